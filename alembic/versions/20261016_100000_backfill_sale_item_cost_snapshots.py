@@ -0,0 +1,52 @@
+"""Backfill cost_price snapshots on sale_items
+
+Revision ID: 20261016_100000
+Revises: eb76c1b5283e
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_100000'
+down_revision = 'eb76c1b5283e'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    """Copy the current product cost onto sale items recorded without a snapshot."""
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        # Walk sale_items in primary key order, one batch at a time
+        item_ids = connection.execute(
+            text(
+                "SELECT id FROM sale_items "
+                "WHERE id > :last_id AND (cost_price IS NULL OR cost_price = 0) "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"last_id": last_id, "batch_size": BATCH_SIZE},
+        ).scalars().all()
+        if not item_ids:
+            break
+
+        connection.execute(
+            text(
+                "UPDATE sale_items SET cost_price = COALESCE("
+                "(SELECT products.cost_price FROM products "
+                "WHERE products.id = sale_items.product_id), 0) "
+                "WHERE id BETWEEN :first_id AND :last_id "
+                "AND (cost_price IS NULL OR cost_price = 0)"
+            ),
+            {"first_id": item_ids[0], "last_id": item_ids[-1]},
+        )
+        last_id = item_ids[-1]
+
+
+def downgrade():
+    # Snapshots cannot be told apart from costs recorded at checkout; nothing to undo
+    pass
@@ -0,0 +1,85 @@
+"""Add products_fts full-text search index
+
+Revision ID: 20261016_110000
+Revises: 20261016_100000
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_110000'
+down_revision = '20261016_100000'
+branch_labels = None
+depends_on = None
+
+# The DDL as of this revision, kept here so later changes to
+# infrastructure.persistence.sqlite.product_search do not change what it does
+PRODUCT_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        code,
+        description,
+        content='products',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_after_insert
+    AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, code, description)
+        VALUES (new.id, new.code, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_after_delete
+    AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, code, description)
+        VALUES ('delete', old.id, old.code, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_after_update
+    AFTER UPDATE OF code, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, code, description)
+        VALUES ('delete', old.id, old.code, old.description);
+        INSERT INTO products_fts(rowid, code, description)
+        VALUES (new.id, new.code, new.description);
+    END
+    """,
+    # Code matches weigh more than description matches when ranking
+    """
+    INSERT INTO products_fts(products_fts, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0)')
+    """,
+]
+
+PRODUCT_SEARCH_TRIGGERS = (
+    "products_fts_after_insert",
+    "products_fts_after_delete",
+    "products_fts_after_update",
+)
+
+
+def upgrade():
+    """Create the FTS5 index over product code/description and its sync triggers."""
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+
+    for statement in PRODUCT_SEARCH_DDL:
+        connection.execute(text(statement))
+    # Index the existing catalog
+    connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+    for trigger in PRODUCT_SEARCH_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    connection.execute(text("DROP TABLE IF EXISTS products_fts"))
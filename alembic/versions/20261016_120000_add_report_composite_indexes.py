@@ -0,0 +1,48 @@
+"""Add composite indexes for report and cash drawer queries
+
+Revision ID: 20261016_120000
+Revises: 20261016_110000
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_120000'
+down_revision = '20261016_110000'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Period summary and payment type reports read only these columns
+    ("ix_sales_date_time_payment_type_total", "sales",
+     "date_time, payment_type, total_amount"),
+    # Department, top product and profit reports join sales to these columns
+    ("ix_sale_items_sale_product_quantity_prices", "sale_items",
+     "sale_id, product_id, quantity, unit_price, cost_price"),
+    ("ix_cash_drawer_entries_drawer_type_timestamp", "cash_drawer_entries",
+     "drawer_id, entry_type, timestamp"),
+    ("ix_cash_drawer_entries_type_timestamp", "cash_drawer_entries",
+     "entry_type, timestamp"),
+    ("ix_inventory_movements_product_timestamp", "inventory_movements",
+     "product_id, timestamp"),
+]
+
+
+def upgrade():
+    """Create the composite indexes and refresh planner statistics."""
+    connection = op.get_bind()
+    for name, table, columns in INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    if connection.dialect.name == 'sqlite':
+        # Let the planner weigh the new indexes against the existing ones;
+        # the sampling limit keeps this quick on large databases
+        connection.execute(text("PRAGMA analysis_limit = 1000"))
+        connection.execute(text("ANALYZE"))
+
+
+def downgrade():
+    connection = op.get_bind()
+    for name, _, _ in INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
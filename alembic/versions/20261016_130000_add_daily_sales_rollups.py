@@ -0,0 +1,298 @@
+"""Add daily sales rollup tables for the period reports
+
+Revision ID: 20261016_130000
+Revises: 20261016_120000
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_130000'
+down_revision = '20261016_120000'
+branch_labels = None
+depends_on = None
+
+# The DDL as of this revision, kept here so later changes to
+# infrastructure.persistence.sqlite.sales_rollups do not change what it does
+SALES_ROLLUP_TABLES = (
+    'sales_daily_payment',
+    'sales_daily_product',
+    'sales_daily_department',
+)
+
+SALES_ROLLUP_TRIGGERS = (
+    'sales_rollup_after_sale_insert',
+    'sales_rollup_after_sale_delete',
+    'sales_rollup_after_sale_update',
+    'sales_rollup_after_sale_day_change',
+    'sales_rollup_after_item_insert',
+    'sales_rollup_after_item_delete',
+    'sales_rollup_after_item_update',
+    'sales_rollup_after_product_department_change',
+)
+
+SALES_ROLLUP_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS sales_daily_payment (
+        day TEXT NOT NULL,
+        payment_type TEXT NOT NULL DEFAULT '',
+        num_sales INTEGER NOT NULL DEFAULT 0,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, payment_type)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sales_daily_product (
+        day TEXT NOT NULL,
+        product_id INTEGER NOT NULL,
+        num_lines INTEGER NOT NULL DEFAULT 0,
+        quantity_sold NUMERIC NOT NULL DEFAULT 0,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        total_cost NUMERIC NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, product_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_sales_daily_product_product_day
+    ON sales_daily_product (product_id, day)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sales_daily_department (
+        day TEXT NOT NULL,
+        department_id INTEGER NOT NULL,
+        num_lines INTEGER NOT NULL DEFAULT 0,
+        quantity_sold NUMERIC NOT NULL DEFAULT 0,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        total_cost NUMERIC NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, department_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+SALES_ROLLUP_TRIGGERS_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_insert
+    AFTER INSERT ON sales BEGIN
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(new.date_time), coalesce(new.payment_type, ''), 1, coalesce(new.total_amount, 0)
+            WHERE new.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_delete
+    AFTER DELETE ON sales BEGIN
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(old.date_time), coalesce(old.payment_type, ''), -1, -coalesce(old.total_amount, 0)
+            WHERE old.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+        DELETE FROM sales_daily_payment
+            WHERE day = date(old.date_time) AND payment_type = coalesce(old.payment_type, '') AND num_sales = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_update
+    AFTER UPDATE OF date_time, payment_type, total_amount ON sales BEGIN
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(old.date_time), coalesce(old.payment_type, ''), -1, -coalesce(old.total_amount, 0)
+            WHERE old.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(new.date_time), coalesce(new.payment_type, ''), 1, coalesce(new.total_amount, 0)
+            WHERE new.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+        DELETE FROM sales_daily_payment
+            WHERE day = date(old.date_time) AND payment_type = coalesce(old.payment_type, '') AND num_sales = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_day_change
+    AFTER UPDATE OF date_time ON sales
+    WHEN date(old.date_time) IS NOT date(new.date_time) BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(old.date_time), i.product_id, -1, -i.quantity, -i.quantity * i.unit_price, -i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(old.date_time), p.department_id, -1, -i.quantity, -i.quantity * i.unit_price, -i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(new.date_time), i.product_id, 1, i.quantity, i.quantity * i.unit_price, i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(new.date_time), p.department_id, 1, i.quantity, i.quantity * i.unit_price, i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_product WHERE day = date(old.date_time) AND num_lines = 0;
+        DELETE FROM sales_daily_department WHERE day = date(old.date_time) AND num_lines = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_insert
+    AFTER INSERT ON sale_items BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), new.product_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_delete
+    AFTER DELETE ON sale_items BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), old.product_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_product
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+        DELETE FROM sales_daily_department
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_update
+    AFTER UPDATE OF sale_id, product_id, quantity, unit_price, cost_price ON sale_items BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), old.product_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), new.product_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_product
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+        DELETE FROM sales_daily_department
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_product_department_change
+    AFTER UPDATE OF department_id ON products
+    WHEN old.department_id IS NOT new.department_id BEGIN
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT day, old.department_id, -num_lines, -quantity_sold, -total_amount, -total_cost
+            FROM sales_daily_product
+            WHERE product_id = old.id AND old.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT day, new.department_id, num_lines, quantity_sold, total_amount, total_cost
+            FROM sales_daily_product
+            WHERE product_id = new.id AND new.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_department
+            WHERE department_id = old.department_id AND num_lines = 0;
+    END
+    """,
+]
+
+SALES_ROLLUP_BACKFILL = [
+    """
+    INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+        SELECT date(s.date_time), coalesce(s.payment_type, ''), COUNT(*), coalesce(SUM(s.total_amount), 0)
+        FROM sales s
+        WHERE s.date_time IS NOT NULL
+        GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+        SELECT date(s.date_time), i.product_id, COUNT(*), SUM(i.quantity), SUM(i.quantity * i.unit_price), SUM(i.quantity * coalesce(i.cost_price, 0))
+        FROM sales s
+        JOIN sale_items i ON i.sale_id = s.id
+        WHERE s.date_time IS NOT NULL
+        GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+        SELECT date(s.date_time), p.department_id, COUNT(*), SUM(i.quantity), SUM(i.quantity * i.unit_price), SUM(i.quantity * coalesce(i.cost_price, 0))
+        FROM sales s
+        JOIN sale_items i ON i.sale_id = s.id
+        JOIN products p ON p.id = i.product_id
+        WHERE s.date_time IS NOT NULL AND p.department_id IS NOT NULL
+        GROUP BY 1, 2
+    """,
+]
+
+
+def upgrade():
+    """Create the rollup tables and their triggers, and backfill them from existing sales."""
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+
+    for statement in SALES_ROLLUP_TABLES_DDL + SALES_ROLLUP_TRIGGERS_DDL:
+        connection.execute(text(statement))
+    for statement in SALES_ROLLUP_BACKFILL:
+        connection.execute(text(statement))
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+    for trigger in SALES_ROLLUP_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for name in SALES_ROLLUP_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
@@ -0,0 +1,190 @@
+"""Add cash drawer sessions and running drawer state
+
+Revision ID: 20261016_140000
+Revises: 20261016_130000
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_140000'
+down_revision = '20261016_130000'
+branch_labels = None
+depends_on = None
+
+# The tables as of this revision, so the backfill does not depend on the
+# application's models or repositories
+entries = sa.table(
+    'cash_drawer_entries',
+    sa.column('id', sa.Integer),
+    sa.column('timestamp', sa.DateTime),
+    sa.column('entry_type', sa.String),
+    sa.column('amount', sa.Numeric(12, 2)),
+    sa.column('user_id', sa.Integer),
+    sa.column('drawer_id', sa.Integer),
+)
+sessions = sa.table(
+    'cash_drawer_sessions',
+    sa.column('id', sa.Integer),
+    sa.column('drawer_id', sa.Integer),
+    sa.column('opened_at', sa.DateTime),
+    sa.column('opened_by', sa.Integer),
+    sa.column('opening_amount', sa.Numeric(12, 2)),
+    sa.column('closed_at', sa.DateTime),
+    sa.column('closed_by', sa.Integer),
+    sa.column('closing_amount', sa.Numeric(12, 2)),
+    sa.column('total_in', sa.Numeric(12, 2)),
+    sa.column('total_out', sa.Numeric(12, 2)),
+    sa.column('total_sales', sa.Numeric(12, 2)),
+    sa.column('total_returns', sa.Numeric(12, 2)),
+    sa.column('entry_count', sa.Integer),
+)
+state = sa.table(
+    'cash_drawer_state',
+    sa.column('drawer_key', sa.Integer),
+    sa.column('balance', sa.Numeric(12, 2)),
+    sa.column('entry_count', sa.Integer),
+    sa.column('last_status_at', sa.DateTime),
+    sa.column('open_session_id', sa.Integer),
+)
+
+# cash_drawer_state key of the entries recorded without a drawer_id
+NO_DRAWER_KEY = -1
+
+# Session total each movement type adds up in
+SESSION_TOTALS = {
+    'IN': 'total_in',
+    'OUT': 'total_out',
+    'SALE': 'total_sales',
+    'RETURN': 'total_returns',
+}
+
+
+def upgrade():
+    """Create the session and state tables and fill them from the existing ledger."""
+    connection = op.get_bind()
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS cash_drawer_sessions ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "drawer_id INTEGER, "
+        "opened_at DATETIME NOT NULL, "
+        "opened_by INTEGER REFERENCES users (id), "
+        "opening_amount NUMERIC(12, 2) NOT NULL, "
+        "closed_at DATETIME, "
+        "closed_by INTEGER REFERENCES users (id), "
+        "closing_amount NUMERIC(12, 2), "
+        "total_in NUMERIC(12, 2) NOT NULL, "
+        "total_out NUMERIC(12, 2) NOT NULL, "
+        "total_sales NUMERIC(12, 2) NOT NULL, "
+        "total_returns NUMERIC(12, 2) NOT NULL, "
+        "entry_count INTEGER NOT NULL)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_cash_drawer_sessions_drawer_opened_at "
+        "ON cash_drawer_sessions (drawer_id, opened_at)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS cash_drawer_state ("
+        "drawer_key INTEGER NOT NULL PRIMARY KEY, "
+        "balance NUMERIC(12, 2) NOT NULL, "
+        "entry_count INTEGER NOT NULL, "
+        "last_status_at DATETIME, "
+        "open_session_id INTEGER REFERENCES cash_drawer_sessions (id))"
+    ))
+    _backfill(connection)
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(text("DROP TABLE IF EXISTS cash_drawer_state"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_cash_drawer_sessions_drawer_opened_at"))
+    connection.execute(text("DROP TABLE IF EXISTS cash_drawer_sessions"))
+
+
+def _backfill(connection):
+    """Sum the ledger per drawer and replay its START/CLOSE entries into sessions."""
+    key = sa.func.coalesce(entries.c.drawer_id, NO_DRAWER_KEY)
+    connection.execute(
+        state.insert().from_select(
+            ['drawer_key', 'balance', 'entry_count'],
+            sa.select(key, sa.func.sum(entries.c.amount), sa.func.count(entries.c.id)).group_by(key),
+        )
+    )
+
+    status_entries = connection.execute(
+        sa.select(
+            entries.c.drawer_id,
+            entries.c.entry_type,
+            entries.c.timestamp,
+            entries.c.amount,
+            entries.c.user_id,
+        )
+        .where(entries.c.entry_type.in_(['START', 'CLOSE']))
+        .order_by(key, entries.c.timestamp, entries.c.id)
+    ).all()
+
+    rebuilt = []
+    last_status = {}
+    open_sessions = {}
+    for row in status_entries:
+        drawer = NO_DRAWER_KEY if row.drawer_id is None else row.drawer_id
+        current = open_sessions.pop(drawer, None)
+        if current:
+            current['closed_at'] = row.timestamp
+            if row.entry_type == 'CLOSE':
+                current['closed_by'] = row.user_id
+                current['closing_amount'] = row.amount
+        if row.entry_type == 'START':
+            session_row = {
+                'id': len(rebuilt) + 1,
+                'drawer_id': row.drawer_id,
+                'opened_at': row.timestamp,
+                'opened_by': row.user_id,
+                'opening_amount': row.amount,
+                'closed_at': None,
+                'closed_by': None,
+                'closing_amount': None,
+                'total_in': 0,
+                'total_out': 0,
+                'total_sales': 0,
+                'total_returns': 0,
+                'entry_count': 0,
+            }
+            rebuilt.append(session_row)
+            open_sessions[drawer] = session_row
+        last_status[drawer] = row.timestamp
+
+    if rebuilt:
+        connection.execute(sessions.insert(), rebuilt)
+        # Entries of a session: same drawer, from opening until the next status change
+        window = sa.and_(
+            key == sa.func.coalesce(sessions.c.drawer_id, NO_DRAWER_KEY),
+            entries.c.timestamp >= sessions.c.opened_at,
+            sa.or_(sessions.c.closed_at.is_(None), entries.c.timestamp < sessions.c.closed_at),
+        )
+        totals = {
+            column: sa.select(sa.func.coalesce(sa.func.sum(entries.c.amount), 0))
+            .where(window, entries.c.entry_type == entry_type)
+            .scalar_subquery()
+            for entry_type, column in SESSION_TOTALS.items()
+        }
+        totals['entry_count'] = (
+            sa.select(sa.func.count(entries.c.id))
+            .where(window, entries.c.entry_type.in_(list(SESSION_TOTALS)))
+            .scalar_subquery()
+        )
+        connection.execute(sessions.update().values(totals))
+
+    for drawer, timestamp in last_status.items():
+        open_session = open_sessions.get(drawer)
+        connection.execute(
+            state.update()
+            .where(state.c.drawer_key == drawer)
+            .values(
+                last_status_at=timestamp,
+                open_session_id=open_session['id'] if open_session else None,
+            )
+        )
@@ -0,0 +1,32 @@
+"""Add per point of sale invoice number sequences
+
+Revision ID: 20261016_150000
+Revises: 20261016_140000
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_150000'
+down_revision = '20261016_140000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the sequence table.
+
+    It starts empty: the first invoice of each point of sale seeds its row
+    from the highest number already issued.
+    """
+    op.get_bind().execute(text(
+        "CREATE TABLE IF NOT EXISTS invoice_sequences ("
+        "point_of_sale INTEGER NOT NULL PRIMARY KEY, "
+        "last_number INTEGER NOT NULL)"
+    ))
+
+
+def downgrade():
+    op.get_bind().execute(text("DROP TABLE IF EXISTS invoice_sequences"))
@@ -0,0 +1,41 @@
+"""Add product price history
+
+Revision ID: 20261016_160000
+Revises: 20261016_150000
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_160000'
+down_revision = '20261016_150000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the price history table; it fills up as prices change."""
+    connection = op.get_bind()
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS product_price_history ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "product_id INTEGER NOT NULL REFERENCES products (id) ON DELETE CASCADE, "
+        "changed_at DATETIME NOT NULL, "
+        "old_sell_price NUMERIC(10, 2), "
+        "new_sell_price NUMERIC(10, 2), "
+        "old_cost_price NUMERIC(10, 2), "
+        "new_cost_price NUMERIC(10, 2), "
+        "percentage NUMERIC(8, 3))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_product_price_history_product_changed_at "
+        "ON product_price_history (product_id, changed_at)"
+    ))
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(text("DROP INDEX IF EXISTS ix_product_price_history_product_changed_at"))
+    connection.execute(text("DROP TABLE IF EXISTS product_price_history"))
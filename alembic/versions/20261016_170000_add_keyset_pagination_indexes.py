@@ -0,0 +1,34 @@
+"""Add indexes for keyset pagination of products and customers
+
+Revision ID: 20261016_170000
+Revises: 20261016_160000
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_170000'
+down_revision = '20261016_160000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Index the sort keys the product and customer lists page on."""
+    connection = op.get_bind()
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_products_description_id "
+        "ON products (description, id)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_customers_name_id "
+        "ON customers (name, id)"
+    ))
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(text("DROP INDEX IF EXISTS ix_customers_name_id"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_products_description_id"))
@@ -0,0 +1,251 @@
+"""Allow NULL sale_items.cost_price to mean "no cost snapshot"
+
+Revision ID: 20261016_180000
+Revises: 20261016_170000
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_180000'
+down_revision = '20261016_170000'
+branch_labels = None
+depends_on = None
+
+# The rollup triggers as of this revision, kept here so later changes to
+# infrastructure.persistence.sqlite.sales_rollups do not change what it does
+SALES_ROLLUP_TRIGGERS = (
+    'sales_rollup_after_sale_insert',
+    'sales_rollup_after_sale_delete',
+    'sales_rollup_after_sale_update',
+    'sales_rollup_after_sale_day_change',
+    'sales_rollup_after_item_insert',
+    'sales_rollup_after_item_delete',
+    'sales_rollup_after_item_update',
+    'sales_rollup_after_product_department_change',
+)
+
+SALES_ROLLUP_TRIGGERS_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_insert
+    AFTER INSERT ON sales BEGIN
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(new.date_time), coalesce(new.payment_type, ''), 1, coalesce(new.total_amount, 0)
+            WHERE new.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_delete
+    AFTER DELETE ON sales BEGIN
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(old.date_time), coalesce(old.payment_type, ''), -1, -coalesce(old.total_amount, 0)
+            WHERE old.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+        DELETE FROM sales_daily_payment
+            WHERE day = date(old.date_time) AND payment_type = coalesce(old.payment_type, '') AND num_sales = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_update
+    AFTER UPDATE OF date_time, payment_type, total_amount ON sales BEGIN
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(old.date_time), coalesce(old.payment_type, ''), -1, -coalesce(old.total_amount, 0)
+            WHERE old.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+        INSERT INTO sales_daily_payment (day, payment_type, num_sales, total_amount)
+            SELECT date(new.date_time), coalesce(new.payment_type, ''), 1, coalesce(new.total_amount, 0)
+            WHERE new.date_time IS NOT NULL
+            ON CONFLICT (day, payment_type)
+            DO UPDATE SET num_sales = num_sales + excluded.num_sales, total_amount = total_amount + excluded.total_amount;
+        DELETE FROM sales_daily_payment
+            WHERE day = date(old.date_time) AND payment_type = coalesce(old.payment_type, '') AND num_sales = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_day_change
+    AFTER UPDATE OF date_time ON sales
+    WHEN date(old.date_time) IS NOT date(new.date_time) BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(old.date_time), i.product_id, -1, -i.quantity, -i.quantity * i.unit_price, -i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(old.date_time), p.department_id, -1, -i.quantity, -i.quantity * i.unit_price, -i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(new.date_time), i.product_id, 1, i.quantity, i.quantity * i.unit_price, i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(new.date_time), p.department_id, 1, i.quantity, i.quantity * i.unit_price, i.quantity * coalesce(i.cost_price, 0)
+            FROM sale_items i
+            JOIN products p ON p.id = i.product_id
+            WHERE i.sale_id = new.id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_product WHERE day = date(old.date_time) AND num_lines = 0;
+        DELETE FROM sales_daily_department WHERE day = date(old.date_time) AND num_lines = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_insert
+    AFTER INSERT ON sale_items BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), new.product_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_delete
+    AFTER DELETE ON sale_items BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), old.product_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_product
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+        DELETE FROM sales_daily_department
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_update
+    AFTER UPDATE OF sale_id, product_id, quantity, unit_price, cost_price ON sale_items BEGIN
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), old.product_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, -1, -old.quantity, -old.quantity * old.unit_price, -old.quantity * coalesce(old.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = old.product_id
+            WHERE s.id = old.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_product (day, product_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), new.product_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id
+            ON CONFLICT (day, product_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT date(s.date_time), p.department_id, 1, new.quantity, new.quantity * new.unit_price, new.quantity * coalesce(new.cost_price, 0)
+            FROM sales s
+            JOIN products p ON p.id = new.product_id
+            WHERE s.id = new.sale_id AND p.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_product
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+        DELETE FROM sales_daily_department
+            WHERE day = (SELECT date(date_time) FROM sales WHERE id = old.sale_id) AND num_lines = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_product_department_change
+    AFTER UPDATE OF department_id ON products
+    WHEN old.department_id IS NOT new.department_id BEGIN
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT day, old.department_id, -num_lines, -quantity_sold, -total_amount, -total_cost
+            FROM sales_daily_product
+            WHERE product_id = old.id AND old.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        INSERT INTO sales_daily_department (day, department_id, num_lines, quantity_sold, total_amount, total_cost)
+            SELECT day, new.department_id, num_lines, quantity_sold, total_amount, total_cost
+            FROM sales_daily_product
+            WHERE product_id = new.id AND new.department_id IS NOT NULL
+            ON CONFLICT (day, department_id)
+            DO UPDATE SET num_lines = num_lines + excluded.num_lines, quantity_sold = quantity_sold + excluded.quantity_sold, total_amount = total_amount + excluded.total_amount, total_cost = total_cost + excluded.total_cost;
+        DELETE FROM sales_daily_department
+            WHERE department_id = old.department_id AND num_lines = 0;
+    END
+    """,
+]
+
+
+def upgrade():
+    """Drop the NOT NULL and the 0 default, so a zero cost is a real snapshot."""
+    _drop_rollup_triggers()
+    with op.batch_alter_table('sale_items') as batch_op:
+        batch_op.alter_column(
+            'cost_price',
+            existing_type=sa.Numeric(precision=10, scale=2),
+            nullable=True,
+            server_default=None,
+        )
+    # SQLite rebuilds the table in batch mode, and the rename fails while
+    # triggers on other tables still name sale_items, so they go around it
+    _recreate_rollup_triggers()
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(text("UPDATE sale_items SET cost_price = 0 WHERE cost_price IS NULL"))
+    _drop_rollup_triggers()
+    with op.batch_alter_table('sale_items') as batch_op:
+        batch_op.alter_column(
+            'cost_price',
+            existing_type=sa.Numeric(precision=10, scale=2),
+            nullable=False,
+            server_default=sa.text("'0.00'"),
+        )
+    _recreate_rollup_triggers()
+
+
+def _recreate_rollup_triggers():
+    connection = op.get_bind()
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SALES_ROLLUP_TRIGGERS_DDL:
+        connection.execute(text(statement))
+
+
+def _drop_rollup_triggers():
+    connection = op.get_bind()
+    if connection.dialect.name != "sqlite":
+        return
+    for trigger in SALES_ROLLUP_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
@@ -0,0 +1,29 @@
+"""Add a case-insensitive index on product codes
+
+Revision ID: 20261016_190000
+Revises: 20261016_180000
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261016_190000'
+down_revision = '20261016_180000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Index code with NOCASE so case-insensitive exact code lookups seek."""
+    connection = op.get_bind()
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_products_code_nocase "
+        "ON products (code COLLATE NOCASE)"
+    ))
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(text("DROP INDEX IF EXISTS ix_products_code_nocase"))
@@ -0,0 +1,44 @@
+"""Add the transactional outbox
+
+Revision ID: 20261017_100000
+Revises: 20261016_200000
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261017_100000'
+down_revision = '20261016_200000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the outbox; units of work fill it as they commit events."""
+    connection = op.get_bind()
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS outbox ("
+        "id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, "
+        "idempotency_key VARCHAR(36) NOT NULL UNIQUE, "
+        "event_type VARCHAR(100) NOT NULL, "
+        "aggregate_key VARCHAR(100), "
+        "payload TEXT NOT NULL, "
+        "occurred_at DATETIME NOT NULL, "
+        "created_at DATETIME NOT NULL, "
+        "attempts INTEGER NOT NULL, "
+        "available_at DATETIME NOT NULL, "
+        "last_error TEXT, "
+        "delivered_at DATETIME)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_outbox_delivered_at_id "
+        "ON outbox (delivered_at, id)"
+    ))
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(text("DROP INDEX IF EXISTS ix_outbox_delivered_at_id"))
+    connection.execute(text("DROP TABLE IF EXISTS outbox"))
@@ -0,0 +1,152 @@
+"""Add the read model tables of the CQRS query side
+
+Revision ID: 20261017_110000
+Revises: 20261017_100000
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261017_110000'
+down_revision = '20261017_100000'
+branch_labels = None
+depends_on = None
+
+# The DDL as of this revision, kept here so later changes to
+# infrastructure.persistence.sqlite.read_models do not change what it does
+READ_MODEL_TABLES = (
+    'read_products',
+    'read_sales',
+    'read_catalog_summary',
+)
+
+READ_MODEL_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS read_products (
+        product_id INTEGER PRIMARY KEY,
+        code TEXT NOT NULL,
+        description TEXT NOT NULL,
+        sell_price NUMERIC,
+        cost_price NUMERIC,
+        quantity_in_stock NUMERIC NOT NULL DEFAULT 0,
+        min_stock NUMERIC,
+        max_stock NUMERIC,
+        uses_inventory INTEGER NOT NULL,
+        is_active INTEGER NOT NULL,
+        department_id INTEGER,
+        department_name TEXT,
+        unit_id INTEGER,
+        unit_name TEXT,
+        in_stock INTEGER NOT NULL,
+        is_low_stock INTEGER NOT NULL,
+        stock_value NUMERIC NOT NULL DEFAULT 0
+    )
+    """,
+    # The product grid, in description order
+    """
+    CREATE INDEX IF NOT EXISTS ix_read_products_description
+    ON read_products (description, product_id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_read_products_code
+    ON read_products (code COLLATE NOCASE)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_read_products_department
+    ON read_products (department_id, description, product_id)
+    """,
+    # Only the few products at or below their minimum are indexed
+    """
+    CREATE INDEX IF NOT EXISTS ix_read_products_low_stock
+    ON read_products (description, product_id) WHERE is_low_stock = 1
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS read_sales (
+        sale_id INTEGER PRIMARY KEY,
+        date_time DATETIME NOT NULL,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        payment_type TEXT,
+        is_credit_sale INTEGER NOT NULL DEFAULT 0,
+        customer_id CHAR(36),
+        user_id INTEGER,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        total_quantity NUMERIC NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_read_sales_date_time
+    ON read_sales (date_time, sale_id)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS read_catalog_summary (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        product_count INTEGER NOT NULL DEFAULT 0,
+        low_stock_count INTEGER NOT NULL DEFAULT 0,
+        out_of_stock_count INTEGER NOT NULL DEFAULT 0,
+        stock_value NUMERIC NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+READ_MODEL_BACKFILL = [
+    """
+    INSERT INTO read_products (
+        product_id, code, description, sell_price, cost_price, quantity_in_stock,
+        min_stock, max_stock, uses_inventory, is_active, department_id,
+        department_name, unit_id, unit_name, in_stock, is_low_stock, stock_value
+    )
+    SELECT p.id, p.code, p.description, p.sell_price, p.cost_price,
+        coalesce(p.quantity_in_stock, 0), p.min_stock, p.max_stock,
+        p.uses_inventory, p.is_active, p.department_id, d.name, u.id, p.unit,
+        coalesce(p.quantity_in_stock, 0) > 0,
+        p.uses_inventory AND p.min_stock IS NOT NULL
+            AND coalesce(p.quantity_in_stock, 0) <= p.min_stock,
+        round(coalesce(p.quantity_in_stock, 0) * coalesce(p.cost_price, 0), 2)
+    FROM products p
+    LEFT JOIN departments d ON d.id = p.department_id
+    LEFT JOIN units u ON u.name = p.unit
+    """,
+    """
+    INSERT INTO read_sales (
+        sale_id, date_time, total_amount, payment_type, is_credit_sale,
+        customer_id, user_id, item_count, total_quantity
+    )
+    SELECT s.id, s.date_time, coalesce(s.total_amount, 0), s.payment_type,
+        s.is_credit_sale, s.customer_id, s.user_id,
+        count(i.id), coalesce(sum(i.quantity), 0)
+    FROM sales s
+    LEFT JOIN sale_items i ON i.sale_id = s.id
+    GROUP BY s.id
+    """,
+    # Sums read_products, so it runs after it is filled
+    """
+    INSERT INTO read_catalog_summary (
+        id, product_count, low_stock_count, out_of_stock_count, stock_value
+    )
+    SELECT 1, count(*), coalesce(sum(is_low_stock), 0),
+        coalesce(sum(uses_inventory AND NOT in_stock), 0),
+        round(coalesce(sum(stock_value), 0), 2)
+    FROM read_products
+    WHERE is_active
+    """,
+]
+
+
+def upgrade():
+    """Create the read product, sale and catalog summary tables and project them from existing rows."""
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+
+    for statement in READ_MODEL_DDL + READ_MODEL_BACKFILL:
+        connection.execute(text(statement))
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+    for name in READ_MODEL_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
@@ -0,0 +1,27 @@
+"""Add a row version to products
+
+Revision ID: 20261017_120000
+Revises: 20261017_110000
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_120000'
+down_revision = '20261017_110000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Every write to a product bumps its version; existing rows start at 1."""
+    op.add_column(
+        'products',
+        sa.Column('version', sa.Integer(), nullable=False, server_default=sa.text('1')),
+    )
+
+
+def downgrade():
+    op.drop_column('products', 'version')
@@ -0,0 +1,105 @@
+"""Add stock checkpoints of the inventory movement ledger
+
+Revision ID: 20261017_130000
+Revises: 20261017_120000
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261017_130000'
+down_revision = '20261017_120000'
+branch_labels = None
+depends_on = None
+
+# The DDL as of this revision, kept here so later changes to
+# infrastructure.persistence.sqlite.stock_checkpoints do not change what it does
+STOCK_CHECKPOINT_TABLES = ('stock_checkpoints',)
+
+STOCK_CHECKPOINT_TRIGGERS = (
+    'stock_checkpoints_after_movement_insert',
+    'stock_checkpoints_after_movement_delete',
+    'stock_checkpoints_after_movement_update',
+)
+
+STOCK_CHECKPOINTS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS stock_checkpoints (
+        product_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        quantity NUMERIC NOT NULL DEFAULT 0,
+        movement_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (product_id, day)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stock_checkpoints_after_movement_insert
+    AFTER INSERT ON inventory_movements BEGIN
+        DELETE FROM stock_checkpoints
+            WHERE product_id = new.product_id AND day > new.timestamp;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stock_checkpoints_after_movement_delete
+    AFTER DELETE ON inventory_movements BEGIN
+        DELETE FROM stock_checkpoints
+            WHERE product_id = old.product_id AND day > old.timestamp;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stock_checkpoints_after_movement_update
+    AFTER UPDATE OF product_id, timestamp, quantity ON inventory_movements BEGIN
+        DELETE FROM stock_checkpoints
+            WHERE product_id = old.product_id AND day > old.timestamp;
+        DELETE FROM stock_checkpoints
+            WHERE product_id = new.product_id AND day > new.timestamp;
+    END
+    """,
+]
+
+# Every product's monthly running sums of its ledger; the table is empty, so
+# all of a product's movements before :until are read
+STOCK_CHECKPOINTS_BACKFILL = """
+    INSERT INTO stock_checkpoints (product_id, day, quantity, movement_count)
+    SELECT d.product_id, d.day,
+           round(sum(d.quantity) OVER (PARTITION BY d.product_id ORDER BY d.day), 3),
+           sum(d.movements) OVER (PARTITION BY d.product_id ORDER BY d.day)
+    FROM (
+        SELECT p.id AS product_id,
+               date(m.timestamp, 'start of month', '+1 month') AS day,
+               sum(m.quantity) AS quantity,
+               count(*) AS movements
+        FROM products p
+        JOIN inventory_movements m
+            ON m.product_id = p.id
+            AND m.timestamp < :until
+        GROUP BY p.id, 2
+    ) AS d
+"""
+
+
+def upgrade():
+    """Create the checkpoint table and triggers and checkpoint every closed month of the ledger."""
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+
+    for statement in STOCK_CHECKPOINTS_DDL:
+        connection.execute(text(statement))
+    # Bound as text, like the ledger's timestamps; the open month is left out
+    until = date.today().replace(day=1)
+    connection.execute(text(STOCK_CHECKPOINTS_BACKFILL), {'until': str(until)})
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+    for trigger in STOCK_CHECKPOINT_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for name in STOCK_CHECKPOINT_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
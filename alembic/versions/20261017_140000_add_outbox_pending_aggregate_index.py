@@ -0,0 +1,29 @@
+"""Index the pending outbox messages by aggregate
+
+Revision ID: 20261017_140000
+Revises: 20261017_130000
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '20261017_140000'
+down_revision = '20261017_130000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Index pending messages by aggregate, so the relay finds the earlier ones a message waits for."""
+    connection = op.get_bind()
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_outbox_pending_aggregate_key_id "
+        "ON outbox (aggregate_key, id) WHERE delivered_at IS NULL"
+    ))
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(text("DROP INDEX IF EXISTS ix_outbox_pending_aggregate_key_id"))
@@ -56,6 +56,49 @@ class Config(BaseSettings):
     
     # Optional printer settings
     default_printer: Optional[str] = Field(default=None)
+
+    # Point of sale (the 0001 in 0001-00000042) whose sequence numbers the invoices
+    invoice_point_of_sale: int = Field(default=1)
+
+    # SQLite connection tuning (see infrastructure/persistence/sqlite/engine_profile.py)
+    sqlite_journal_mode: str = Field(default="WAL")
+    sqlite_synchronous: str = Field(default="NORMAL")
+    sqlite_cache_size_mb: int = Field(default=64)
+    sqlite_mmap_size_mb: int = Field(default=256)
+    sqlite_busy_timeout_ms: int = Field(default=5000)
+    sqlite_foreign_keys: bool = Field(default=True)
+    analyze_interval_hours: float = Field(default=24.0)
+
+    # Scheduled database backups (interval 0 disables them)
+    backup_dir: str = Field(default_factory=lambda: str(APP_DATA_DIR / 'backups'))
+    backup_interval_hours: float = Field(default=24.0)
+    backup_keep_last: int = Field(default=7)
+
+    # Domain event dispatch: "sync" runs handlers on the publishing thread,
+    # "async" on worker threads (see core/event_dispatcher.py)
+    event_dispatch_mode: str = Field(default="sync")
+    event_dispatch_workers: int = Field(default=2)
+    event_queue_size: int = Field(default=1000)
+    event_handler_timeout_s: float = Field(default=5.0)
+
+    # Transactional outbox: events are stored with the changes that raised them
+    # and delivered in batches by a background relay (see infrastructure/persistence/outbox.py)
+    outbox_enabled: bool = Field(default=False)
+    outbox_batch_size: int = Field(default=500)
+    outbox_poll_interval_s: float = Field(default=1.0)
+    outbox_max_attempts: int = Field(default=10)
+    outbox_retention_days: float = Field(default=7.0)
+
+    # Seconds a cached catalog product is served before it is loaded again, so
+    # changes made on other terminals show up (see core/services/product_catalog_cache.py);
+    # 0 keeps products until this process changes them
+    product_cache_ttl_s: float = Field(default=30.0)
+
+    # SQL profiling for diagnostics (see infrastructure/persistence/sqlite/query_profiler.py)
+    sql_profiling: bool = Field(default=False)
+    sql_slow_query_ms: float = Field(default=200.0)
+    sql_n_plus_one_threshold: int = Field(default=5)
+    sql_profile_path: str = Field(default_factory=lambda: str(APP_DATA_DIR / 'query_profile.json'))
     
     if SettingsConfigDict:
         model_config = SettingsConfigDict(
@@ -112,6 +155,42 @@ PDF_OUTPUT_DIR={self.pdf_output_dir}
 # Optional Settings
 {f'DEFAULT_PRINTER={self.default_printer}' if self.default_printer else '# DEFAULT_PRINTER='}
 
+# SQLite Tuning
+SQLITE_JOURNAL_MODE={self.sqlite_journal_mode}
+SQLITE_SYNCHRONOUS={self.sqlite_synchronous}
+SQLITE_CACHE_SIZE_MB={self.sqlite_cache_size_mb}
+SQLITE_MMAP_SIZE_MB={self.sqlite_mmap_size_mb}
+SQLITE_BUSY_TIMEOUT_MS={self.sqlite_busy_timeout_ms}
+SQLITE_FOREIGN_KEYS={str(self.sqlite_foreign_keys).lower()}
+ANALYZE_INTERVAL_HOURS={self.analyze_interval_hours}
+
+# Scheduled Backups
+BACKUP_DIR={self.backup_dir}
+BACKUP_INTERVAL_HOURS={self.backup_interval_hours}
+BACKUP_KEEP_LAST={self.backup_keep_last}
+
+# Domain Event Dispatch
+EVENT_DISPATCH_MODE={self.event_dispatch_mode}
+EVENT_DISPATCH_WORKERS={self.event_dispatch_workers}
+EVENT_QUEUE_SIZE={self.event_queue_size}
+EVENT_HANDLER_TIMEOUT_S={self.event_handler_timeout_s}
+
+# Transactional Outbox
+OUTBOX_ENABLED={str(self.outbox_enabled).lower()}
+OUTBOX_BATCH_SIZE={self.outbox_batch_size}
+OUTBOX_POLL_INTERVAL_S={self.outbox_poll_interval_s}
+OUTBOX_MAX_ATTEMPTS={self.outbox_max_attempts}
+OUTBOX_RETENTION_DAYS={self.outbox_retention_days}
+
+# Catalog Cache
+PRODUCT_CACHE_TTL_S={self.product_cache_ttl_s}
+
+# SQL Profiling
+SQL_PROFILING={str(self.sql_profiling).lower()}
+SQL_SLOW_QUERY_MS={self.sql_slow_query_ms}
+SQL_N_PLUS_ONE_THRESHOLD={self.sql_n_plus_one_threshold}
+SQL_PROFILE_PATH={self.sql_profile_path}
+
 # Test Mode (for development)
 TEST_MODE=false
 """
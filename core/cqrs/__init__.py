@@ -0,0 +1,11 @@
+"""
+CQRS: commands change state through the services, queries read flat read
+models from tables projected from the domain events.
+
+- commands / handlers: command objects and the handlers that run them,
+  returning a UseCaseResult
+- queries / handlers: query objects and the handlers that answer them
+- read_models: the flat, immutable views the queries return
+- projections: ReadModelProjector, which keeps the read model tables
+  (infrastructure.persistence.sqlite.read_models) current
+"""
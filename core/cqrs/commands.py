@@ -0,0 +1,75 @@
+"""
+Commands: requests to change state, handled by the command handlers in
+core.cqrs.handlers.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, List, Optional
+
+
+@dataclass(frozen=True)
+class CreateProductCommand:
+    """Adds a product to the catalog."""
+
+    code: str
+    description: str
+    sell_price: Optional[Decimal]
+    cost_price: Optional[Decimal] = None
+    department_id: Optional[int] = None
+    unit: str = "Unidad"
+    uses_inventory: bool = True
+    quantity_in_stock: Decimal = Decimal("0")
+    min_stock: Optional[Decimal] = None
+    max_stock: Optional[Decimal] = None
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class UpdateProductCommand:
+    """Changes the given fields of a product; fields left as None are kept."""
+
+    product_id: Any
+    code: Optional[str] = None
+    description: Optional[str] = None
+    sell_price: Optional[Decimal] = None
+    cost_price: Optional[Decimal] = None
+    department_id: Optional[int] = None
+    unit: Optional[str] = None
+    uses_inventory: Optional[bool] = None
+    min_stock: Optional[Decimal] = None
+    max_stock: Optional[Decimal] = None
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class DeleteProductCommand:
+    """Removes a product from the catalog."""
+
+    product_id: Any
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class SaleItemCommand:
+    """A line of a ProcessSaleCommand."""
+
+    product_code: str
+    quantity: Decimal
+
+
+@dataclass(frozen=True)
+class ProcessSaleCommand:
+    """Records a sale of the given lines."""
+
+    items: List[SaleItemCommand]
+    payment_type: Optional[str] = None
+    paid_amount: Optional[Decimal] = None
+    customer_id: Any = None
+    is_credit_sale: bool = False
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class RebuildReadModelsCommand:
+    """Recomputes every read model table from the write tables."""
@@ -0,0 +1,314 @@
+"""
+Command and query handlers.
+
+Command handlers validate a command, run it through the services (which
+own the write tables and raise the domain events) and report the outcome
+as a UseCaseResult.
+
+Query handlers answer from the read model tables, which the
+ReadModelProjector keeps current from those events: a product grid page,
+the low stock list or the dashboard is one indexed read. Given a service
+instead, they build the read models from its domain objects, e.g. for
+callers without the read model tables.
+"""
+
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from core.cqrs.commands import (
+    CreateProductCommand,
+    DeleteProductCommand,
+    ProcessSaleCommand,
+    RebuildReadModelsCommand,
+    UpdateProductCommand,
+)
+from core.cqrs.queries import (
+    GetDashboardSummaryQuery,
+    GetLowStockProductsQuery,
+    GetProductByCodeQuery,
+    GetProductByIdQuery,
+    GetSalesQuery,
+    SearchProductsQuery,
+)
+from core.cqrs.read_models import (
+    DashboardSummaryReadModel,
+    ProductListItemReadModel,
+    ProductReadModel,
+    SaleReadModel,
+)
+from core.models.product import Product
+from core.specifications.sale_specifications import to_payment_type
+from core.use_cases.base import UseCaseResult
+from infrastructure.persistence.unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+
+# --- Commands ---
+
+
+def _product_errors(code, description, sell_price) -> Dict[str, str]:
+    errors = {}
+    if code is not None and not code.strip():
+        errors["code"] = "Code is required"
+    if description is not None and not description.strip():
+        errors["description"] = "Description is required"
+    if sell_price is not None and sell_price < 0:
+        errors["sell_price"] = "Sell price cannot be negative"
+    return errors
+
+
+class CreateProductCommandHandler:
+    """Adds a product; the result's data is the new product's id."""
+
+    def __init__(self, product_service):
+        self.product_service = product_service
+
+    def handle(self, command: CreateProductCommand) -> UseCaseResult:
+        errors = _product_errors(command.code or "", command.description or "", command.sell_price)
+        if errors:
+            return UseCaseResult.validation_error(errors)
+
+        product = Product(
+            code=command.code.strip(),
+            description=command.description.strip(),
+            sell_price=command.sell_price,
+            cost_price=command.cost_price or Decimal("0"),
+            department_id=command.department_id,
+            unit=command.unit,
+            uses_inventory=command.uses_inventory,
+            quantity_in_stock=command.quantity_in_stock,
+            min_stock=command.min_stock,
+            max_stock=command.max_stock,
+        )
+        try:
+            created = self.product_service.add_product(product, user_id=command.user_id)
+        except ValueError as e:
+            return UseCaseResult.conflict(str(e))
+        return UseCaseResult.success(created.id)
+
+
+class UpdateProductCommandHandler:
+    """Changes the fields a command sets; the result's data is the product's id."""
+
+    _FIELDS = (
+        "code",
+        "description",
+        "sell_price",
+        "cost_price",
+        "department_id",
+        "unit",
+        "uses_inventory",
+        "min_stock",
+        "max_stock",
+    )
+
+    def __init__(self, product_service):
+        self.product_service = product_service
+
+    def handle(self, command: UpdateProductCommand) -> UseCaseResult:
+        errors = _product_errors(command.code, command.description, command.sell_price)
+        if errors:
+            return UseCaseResult.validation_error(errors)
+
+        existing = self.product_service.get_product_by_id(command.product_id)
+        if existing is None:
+            return UseCaseResult.not_found("Product", command.product_id)
+
+        changes = {
+            name: getattr(command, name)
+            for name in self._FIELDS
+            if getattr(command, name) is not None
+        }
+        try:
+            self.product_service.update_product(
+                existing.model_copy(update=changes), user_id=command.user_id
+            )
+        except ValueError as e:
+            return UseCaseResult.conflict(str(e))
+        return UseCaseResult.success(existing.id)
+
+
+class DeleteProductCommandHandler:
+    """Deletes a product; a product with stock or history is a conflict."""
+
+    def __init__(self, product_service):
+        self.product_service = product_service
+
+    def handle(self, command: DeleteProductCommand) -> UseCaseResult:
+        try:
+            deleted = self.product_service.delete_product(command.product_id, user_id=command.user_id)
+        except ValueError as e:
+            return UseCaseResult.conflict(str(e))
+        if deleted is None:
+            return UseCaseResult.not_found("Product", command.product_id)
+        return UseCaseResult.success(command.product_id)
+
+
+class ProcessSaleCommandHandler:
+    """Records a sale from product codes; the result's data is the sale's id."""
+
+    def __init__(self, sale_service, product_service):
+        self.sale_service = sale_service
+        self.product_service = product_service
+
+    def handle(self, command: ProcessSaleCommand) -> UseCaseResult:
+        if not command.items:
+            return UseCaseResult.validation_error({"items": "A sale needs at least one item"})
+        errors = {
+            f"items[{n}].quantity": "Quantity must be greater than zero"
+            for n, item in enumerate(command.items)
+            if item.quantity <= 0
+        }
+        if errors:
+            return UseCaseResult.validation_error(errors)
+
+        try:
+            payment_type = to_payment_type(command.payment_type) if command.payment_type else None
+        except ValueError as e:
+            return UseCaseResult.validation_error({"payment_type": str(e)})
+
+        items_data = []
+        for item in command.items:
+            product = self.product_service.get_product_by_code(item.product_code)
+            if product is None:
+                return UseCaseResult.not_found("Product", item.product_code)
+            items_data.append({"product_id": product.id, "quantity": item.quantity})
+
+        try:
+            sale = self.sale_service.create_sale(
+                items_data,
+                user_id=command.user_id,
+                payment_type=payment_type,
+                customer_id=command.customer_id,
+                is_credit_sale=command.is_credit_sale,
+            )
+        except ValueError as e:
+            return UseCaseResult.conflict(str(e))
+        if command.paid_amount is not None and command.paid_amount < sale.total:
+            logger.warning(f"Sale {sale.id} paid {command.paid_amount} of {sale.total}")
+        return UseCaseResult.success(sale.id)
+
+
+class RebuildReadModelsCommandHandler:
+    """Recomputes the read model tables; the result's data is the rows written per table."""
+
+    def handle(self, command: RebuildReadModelsCommand) -> UseCaseResult:
+        with unit_of_work() as uow:
+            written = uow.read_models.rebuild()
+        logger.info(f"Rebuilt the read models: {written}")
+        return UseCaseResult.success(written)
+
+
+# --- Queries ---
+
+
+class _QueryHandler:
+    """Base of the query handlers: the read model tables, or a service's domain objects."""
+
+    def __init__(self, product_service=None):
+        self.product_service = product_service
+
+    def _products(self, values) -> List[Product]:
+        """The service's products; anything else it returned is logged and left out."""
+        products = []
+        for value in values or []:
+            if isinstance(value, Product):
+                products.append(value)
+            else:
+                logger.warning(
+                    f"{type(self).__name__}: expected a Product from the service, got {type(value).__name__}"
+                )
+        return products
+
+    def _product(self, value) -> Optional[Product]:
+        products = self._products([value] if value is not None else [])
+        return products[0] if products else None
+
+
+def _matches(product: Product, query: SearchProductsQuery) -> bool:
+    if query.search_term:
+        term = query.search_term.lower()
+        if term not in product.code.lower() and term not in product.description.lower():
+            return False
+    if query.department_id is not None and product.department_id != query.department_id:
+        return False
+    if query.in_stock_only and not (product.quantity_in_stock or Decimal("0")) > 0:
+        return False
+    price = product.sell_price
+    if query.min_price is not None and (price is None or price < query.min_price):
+        return False
+    if query.max_price is not None and (price is None or price > query.max_price):
+        return False
+    return True
+
+
+class GetProductByIdQueryHandler(_QueryHandler):
+    def handle(self, query: GetProductByIdQuery) -> Optional[ProductReadModel]:
+        if self.product_service is not None:
+            product = self._product(self.product_service.get_product_by_id(query.product_id))
+            return ProductReadModel.from_product(product) if product else None
+        with unit_of_work(read_only=True) as uow:
+            return uow.read_models.get_product(query.product_id)
+
+
+class GetProductByCodeQueryHandler(_QueryHandler):
+    def handle(self, query: GetProductByCodeQuery) -> Optional[ProductReadModel]:
+        if self.product_service is not None:
+            product = self._product(self.product_service.get_product_by_code(query.code))
+            return ProductReadModel.from_product(product) if product else None
+        with unit_of_work(read_only=True) as uow:
+            return uow.read_models.get_product_by_code(query.code)
+
+
+class SearchProductsQueryHandler(_QueryHandler):
+    """A page of the product grid, from the description-ordered read index."""
+
+    def handle(self, query: SearchProductsQuery) -> List[ProductListItemReadModel]:
+        if self.product_service is not None:
+            products = self._products(self.product_service.get_all_products())
+            matching = [p for p in products if _matches(p, query)]
+            page = matching[query.offset : query.offset + query.limit]
+            return [ProductListItemReadModel.from_product(p) for p in page]
+        with unit_of_work(read_only=True) as uow:
+            return uow.read_models.search_products(
+                search_term=query.search_term,
+                department_id=query.department_id,
+                in_stock_only=query.in_stock_only,
+                min_price=query.min_price,
+                max_price=query.max_price,
+                limit=query.limit,
+                offset=query.offset,
+            )
+
+
+class GetLowStockProductsQueryHandler(_QueryHandler):
+    """Products at or below their minimum stock, from the partial low stock index."""
+
+    def handle(self, query: GetLowStockProductsQuery) -> List[ProductReadModel]:
+        if self.product_service is not None:
+            products = self._products(self.product_service.get_all_products(query.department_id))
+            low = [
+                model
+                for model in map(ProductReadModel.from_product, products)
+                if model.is_low_stock
+            ]
+            return low[: query.limit] if query.limit is not None else low
+        with unit_of_work(read_only=True) as uow:
+            return uow.read_models.get_low_stock_products(query.department_id, query.limit)
+
+
+class GetSalesQueryHandler:
+    def handle(self, query: GetSalesQuery) -> List[SaleReadModel]:
+        with unit_of_work(read_only=True) as uow:
+            return uow.read_models.get_sales(query.start, query.end, query.limit, query.offset)
+
+
+class GetDashboardSummaryQueryHandler:
+    """The dashboard figures: the catalog summary row and the day's sales rollup, in one read."""
+
+    def handle(self, query: GetDashboardSummaryQuery) -> DashboardSummaryReadModel:
+        with unit_of_work(read_only=True) as uow:
+            return uow.read_models.get_dashboard_summary(query.day or date.today())
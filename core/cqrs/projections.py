@@ -0,0 +1,137 @@
+"""
+Projection of the domain events into the read model tables.
+
+ReadModelProjector subscribes batch handlers (EventPublisher.subscribe_batch)
+to the product, stock, department and sale events. Each batch re-projects
+the products or sales it names in one unit of work, so the 500 events of a
+bulk outbox delivery cost one set-based upsert, not 500. Events that touch
+many products at once (a bulk repricing, an import, a department rename)
+re-project the department, or every product.
+
+Events published one by one on the GUI thread (no outbox relay, synchronous
+dispatch) would each cost a unit of work and a commit of their own; there
+attach_to_transactions() instead has every unit of work project its events
+together, in its own transaction, just before it commits.
+
+The projection re-reads the write tables instead of applying the event's
+values, so a repeated or reordered delivery leaves the same rows.
+"""
+
+import logging
+from typing import List, Set
+
+from core.domain_events import DomainEvent, EventPublisher
+from core.events.inventory_events import (
+    LowStockDetected,
+    StockMovementRecorded,
+    StockReplenished,
+)
+from core.events.product_events import (
+    BulkPriceChanged,
+    DepartmentUpdated,
+    ProductCreated,
+    ProductDeleted,
+    ProductPriceChanged,
+    ProductsImported,
+    ProductUpdated,
+)
+from core.events.sale_events import SaleCompleted, SaleDeleted, SaleUpdated
+from infrastructure.persistence.unit_of_work import set_transaction_projector, unit_of_work
+
+logger = logging.getLogger(__name__)
+
+# Events naming the one product they changed
+_PRODUCT_EVENTS = (
+    ProductCreated,
+    ProductUpdated,
+    ProductPriceChanged,
+    ProductDeleted,
+    StockMovementRecorded,
+    StockReplenished,
+    LowStockDetected,
+)
+_CATALOG_EVENTS = (BulkPriceChanged, ProductsImported, DepartmentUpdated)
+_SALE_EVENTS = (SaleCompleted, SaleUpdated, SaleDeleted)
+
+
+class ReadModelProjector:
+    """Keeps the read model tables current from the domain events."""
+
+    def attach(self) -> None:
+        """
+        Subscribes the projection handlers to their events.
+
+        Idempotent, so it can be called again after EventPublisher.clear_handlers().
+        """
+        for event_type in _PRODUCT_EVENTS + _CATALOG_EVENTS:
+            if self.project_products not in EventPublisher.get_batch_handlers(event_type):
+                EventPublisher.subscribe_batch(event_type, self.project_products)
+        for event_type in _SALE_EVENTS:
+            if self.project_sales not in EventPublisher.get_batch_handlers(event_type):
+                EventPublisher.subscribe_batch(event_type, self.project_sales)
+
+    def attach_to_transactions(self) -> None:
+        """Has every unit of work project its events just before it commits."""
+        set_transaction_projector(self.project_transaction)
+
+    def detach(self) -> None:
+        """Stops the projection in units of work started by attach_to_transactions()."""
+        set_transaction_projector(None)
+
+    def project_products(self, events: List[DomainEvent]) -> None:
+        """Re-projects the products a batch of product, stock or catalog events changed."""
+        with unit_of_work() as uow:
+            written = self._project_products(uow.read_models, events)
+        logger.debug(f"Projected {written} products from {len(events)} events")
+
+    def project_sales(self, events: List[DomainEvent]) -> None:
+        """Re-projects the sales a batch of sale events recorded, edited or deleted."""
+        with unit_of_work() as uow:
+            written = self._project_sales(uow.read_models, events)
+        logger.debug(f"Projected {written} sales from {len(events)} events")
+
+    def project_transaction(self, uow, events: List[DomainEvent]) -> None:
+        """Re-projects what the events of a committing unit of work changed, in its transaction."""
+        product_events = [e for e in events if isinstance(e, _PRODUCT_EVENTS + _CATALOG_EVENTS)]
+        sale_events = [e for e in events if isinstance(e, _SALE_EVENTS)]
+        written = 0
+        if product_events:
+            written += self._project_products(uow.read_models, product_events)
+        if sale_events:
+            written += self._project_sales(uow.read_models, sale_events)
+        logger.debug(f"Projected {written} rows from {len(events)} events before commit")
+
+    @staticmethod
+    def _project_products(read_models, events: List[DomainEvent]) -> int:
+        product_ids: Set = set()
+        department_ids: Set = set()
+        whole_catalog = False
+        for event in events:
+            if isinstance(event, ProductsImported):
+                whole_catalog = True
+            elif isinstance(event, BulkPriceChanged):
+                if event.department_id is None:
+                    whole_catalog = True
+                else:
+                    department_ids.add(event.department_id)
+            elif isinstance(event, DepartmentUpdated):
+                department_ids.add(event.department_id)
+            elif event.product_id is not None:
+                product_ids.add(event.product_id)
+
+        if whole_catalog:
+            return read_models.project_products()
+        written = 0
+        for department_id in department_ids:
+            written += read_models.project_products(department_id=department_id)
+        if product_ids:
+            written += read_models.project_products(product_ids)
+        return written
+
+    @staticmethod
+    def _project_sales(read_models, events: List[DomainEvent]) -> int:
+        return read_models.project_sales({event.sale_id for event in events})
+
+
+# Process-wide projector, attached at startup (see main.start_read_model_projector)
+read_model_projector = ReadModelProjector()
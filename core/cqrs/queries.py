@@ -0,0 +1,57 @@
+"""
+Queries: requests to read state, answered by the query handlers in
+core.cqrs.handlers as read models, never as domain objects.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+
+@dataclass(frozen=True)
+class GetProductByIdQuery:
+    product_id: Any
+
+
+@dataclass(frozen=True)
+class GetProductByCodeQuery:
+    code: str
+
+
+@dataclass(frozen=True)
+class SearchProductsQuery:
+    """A page of the product list, in description order, optionally filtered."""
+
+    search_term: Optional[str] = None
+    department_id: Any = None
+    in_stock_only: bool = False
+    min_price: Optional[Decimal] = None
+    max_price: Optional[Decimal] = None
+    limit: int = 100
+    offset: int = 0
+
+
+@dataclass(frozen=True)
+class GetLowStockProductsQuery:
+    """Products tracked in inventory at or below their minimum stock."""
+
+    department_id: Any = None
+    limit: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class GetSalesQuery:
+    """Sales in a period, newest first."""
+
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    limit: int = 100
+    offset: int = 0
+
+
+@dataclass(frozen=True)
+class GetDashboardSummaryQuery:
+    """The dashboard figures for a day (today when None)."""
+
+    day: Optional[date] = None
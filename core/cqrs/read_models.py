@@ -0,0 +1,139 @@
+"""
+Read models: flat, immutable views shaped for one screen each.
+
+They carry the names of related records (department, unit, customer) and
+the figures derived from the stock (in stock, low stock, stock value), so a
+screen shows them without further lookups. The query handlers read them
+from the read model tables (see infrastructure.persistence.sqlite.
+read_models), or build them from domain objects with from_product().
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+from core.models.product import Product
+
+_CENTS = Decimal("0.01")
+
+
+def _is_low_stock(product: Product) -> bool:
+    # Same rule as SqliteProductRepository.get_low_stock
+    return bool(
+        product.uses_inventory
+        and product.min_stock is not None
+        and product.quantity_in_stock <= product.min_stock
+    )
+
+
+def _department_name(product: Product) -> Optional[str]:
+    return product.department.name if product.department is not None else None
+
+
+@dataclass(frozen=True)
+class ProductReadModel:
+    """Everything the product detail and edit screens show."""
+
+    id: Any
+    code: str
+    description: str
+    sell_price: Optional[Decimal]
+    cost_price: Optional[Decimal]
+    quantity_in_stock: Decimal
+    min_stock: Optional[Decimal]
+    max_stock: Optional[Decimal]
+    uses_inventory: bool
+    department_id: Any
+    department_name: Optional[str]
+    unit_id: Any
+    unit_name: Optional[str]
+    in_stock: bool
+    is_low_stock: bool
+    stock_value: Decimal
+
+    @classmethod
+    def from_product(cls, product: Product) -> "ProductReadModel":
+        quantity = product.quantity_in_stock or Decimal("0")
+        return cls(
+            id=product.id,
+            code=product.code,
+            description=product.description,
+            sell_price=product.sell_price,
+            cost_price=product.cost_price,
+            quantity_in_stock=quantity,
+            min_stock=product.min_stock,
+            max_stock=product.max_stock,
+            uses_inventory=product.uses_inventory,
+            department_id=product.department_id,
+            department_name=_department_name(product),
+            unit_id=None,
+            unit_name=product.unit,
+            in_stock=quantity > 0,
+            is_low_stock=_is_low_stock(product),
+            stock_value=(quantity * (product.cost_price or Decimal("0"))).quantize(_CENTS),
+        )
+
+
+@dataclass(frozen=True)
+class ProductListItemReadModel:
+    """A row of the product grid and of search results."""
+
+    id: Any
+    code: str
+    description: str
+    sell_price: Optional[Decimal]
+    quantity_in_stock: Decimal
+    department_name: Optional[str]
+    in_stock: bool
+    is_low_stock: bool
+
+    @classmethod
+    def from_product(cls, product: Product) -> "ProductListItemReadModel":
+        quantity = product.quantity_in_stock or Decimal("0")
+        return cls(
+            id=product.id,
+            code=product.code,
+            description=product.description,
+            sell_price=product.sell_price,
+            quantity_in_stock=quantity,
+            department_name=_department_name(product),
+            in_stock=quantity > 0,
+            is_low_stock=_is_low_stock(product),
+        )
+
+
+@dataclass(frozen=True)
+class SaleReadModel:
+    """A row of the sales list."""
+
+    id: Any
+    date_time: datetime
+    total_amount: Decimal
+    payment_type: Optional[str]
+    is_credit_sale: bool
+    customer_id: Any
+    customer_name: Optional[str]
+    user_id: Any
+    username: Optional[str]
+    item_count: int
+    total_quantity: Decimal
+
+
+@dataclass(frozen=True)
+class DashboardSummaryReadModel:
+    """The figures of the dashboard for one day."""
+
+    day: date
+    sales_count: int
+    sales_total: Decimal
+    product_count: int
+    low_stock_count: int
+    out_of_stock_count: int
+    stock_value: Decimal
+
+    @property
+    def average_ticket(self) -> Decimal:
+        if not self.sales_count:
+            return Decimal("0.00")
+        return (self.sales_total / self.sales_count).quantize(_CENTS)
@@ -14,7 +14,7 @@ from __future__ import annotations
 from abc import ABC
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Type, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Optional, Protocol, Type, TYPE_CHECKING
 from uuid import UUID
 import logging
 
@@ -25,7 +25,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, kw_only=True)
 class DomainEvent(ABC):
     """
     Base class for all domain events.
@@ -33,6 +33,9 @@ class DomainEvent(ABC):
     Domain events represent something that happened in the domain that
     domain experts care about. They are immutable facts about the past.
 
+    Subclasses must be frozen dataclasses as well. The base fields are
+    keyword-only so subclasses can declare fields without defaults.
+
     Examples:
         - ProductPriceChanged
         - SaleCompleted
@@ -52,6 +55,15 @@ class DomainEvent(ABC):
             object.__setattr__(self, 'event_id', uuid.uuid4())
 
 
+class EventDispatcher(Protocol):
+    """Runs the handlers of a published event, e.g. on worker threads."""
+
+    def dispatch(
+        self, event: DomainEvent, handlers: List[Callable[[DomainEvent], None]]
+    ) -> None:
+        ...
+
+
 class EventPublisher:
     """
     Central event publisher implementing the Observer pattern.
@@ -78,12 +90,19 @@ class EventPublisher:
 
     _handlers: Dict[Type[DomainEvent], List[Callable[[DomainEvent], None]]] = {}
     _global_handlers: List[Callable[[DomainEvent], None]] = []
+    # Handlers that always run on the publishing thread, even with a dispatcher
+    _inline_handlers: List[Callable[[DomainEvent], None]] = []
+    # Handlers that take a list of events of one type
+    _batch_handlers: Dict[Type[DomainEvent], List[Callable[[List[DomainEvent]], None]]] = {}
+    # Dispatcher that runs the other handlers off the publishing thread, if any
+    _dispatcher: Optional[EventDispatcher] = None
 
     @classmethod
     def subscribe(
         cls,
         event_type: Type[DomainEvent],
-        handler: Callable[[DomainEvent], None] = None
+        handler: Callable[[DomainEvent], None] = None,
+        inline: bool = False,
     ):
         """
         Subscribe a handler to a specific event type.
@@ -93,6 +112,9 @@ class EventPublisher:
         Args:
             event_type: The type of event to subscribe to
             handler: The handler function (optional if used as decorator)
+            inline: Always run the handler on the publishing thread, for
+                handlers the publisher relies on right after publishing
+                (e.g. cache invalidation), even when a dispatcher is set
 
         Returns:
             The handler function (for decorator usage)
@@ -102,6 +124,8 @@ class EventPublisher:
                 cls._handlers[event_type] = []
 
             cls._handlers[event_type].append(func)
+            if inline and func not in cls._inline_handlers:
+                cls._inline_handlers.append(func)
             logger.debug(
                 f"Subscribed {func.__name__} to {event_type.__name__}"
             )
@@ -127,12 +151,60 @@ class EventPublisher:
         cls._global_handlers.append(handler)
         logger.debug(f"Subscribed {handler.__name__} to all events")
 
+    @classmethod
+    def subscribe_batch(
+        cls,
+        event_type: Type[DomainEvent],
+        handler: Callable[[List[DomainEvent]], None] = None,
+    ):
+        """
+        Subscribe a handler that takes a list of events of one type.
+
+        The outbox relay (infrastructure.persistence.outbox) hands it every
+        pending event of the type at once, e.g. the 500 ProductPriceChanged of
+        a bulk repricing; events published directly are handed over one by
+        one as single-element lists. Can be used as a decorator.
+
+        Args:
+            event_type: The type of event to subscribe to
+            handler: The handler function (optional if used as decorator)
+
+        Returns:
+            The handler function (for decorator usage)
+        """
+        def decorator(func: Callable[[List[DomainEvent]], None]):
+            cls._batch_handlers.setdefault(event_type, []).append(func)
+            logger.debug(
+                f"Subscribed batch handler {func.__name__} to {event_type.__name__}"
+            )
+            return func
+
+        if handler is not None:
+            return decorator(handler)
+        return decorator
+
+    @classmethod
+    def set_dispatcher(cls, dispatcher: Optional[EventDispatcher]) -> None:
+        """
+        Hand the handlers of published events to a dispatcher.
+
+        With a dispatcher (see core.event_dispatcher.AsyncEventDispatcher),
+        publish() only runs the inline handlers and queues the event for the
+        rest; None restores synchronous publishing.
+
+        Args:
+            dispatcher: The dispatcher to use, or None
+        """
+        cls._dispatcher = dispatcher
+
     @classmethod
     def publish(cls, event: DomainEvent) -> None:
         """
         Publish a domain event to all registered handlers.
 
-        Handlers are executed synchronously in registration order.
+        Handlers are executed synchronously in registration order, global
+        handlers first, unless a dispatcher is set: then inline handlers run
+        here and the others are run by the dispatcher.
         If a handler raises an exception, it is logged but does not
         prevent other handlers from executing.
 
@@ -142,28 +214,66 @@ class EventPublisher:
         event_type = type(event)
         logger.info(f"Publishing event: {event_type.__name__}")
 
-        # Execute global handlers
-        for handler in cls._global_handlers:
-            try:
-                handler(event)
-            except Exception as e:
-                logger.error(
-                    f"Error in global handler {handler.__name__} "
-                    f"for {event_type.__name__}: {e}",
-                    exc_info=True
-                )
-
-        # Execute specific handlers
-        handlers = cls._handlers.get(event_type, [])
+        handlers = cls.handlers_for(event) + [
+            _SingleEventBatch(handler) for handler in cls.get_batch_handlers(event_type)
+        ]
+        dispatcher = cls._dispatcher
+        if dispatcher is None:
+            for handler in handlers:
+                cls.run_handler(handler, event)
+            return
+
+        deferred = []
         for handler in handlers:
-            try:
-                handler(event)
-            except Exception as e:
-                logger.error(
-                    f"Error in handler {handler.__name__} "
-                    f"for {event_type.__name__}: {e}",
-                    exc_info=True
-                )
+            if handler in cls._inline_handlers:
+                cls.run_handler(handler, event)
+            else:
+                deferred.append(handler)
+        if deferred:
+            dispatcher.dispatch(event, deferred)
+
+    @classmethod
+    def publish_inline(cls, event: DomainEvent) -> None:
+        """
+        Run only the inline handlers of an event.
+
+        Used when the other handlers are run later by the outbox relay.
+
+        Args:
+            event: The domain event to publish
+        """
+        for handler in cls.handlers_for(event):
+            if handler in cls._inline_handlers:
+                cls.run_handler(handler, event)
+
+    @classmethod
+    def handlers_for(
+        cls, event: DomainEvent, include_inline: bool = True
+    ) -> List[Callable[[DomainEvent], None]]:
+        """Global handlers followed by the handlers of the event's type."""
+        handlers = cls._global_handlers + cls._handlers.get(type(event), [])
+        if include_inline:
+            return handlers
+        return [handler for handler in handlers if handler not in cls._inline_handlers]
+
+    @classmethod
+    def run_handler(cls, handler: Callable[[DomainEvent], None], event: DomainEvent) -> bool:
+        """
+        Run one handler, logging instead of raising its errors.
+
+        Returns:
+            True if the handler completed without raising
+        """
+        try:
+            handler(event)
+            return True
+        except Exception as e:
+            logger.error(
+                f"Error in handler {getattr(handler, '__name__', handler)} "
+                f"for {type(event).__name__}: {e}",
+                exc_info=True
+            )
+            return False
 
     @classmethod
     def clear_handlers(cls) -> None:
@@ -174,6 +284,8 @@ class EventPublisher:
         """
         cls._handlers.clear()
         cls._global_handlers.clear()
+        cls._inline_handlers.clear()
+        cls._batch_handlers.clear()
         logger.debug("Cleared all event handlers")
 
     @classmethod
@@ -191,6 +303,25 @@ class EventPublisher:
         """
         return cls._handlers.get(event_type, []).copy()
 
+    @classmethod
+    def get_batch_handlers(
+        cls, event_type: Type[DomainEvent]
+    ) -> List[Callable[[List[DomainEvent]], None]]:
+        """Get the batch handlers registered for a specific event type."""
+        return cls._batch_handlers.get(event_type, []).copy()
+
+
+class _SingleEventBatch:
+    """Calls a batch handler with a single published event."""
+
+    def __init__(self, handler: Callable[[List[DomainEvent]], None]):
+        self.handler = handler
+        self.__name__ = getattr(handler, "__name__", repr(handler))
+        self.__qualname__ = getattr(handler, "__qualname__", self.__name__)
+
+    def __call__(self, event: DomainEvent) -> None:
+        self.handler([event])
+
 
 class MessageBus:
     """
@@ -0,0 +1,324 @@
+"""
+Asynchronous dispatch of domain events.
+
+By default EventPublisher.publish() runs every handler on the publishing
+thread, which for a sale is the Qt GUI thread committing the unit of work.
+AsyncEventDispatcher takes the handlers off that thread:
+
+- Events go into a bounded queue drained by a pool of worker threads. The
+  queue is split in one lane per worker and an event's lane is chosen from
+  its aggregate (the product_id of a ProductPriceChanged, the sale_id of a
+  SaleCompleted), so the events of one aggregate are handled in the order
+  they were published. Events without an aggregate are spread over the lanes.
+- When a lane stays full for ``enqueue_timeout`` seconds the event is
+  handled on the publishing thread instead, so events are never dropped,
+  but only once no earlier event of its aggregate is waiting or running;
+  until then the publisher keeps waiting for room in the lane.
+- A handler can be given a timeout (``handler_timeout`` for all, or
+  ``handler_timeouts`` per handler). A handler that overruns it is logged
+  and counted, and the event's other handlers go on without it. It cannot
+  be interrupted, so the next event of the lane waits until it finishes:
+  handlers never see the events of one aggregate out of order or at once.
+- metrics() reports latency, failures and timeouts per handler, and the
+  queue depth.
+- flush() waits until every queued event has been handled, so tests can
+  publish and then assert synchronously.
+
+Handlers subscribed with ``inline=True`` still run on the publishing thread.
+
+Usage:
+    dispatcher = AsyncEventDispatcher(workers=2, handler_timeout=5.0)
+    dispatcher.start()
+    EventPublisher.set_dispatcher(dispatcher)
+    ...
+    dispatcher.shutdown()
+"""
+
+import itertools
+from collections import Counter
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.domain_events import DomainEvent, EventPublisher
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[DomainEvent], None]
+
+# Event fields identifying the aggregate an event belongs to, in lookup order
+AGGREGATE_ID_FIELDS = ("aggregate_id", "product_id", "sale_id", "customer_id", "invoice_id")
+
+# Put in a lane to stop its worker
+_STOP = object()
+
+
+def aggregate_key(event: DomainEvent) -> Optional[Tuple[str, Any]]:
+    """The (field, id) of the aggregate the event belongs to, or None."""
+    for name in AGGREGATE_ID_FIELDS:
+        value = getattr(event, name, None)
+        if value is not None:
+            return name, value
+    return None
+
+
+def handler_name(handler: Handler) -> str:
+    """A readable name for a handler: its qualified name, or its repr."""
+    return getattr(handler, "__qualname__", None) or repr(handler)
+
+
+@dataclass
+class HandlerMetrics:
+    """Runs of one handler by the dispatcher."""
+
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def average_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class AsyncEventDispatcher:
+    """Runs event handlers on worker threads, preserving per-aggregate order."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue_size: int = 1000,
+        handler_timeout: Optional[float] = None,
+        handler_timeouts: Optional[Dict[Handler, float]] = None,
+        enqueue_timeout: float = 0.5,
+    ):
+        """
+        Args:
+            workers: Worker threads (and queue lanes).
+            max_queue_size: Events that can wait, split evenly over the lanes.
+            handler_timeout: Seconds a handler may run before it is abandoned;
+                None waits for it however long it takes.
+            handler_timeouts: Per-handler overrides of handler_timeout.
+            enqueue_timeout: Seconds to wait for room in a full lane before
+                handling the event on the publishing thread (once its
+                aggregate has no earlier event left in the lane).
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.handler_timeout = handler_timeout
+        self.handler_timeouts: Dict[Handler, float] = dict(handler_timeouts or {})
+        self.enqueue_timeout = enqueue_timeout
+
+        lane_size = max(1, -(-max_queue_size // workers))
+        self._lanes: List[queue.Queue] = [queue.Queue(maxsize=lane_size) for _ in range(workers)]
+        self._threads: List[threading.Thread] = []
+        self._round_robin = itertools.count()
+        self._handler_pool: Optional[ThreadPoolExecutor] = None
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        # Events of each aggregate queued or being handled
+        self._pending_by_aggregate: Counter = Counter()
+        self._metrics: Dict[str, HandlerMetrics] = {}
+        self._queued = 0
+        self._processed = 0
+        self._ran_inline = 0
+        self._max_queue_depth = 0
+        self._max_wait_ms = 0.0
+
+    # --- Lifecycle ---
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self) -> None:
+        """Starts the worker threads."""
+        if self.running:
+            return
+        if self.handler_timeout is not None or self.handler_timeouts:
+            # Handlers with a timeout run here so a worker can stop waiting for them
+            self._handler_pool = ThreadPoolExecutor(
+                max_workers=self.workers * 2, thread_name_prefix="event-handler"
+            )
+        self._threads = [
+            threading.Thread(
+                target=self._work, args=(lane,), name=f"event-dispatcher-{n}", daemon=True
+            )
+            for n, lane in enumerate(self._lanes)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Event dispatcher started with {self.workers} workers")
+
+    def shutdown(self, timeout: Optional[float] = 10.0) -> None:
+        """Handles the events still queued, then stops the workers."""
+        if not self.running:
+            return
+        for lane in self._lanes:
+            lane.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._handler_pool is not None:
+            self._handler_pool.shutdown(wait=False)
+            self._handler_pool = None
+        logger.info("Event dispatcher stopped")
+
+    # --- Dispatch ---
+
+    def dispatch(self, event: DomainEvent, handlers: List[Handler]) -> None:
+        """Queues the event's handlers on the lane of its aggregate."""
+        if not self.running:
+            self._run(event, handlers)
+            return
+
+        key = aggregate_key(event)
+        index = hash(key) if key is not None else next(self._round_robin)
+        lane_index = index % self.workers
+        lane = self._lanes[lane_index]
+        with self._lock:
+            self._pending += 1
+            self._pending_by_aggregate[key] += 1
+        item = (event, handlers, key, time.perf_counter())
+        while True:
+            try:
+                lane.put(item, timeout=self.enqueue_timeout)
+                break
+            except queue.Full:
+                if self._can_run_inline(key, lane_index):
+                    self._run_inline(event, handlers, key)
+                    return
+                # An earlier event of the aggregate is still in the lane:
+                # handling this one now would overtake it
+        with self._lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self.queue_depth())
+
+    def _can_run_inline(self, key, lane_index: int) -> bool:
+        if key is None:
+            return True
+        threads = self._threads
+        if threads and threading.current_thread() is threads[lane_index]:
+            # A handler publishing into its own full lane would wait for itself
+            return True
+        with self._lock:
+            # This event is the only one of its aggregate not yet handled
+            return self._pending_by_aggregate[key] == 1
+
+    def _run_inline(self, event: DomainEvent, handlers: List[Handler], key) -> None:
+        logger.warning(
+            f"Event queue full, handling {type(event).__name__} on the publishing thread"
+        )
+        with self._lock:
+            self._ran_inline += 1
+        try:
+            self._run(event, handlers)
+        finally:
+            self._done(key)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every queued event has been handled.
+
+        Returns:
+            False if the timeout expired first.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def queue_depth(self) -> int:
+        """Events waiting in the lanes."""
+        return sum(lane.qsize() for lane in self._lanes)
+
+    def _work(self, lane: queue.Queue) -> None:
+        while True:
+            item = lane.get()
+            if item is _STOP:
+                return
+            event, handlers, key, queued_at = item
+            wait_ms = (time.perf_counter() - queued_at) * 1000
+            try:
+                self._run(event, handlers)
+            except Exception as e:
+                logger.error(f"Error dispatching {type(event).__name__}: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._processed += 1
+                    self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+                self._done(key)
+
+    def _done(self, key) -> None:
+        with self._idle:
+            self._pending -= 1
+            self._pending_by_aggregate[key] -= 1
+            if not self._pending_by_aggregate[key]:
+                del self._pending_by_aggregate[key]
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _run(self, event: DomainEvent, handlers: List[Handler]) -> None:
+        overrunning = []
+        for handler in handlers:
+            timeout = self.handler_timeouts.get(handler, self.handler_timeout)
+            timed_out = False
+            started = time.perf_counter()
+            if timeout is None or self._handler_pool is None:
+                ok = EventPublisher.run_handler(handler, event)
+            else:
+                future = self._handler_pool.submit(EventPublisher.run_handler, handler, event)
+                try:
+                    ok = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    ok, timed_out = False, True
+                    overrunning.append(future)
+                    logger.warning(
+                        f"Handler {handler_name(handler)} timed out after {timeout:g}s "
+                        f"on {type(event).__name__}"
+                    )
+            self._record(handler, (time.perf_counter() - started) * 1000, ok, timed_out)
+        # The next event of the lane must not run alongside a handler still on this one
+        wait(overrunning)
+
+    def _record(self, handler: Handler, elapsed_ms: float, ok: bool, timed_out: bool) -> None:
+        with self._lock:
+            metrics = self._metrics.setdefault(handler_name(handler), HandlerMetrics())
+            metrics.calls += 1
+            metrics.total_ms += elapsed_ms
+            metrics.max_ms = max(metrics.max_ms, elapsed_ms)
+            if timed_out:
+                metrics.timeouts += 1
+            elif not ok:
+                metrics.failures += 1
+
+    # --- Metrics ---
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue counters and per-handler latency, failures and timeouts."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth(),
+                "max_queue_depth": self._max_queue_depth,
+                "queued": self._queued,
+                "processed": self._processed,
+                "ran_inline": self._ran_inline,
+                "max_wait_ms": round(self._max_wait_ms, 3),
+                "handlers": {
+                    name: {
+                        "calls": m.calls,
+                        "failures": m.failures,
+                        "timeouts": m.timeouts,
+                        "average_ms": round(m.average_ms, 3),
+                        "max_ms": round(m.max_ms, 3),
+                    }
+                    for name, m in self._metrics.items()
+                },
+            }
@@ -15,11 +15,13 @@ To activate these handlers, simply import this module during app startup:
 
 import logging
 from decimal import Decimal
+from typing import List
 
 from core.domain_events import EventPublisher
 from core.events.product_events import (
     ProductCreated,
     ProductPriceChanged,
+    BulkPriceChanged,
     ProductDeleted,
 )
 from core.events.inventory_events import (
@@ -63,39 +65,68 @@ def on_product_created(event: ProductCreated) -> None:
     # analytics_service.track_product_created(event)
 
 
-@EventPublisher.subscribe(ProductPriceChanged)
-def on_product_price_changed(event: ProductPriceChanged) -> None:
+@EventPublisher.subscribe_batch(ProductPriceChanged)
+def on_product_prices_changed(events: List[ProductPriceChanged]) -> None:
     """
-    Handle ProductPriceChanged events.
+    Handle ProductPriceChanged events as a batch.
+
+    The outbox relay delivers every pending price change at once, so a
+    repricing of 500 products is one call (and one summary line) instead
+    of 500.
 
     Example actions:
     - Notify managers of significant price changes
     - Update price tags/labels
-    - Record in price history
     - Trigger repricing of pending orders
     """
-    change_percent = abs(event.price_change_percent)
-    direction = "increased" if event.new_price > event.old_price else "decreased"
-
-    logger.info(
-        f"💰 Price changed for {event.code}: "
-        f"${event.old_price} → ${event.new_price} ({direction} by {change_percent}%)"
-    )
+    significant = []
+    for event in events:
+        change_percent = abs(event.price_change_percent)
+        direction = "increased" if event.new_price > event.old_price else "decreased"
+        logger.debug(
+            f"💰 Price changed for {event.code}: "
+            f"${event.old_price} → ${event.new_price} ({direction} by {change_percent}%)"
+        )
+        # Alert on significant price changes (>10%)
+        if change_percent > Decimal('10'):
+            significant.append(f"{event.code} {direction} by {change_percent}%")
 
-    # Alert on significant price changes (>10%)
-    if change_percent > Decimal('10'):
+    logger.info(f"💰 Prices changed for {len(events)} products")
+    if significant:
         logger.warning(
-            f"⚠️  SIGNIFICANT PRICE CHANGE: {event.code} price {direction} by {change_percent}%"
+            f"⚠️  SIGNIFICANT PRICE CHANGES ({len(significant)}): "
+            + ", ".join(significant[:20])
+            + (" ..." if len(significant) > 20 else "")
         )
-        # Example: Send alert to managers
+        # Example: Send one alert to managers for the whole batch
         # notification_service.send_alert(
         #     level="warning",
-        #     title=f"Large Price Change: {event.code}",
-        #     message=f"Price {direction} by {change_percent}%"
+        #     title=f"Large Price Changes: {len(significant)} products",
+        #     message="\n".join(significant)
         # )
 
-    # Example: Update external price label system
-    # label_printer_service.queue_price_label_update(event.product_id)
+    # Example: Update external price label system in one call
+    # label_printer_service.queue_price_label_updates([e.product_id for e in events])
+
+
+@EventPublisher.subscribe(BulkPriceChanged)
+def on_bulk_price_changed(event: BulkPriceChanged) -> None:
+    """
+    Handle BulkPriceChanged events.
+
+    Example actions:
+    - Reprint the price labels of the affected department
+    - Notify managers of the adjustment
+    """
+    scope = (
+        f"department {event.department_id}"
+        if event.department_id is not None
+        else "all departments"
+    )
+    logger.info(
+        f"💰 Prices of {event.product_count} products in {scope} "
+        f"changed by {event.percentage}%"
+    )
 
 
 @EventPublisher.subscribe(ProductDeleted)
@@ -0,0 +1,39 @@
+"""
+Domain event definitions.
+
+Events are immutable dataclasses derived from core.domain_events.DomainEvent.
+They are added to a Unit of Work and published through the EventPublisher
+after the transaction commits.
+"""
+
+from core.events.product_events import (
+    ProductCreated,
+    ProductUpdated,
+    ProductPriceChanged,
+    BulkPriceChanged,
+    ProductDeleted,
+    ProductsImported,
+    DepartmentUpdated,
+)
+from core.events.inventory_events import (
+    LowStockDetected,
+    StockReplenished,
+    StockMovementRecorded,
+)
+from core.events.sale_events import SaleCompleted, SaleUpdated, SaleDeleted
+
+__all__ = [
+    "ProductCreated",
+    "ProductUpdated",
+    "ProductPriceChanged",
+    "BulkPriceChanged",
+    "ProductDeleted",
+    "ProductsImported",
+    "DepartmentUpdated",
+    "LowStockDetected",
+    "StockReplenished",
+    "StockMovementRecorded",
+    "SaleCompleted",
+    "SaleUpdated",
+    "SaleDeleted",
+]
@@ -0,0 +1,43 @@
+"""
+Inventory domain events.
+
+Raised when stock levels change or fall below the configured minimum.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Optional
+
+from core.domain_events import DomainEvent
+
+
+@dataclass(frozen=True)
+class StockMovementRecorded(DomainEvent):
+    """Stock of a product changed by quantity (negative for outgoing stock)."""
+
+    product_id: Any
+    quantity: Decimal
+    movement_type: str
+    related_id: Optional[Any] = None
+    user_id: Optional[Any] = None
+
+
+@dataclass(frozen=True)
+class StockReplenished(DomainEvent):
+    """Stock was added to a product."""
+
+    product_id: Any
+    product_code: str
+    quantity_added: Decimal
+    new_quantity: Decimal
+
+
+@dataclass(frozen=True)
+class LowStockDetected(DomainEvent):
+    """Stock of a product is at or below its minimum level."""
+
+    product_id: Any
+    product_code: str
+    product_description: str
+    current_quantity: Decimal
+    minimum_stock: Decimal
@@ -0,0 +1,111 @@
+"""
+Product domain events.
+
+Raised by ProductService when products are created, updated, repriced or
+deleted, or their departments are edited, and by the product import.
+"""
+
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from core.domain_events import DomainEvent
+
+
+@dataclass(frozen=True)
+class ProductCreated(DomainEvent):
+    """A new product was added to the catalog."""
+
+    product_id: Any
+    code: str
+    description: str
+    sell_price: Optional[Decimal]
+    department_id: Optional[Any]
+    user_id: Any
+
+
+@dataclass(frozen=True)
+class ProductUpdated(DomainEvent):
+    """An existing product was modified."""
+
+    product_id: Any
+    updated_fields: Dict[str, Any] = field(default_factory=dict)
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class ProductPriceChanged(DomainEvent):
+    """
+    The sell price of a product changed.
+
+    price_change_percent is calculated from old_price and new_price, the
+    value passed in is ignored.
+    """
+
+    product_id: Any
+    code: str
+    old_price: Decimal
+    new_price: Decimal
+    price_change_percent: Decimal = Decimal("0")
+    user_id: Any = None
+
+    def __post_init__(self):
+        super().__post_init__()
+        try:
+            old_price = Decimal(str(self.old_price))
+            new_price = Decimal(str(self.new_price))
+        except (InvalidOperation, ValueError):
+            return  # Keep the given percentage for non-numeric prices
+        percent = Decimal("0")
+        if old_price:
+            percent = (new_price - old_price) / old_price * Decimal("100")
+        object.__setattr__(
+            self, "price_change_percent", percent.quantize(Decimal("0.01"))
+        )
+
+
+@dataclass(frozen=True)
+class BulkPriceChanged(DomainEvent):
+    """
+    The prices of many products were changed by one percentage at once.
+
+    Raised once for the whole change instead of one ProductPriceChanged per
+    product; the old and new prices are kept in the price history.
+    """
+
+    percentage: Decimal
+    product_count: int
+    department_id: Optional[Any] = None
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class ProductDeleted(DomainEvent):
+    """A product was removed from the catalog."""
+
+    product_id: Any
+    code: str
+    description: str
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class ProductsImported(DomainEvent):
+    """
+    Products were created or updated in bulk by an import.
+
+    Raised once for the whole import, which writes the products without one
+    ProductCreated or ProductUpdated per row.
+    """
+
+    product_count: int
+    user_id: Any = None
+
+
+@dataclass(frozen=True)
+class DepartmentUpdated(DomainEvent):
+    """A department was renamed or otherwise edited."""
+
+    department_id: Any
+    name: str
+    user_id: Any = None
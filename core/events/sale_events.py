@@ -0,0 +1,36 @@
+"""
+Sale domain events.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Optional
+
+from core.domain_events import DomainEvent
+
+
+@dataclass(frozen=True)
+class SaleCompleted(DomainEvent):
+    """A sale was recorded."""
+
+    sale_id: Any
+    total_amount: Decimal
+    payment_type: Optional[str] = None
+    customer_id: Optional[Any] = None
+    user_id: Optional[Any] = None
+
+
+@dataclass(frozen=True)
+class SaleUpdated(DomainEvent):
+    """A recorded sale was edited (e.g. assigned to a customer)."""
+
+    sale_id: Any
+    user_id: Optional[Any] = None
+
+
+@dataclass(frozen=True)
+class SaleDeleted(DomainEvent):
+    """A recorded sale was deleted."""
+
+    sale_id: Any
+    user_id: Optional[Any] = None
@@ -110,3 +110,15 @@ class SaleNotFoundError(ResourceNotFoundError):
             else "Sale not found"
         )
         super().__init__(message)
+
+
+class ConcurrentUpdateError(ApplicationError, ValueError):
+    """
+    Exception raised when a record changed since the caller read it.
+
+    Used by optimistic concurrency checks on a record's version. It is also a
+    ValueError, so callers handling the repositories' ValueErrors show it.
+    """
+
+    def __init__(self, message="The record was changed by another user"):
+        super().__init__(message)
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Generic, Iterator, List, Optional, Dict, Any, Tuple, TypeVar
 import uuid
 from datetime import datetime
 from decimal import Decimal
@@ -7,8 +8,8 @@ from core.models.user import User  # Moved User import outside try/except
 
 # Adjust path if necessary to import core models
 try:
-    from ..models.product import Product, Department
-    from ..models.inventory import InventoryMovement
+    from ..models.product import Product, ProductRow, Department, StockLevel
+    from ..models.inventory import InventoryMovement, StockDrift
     from ..models.sale import Sale, SaleItem  # noqa: F401 - used in type hints
     from ..models.customer import Customer
     from ..models.credit_payment import CreditPayment
@@ -17,8 +18,8 @@ try:
     from ..models.unit import Unit
 except ImportError:
     # Fallback for different import contexts
-    from core.models.product import Product, Department
-    from core.models.inventory import InventoryMovement
+    from core.models.product import Product, ProductRow, Department, StockLevel
+    from core.models.inventory import InventoryMovement, StockDrift
     from core.models.sale import Sale
     from core.models.customer import Customer
     from core.models.credit_payment import CreditPayment
@@ -28,6 +29,20 @@ except ImportError:
 
     # Removed User import from here
 
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    """One page of a keyset-paginated listing.
+
+    ``next_cursor`` is the sort key of the page's last item; pass it back as
+    ``after`` to get the following page. It is None on the last page.
+    """
+
+    items: List[T]
+    next_cursor: Optional[Tuple] = None
+
 
 class IDepartmentRepository(ABC):
     """Interface for department data access operations."""
@@ -115,6 +130,11 @@ class IProductRepository(ABC):
         """Retrieves a product by its unique ID."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def get_by_ids(self, product_ids: List[int]) -> Dict[int, Product]:
+        """Retrieves several products at once, keyed by id; unknown ids are left out."""
+        pass  # pragma: no cover
+
     @abstractmethod
     def get_by_code(self, code: str) -> Optional[Product]:
         """Retrieves a product by its code."""
@@ -130,6 +150,18 @@ class IProductRepository(ABC):
         """Retrieves all products, typically ordered."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def get_page(self, after: Optional[Tuple] = None, limit: int = 100) -> Page[Product]:
+        """Retrieves the products after a cursor, ordered by description."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def get_row_page(
+        self, after: Optional[Tuple] = None, limit: int = 100
+    ) -> Page[ProductRow]:
+        """Retrieves list-screen rows of the products after a cursor, ordered by description."""
+        pass  # pragma: no cover
+
     @abstractmethod
     def update(self, product: Product) -> Optional[Product]:
         """Updates an existing product."""
@@ -141,8 +173,28 @@ class IProductRepository(ABC):
         pass  # pragma: no cover
 
     @abstractmethod
-    def search(self, query: str) -> List[Product]:
-        """Searches for products based on a term (e.g., code or description)."""
+    def search(self, query: str, limit: Optional[int] = None) -> List[Product]:
+        """Searches for products based on a term (e.g., code or description), best matches first."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def get_ids_by_codes(self, codes: List[str]) -> Dict[str, int]:
+        """Maps product codes to ids; codes without a product are left out."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def bulk_upsert(self, rows: List[Dict[str, Any]]) -> None:
+        """Inserts products in bulk, updating existing products with the same code."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def count(self) -> int:
+        """Returns the number of products in the catalog."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def iter_export_rows(self, batch_size: int = 1000) -> Iterator[Tuple]:
+        """Streams export rows (product columns plus department name) in batches."""
         pass  # pragma: no cover
 
     @abstractmethod
@@ -153,11 +205,33 @@ class IProductRepository(ABC):
     @abstractmethod
     def update_stock(
         self,
-        product_id: uuid.UUID,
-        quantity_change: float,
-        cost_price: Optional[float] = None,
+        product_id: int,
+        quantity_change: Decimal,
+        cost_price: Optional[Decimal] = None,
+        expected_version: Optional[int] = None,
     ) -> Optional[Product]:
-        """Updates only the stock quantity of a specific product."""
+        """Adds a signed quantity to a product's stock in one guarded UPDATE."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def change_stock(
+        self,
+        changes: Dict[int, Decimal],
+        expected_versions: Optional[Dict[int, int]] = None,
+    ) -> Dict[int, StockLevel]:
+        """Adds signed quantities, keyed by product id, to several products' stock at once."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def update_prices_by_percentage(
+        self, percentage: Decimal, department_id: Optional[int] = None
+    ) -> int:
+        """Reprices products by a percentage, recording price history; returns how many changed."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def decrease_stock(self, quantities: Dict[int, Decimal]) -> None:
+        """Subtracts quantities, keyed by product id, from several products' stock at once."""
         pass  # pragma: no cover
 
     @abstractmethod
@@ -172,6 +246,21 @@ class IProductRepository(ABC):
         """Returns products with stock below the specified threshold."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def search_rows(self, term: str, limit: Optional[int] = None) -> List[ProductRow]:
+        """Searches products like search(), returning list-screen rows."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def get_inventory_rows(self, department_id: Optional[int] = None) -> List[ProductRow]:
+        """Returns list-screen rows of the inventory tracked products."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def get_low_stock_rows(self, threshold: Optional[Decimal] = None) -> List[ProductRow]:
+        """Returns list-screen rows of the products with low stock."""
+        pass  # pragma: no cover
+
 
 # Define other repository interfaces here as needed (e.g., ISaleRepository, IUserRepository)
 
@@ -184,19 +273,28 @@ class IInventoryRepository(ABC):
         """Adds a new inventory movement record."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def add_movements(self, movements: List[InventoryMovement]) -> None:
+        """Adds several inventory movement records in one batch."""
+        pass  # pragma: no cover
+
     @abstractmethod
     def get_movements_for_product(
         self,
         product_id: uuid.UUID,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
     ) -> List[InventoryMovement]:
         """Retrieves all inventory movements for a specific product, typically ordered by timestamp."""
         pass  # pragma: no cover
 
     @abstractmethod
     def get_all_movements(
-        self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
     ) -> List[InventoryMovement]:
         """Retrieves all inventory movements."""
         pass  # pragma: no cover
@@ -208,10 +306,26 @@ class IInventoryRepository(ABC):
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         movement_type: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> List[InventoryMovement]:
         """Returns inventory movements with optional filters."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def stock_as_of(self, product_ids: List[int], timestamp: datetime) -> Dict[int, Decimal]:
+        """Returns the products' stock at an instant, according to the movement ledger."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def refresh_stock_checkpoints(self, granularity: str = "month", rebuild: bool = False) -> int:
+        """Adds the stock checkpoints of the periods closed since the last refresh."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def find_stock_drift(self) -> List[StockDrift]:
+        """Returns the products whose stock differs from the sum of their movements."""
+        pass  # pragma: no cover
+
 
 # --- Add Sale Repository Interface ---
 
@@ -358,6 +472,22 @@ class ISaleRepository(ABC):
         """
         pass  # pragma: no cover
 
+    @abstractmethod
+    def backfill_cost_snapshots(
+        self, after_id: int = 0, batch_size: int = 1000
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Snapshots the current product cost onto one batch of sale items that lack one.
+
+        Args:
+            after_id: Only sale items with a greater id are considered
+            batch_size: Maximum number of sale items to update
+
+        Returns:
+            Tuple of (items updated, last item id processed or None when done)
+        """
+        pass  # pragma: no cover
+
 
 # --- Customer Repository ---
 
@@ -382,6 +512,11 @@ class ICustomerRepository(ABC):
         """Retrieves all customers, with optional pagination."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def get_page(self, after: Optional[Tuple] = None, limit: int = 100) -> Page[Customer]:
+        """Retrieves the customers after a cursor, ordered by name."""
+        pass  # pragma: no cover
+
     @abstractmethod
     def update(self, customer: Customer) -> Optional[Customer]:
         """Updates an existing customer's details."""
@@ -526,6 +661,21 @@ class IInvoiceRepository(ABC):
         """Retrieves all invoices."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def get_page(self, after: Optional[Tuple] = None, limit: int = 100) -> Page[Invoice]:
+        """Retrieves the invoices after a cursor, newest first."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def allocate_invoice_number(self, point_of_sale: int) -> int:
+        """Takes the next number of a point of sale's invoice sequence."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def verify_invoice_sequence(self, point_of_sale: int) -> List[str]:
+        """Lists gaps and duplicates in a point of sale's invoice numbers."""
+        pass  # pragma: no cover
+
 
 # --- Cash Drawer Repository Interface ---
 class ICashDrawerRepository(ABC):
@@ -17,7 +17,10 @@ Benefits:
 """
 
 from abc import ABC, abstractmethod
-from typing import List, TypeVar, Generic, Optional
+from typing import Any, List, TypeVar, Generic, Optional
+
+from sqlalchemy import func, select
+
 from core.specifications.base import Specification
 
 T = TypeVar('T')
@@ -204,50 +207,54 @@ class ISaleSpecificationRepository(IPageableSpecificationRepository[Sale]):
 
 class SpecificationRepositoryMixin(Generic[T]):
     """
-    Mixin class providing default specification repository implementation.
+    Mixin class providing the specification queries on top of a SQLAlchemy session.
 
-    This can be mixed into concrete repository implementations to provide
-    specification support.
+    Every query compiles the specification with to_sqlalchemy_filter() and
+    runs in the database: find pages with LIMIT/OFFSET in a stable order,
+    count runs SELECT count(*) and exists runs SELECT EXISTS, so no rows are
+    loaded to be filtered or counted in Python.
 
     Requirements:
     - Must have self.session (SQLAlchemy session)
-    - Must define self._entity_class (ORM model class)
+    - Must set _entity_class (ORM model class)
     - Must implement _entity_to_domain(entity) -> T
+    - May override _specification_select() to add loader options
+
+    The mixin must come before the specification interfaces in the bases,
+    so its methods implement their abstract ones.
 
     Usage:
         class ProductRepository(
-            RepositoryBase[Product],
+            SpecificationRepositoryMixin[Product],
+            IProductRepository,
             IProductSpecificationRepository,
-            SpecificationRepositoryMixin[Product]
         ):
-            def __init__(self, session: Session):
-                super().__init__(session)
-                self._entity_class = ProductOrm
+            _entity_class = ProductOrm
     """
 
-    def find_by_specification(self, specification: Specification[T]) -> List[T]:
-        """
-        Find all entities matching the specification.
+    session: Any
+    _entity_class: Any = None
 
-        Uses the specification's to_sqlalchemy_filter() method to
-        build a database query.
-        """
-        if not hasattr(self, 'session') or not hasattr(self, '_entity_class'):
-            raise NotImplementedError(
-                "SpecificationRepositoryMixin requires session and _entity_class"
-            )
+    def _entity_to_domain(self, entity) -> T:
+        raise NotImplementedError  # pragma: no cover
 
-        # Get SQLAlchemy filter from specification
-        filter_expr = specification.to_sqlalchemy_filter()
+    def _specification_select(self):
+        """The select the specification filters; override to add loader options."""
+        return select(self._entity_class)
 
-        # Query database
-        query = self.session.query(self._entity_class)
-        if filter_expr is not None:
-            query = query.filter(filter_expr)
+    def _specification_order(self):
+        """Columns giving pages a stable order; the primary key by default."""
+        return list(self._entity_class.__mapper__.primary_key)
 
-        entities = query.all()
+    def _filtered(self, stmt, specification: Specification[T]):
+        filter_expr = specification.to_sqlalchemy_filter()
+        return stmt if filter_expr is None else stmt.where(filter_expr)
 
-        # Convert to domain models
+    def find_by_specification(self, specification: Specification[T]) -> List[T]:
+        """Find all entities matching the specification."""
+        stmt = self._filtered(self._specification_select(), specification)
+        stmt = stmt.order_by(*self._specification_order())
+        entities = self.session.scalars(stmt).unique().all()
         return [self._entity_to_domain(e) for e in entities]
 
     def find_one_by_specification(
@@ -255,39 +262,20 @@ class SpecificationRepositoryMixin(Generic[T]):
         specification: Specification[T]
     ) -> Optional[T]:
         """Find first entity matching specification."""
-        if not hasattr(self, 'session') or not hasattr(self, '_entity_class'):
-            raise NotImplementedError(
-                "SpecificationRepositoryMixin requires session and _entity_class"
-            )
-
-        filter_expr = specification.to_sqlalchemy_filter()
-
-        query = self.session.query(self._entity_class)
-        if filter_expr is not None:
-            query = query.filter(filter_expr)
-
-        entity = query.first()
-
-        return self._entity_to_domain(entity) if entity else None
+        found = self.find_by_specification_paginated(specification, limit=1)
+        return found[0] if found else None
 
     def count_by_specification(self, specification: Specification[T]) -> int:
-        """Count entities matching specification."""
-        if not hasattr(self, 'session') or not hasattr(self, '_entity_class'):
-            raise NotImplementedError(
-                "SpecificationRepositoryMixin requires session and _entity_class"
-            )
-
-        filter_expr = specification.to_sqlalchemy_filter()
-
-        query = self.session.query(self._entity_class)
-        if filter_expr is not None:
-            query = query.filter(filter_expr)
-
-        return query.count()
+        """Count entities matching specification with SELECT count(*)."""
+        stmt = self._filtered(
+            select(func.count()).select_from(self._entity_class), specification
+        )
+        return self.session.scalar(stmt)
 
     def exists_by_specification(self, specification: Specification[T]) -> bool:
-        """Check if any entity matches specification."""
-        return self.count_by_specification(specification) > 0
+        """Check if any entity matches specification with SELECT EXISTS."""
+        subquery = self._filtered(select(self._entity_class), specification)
+        return bool(self.session.scalar(select(subquery.exists())))
 
     def find_by_specification_paginated(
         self,
@@ -296,19 +284,9 @@ class SpecificationRepositoryMixin(Generic[T]):
         offset: int = 0
     ) -> List[T]:
         """Find entities matching specification with pagination."""
-        if not hasattr(self, 'session') or not hasattr(self, '_entity_class'):
-            raise NotImplementedError(
-                "SpecificationRepositoryMixin requires session and _entity_class"
-            )
-
-        filter_expr = specification.to_sqlalchemy_filter()
-
-        query = self.session.query(self._entity_class)
-        if filter_expr is not None:
-            query = query.filter(filter_expr)
-
-        entities = query.limit(limit).offset(offset).all()
-
+        stmt = self._filtered(self._specification_select(), specification)
+        stmt = stmt.order_by(*self._specification_order()).limit(limit).offset(offset)
+        entities = self.session.scalars(stmt).unique().all()
         return [self._entity_to_domain(e) for e in entities]
 
 
@@ -1,5 +1,5 @@
-from .product import Department, Product
-from .inventory import InventoryMovement
+from .product import Department, Product, ProductRow, StockLevel
+from .inventory import InventoryMovement, StockDrift
 from .sale import Sale, SaleItem
 from .customer import Customer
 from .credit_payment import CreditPayment
@@ -11,12 +11,16 @@ from .invoice import Invoice
 from .cash_drawer import (
     CashDrawerEntry,
     CashDrawerEntryType,
+    CashDrawerSession,
 )  # Removed CashDrawerState, CashDrawerSummary
 
 __all__ = [
     "Department",
     "Product",
+    "ProductRow",
+    "StockLevel",
     "InventoryMovement",
+    "StockDrift",
     "Sale",
     "SaleItem",
     "Customer",
@@ -29,5 +33,6 @@ __all__ = [
     # "CashDrawerState", # Removed
     "CashDrawerEntry",
     "CashDrawerEntryType",
+    "CashDrawerSession",
     # "CashDrawerSummary" # Removed
 ]
@@ -28,3 +28,38 @@ class CashDrawerEntry(BaseModel):
     drawer_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CashDrawerSession(BaseModel):
+    """Domain model of a drawer session, from its START entry to its CLOSE."""
+
+    id: Optional[int] = None
+    drawer_id: Optional[int] = None
+    opened_at: datetime
+    opened_by: Optional[int] = None
+    opening_amount: Decimal = Decimal("0.00")
+    closed_at: Optional[datetime] = None
+    closed_by: Optional[int] = None
+    closing_amount: Optional[Decimal] = None
+    total_in: Decimal = Decimal("0.00")
+    total_out: Decimal = Decimal("0.00")  # Negative, as OUT entries are stored
+    total_sales: Decimal = Decimal("0.00")
+    total_returns: Decimal = Decimal("0.00")
+    entry_count: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @property
+    def is_open(self) -> bool:
+        return self.closed_at is None
+
+    @property
+    def expected_amount(self) -> Decimal:
+        """Cash that should be in the drawer: opening amount plus every movement."""
+        return (
+            self.opening_amount
+            + self.total_in
+            + self.total_out
+            + self.total_sales
+            + self.total_returns
+        )
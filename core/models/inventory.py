@@ -1,6 +1,6 @@
 from datetime import datetime
 from decimal import Decimal  # For precise quantity representation
-from typing import Optional
+from typing import NamedTuple, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 from core.models.enums import InventoryMovementType
@@ -21,3 +21,17 @@ class InventoryMovement(BaseModel):
     related_id: Optional[int] = None  # e.g., Sale ID, Purchase ID
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class StockDrift(NamedTuple):
+    """A product whose stored stock differs from the sum of its ledger movements."""
+
+    product_id: int
+    code: str
+    quantity_in_stock: Decimal
+    ledger_quantity: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        """Stock the ledger does not account for (negative when the ledger has more)."""
+        return self.quantity_in_stock - self.ledger_quantity
@@ -23,3 +23,8 @@ class Invoice:
     cae_due_date: Optional[datetime] = None
     notes: Optional[str] = None
     is_active: bool = True
+
+
+def format_invoice_number(point_of_sale: int, number: int) -> str:
+    """Invoice number as printed on the invoice: 0001-00000042 (Point of Sale - Number)."""
+    return f"{point_of_sale:04d}-{number:08d}"
@@ -1,4 +1,4 @@
-from typing import Optional, Any
+from typing import NamedTuple, Optional, Any
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 import datetime
 from decimal import Decimal
@@ -51,6 +51,7 @@ class Product(BaseModel):
     )  # Renamed from max_stock_level
     uses_inventory: bool = True  # Whether the product is tracked in inventory
     is_service: bool = False  # Service products don't have inventory
+    version: Optional[int] = None  # Row version when loaded; None skips the concurrency check
 
     @field_validator(
         "cost_price",
@@ -81,3 +82,74 @@ class Product(BaseModel):
         return attr
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class StockLevel(NamedTuple):
+    """A product's stock and row version right after a stock change."""
+
+    product_id: int
+    quantity_in_stock: Decimal
+    version: int
+
+
+class ProductRow:
+    """
+    Read-only projection of the product columns shown in list screens.
+
+    Built straight from a Core select of these columns, so listing a large
+    catalog skips pydantic validation and the nested Department per row.
+    Rows carry enough to sell or restock a product; use
+    ProductService.get_product_by_id to get the full Product for editing.
+    """
+
+    __slots__ = (
+        "id",
+        "code",
+        "description",
+        "sell_price",
+        "cost_price",
+        "quantity_in_stock",
+        "min_stock",
+        "uses_inventory",
+        "unit",
+        "department_id",
+        "department_name",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        code: str,
+        description: str,
+        sell_price: Optional[Decimal],
+        cost_price: Optional[Decimal],
+        quantity_in_stock: Decimal,
+        min_stock: Optional[Decimal],
+        uses_inventory: bool,
+        unit: str = "Unidad",
+        department_id: Optional[int] = None,
+        department_name: Optional[str] = None,
+    ):
+        self.id = id
+        self.code = code
+        self.description = description
+        self.sell_price = sell_price
+        self.cost_price = cost_price
+        self.quantity_in_stock = quantity_in_stock
+        self.min_stock = min_stock
+        self.uses_inventory = uses_inventory
+        self.unit = unit
+        self.department_id = department_id
+        self.department_name = department_name
+
+    def __eq__(self, other):
+        if isinstance(other, ProductRow):
+            return all(
+                getattr(self, name) == getattr(other, name) for name in self.__slots__
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ProductRow(id={self.id}, code='{self.code}', description='{self.description}')"
@@ -21,6 +21,7 @@ class SaleItem:
     product_code: str = ""  # Denormalized for easy display
     product_description: str = ""  # Denormalized for easy display
     product_unit: str = "Unidad"  # Unit of measure for the product
+    cost_price: Optional[Decimal] = None  # Cost snapshot at the time of sale
 
     def __post_init__(self):
         # Ensure quantity and unit_price are always Decimal objects
@@ -28,6 +29,8 @@ class SaleItem:
             self.quantity = Decimal(str(self.quantity))
         if not isinstance(self.unit_price, Decimal):
             self.unit_price = Decimal(str(self.unit_price))
+        if self.cost_price is not None and not isinstance(self.cost_price, Decimal):
+            self.cost_price = Decimal(str(self.cost_price))
 
     @property
     def subtotal(self) -> Decimal:
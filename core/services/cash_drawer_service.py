@@ -1,6 +1,6 @@
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from core.models.cash_drawer import CashDrawerEntry, CashDrawerEntryType
 from core.services.service_base import ServiceBase
@@ -228,6 +228,22 @@ class CashDrawerService(ServiceBase):
                 "opened_by": opened_by,
             }
 
+    def check_drawer_consistency(self, repair: bool = False) -> List[str]:
+        """
+        Recomputes the drawer balances and open states from the entry ledger.
+
+        Args:
+            repair: Rebuild the running drawer state when it differs from the ledger
+
+        Returns:
+            A list of the differences found, empty if everything matches
+        """
+        with unit_of_work() as uow:
+            problems = uow.cash_drawer.check_consistency(repair=repair)
+            for problem in problems:
+                self.logger.warning(problem)
+            return problems
+
     def close_drawer(
         self,
         actual_amount: Decimal,
@@ -1,10 +1,11 @@
 import re
 from decimal import Decimal
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Tuple
 import uuid
 
 from core.models.customer import Customer
 from core.models.credit_payment import CreditPayment
+from core.interfaces.repository_interfaces import Page
 from core.services.service_base import ServiceBase
 from infrastructure.persistence.unit_of_work import unit_of_work
 import logging
@@ -153,7 +154,7 @@ class CustomerService(ServiceBase):
         offset: Optional[int] = None,
     ) -> list[Customer]:
         """Find customers matching the search term, with optional pagination."""
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.customers.search(search_term, limit=limit, offset=offset)
 
     def get_customer_by_id(self, customer_id: Any) -> Customer | None:
@@ -166,7 +167,7 @@ class CustomerService(ServiceBase):
         Returns:
             Customer object if found, None otherwise
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             customer = uow.customers.get_by_id(customer_id)
             if customer:
                 return customer
@@ -181,9 +182,16 @@ class CustomerService(ServiceBase):
         self, limit: Optional[int] = None, offset: Optional[int] = None
     ) -> list[Customer]:
         """Get all customers, with optional pagination."""
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.customers.get_all(limit=limit, offset=offset)
 
+    def get_customers_page(
+        self, after: Optional[Tuple] = None, limit: int = 100
+    ) -> Page[Customer]:
+        """Get the customers after a cursor, ordered by name, for lazily filled lists."""
+        with unit_of_work(read_only=True) as uow:
+            return uow.customers.get_page(after, limit)
+
     # --- Methods related to Credit (Implementation for TASK-027) ---
 
     def apply_payment(
@@ -263,7 +271,7 @@ class CustomerService(ServiceBase):
 
     def get_customer_payments(self, customer_id: int) -> List[CreditPayment]:
         """Get all payments for a customer."""
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.credit_payments.get_for_customer(customer_id)
 
     # Optional: Credit Limit Check
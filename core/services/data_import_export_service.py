@@ -1,11 +1,10 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
 from decimal import Decimal
 import csv
 import json
 import os
 from datetime import datetime
 import logging
-import pandas as pd
 
 try:
     import openpyxl
@@ -17,68 +16,114 @@ except ImportError:
 
 from core.models.product import Product, Department
 from core.services.service_base import ServiceBase
+from core.events.product_events import ProductsImported
+from core.services.product_catalog_cache import product_catalog_cache
+from infrastructure.persistence.sqlite.backup import (
+    backup_database,
+    restore_database,
+    verify_backup,
+)
 from infrastructure.persistence.unit_of_work import unit_of_work
 
+# Filas por lote de importación: se validan juntas y se escriben con un único upsert
+IMPORT_CHUNK_SIZE = 5000
+
+# Columnas de importación, en el orden en que aparecen en las planillas Excel
+IMPORT_COLUMNS = (
+    "codigo",
+    "descripcion",
+    "precio_costo",
+    "precio_venta",
+    "stock",
+    "stock_minimo",
+    "unidad",
+    "usa_inventario",
+    "departamento",
+)
+
+TRUE_VALUES = ["si", "sí", "yes", "true", "1"]
+
+# Productos leídos por viaje a la base de datos al exportar
+EXPORT_BATCH_SIZE = 1000
+
+# Cada cuántas filas exportadas se informa el avance
+EXPORT_PROGRESS_INTERVAL = 5000
+
+EXPORT_HEADERS = [
+    "Código",
+    "Descripción",
+    "Precio Costo",
+    "Precio Venta",
+    "Stock",
+    "Stock Mínimo",
+    "Unidad",
+    "Usa Inventario",
+    "Departamento",
+]
+
+# Recibe (filas procesadas, total de filas o None si no se conoce)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
 
 class DataImportExportService(ServiceBase):
     """Servicio para importar y exportar datos del inventario."""
 
-    def __init__(self):
+    def __init__(self, engine=None):
+        """
+        Args:
+            engine: Motor SQLAlchemy de la base a respaldar; por defecto el de la aplicación
+        """
         super().__init__()
         self.logger = logging.getLogger(__name__)
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from infrastructure.persistence.sqlite.database import engine
+
+            self._engine = engine
+        return self._engine
+
+    def export_products_to_excel(
+        self,
+        file_path: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Exporta todos los productos a un archivo Excel.
+
+        Las filas se escriben a medida que se leen de la base de datos, con
+        openpyxl en modo de solo escritura, por lo que la memoria usada no
+        depende del tamaño del catálogo.
+
+        Args:
+            file_path: Ruta del archivo .xlsx
+            progress_callback: Recibe (filas exportadas, total de productos) cada
+                EXPORT_PROGRESS_INTERVAL filas y al terminar
+        """
+        if not EXCEL_AVAILABLE:
+            return {
+                "success": False,
+                "error": "openpyxl no está instalado. Instale con: pip install openpyxl",
+                "message": "Excel no está disponible",
+            }
 
-    def export_products_to_excel(self, file_path: str) -> Dict[str, Any]:
-        """Exporta todos los productos a un archivo Excel."""
-        try:
-            with unit_of_work() as uow:
-                products = uow.products.get_all()
-                departments = {dept.id: dept.name for dept in uow.departments.get_all()}
-
-                # Convertir a DataFrame
-                data = []
-                for product in products:
-                    data.append(
-                        {
-                            "Código": product.code,
-                            "Descripción": product.description,
-                            "Precio Costo": (
-                                float(product.cost_price) if product.cost_price else 0
-                            ),
-                            "Precio Venta": (
-                                float(product.sell_price) if product.sell_price else 0
-                            ),
-                            "Stock": (
-                                float(product.quantity_in_stock)
-                                if product.quantity_in_stock
-                                else 0
-                            ),
-                            "Stock Mínimo": (
-                                float(product.min_stock) if product.min_stock else 0
-                            ),
-                            "Unidad": (
-                                product.unit if hasattr(product, "unit") else "Unidad"
-                            ),
-                            "Usa Inventario": "Sí" if product.uses_inventory else "No",
-                            "Departamento": (
-                                departments.get(product.department_id, "")
-                                if product.department_id
-                                else ""
-                            ),
-                        }
-                    )
-
-                df = pd.DataFrame(data)
-                df.to_excel(file_path, index=False, engine="openpyxl")
-
-                self.logger.info(
-                    f"Exported {len(products)} products to Excel: {file_path}"
-                )
+        def write_rows(output_path: str, rows: Iterable[List[Any]]) -> None:
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("Productos")
+            ws.append(EXPORT_HEADERS)
+            for row in rows:
+                ws.append(row)
+            wb.save(output_path)
 
-                return {
-                    "success": True,
-                    "message": f"Productos exportados exitosamente a {os.path.basename(file_path)}",
-                    "products_exported": len(products),
-                }
+        try:
+            exported = self._export_products(file_path, write_rows, progress_callback)
+            self.logger.info(f"Exported {exported} products to Excel: {file_path}")
+            return {
+                "success": True,
+                "message": f"Productos exportados exitosamente a {os.path.basename(file_path)}",
+                "products_exported": exported,
+            }
 
         except Exception as e:
             self.logger.error(f"Error exporting products to Excel: {e}")
@@ -88,58 +133,36 @@ class DataImportExportService(ServiceBase):
                 "error": str(e),
             }
 
-    def export_products_to_csv(self, file_path: str) -> Dict[str, Any]:
-        """Exporta todos los productos a un archivo CSV."""
-        try:
-            with unit_of_work() as uow:
-                products = uow.products.get_all()
-                departments = {dept.id: dept.name for dept in uow.departments.get_all()}
+    def export_products_to_csv(
+        self,
+        file_path: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Exporta todos los productos a un archivo CSV.
 
-                # Convertir a DataFrame
-                data = []
-                for product in products:
-                    data.append(
-                        {
-                            "Código": product.code,
-                            "Descripción": product.description,
-                            "Precio Costo": (
-                                float(product.cost_price) if product.cost_price else 0
-                            ),
-                            "Precio Venta": (
-                                float(product.sell_price) if product.sell_price else 0
-                            ),
-                            "Stock": (
-                                float(product.quantity_in_stock)
-                                if product.quantity_in_stock
-                                else 0
-                            ),
-                            "Stock Mínimo": (
-                                float(product.min_stock) if product.min_stock else 0
-                            ),
-                            "Unidad": (
-                                product.unit if hasattr(product, "unit") else "Unidad"
-                            ),
-                            "Usa Inventario": "Sí" if product.uses_inventory else "No",
-                            "Departamento": (
-                                departments.get(product.department_id, "")
-                                if product.department_id
-                                else ""
-                            ),
-                        }
-                    )
+        Las filas se escriben a medida que se leen de la base de datos, por
+        lo que la memoria usada no depende del tamaño del catálogo.
 
-                df = pd.DataFrame(data)
-                df.to_csv(file_path, index=False, encoding="utf-8-sig")
+        Args:
+            file_path: Ruta del archivo .csv
+            progress_callback: Recibe (filas exportadas, total de productos) cada
+                EXPORT_PROGRESS_INTERVAL filas y al terminar
+        """
 
-                self.logger.info(
-                    f"Exported {len(products)} products to CSV: {file_path}"
-                )
+        def write_rows(output_path: str, rows: Iterable[List[Any]]) -> None:
+            with open(output_path, "w", encoding="utf-8-sig", newline="") as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(EXPORT_HEADERS)
+                writer.writerows(rows)
 
-                return {
-                    "success": True,
-                    "message": f"Productos exportados exitosamente a {os.path.basename(file_path)}",
-                    "products_exported": len(products),
-                }
+        try:
+            exported = self._export_products(file_path, write_rows, progress_callback)
+            self.logger.info(f"Exported {exported} products to CSV: {file_path}")
+            return {
+                "success": True,
+                "message": f"Productos exportados exitosamente a {os.path.basename(file_path)}",
+                "products_exported": exported,
+            }
 
         except Exception as e:
             self.logger.error(f"Error exporting products to CSV: {e}")
@@ -149,8 +172,81 @@ class DataImportExportService(ServiceBase):
                 "error": str(e),
             }
 
-    def import_products_from_excel(self, file_path: str) -> Dict[str, Any]:
-        """Importa productos desde un archivo Excel."""
+    def _export_products(
+        self,
+        file_path: str,
+        write_rows: Callable[[str, Iterable[List[Any]]], None],
+        progress_callback: Optional[ProgressCallback],
+    ) -> int:
+        """Recorre los productos con un cursor por lotes y los entrega a write_rows.
+
+        El archivo se escribe primero con un nombre temporal y se renombra al
+        final, así un error a mitad de camino no deja un archivo truncado.
+
+        Returns:
+            Cantidad de productos exportados
+        """
+        exported = 0
+        temp_path = f"{file_path}.tmp"
+        try:
+            with unit_of_work(read_only=True) as uow:
+                total = uow.products.count()
+
+                def rows():
+                    nonlocal exported
+                    for row in uow.products.iter_export_rows(EXPORT_BATCH_SIZE):
+                        yield self._format_export_row(row)
+                        exported += 1
+                        if progress_callback and exported % EXPORT_PROGRESS_INTERVAL == 0:
+                            progress_callback(exported, total)
+
+                write_rows(temp_path, rows())
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        if progress_callback:
+            progress_callback(exported, total)
+        return exported
+
+    @staticmethod
+    def _format_export_row(row: Tuple) -> List[Any]:
+        """Convierte una fila de iter_export_rows en los valores de EXPORT_HEADERS."""
+        (
+            code,
+            description,
+            cost_price,
+            sell_price,
+            quantity_in_stock,
+            min_stock,
+            unit,
+            uses_inventory,
+            department_name,
+        ) = row
+        return [
+            code,
+            description,
+            float(cost_price) if cost_price else 0,
+            float(sell_price) if sell_price else 0,
+            float(quantity_in_stock) if quantity_in_stock else 0,
+            float(min_stock) if min_stock else 0,
+            unit or "Unidad",
+            "Sí" if uses_inventory else "No",
+            department_name or "",
+        ]
+
+    def import_products_from_excel(
+        self,
+        file_path: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Importa productos desde un archivo Excel.
+
+        Args:
+            file_path: Ruta del archivo .xlsx
+            progress_callback: Recibe (filas procesadas, total de filas) tras cada lote
+        """
         if not EXCEL_AVAILABLE:
             return {
                 "success": False,
@@ -166,105 +262,25 @@ class DataImportExportService(ServiceBase):
             }
 
         try:
-            with unit_of_work() as uow:
-                wb = openpyxl.load_workbook(file_path)
+            # Modo de solo lectura: las filas se leen a medida que se procesan
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
                 ws = wb.active
+                total_rows = max((ws.max_row or 1) - 1, 0)
 
-                results = {
-                    "success": True,
-                    "total_rows": 0,
-                    "imported": 0,
-                    "updated": 0,
-                    "skipped": 0,
-                    "errors": [],
-                }
-
-                # Leer headers (primera fila)
-                [cell.value for cell in ws[1]]
-
-                # Procesar cada fila de datos
-                for row_num, row in enumerate(
-                    ws.iter_rows(min_row=2, values_only=True), 2
-                ):
-                    if not any(row):  # Saltar filas vacías
-                        continue
-
-                    results["total_rows"] += 1
-
-                    try:
-                        # Extraer datos de la fila
-                        codigo = str(row[0]).strip() if row[0] else ""
-                        descripcion = str(row[1]).strip() if row[1] else ""
-                        precio_costo = float(row[2]) if row[2] is not None else 0.0
-                        precio_venta = float(row[3]) if row[3] is not None else 0.0
-                        stock = float(row[4]) if row[4] is not None else 0.0
-                        stock_minimo = float(row[5]) if row[5] is not None else 0.0
-                        unidad = str(row[6]).strip() if row[6] else "U"
-                        usa_inventario = (
-                            str(row[7]).strip().lower()
-                            in ["si", "sí", "yes", "true", "1"]
-                            if row[7]
-                            else True
-                        )
-                        departamento_nombre = str(row[8]).strip() if row[8] else ""
-
-                        if not codigo or not descripcion:
-                            results["errors"].append(
-                                f"Fila {row_num}: Código y descripción son obligatorios"
-                            )
-                            results["skipped"] += 1
+                def rows():
+                    for row_num, row in enumerate(
+                        ws.iter_rows(min_row=2, values_only=True), 2
+                    ):
+                        if not any(row):  # Saltar filas vacías
                             continue
+                        row = tuple(row) + (None,) * (len(IMPORT_COLUMNS) - len(row))
+                        yield row_num, dict(zip(IMPORT_COLUMNS, row))
 
-                        # Buscar departamento por nombre
-                        department_id = None
-                        if departamento_nombre and departamento_nombre != "-":
-                            departments = uow.departments.get_all()
-                            for dept in departments:
-                                if dept.name.lower() == departamento_nombre.lower():
-                                    department_id = dept.id
-                                    break
-
-                        # Verificar si el producto ya existe
-                        existing_product = uow.products.get_by_code(codigo)
-
-                        product_data = {
-                            "code": codigo,
-                            "description": descripcion,
-                            "cost_price": Decimal(str(precio_costo)),
-                            "sell_price": Decimal(str(precio_venta)),
-                            "quantity_in_stock": Decimal(str(stock)),
-                            "min_stock": Decimal(str(stock_minimo)),
-                            "unit": unidad,
-                            "uses_inventory": usa_inventario,
-                            "department_id": department_id,
-                        }
-
-                        if existing_product:
-                            # Actualizar producto existente
-                            for key, value in product_data.items():
-                                setattr(existing_product, key, value)
-                            uow.products.update(existing_product)
-                            results["updated"] += 1
-                        else:
-                            # Crear nuevo producto
-                            new_product = Product(**product_data)
-                            uow.products.add(new_product)
-                            results["imported"] += 1
-
-                    except Exception as e:
-                        error_msg = f"Fila {row_num}: {str(e)}"
-                        results["errors"].append(error_msg)
-                        results["skipped"] += 1
-                        self.logger.error(error_msg)
-
-                # Commit de los cambios
-                uow.commit()
-
-                results["message"] = (
-                    f"Importación completada: {results['imported']} nuevos, {results['updated']} actualizados, {results['skipped']} omitidos"
-                )
-
-                return results
+                results = self._import_product_rows(rows(), total_rows, progress_callback)
+            finally:
+                wb.close()
+            return results
 
         except Exception as e:
             self.logger.error(f"Error importando productos desde Excel: {e}")
@@ -274,8 +290,18 @@ class DataImportExportService(ServiceBase):
                 "message": f"Error al importar: {e}",
             }
 
-    def import_products_from_csv(self, file_path: str) -> Dict[str, Any]:
-        """Importa productos desde un archivo CSV."""
+    def import_products_from_csv(
+        self,
+        file_path: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Importa productos desde un archivo CSV.
+
+        Args:
+            file_path: Ruta del archivo .csv
+            progress_callback: Recibe (filas procesadas, total de filas) tras cada lote;
+                el total es None porque el archivo se lee una sola vez
+        """
         if not os.path.exists(file_path):
             return {
                 "success": False,
@@ -284,110 +310,276 @@ class DataImportExportService(ServiceBase):
             }
 
         try:
-            with unit_of_work() as uow:
-                results = {
-                    "success": True,
-                    "total_rows": 0,
-                    "imported": 0,
-                    "updated": 0,
-                    "skipped": 0,
-                    "errors": [],
-                }
-
-                with open(file_path, "r", encoding="utf-8") as csvfile:
-                    # Detectar el dialecto del CSV
-                    sample = csvfile.read(1024)
-                    csvfile.seek(0)
-                    sniffer = csv.Sniffer()
-                    delimiter = sniffer.sniff(sample).delimiter
+            with open(file_path, "r", encoding="utf-8") as csvfile:
+                # Detectar el dialecto del CSV
+                sample = csvfile.read(1024)
+                csvfile.seek(0)
+                sniffer = csv.Sniffer()
+                delimiter = sniffer.sniff(sample).delimiter
+
+                reader = csv.DictReader(csvfile, delimiter=delimiter)
+                return self._import_product_rows(
+                    enumerate(reader, 2), None, progress_callback
+                )
 
-                    reader = csv.DictReader(csvfile, delimiter=delimiter)
+        except Exception as e:
+            self.logger.error(f"Error importando productos desde CSV: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Error al importar: {e}",
+            }
 
-                    for row_num, row in enumerate(reader, 2):
-                        results["total_rows"] += 1
+    def _import_product_rows(
+        self,
+        rows: Iterable[Tuple[int, Dict[str, Any]]],
+        total_rows: Optional[int],
+        progress_callback: Optional[ProgressCallback],
+    ) -> Dict[str, Any]:
+        """Importa filas (número de fila, valores por columna) en lotes de IMPORT_CHUNK_SIZE.
+
+        Los departamentos se resuelven una sola vez; cada lote se valida en memoria,
+        consulta los códigos existentes con una sola consulta y se escribe con un
+        único upsert. Toda la importación ocurre en una transacción.
+        """
+        results = {
+            "success": True,
+            "total_rows": 0,
+            "imported": 0,
+            "updated": 0,
+            "skipped": 0,
+            "errors": [],
+        }
+
+        with unit_of_work() as uow:
+            departments = {
+                dept.name.lower(): dept.id for dept in uow.departments.get_all()
+            }
 
-                        try:
-                            # Extraer datos de la fila
-                            codigo = row.get("codigo", "").strip()
-                            descripcion = row.get("descripcion", "").strip()
-                            precio_costo = float(row.get("precio_costo", 0))
-                            precio_venta = float(row.get("precio_venta", 0))
-                            stock = float(row.get("stock", 0))
-                            stock_minimo = float(row.get("stock_minimo", 0))
-                            unidad = row.get("unidad", "U").strip()
-                            usa_inventario = row.get(
-                                "usa_inventario", "Si"
-                            ).strip().lower() in ["si", "sí", "yes", "true", "1"]
-                            departamento_nombre = row.get("departamento", "").strip()
-
-                            if not codigo or not descripcion:
-                                results["errors"].append(
-                                    f"Fila {row_num}: Código y descripción son obligatorios"
-                                )
-                                results["skipped"] += 1
-                                continue
+            chunk = []
+            for row_num, row in rows:
+                results["total_rows"] += 1
+                chunk.append((row_num, row))
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    self._import_product_chunk(uow, chunk, departments, results)
+                    chunk = []
+                    if progress_callback:
+                        progress_callback(results["total_rows"], total_rows)
+            if chunk:
+                self._import_product_chunk(uow, chunk, departments, results)
+            if progress_callback:
+                progress_callback(results["total_rows"], total_rows)
+
+            written = results["imported"] + results["updated"]
+            if written:
+                uow.add_event(ProductsImported(product_count=written))
+
+            # Commit de los cambios
+            uow.commit()
+
+        # El upsert masivo no publica eventos por producto
+        product_catalog_cache.invalidate_all()
+
+        self.logger.info(
+            f"Imported {results['total_rows']} rows: {results['imported']} new, "
+            f"{results['updated']} updated, {results['skipped']} skipped"
+        )
+        results["message"] = (
+            f"Importación completada: {results['imported']} nuevos, {results['updated']} actualizados, {results['skipped']} omitidos"
+        )
+        return results
+
+    def _import_product_chunk(
+        self,
+        uow,
+        chunk: List[Tuple[int, Dict[str, Any]]],
+        departments: Dict[str, int],
+        results: Dict[str, Any],
+    ) -> None:
+        """Valida un lote de filas y lo escribe con un único upsert."""
+        valid_rows = []
+        for row_num, row in chunk:
+            try:
+                product_data = self._parse_import_row(row, departments)
+                if product_data is None:
+                    results["errors"].append(
+                        f"Fila {row_num}: Código y descripción son obligatorios"
+                    )
+                    results["skipped"] += 1
+                    continue
+                Product(**product_data)  # Mismas reglas que un alta individual
+                valid_rows.append(product_data)
+            except Exception as e:
+                error_msg = f"Fila {row_num}: {str(e)}"
+                results["errors"].append(error_msg)
+                results["skipped"] += 1
+                self.logger.error(error_msg)
+
+        existing_codes = set(
+            uow.products.get_ids_by_codes(list({r["code"] for r in valid_rows}))
+        )
+        # Un código repetido en el archivo actualiza el producto; gana la última fila
+        rows_by_code = {}
+        for product_data in valid_rows:
+            code = product_data["code"]
+            if code in existing_codes or code in rows_by_code:
+                results["updated"] += 1
+            else:
+                results["imported"] += 1
+            rows_by_code[code] = product_data
+
+        uow.products.bulk_upsert(list(rows_by_code.values()))
+
+    @staticmethod
+    def _parse_import_row(
+        row: Dict[str, Any], departments: Dict[str, int]
+    ) -> Optional[Dict[str, Any]]:
+        """Convierte una fila del archivo en valores de producto.
+
+        Devuelve None si falta el código o la descripción.
+        """
+
+        def text(column: str, default: str = "") -> str:
+            value = row.get(column)
+            return str(value).strip() if value not in (None, "") else default
+
+        def number(column: str) -> Decimal:
+            value = row.get(column)
+            if value is None or (isinstance(value, str) and not value.strip()):
+                return Decimal("0.0")
+            return Decimal(str(float(value)))
+
+        codigo = text("codigo")
+        descripcion = text("descripcion")
+        if not codigo or not descripcion:
+            return None
+
+        usa_inventario = text("usa_inventario")
+        departamento_nombre = text("departamento")
+
+        return {
+            "code": codigo,
+            "description": descripcion,
+            "cost_price": number("precio_costo"),
+            "sell_price": number("precio_venta"),
+            "quantity_in_stock": number("stock"),
+            "min_stock": number("stock_minimo"),
+            "unit": text("unidad", "U"),
+            "uses_inventory": (
+                usa_inventario.lower() in TRUE_VALUES if usa_inventario else True
+            ),
+            # Buscar departamento por nombre
+            "department_id": (
+                departments.get(departamento_nombre.lower())
+                if departamento_nombre and departamento_nombre != "-"
+                else None
+            ),
+        }
+
+    def create_database_backup(
+        self,
+        backup_path: str,
+        compress: Optional[bool] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """Crea una copia completa de la base de datos sin detener las ventas.
+
+        Usa la API de respaldo en línea de SQLite, por páginas, y verifica la
+        integridad de la copia antes de informar el éxito.
+
+        Args:
+            backup_path: Archivo de respaldo (.db, o .db.gz para comprimirlo)
+            compress: Comprimir con gzip; por defecto según la extensión
+            progress_callback: Recibe (páginas copiadas, total de páginas)
+        """
+        if compress is None:
+            compress = backup_path.endswith(".gz")
+        try:
+            result = backup_database(
+                self.engine, backup_path, compress=compress, progress=progress_callback
+            )
+            problems = verify_backup(result.path)
+            if problems:
+                os.remove(result.path)
+                return {
+                    "success": False,
+                    "error": "; ".join(problems[:5]),
+                    "message": "El respaldo creado no pasó la verificación de integridad.",
+                }
 
-                            # Buscar departamento por nombre
-                            department_id = None
-                            if departamento_nombre and departamento_nombre != "-":
-                                departments = uow.departments.get_all()
-                                for dept in departments:
-                                    if dept.name.lower() == departamento_nombre.lower():
-                                        department_id = dept.id
-                                        break
-
-                            # Verificar si el producto ya existe
-                            existing_product = uow.products.get_by_code(codigo)
-
-                            product_data = {
-                                "code": codigo,
-                                "description": descripcion,
-                                "cost_price": Decimal(str(precio_costo)),
-                                "sell_price": Decimal(str(precio_venta)),
-                                "quantity_in_stock": Decimal(str(stock)),
-                                "min_stock": Decimal(str(stock_minimo)),
-                                "unit": unidad,
-                                "uses_inventory": usa_inventario,
-                                "department_id": department_id,
-                            }
+            self.logger.info(f"Created database backup {backup_path}")
+            return {
+                "success": True,
+                "file_path": result.path,
+                "size_bytes": result.size_bytes,
+                "duration_seconds": result.duration_seconds,
+                "message": (
+                    f"Respaldo creado y verificado: {os.path.basename(result.path)} "
+                    f"({result.size_bytes / (1024 * 1024):.1f} MB en {result.duration_seconds:.1f} s)."
+                ),
+            }
 
-                            if existing_product:
-                                # Actualizar producto existente
-                                for key, value in product_data.items():
-                                    setattr(existing_product, key, value)
-                                uow.products.update(existing_product)
-                                results["updated"] += 1
-                            else:
-                                # Crear nuevo producto
-                                new_product = Product(**product_data)
-                                uow.products.add(new_product)
-                                results["imported"] += 1
+        except Exception as e:
+            self.logger.error(f"Error creating database backup: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Error al crear respaldo: {e}",
+            }
 
-                        except Exception as e:
-                            error_msg = f"Fila {row_num}: {str(e)}"
-                            results["errors"].append(error_msg)
-                            results["skipped"] += 1
-                            self.logger.error(error_msg)
+    def verify_database_backup(self, backup_path: str) -> Dict[str, Any]:
+        """Verifica la integridad de un respaldo de la base de datos."""
+        problems = verify_backup(backup_path)
+        if problems:
+            return {
+                "success": False,
+                "errors": problems,
+                "message": "El respaldo está dañado.",
+            }
+        return {"success": True, "errors": [], "message": "El respaldo está íntegro."}
 
-                # Commit de los cambios
-                uow.commit()
+    def restore_database_backup(self, backup_path: str) -> Dict[str, Any]:
+        """Reemplaza los datos actuales por los de un respaldo de la base de datos.
 
-                results["message"] = (
-                    f"Importación completada: {results['imported']} nuevos, {results['updated']} actualizados, {results['skipped']} omitidos"
-                )
+        El respaldo se verifica y se adjunta a la base actual; todas las tablas
+        se copian en una única transacción, de modo que un error no deja la
+        base a medio restaurar.
+        """
+        if not os.path.exists(backup_path):
+            return {
+                "success": False,
+                "error": "Archivo no encontrado",
+                "message": f"El archivo {backup_path} no existe.",
+            }
 
-                return results
+        try:
+            restored = restore_database(self.engine, backup_path)
+            product_catalog_cache.invalidate_all()
+            self.logger.info(f"Restored database backup {backup_path}")
+            return {
+                "success": True,
+                "tables_restored": len(restored),
+                "rows_restored": sum(restored.values()),
+                "products_restored": restored.get("products", 0),
+                "message": (
+                    f"Respaldo restaurado: {sum(restored.values())} registros "
+                    f"en {len(restored)} tablas."
+                ),
+            }
 
         except Exception as e:
-            self.logger.error(f"Error importando productos desde CSV: {e}")
+            self.logger.error(f"Error restoring database backup: {e}")
             return {
                 "success": False,
                 "error": str(e),
-                "message": f"Error al importar: {e}",
+                "message": f"Error al restaurar respaldo: {e}",
             }
 
     def create_backup(self, backup_path: str) -> Dict[str, Any]:
-        """Crea un respaldo completo de la base de datos en formato JSON."""
+        """Crea un respaldo de productos y departamentos en formato JSON.
+
+        Para un respaldo completo de la base de datos use create_database_backup.
+        """
         try:
             with unit_of_work() as uow:
                 # Obtener todos los datos
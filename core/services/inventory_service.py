@@ -2,10 +2,11 @@ from typing import List, Optional, Any, Dict
 from decimal import Decimal
 from datetime import datetime
 
-from core.models.inventory import InventoryMovement
+from core.models.inventory import InventoryMovement, StockDrift
 from core.models.enums import InventoryMovementType
-from core.models.product import Product
+from core.models.product import Product, ProductRow
 from core.services.service_base import ServiceBase
+from core.events.inventory_events import StockMovementRecorded
 from infrastructure.persistence.unit_of_work import unit_of_work
 
 
@@ -39,18 +40,10 @@ class InventoryService(ServiceBase):
                     f"Product {product.code} does not use inventory control."
                 )
 
-            # Ensure quantity_in_stock is Decimal before adding
-            current_stock = (
-                product.quantity_in_stock
-                if isinstance(product.quantity_in_stock, Decimal)
-                else Decimal(str(product.quantity_in_stock))
-            )
-            new_quantity = current_stock + quantity
-
-            # Update product stock (and cost if provided)
-            uow.products.update_stock(
+            # Added to the stored stock in one UPDATE, so concurrent tills keep each other's changes
+            updated_product = uow.products.update_stock(
                 product_id, quantity, new_cost_price
-            )  # Pass quantity change, not new total
+            )
 
             # Log the movement
             movement = InventoryMovement(
@@ -61,13 +54,17 @@ class InventoryService(ServiceBase):
                 user_id=user_id,
             )
             uow.inventory.add_movement(movement)
+            uow.add_event(
+                StockMovementRecorded(
+                    product_id=product_id,
+                    quantity=movement.quantity,
+                    movement_type=movement.movement_type.value,
+                    related_id=movement.related_id,
+                    user_id=user_id,
+                )
+            )
 
-            # Update local product object for return
-            product.quantity_in_stock = new_quantity
-            if new_cost_price is not None:
-                product.cost_price = new_cost_price
-
-            return product
+            return updated_product
 
     def adjust_inventory(
         self,
@@ -103,8 +100,8 @@ class InventoryService(ServiceBase):
                     f"Adjustment results in negative stock ({new_quantity}) for product {product.code}, which is not allowed."
                 )
 
-            # Update product stock - pass the change in quantity, not the new total
-            uow.products.update_stock(product_id, quantity)
+            # The UPDATE checks the stock again, against the stored value
+            updated_product = uow.products.update_stock(product_id, quantity)
 
             # Log the movement
             movement = InventoryMovement(
@@ -115,11 +112,17 @@ class InventoryService(ServiceBase):
                 user_id=user_id,
             )
             uow.inventory.add_movement(movement)
+            uow.add_event(
+                StockMovementRecorded(
+                    product_id=product_id,
+                    quantity=movement.quantity,
+                    movement_type=movement.movement_type.value,
+                    related_id=movement.related_id,
+                    user_id=user_id,
+                )
+            )
 
-            # Update local product object for return
-            product.quantity_in_stock = new_quantity
-
-            return product
+            return updated_product
 
     def decrease_stock_for_sale(
         self,
@@ -173,7 +176,7 @@ class InventoryService(ServiceBase):
                     f"Insufficient stock for product {product.code} (requires {quantity}, has {current_stock}). Sale {sale_id}"
                 )
 
-            # Update stock - pass the negative quantity as change
+            # The UPDATE checks the stock again, so a concurrent sale cannot oversell
             uow.products.update_stock(product_id, -quantity)
 
             # Log movement
@@ -186,6 +189,15 @@ class InventoryService(ServiceBase):
                 user_id=user_id,
             )
             uow.inventory.add_movement(movement)
+            uow.add_event(
+                StockMovementRecorded(
+                    product_id=product_id,
+                    quantity=movement.quantity,
+                    movement_type=movement.movement_type.value,
+                    related_id=movement.related_id,
+                    user_id=user_id,
+                )
+            )
 
     # --- Reporting Methods ---
 
@@ -201,18 +213,70 @@ class InventoryService(ServiceBase):
         with unit_of_work() as uow:
             return uow.products.get_low_stock_products(threshold)
 
+    def get_inventory_rows(self, department_id: Optional[int] = None) -> List[ProductRow]:
+        """Returns list-screen rows of the inventory tracked products."""
+        with unit_of_work(read_only=True) as uow:
+            return uow.products.get_inventory_rows(department_id)
+
+    def get_low_stock_rows(
+        self, threshold: Decimal = Decimal("10")
+    ) -> List[ProductRow]:
+        """Returns list-screen rows of the products with stock below the threshold."""
+        with unit_of_work(read_only=True) as uow:
+            return uow.products.get_low_stock_rows(threshold)
+
     def get_inventory_movements(
         self,
         product_id: Optional[int] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         movement_type: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> List[InventoryMovement]:
-        """Returns inventory movements with optional filters."""
+        """Returns inventory movements with optional filters, newest first."""
         with unit_of_work() as uow:
             return uow.inventory.get_movements(
                 product_id=product_id,
                 start_date=start_date,
                 end_date=end_date,
                 movement_type=movement_type,
+                limit=limit,
             )
+
+    def get_stock_as_of(self, product_ids: List[int], timestamp: datetime) -> Dict[int, Decimal]:
+        """Returns the products' stock at an instant (e.g. a month-end close), from the ledger."""
+        with unit_of_work(read_only=True) as uow:
+            return uow.inventory.stock_as_of(product_ids, timestamp)
+
+    def refresh_stock_checkpoints(self, granularity: str = "month", rebuild: bool = False) -> int:
+        """Checkpoints the ledger up to the current period; returns the checkpoints written."""
+        with unit_of_work() as uow:
+            return uow.inventory.refresh_stock_checkpoints(granularity, rebuild=rebuild)
+
+    def reconcile_stock(
+        self, record_adjustments: bool = False, user_id: Optional[int] = None
+    ) -> List[StockDrift]:
+        """
+        Returns the products whose stock differs from their movement ledger.
+
+        With record_adjustments, an ADJUSTMENT movement is recorded for each
+        difference, so the ledger accounts for stock a product got without a
+        movement (its opening stock, an import). The stock is not changed.
+        """
+        with unit_of_work() as uow:
+            drift = uow.inventory.find_stock_drift()
+            if record_adjustments and drift:
+                uow.inventory.add_movements(
+                    [
+                        InventoryMovement(
+                            product_id=product.product_id,
+                            quantity=product.difference,
+                            movement_type=InventoryMovementType.ADJUSTMENT,
+                            description="Conciliación de existencias",
+                            user_id=user_id,
+                        )
+                        for product in drift
+                    ]
+                )
+                self.logger.info(f"Recorded {len(drift)} stock reconciliation movements")
+            return drift
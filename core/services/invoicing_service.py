@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime
 import os
@@ -11,7 +11,7 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 
-from core.models.invoice import Invoice
+from core.models.invoice import Invoice, format_invoice_number
 from core.models.sale import Sale
 from core.models.customer import Customer
 from config import config
@@ -222,45 +222,29 @@ class InvoicingService(ServiceBase):
 
     def _generate_next_invoice_number(self, invoice_repo: IInvoiceRepository) -> str:
         """
-        Generate the next available invoice number.
+        Allocate the next invoice number of the configured point of sale.
         Format: 0001-00000001 (Point of Sale - Number)
-        """
-        # For now, use a simple approach: get the last invoice and increment
-        # In a production system, this would need to be more robust and potentially
-        # use a sequence or retrieve from a fiscal service
 
-        # Default POS number (could be configurable)
-        pos_number = "0001"
+        The number is taken from the point of sale's sequence in the invoice's
+        own transaction, so numbers stay consecutive without reading the
+        existing invoices.
+        """
+        point_of_sale = config.invoice_point_of_sale
+        number = invoice_repo.allocate_invoice_number(point_of_sale)
+        return format_invoice_number(point_of_sale, number)
 
-        try:
-            # Get all invoices and find the highest number
-            all_invoices = invoice_repo.get_all()
-
-            if not all_invoices:
-                # First invoice
-                return f"{pos_number}-00000001"
-
-            # Find highest invoice number
-            highest_number = 0
-            for invoice in all_invoices:
-                if invoice.invoice_number:
-                    parts = invoice.invoice_number.split("-")
-                    if len(parts) == 2:
-                        try:
-                            number = int(parts[1])
-                            if number > highest_number:
-                                highest_number = number
-                        except ValueError:
-                            continue
-
-            # Increment and format
-            next_number = highest_number + 1
-            return f"{pos_number}-{next_number:08d}"
+    def verify_invoice_numbers(self) -> List[str]:
+        """
+        Check the configured point of sale's invoice numbers for gaps and duplicates.
 
-        except Exception as e:
-            # Log the error and use a fallback approach
-            self.logger.error(f"Error generating invoice number: {e}")
-            return f"{pos_number}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        Returns:
+            A list of the problems found, empty if the numbering is complete
+        """
+        with unit_of_work() as uow:
+            problems = uow.invoices.verify_invoice_sequence(config.invoice_point_of_sale)
+            for problem in problems:
+                self.logger.warning(problem)
+            return problems
 
     def _determine_invoice_type(self, iva_condition: Optional[str]) -> str:
         """
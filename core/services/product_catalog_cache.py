@@ -0,0 +1,343 @@
+"""
+Process-wide, in-memory cache of catalog products.
+
+Products are kept in least-recently-used order and looked up by id or by
+code, so barcode lookups at the till do not reach the database once a
+product has been seen. Product search results are cached as lists of ids
+on top of the same entries; searches for ProductRow projections, as used
+by the till's suggestions, are cached as the row lists themselves.
+
+The cache is bounded both by entry count and by an estimate of the memory
+held by the cached products. It is kept consistent through domain events:
+product changes and stock movements published by the EventPublisher after
+a commit drop the affected entries, a department change drops that
+department's products, and bulk price changes drop them all.
+
+Events only reach the cache of the process that published them, so entries
+also expire ``ttl`` seconds after they were loaded: changes made on another
+terminal are seen at most that late.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import config
+from core.domain_events import DomainEvent, EventPublisher
+from core.events.inventory_events import StockMovementRecorded
+from core.events.product_events import (
+    BulkPriceChanged,
+    DepartmentUpdated,
+    ProductCreated,
+    ProductDeleted,
+    ProductPriceChanged,
+    ProductUpdated,
+)
+from core.models.product import Product, ProductRow
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_SEARCHES = 500
+DEFAULT_TTL = 30.0
+
+# Events that change a single product; all other subscribed events only
+# affect search results, except department changes, which drop the
+# department's products, and bulk changes, which drop everything
+_PRODUCT_EVENTS = (ProductUpdated, ProductPriceChanged, ProductDeleted, StockMovementRecorded)
+_DEPARTMENT_EVENTS = (DepartmentUpdated,)
+_BULK_EVENTS = (BulkPriceChanged,)
+
+
+class ProductCatalogCache:
+    """
+    LRU cache of Product objects keyed by id and code.
+
+    Cached products are copied on the way in and out, so callers are free to
+    modify what they get back. Products and search results older than ttl
+    seconds (None: no limit) are loaded again. All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_searches: int = DEFAULT_MAX_SEARCHES,
+        ttl: Optional[float] = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_searches = max_searches
+        self.ttl = ttl
+        self._clock = clock
+
+        self._lock = threading.RLock()
+        # Entries are (product, estimated size, load time)
+        self._products: "OrderedDict[Any, Tuple[Product, int, float]]" = OrderedDict()
+        self._ids_by_code: Dict[str, Any] = {}
+        self._searches: "OrderedDict[Tuple[str, Optional[int]], Tuple[List[Any], float]]" = OrderedDict()
+        self._row_searches: "OrderedDict[Tuple[str, Optional[int]], Tuple[List[ProductRow], float]]" = (
+            OrderedDict()
+        )
+        self._size_bytes = 0
+        # Bumped on every invalidation; loads that started before it are not stored
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # --- Lookups ---
+
+    def get_by_id(
+        self, product_id: Any, loader: Callable[[], Optional[Product]]
+    ) -> Optional[Product]:
+        """Returns the product with the given id, calling loader on a miss."""
+        with self._lock:
+            entry = self._fresh_entry(product_id)
+            if entry is not None:
+                return self._hit(product_id, entry)
+            self.misses += 1
+            generation = self._generation
+
+        product = loader()
+        if product is not None:
+            self._store(product, generation)
+        return product
+
+    def get_by_code(
+        self, code: str, loader: Callable[[], Optional[Product]]
+    ) -> Optional[Product]:
+        """Returns the product with the given code, calling loader on a miss."""
+        with self._lock:
+            product_id = self._ids_by_code.get(code)
+            entry = self._fresh_entry(product_id) if product_id is not None else None
+            if entry is not None:
+                return self._hit(product_id, entry)
+            self.misses += 1
+            generation = self._generation
+
+        product = loader()
+        if product is not None:
+            self._store(product, generation)
+        return product
+
+    def search(
+        self, term: str, limit: Optional[int], loader: Callable[[], List[Product]]
+    ) -> List[Product]:
+        """Returns cached results for a search term, calling loader on a miss."""
+        key = (term, limit)
+        with self._lock:
+            cached = self._searches.get(key)
+            if cached is not None:
+                product_ids, stored_at = cached
+                entries = [self._fresh_entry(pid) for pid in product_ids]
+                # Results are only usable if none of their products was evicted or expired
+                if self._is_fresh(stored_at) and all(entry is not None for entry in entries):
+                    self._searches.move_to_end(key)
+                    self.hits += 1
+                    for pid in product_ids:
+                        self._products.move_to_end(pid)
+                    return [product.model_copy() for product, _, _ in entries]
+                if not self._is_fresh(stored_at):
+                    self.expirations += 1
+                del self._searches[key]
+            self.misses += 1
+            generation = self._generation
+
+        products = loader()
+        with self._lock:
+            if generation != self._generation:
+                return products
+            for product in products:
+                self._store(product, generation)
+            if all(p.id in self._products for p in products):
+                self._searches[key] = ([p.id for p in products], self._clock())
+                while len(self._searches) > self.max_searches:
+                    self._searches.popitem(last=False)
+        return products
+
+    def search_rows(
+        self, term: str, limit: Optional[int], loader: Callable[[], List[ProductRow]]
+    ) -> List[ProductRow]:
+        """
+        Returns cached ProductRow results for a search term, calling loader on a miss.
+
+        Rows are read-only projections, so only the list is copied.
+        """
+        key = (term, limit)
+        with self._lock:
+            cached = self._row_searches.get(key)
+            if cached is not None and self._is_fresh(cached[1]):
+                self._row_searches.move_to_end(key)
+                self.hits += 1
+                return list(cached[0])
+            if cached is not None:
+                del self._row_searches[key]
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generation
+
+        rows = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._row_searches[key] = (list(rows), self._clock())
+                while len(self._row_searches) > self.max_searches:
+                    self._row_searches.popitem(last=False)
+        return rows
+
+    # --- Invalidation ---
+
+    def invalidate(self, product_id: Any) -> None:
+        """Drops one product and all cached search results."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._remove(product_id)
+            self._searches.clear()
+            self._row_searches.clear()
+
+    def invalidate_department(self, department_id: Any) -> None:
+        """Drops the products of a department, which carry its name, and all cached search results."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for product_id in [
+                pid for pid, (product, _, _) in self._products.items() if product.department_id == department_id
+            ]:
+                self._remove(product_id)
+            self._searches.clear()
+            self._row_searches.clear()
+
+    def invalidate_searches(self) -> None:
+        """Drops cached search results, e.g. after a product was added."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._searches.clear()
+            self._row_searches.clear()
+
+    def invalidate_all(self) -> None:
+        """Drops every cached entry, e.g. after a bulk write that publishes no events."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._products.clear()
+            self._ids_by_code.clear()
+            self._searches.clear()
+            self._row_searches.clear()
+            self._size_bytes = 0
+
+    def clear(self) -> None:
+        """Drops every cached entry and resets the counters."""
+        with self._lock:
+            self.invalidate_all()
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def handle_event(self, event: DomainEvent) -> None:
+        """EventPublisher handler that invalidates entries affected by an event."""
+        if isinstance(event, _BULK_EVENTS):
+            self.invalidate_all()
+        elif isinstance(event, _DEPARTMENT_EVENTS):
+            self.invalidate_department(event.department_id)
+        elif isinstance(event, _PRODUCT_EVENTS):
+            self.invalidate(event.product_id)
+        else:
+            self.invalidate_searches()
+
+    def attach(self) -> None:
+        """
+        Subscribes handle_event to the product and stock events.
+
+        Idempotent, so it can be called before each use to survive
+        EventPublisher.clear_handlers().
+        """
+        for event_type in (ProductCreated,) + _PRODUCT_EVENTS + _DEPARTMENT_EVENTS + _BULK_EVENTS:
+            if self.handle_event not in EventPublisher.get_handlers(event_type):
+                # Inline: the GUI reads through the cache right after committing
+                EventPublisher.subscribe(event_type, self.handle_event, inline=True)
+
+    # --- Statistics ---
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the current size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "entries": len(self._products),
+                "searches": len(self._searches) + len(self._row_searches),
+                "size_bytes": self._size_bytes,
+            }
+
+    # --- Internals (callers hold the lock) ---
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return self.ttl is None or self._clock() - stored_at < self.ttl
+
+    def _fresh_entry(self, product_id: Any) -> Optional[Tuple[Product, int, float]]:
+        """The product's entry, or None if it is not cached or has expired (then it is dropped)."""
+        entry = self._products.get(product_id)
+        if entry is None or self._is_fresh(entry[2]):
+            return entry
+        self._remove(product_id)
+        self.expirations += 1
+        return None
+
+    def _hit(self, product_id: Any, entry: Tuple[Product, int, float]) -> Product:
+        self._products.move_to_end(product_id)
+        self.hits += 1
+        return entry[0].model_copy()
+
+    def _store(self, product: Product, generation: int) -> None:
+        if product.id is None:
+            return
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while loading; the loaded copy may be stale
+                return
+            self._remove(product.id)
+            cached = product.model_copy()
+            size = _estimate_size(cached)
+            self._products[cached.id] = (cached, size, self._clock())
+            self._ids_by_code[cached.code] = cached.id
+            self._size_bytes += size
+            while self._products and (
+                len(self._products) > self.max_entries
+                or self._size_bytes > self.max_bytes
+            ):
+                oldest_id = next(iter(self._products))
+                self._remove(oldest_id)
+                self.evictions += 1
+
+    def _remove(self, product_id: Any) -> None:
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        product, size, _ = entry
+        self._size_bytes -= size
+        if self._ids_by_code.get(product.code) == product_id:
+            del self._ids_by_code[product.code]
+
+
+def _estimate_size(product: Product) -> int:
+    """Approximate memory held by a product and its field values."""
+    return sys.getsizeof(product) + sum(
+        sys.getsizeof(value) for value in product.__dict__.values()
+    )
+
+
+# Shared by all ProductService instances in the process
+product_catalog_cache = ProductCatalogCache(ttl=config.product_cache_ttl_s or None)
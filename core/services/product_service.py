@@ -1,12 +1,18 @@
 # core/services/product_service.py
 
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Tuple
 from decimal import Decimal
 from uuid import UUID
 
-from core.models.product import Product, Department
+from core.models.product import Product, ProductRow, Department
+from core.interfaces.repository_interfaces import Page
+from core.specifications.product_specifications import products_in_department
 from infrastructure.persistence.unit_of_work import UnitOfWork, unit_of_work
 from core.services.service_base import ServiceBase
+from core.services.product_catalog_cache import (
+    ProductCatalogCache,
+    product_catalog_cache,
+)
 from core.utils.validation import (
     validate_required_field,
     validate_positive_number,
@@ -17,18 +23,24 @@ from core.events.product_events import (
     ProductCreated,
     ProductUpdated,
     ProductPriceChanged,
+    BulkPriceChanged,
     ProductDeleted,
+    DepartmentUpdated,
 )
 
 
 class ProductService(ServiceBase):
     """Service for product and department management using Unit of Work pattern."""
 
-    def __init__(self):
+    def __init__(self, catalog_cache: Optional[ProductCatalogCache] = None):
         """
         Initialize the service.
+
+        Args:
+            catalog_cache: Cache for product lookups; defaults to the process-wide cache
         """
         super().__init__()  # Initialize base class with default logger
+        self.catalog_cache = catalog_cache or product_catalog_cache
 
     def _validate_product(
         self,
@@ -172,14 +184,15 @@ class ProductService(ServiceBase):
 
     def delete_product(self, product_id: int, user_id: Optional[UUID] = None) -> None:
         """
-        Deletes a product. Raises ValueError if it has stock.
+        Deletes a product. Raises ValueError if it has stock or history.
 
         Args:
             product_id: The ID of the product to delete
             user_id: The ID of the user performing the action (for event tracking)
 
         Raises:
-            ValueError: If product has stock and cannot be deleted
+            ValueError: If product has stock, sale lines or inventory movements
+                and cannot be deleted
         """
         with unit_of_work() as uow:
             product = uow.products.get_by_id(product_id)
@@ -226,34 +239,84 @@ class ProductService(ServiceBase):
                 )
                 return None
 
-    def find_product(self, search_term: Optional[str] = None) -> List[Product]:
-        """Finds products based on a search term or returns all if no term is provided."""
-        with unit_of_work() as uow:
-            if search_term:
-                self.logger.debug(f"Searching products with term: '{search_term}'")
-                return uow.products.search(search_term)
-            else:
-                self.logger.debug("Getting all products")
-                return uow.products.get_all()
+    def find_product(
+        self, search_term: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Product]:
+        """Finds products based on a search term or returns all if no term is provided.
+
+        When searching, at most ``limit`` products are returned, best matches first.
+        Search results are served from the catalog cache when possible.
+        """
+        if search_term:
+            self.catalog_cache.attach()
+            return self.catalog_cache.search(
+                search_term, limit, lambda: self._search_products(search_term, limit)
+            )
+        with unit_of_work(read_only=True) as uow:
+            self.logger.debug("Getting all products")
+            return uow.products.get_all()
+
+    def _search_products(self, search_term: str, limit: Optional[int]) -> List[Product]:
+        with unit_of_work(read_only=True) as uow:
+            self.logger.debug(f"Searching products with term: '{search_term}'")
+            return uow.products.search(search_term, limit=limit)
 
     def get_all_products(self, department_id=None) -> List[Product]:
         """Gets all products, optionally filtered by department_id."""
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             self.logger.debug(
                 f"Getting all products via get_all_products, department_id={department_id}"
             )
 
-            products = uow.products.get_all()
-
-            # Filter by department_id if provided
-            if department_id is not None:
-                products = [p for p in products if p.department_id == department_id]
+            if department_id is None:
+                return uow.products.get_all()
+            # The department filter runs in SQL instead of over the whole catalog
+            return uow.products.find_by_specification(
+                products_in_department(department_id)
+            )
 
-            return products
+    def get_products_page(
+        self, after: Optional[Tuple] = None, limit: int = 100
+    ) -> Page[Product]:
+        """Gets the products after a cursor, ordered by description, for lazily filled lists."""
+        with unit_of_work(read_only=True) as uow:
+            return uow.products.get_page(after, limit)
+
+    def get_product_rows_page(
+        self, after: Optional[Tuple] = None, limit: int = 100
+    ) -> Page[ProductRow]:
+        """Gets list-screen rows of the products after a cursor, ordered by description."""
+        with unit_of_work(read_only=True) as uow:
+            return uow.products.get_row_page(after, limit)
+
+    def search_product_rows(
+        self, search_term: str, limit: Optional[int] = None
+    ) -> List[ProductRow]:
+        """Searches products like find_product, returning list-screen rows for suggestions.
+
+        Results are served from the catalog cache when possible.
+        """
+        self.catalog_cache.attach()
+        return self.catalog_cache.search_rows(
+            search_term, limit, lambda: self._search_product_rows(search_term, limit)
+        )
+
+    def _search_product_rows(
+        self, search_term: str, limit: Optional[int]
+    ) -> List[ProductRow]:
+        with unit_of_work(read_only=True) as uow:
+            self.logger.debug(f"Searching product rows with term: '{search_term}'")
+            return uow.products.search_rows(search_term, limit=limit)
 
     def get_product_by_code(self, code: str) -> Optional[Product]:
-        """Gets a product by its code."""
-        with unit_of_work() as uow:
+        """Gets a product by its code, from the catalog cache when possible."""
+        self.catalog_cache.attach()
+        return self.catalog_cache.get_by_code(
+            code, lambda: self._load_product_by_code(code)
+        )
+
+    def _load_product_by_code(self, code: str) -> Optional[Product]:
+        with unit_of_work(read_only=True) as uow:
             self.logger.debug(f"Getting product with code: {code}")
             return uow.products.get_by_code(code)
 
@@ -267,7 +330,13 @@ class ProductService(ServiceBase):
         Returns:
             Product object if found, None otherwise
         """
-        with unit_of_work() as uow:
+        self.catalog_cache.attach()
+        return self.catalog_cache.get_by_id(
+            product_id, lambda: self._load_product_by_id(product_id)
+        )
+
+    def _load_product_by_id(self, product_id: Any) -> Optional[Product]:
+        with unit_of_work(read_only=True) as uow:
             self.logger.debug(
                 f"Getting product with ID: {product_id}, type: {type(product_id)}"
             )
@@ -302,7 +371,7 @@ class ProductService(ServiceBase):
 
     def get_all_departments(self) -> List[Department]:
         """Gets all departments."""
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             self.logger.debug("Getting all departments")
             return uow.departments.get_all()
 
@@ -341,6 +410,11 @@ class ProductService(ServiceBase):
 
             self.logger.info(f"Updating department with ID: {department_data.id}")
             updated_department = uow.departments.update(department_data)
+            uow.add_event(
+                DepartmentUpdated(
+                    department_id=department_data.id, name=department_data.name
+                )
+            )
             return updated_department
 
     def update_prices_by_percentage(
@@ -352,6 +426,9 @@ class ProductService(ServiceBase):
         """
         Updates product prices by a given percentage.
         If department_id is provided, only updates products in that department.
+        Sell and cost prices change in one set-based update, the previous prices
+        are kept in the price history, and a single BulkPriceChanged event is
+        published for the whole change.
         Returns the number of products updated.
 
         Args:
@@ -369,66 +446,32 @@ class ProductService(ServiceBase):
             raise ValueError("Percentage must be a number greater than -100.")
 
         with unit_of_work() as uow:
-            products_to_update: List[Product]
-            if department_id is not None:
-                self.logger.info(
-                    f"Fetching products for department ID: {department_id} to update prices by {percentage}%."
-                )
-                products_to_update = uow.products.get_by_department_id(department_id)
-            else:
-                self.logger.info(
-                    f"Fetching all products to update prices by {percentage}%."
-                )
-                products_to_update = uow.products.get_all()
+            scope = (
+                f"department ID: {department_id}"
+                if department_id is not None
+                else "all departments"
+            )
+            self.logger.info(f"Updating prices in {scope} by {percentage}%.")
 
-            if not products_to_update:
+            # One set-based update; the old prices go to the price history
+            updated_count = uow.products.update_prices_by_percentage(
+                percentage, department_id
+            )
+            if not updated_count:
                 self.logger.info("No products found to update.")
                 return 0
 
-            updated_count = 0
-            for product in products_to_update:
-                if product.sell_price is not None:
-                    original_price = product.sell_price
-                    increase_amount = original_price * (percentage / Decimal("100"))
-                    new_price = original_price + increase_amount
-                    # Ensure price is not negative, though percentage validation should prevent this for positive prices
-                    product.sell_price = max(
-                        Decimal("0.00"), new_price.quantize(Decimal("0.01"))
-                    )
-
-                    # Update cost price proportionally if it exists
-                    if product.cost_price is not None:
-                        original_cost_price = product.cost_price
-                        cost_increase_amount = original_cost_price * (
-                            percentage / Decimal("100")
-                        )
-                        new_cost_price = original_cost_price + cost_increase_amount
-                        product.cost_price = max(
-                            Decimal("0.00"), new_cost_price.quantize(Decimal("0.01"))
-                        )
-
-                    uow.products.update(
-                        product
-                    )  # Assuming update handles individual product persistence
-
-                    # Publish price change event
-                    event = ProductPriceChanged(
-                        product_id=product.id,
-                        code=product.code,
-                        old_price=original_price,
-                        new_price=product.sell_price,
-                        price_change_percent=Decimal('0'),  # Calculated in __post_init__
-                        user_id=user_id or UUID(int=0)
-                    )
-                    uow.add_event(event)
-
-                    self.logger.debug(
-                        f"Updated product ID {product.id} ('{product.code}'): sell_price from {original_price} to {product.sell_price}, cost_price updated proportionally."
-                    )
-                    updated_count += 1
+            uow.add_event(
+                BulkPriceChanged(
+                    percentage=percentage,
+                    product_count=updated_count,
+                    department_id=department_id,
+                    user_id=user_id or UUID(int=0),
+                )
+            )
 
             self.logger.info(
-                f"Successfully updated prices for {updated_count} products by {percentage}%. Published {updated_count} events."
+                f"Successfully updated prices for {updated_count} products by {percentage}%."
             )
             return updated_count
 
@@ -33,7 +33,7 @@ class ReportingService(ServiceBase):
         Returns:
             List of dictionaries with date and aggregated sales data
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.sales.get_sales_summary_by_period(start_time, end_time, group_by)
 
     def get_sales_by_payment_type(
@@ -49,7 +49,7 @@ class ReportingService(ServiceBase):
         Returns:
             List of dictionaries with payment type, total amount, and number of sales
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.sales.get_sales_by_payment_type(start_time, end_time)
 
     def get_sales_by_department(
@@ -65,7 +65,7 @@ class ReportingService(ServiceBase):
         Returns:
             List of dictionaries with department_id, department_name, total_amount, and num_items
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.sales.get_sales_by_department(start_time, end_time)
 
     def get_sales_by_customer(
@@ -82,7 +82,7 @@ class ReportingService(ServiceBase):
         Returns:
             List of dictionaries with customer_id, customer_name, total_amount, and num_sales
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.sales.get_sales_by_customer(start_time, end_time, limit)
 
     def get_top_selling_products(
@@ -100,7 +100,7 @@ class ReportingService(ServiceBase):
             List of dictionaries with product_id, product_code, product_description,
             quantity_sold, and total_amount
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.sales.get_top_selling_products(start_time, end_time, limit)
 
     def calculate_profit_for_period(
@@ -116,7 +116,7 @@ class ReportingService(ServiceBase):
         Returns:
             Dictionary with total_revenue, total_cost, total_profit, and profit_margin
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             return uow.sales.calculate_profit_for_period(start_time, end_time)
 
     def get_daily_sales_report(self, date: datetime) -> Dict[str, Any]:
@@ -129,7 +129,7 @@ class ReportingService(ServiceBase):
         Returns:
             Dictionary with various sales metrics for the day
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             # Set time to start and end of the specified date
             start_time = datetime.combine(date, datetime.min.time())
             end_time = datetime.combine(date, datetime.max.time())
@@ -171,7 +171,7 @@ class ReportingService(ServiceBase):
         Returns:
             List of dictionaries with date and sales data points
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             # Map trend_type to appropriate group_by parameter
             group_by_mapping = {"daily": "day", "weekly": "week", "monthly": "month"}
             group_by = group_by_mapping.get(trend_type, "day")
@@ -222,7 +222,7 @@ class ReportingService(ServiceBase):
         Returns:
             Dictionary with comparative metrics and percentage changes
         """
-        with unit_of_work() as uow:
+        with unit_of_work(read_only=True) as uow:
             current_profit = uow.sales.calculate_profit_for_period(
                 current_period_start, current_period_end
             )
@@ -594,17 +594,14 @@ class ReportingService(ServiceBase):
             for dept in dept_data:
                 dept_profit = {
                     "department_name": dept.get("department_name", "Sin departamento"),
-                    "revenue": dept.get("total_amount", 0),
-                    "cost": 0,  # We would need to calculate this from the items
+                    "revenue": Decimal(
+                        str(dept.get("total_sales", dept.get("total_amount", 0)))
+                    ),
+                    # Cost at the time of sale, from the sale item snapshots
+                    "cost": Decimal(str(dept.get("total_cost", 0))),
                     "profit": 0,
                     "margin": 0,
                 }
-
-                # Get department cost from sale items (simplified example)
-                # In a real implementation, you would get actual costs from the database
-                dept_profit["cost"] = dept_profit["revenue"] * Decimal(
-                    "0.65"
-                )  # Assuming 65% cost of goods
                 dept_profit["profit"] = dept_profit["revenue"] - dept_profit["cost"]
 
                 if dept_profit["revenue"] > 0:
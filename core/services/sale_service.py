@@ -6,6 +6,11 @@ import uuid
 from core.services.service_base import ServiceBase
 from infrastructure.persistence.unit_of_work import unit_of_work
 from core.models.sale import Sale, SaleItem
+from core.models.product import Product
+from core.models.inventory import InventoryMovement
+from core.models.enums import InventoryMovementType
+from core.events.inventory_events import StockMovementRecorded
+from core.events.sale_events import SaleCompleted, SaleUpdated, SaleDeleted
 from infrastructure.reporting.document_generator import DocumentPdfGenerator
 
 
@@ -31,8 +36,22 @@ class SaleService(ServiceBase):
         customer_id: Optional[int] = None,
         is_credit_sale: bool = False,
     ) -> Sale:
-        """Create a new sale with the given items and parameters."""
+        """
+        Create a new sale with the given items and parameters.
+
+        The whole ticket is written in one unit of work: the line products
+        are loaded with one query, the stock is decremented by one UPDATE that
+        only succeeds if every product still has enough, and the sale and its
+        inventory movements are written in batches and committed together.
+
+        Raises:
+            ValueError: If an inventory-tracked product does not have enough stock
+        """
         with unit_of_work() as uow:
+            products = uow.products.get_by_ids(
+                {item_data["product_id"] for item_data in items_data}
+            )
+
             # Convert item dictionaries to SaleItem objects
             sale_items = []
             for item_data in items_data:
@@ -46,22 +65,25 @@ class SaleService(ServiceBase):
                     or "product_description" not in item_data
                     or "unit_price" not in item_data
                 ):
-                    # Fetch product from repository to get missing details
-                    product = uow.products.get_by_id(product_id)
+                    product = products.get(product_id)
                     if product:
                         product_code = product.code
                         product_description = product.description
                         unit_price = product.sell_price
+                        cost_price = product.cost_price
                     else:
                         # Fallback values if product not found
                         product_code = f"PROD-{product_id}"
                         product_description = f"Product {product_id}"
                         unit_price = 0.0
+                        cost_price = None
                 else:
                     # Use provided values
                     product_code = item_data["product_code"]
                     product_description = item_data["product_description"]
                     unit_price = item_data["unit_price"]
+                    # Without an explicit cost, the repository snapshots the current one
+                    cost_price = item_data.get("cost_price")
 
                 sale_item = SaleItem(
                     product_id=product_id,
@@ -69,9 +91,14 @@ class SaleService(ServiceBase):
                     product_description=product_description,
                     quantity=quantity,
                     unit_price=unit_price,
+                    cost_price=cost_price,
                 )
                 sale_items.append(sale_item)
 
+            stock_decrements = self._stock_decrements(sale_items, products)
+            # Fails before the sale is written if any product is short of stock
+            uow.products.decrease_stock(stock_decrements)
+
             # Create the sale object with the SaleItem objects
             sale = Sale(
                 items=sale_items,
@@ -80,8 +107,86 @@ class SaleService(ServiceBase):
                 customer_id=customer_id,
                 is_credit_sale=is_credit_sale,
             )
+            sale = uow.sales.add_sale(sale)
+
+            if stock_decrements:
+                movements = [
+                    InventoryMovement(
+                        product_id=product_id,
+                        quantity=-quantity,
+                        movement_type=InventoryMovementType.SALE,
+                        description=f"Venta #{sale.id}",
+                        related_id=sale.id,
+                        user_id=user_id,
+                    )
+                    for product_id, quantity in stock_decrements.items()
+                ]
+                uow.inventory.add_movements(movements)
+                for movement in movements:
+                    uow.add_event(
+                        StockMovementRecorded(
+                            product_id=movement.product_id,
+                            quantity=movement.quantity,
+                            movement_type=movement.movement_type.value,
+                            related_id=movement.related_id,
+                            user_id=user_id,
+                        )
+                    )
+            uow.add_event(
+                SaleCompleted(
+                    sale_id=sale.id,
+                    total_amount=sale.total,
+                    payment_type=getattr(sale.payment_type, "value", sale.payment_type),
+                    customer_id=customer_id,
+                    user_id=user_id,
+                )
+            )
+
+            return sale
 
-            return uow.sales.add_sale(sale)
+    @staticmethod
+    def _stock_decrements(
+        sale_items: List[SaleItem], products: Dict[int, Product]
+    ) -> Dict[int, Decimal]:
+        """
+        Adds up the quantity sold of each inventory-tracked product.
+
+        The stock itself is checked by the guarded UPDATE of decrease_stock,
+        against the stock at write time rather than the one read here.
+        """
+        decrements: Dict[int, Decimal] = {}
+        for item in sale_items:
+            product = products.get(item.product_id)
+            if product is None or not product.uses_inventory:
+                continue
+            decrements[item.product_id] = (
+                decrements.get(item.product_id, Decimal("0")) + item.quantity
+            )
+        return decrements
+
+    def backfill_cost_snapshots(self, batch_size: int = 1000) -> int:
+        """
+        Snapshots the current product cost onto sale items recorded without one.
+
+        Each batch runs in its own unit of work so the backfill can run on a
+        live database without blocking checkout for its whole duration.
+
+        Args:
+            batch_size: Number of sale items updated per transaction
+
+        Returns:
+            Total number of sale items updated
+        """
+        total_updated = 0
+        last_id = 0
+        while last_id is not None:
+            with unit_of_work() as uow:
+                updated, last_id = uow.sales.backfill_cost_snapshots(
+                    after_id=last_id, batch_size=batch_size
+                )
+            total_updated += updated
+        self.logger.info(f"Backfilled cost snapshots for {total_updated} sale items")
+        return total_updated
 
     def get_sale_by_id(self, sale_id: int) -> Optional[Sale]:
         """Get a sale by its ID. Returns None if not found."""
@@ -96,6 +201,7 @@ class SaleService(ServiceBase):
                 # Assume update method exists in repository
                 update_data = {"customer_id": customer_id}
                 uow.sales.update(sale_id, update_data)
+                uow.add_event(SaleUpdated(sale_id=sale_id))
                 return True
             return False
 
@@ -105,7 +211,9 @@ class SaleService(ServiceBase):
             sale = uow.sales.get_by_id(sale_id)
             if sale:
                 # Assume update method exists in repository
-                return uow.sales.update(sale_id, update_data)
+                updated_sale = uow.sales.update(sale_id, update_data)
+                uow.add_event(SaleUpdated(sale_id=sale_id))
+                return updated_sale
             return None
 
     def delete_sale(self, sale_id: int) -> bool:
@@ -113,7 +221,10 @@ class SaleService(ServiceBase):
         with unit_of_work() as uow:
             sale = uow.sales.get_by_id(sale_id)
             if sale:
-                return uow.sales.delete(sale_id)
+                deleted = uow.sales.delete(sale_id)
+                if deleted:
+                    uow.add_event(SaleDeleted(sale_id=sale_id))
+                return deleted
             return False
 
     def generate_receipt_pdf(self, sale_id: int, output_dir: str) -> str:
@@ -0,0 +1,24 @@
+"""
+Specification Pattern: composable business rules that run in memory and
+compile to SQL.
+
+Repositories that mix in SpecificationRepositoryMixin (see
+core.interfaces.specification_repository) accept these specifications and
+push them down to the database as WHERE clauses.
+"""
+
+from core.specifications.base import (
+    Specification,
+    ParameterizedSpecification,
+    AndSpecification,
+    OrSpecification,
+    NotSpecification,
+)
+
+__all__ = [
+    "Specification",
+    "ParameterizedSpecification",
+    "AndSpecification",
+    "OrSpecification",
+    "NotSpecification",
+]
@@ -0,0 +1,127 @@
+"""
+Specification Pattern base classes.
+
+A Specification is a business rule about a candidate (a Product, a Sale)
+that can be answered two ways:
+
+- ``is_satisfied_by(candidate)`` evaluates it in memory, e.g. in tests or
+  against objects already loaded.
+- ``to_sqlalchemy_filter()`` compiles it to a SQLAlchemy boolean expression
+  over the ORM columns, so repositories push the filter down to SQL.
+
+``None`` from ``to_sqlalchemy_filter()`` means "no restriction". Rules are
+composed with ``and_``/``or_``/``not_`` (or ``&``, ``|``, ``~``) and the
+composites compile to the matching SQL operators.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Generic, Optional, TypeVar
+
+from sqlalchemy import and_, false, not_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+
+
+class Specification(ABC, Generic[T]):
+    """A composable rule over candidates of type T."""
+
+    @abstractmethod
+    def is_satisfied_by(self, candidate: T) -> bool:
+        """True if the candidate satisfies the rule."""
+
+    @abstractmethod
+    def to_sqlalchemy_filter(self) -> Optional[ColumnElement]:
+        """The rule as a SQLAlchemy WHERE expression, or None for no restriction."""
+
+    def and_(self, other: "Specification[T]") -> "AndSpecification[T]":
+        return AndSpecification(self, other)
+
+    def or_(self, other: "Specification[T]") -> "OrSpecification[T]":
+        return OrSpecification(self, other)
+
+    def not_(self) -> "NotSpecification[T]":
+        return NotSpecification(self)
+
+    __and__ = and_
+    __or__ = or_
+    __invert__ = not_
+
+    def __repr__(self) -> str:
+        name = type(self).__name__
+        return name[: -len("Specification")] if name.endswith("Specification") else name
+
+
+class ParameterizedSpecification(Specification[T]):
+    """A rule with parameters, shown in its repr as ``Name(param, ...)``."""
+
+    def __init__(self, *params: Any):
+        self.params = params
+
+    def __repr__(self) -> str:
+        shown = ", ".join(str(param) for param in self.params)
+        return f"{super().__repr__()}({shown})"
+
+
+class AndSpecification(Specification[T]):
+    """Satisfied when both rules are."""
+
+    def __init__(self, left: Specification[T], right: Specification[T]):
+        self.left = left
+        self.right = right
+
+    def is_satisfied_by(self, candidate: T) -> bool:
+        return self.left.is_satisfied_by(candidate) and self.right.is_satisfied_by(candidate)
+
+    def to_sqlalchemy_filter(self) -> Optional[ColumnElement]:
+        left = self.left.to_sqlalchemy_filter()
+        right = self.right.to_sqlalchemy_filter()
+        if left is None:
+            return right
+        if right is None:
+            return left
+        return and_(left, right)
+
+    def __repr__(self) -> str:
+        return f"({self.left!r} AND {self.right!r})"
+
+
+class OrSpecification(Specification[T]):
+    """Satisfied when either rule is."""
+
+    def __init__(self, left: Specification[T], right: Specification[T]):
+        self.left = left
+        self.right = right
+
+    def is_satisfied_by(self, candidate: T) -> bool:
+        return self.left.is_satisfied_by(candidate) or self.right.is_satisfied_by(candidate)
+
+    def to_sqlalchemy_filter(self) -> Optional[ColumnElement]:
+        left = self.left.to_sqlalchemy_filter()
+        right = self.right.to_sqlalchemy_filter()
+        if left is None or right is None:
+            # Either side matches every row, so the disjunction does too
+            return None
+        return or_(left, right)
+
+    def __repr__(self) -> str:
+        return f"({self.left!r} OR {self.right!r})"
+
+
+class NotSpecification(Specification[T]):
+    """Satisfied when the wrapped rule is not."""
+
+    def __init__(self, spec: Specification[T]):
+        self.spec = spec
+
+    def is_satisfied_by(self, candidate: T) -> bool:
+        return not self.spec.is_satisfied_by(candidate)
+
+    def to_sqlalchemy_filter(self) -> Optional[ColumnElement]:
+        inner = self.spec.to_sqlalchemy_filter()
+        if inner is None:
+            return false()
+        return not_(inner)
+
+    def __repr__(self) -> str:
+        return f"NOT {self.spec!r}"
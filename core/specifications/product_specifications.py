@@ -0,0 +1,200 @@
+"""
+Specifications over catalog products.
+
+Each rule is evaluated in memory against a Product (or a ProductRow, which
+carries the same stock and price fields) and compiles to a filter on
+ProductOrm. Filters on nullable columns test for NULL explicitly, so a
+negated rule selects the same rows in SQL as it does in memory.
+"""
+
+from decimal import Decimal
+from typing import Any, Optional
+
+from sqlalchemy import and_, func, true
+
+from core.models.product import Product
+from core.specifications.base import ParameterizedSpecification, Specification
+from infrastructure.persistence.sqlite.models_mapping import ProductOrm
+
+
+def _like_pattern(term: str) -> str:
+    """A LIKE pattern matching ``term`` anywhere, with its wildcards escaped."""
+    escaped = term.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class ProductInStockSpecification(Specification[Product]):
+    """Products with stock on hand."""
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return candidate.quantity_in_stock > 0
+
+    def to_sqlalchemy_filter(self):
+        return ProductOrm.quantity_in_stock > 0
+
+
+class ProductOutOfStockSpecification(Specification[Product]):
+    """Products with no stock on hand (zero or negative)."""
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return candidate.quantity_in_stock <= 0
+
+    def to_sqlalchemy_filter(self):
+        return ProductOrm.quantity_in_stock <= 0
+
+
+class ProductLowStockSpecification(Specification[Product]):
+    """Products at or below their minimum stock; products without one never are."""
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return (
+            candidate.min_stock is not None
+            and candidate.quantity_in_stock <= candidate.min_stock
+        )
+
+    def to_sqlalchemy_filter(self):
+        return and_(
+            ProductOrm.min_stock.is_not(None),
+            ProductOrm.quantity_in_stock <= ProductOrm.min_stock,
+        )
+
+
+class ProductInDepartmentSpecification(ParameterizedSpecification[Product]):
+    """Products of one department; None selects products without a department."""
+
+    def __init__(self, department_id: Any):
+        super().__init__(department_id)
+        self.department_id = department_id
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return candidate.department_id == self.department_id
+
+    def to_sqlalchemy_filter(self):
+        if self.department_id is None:
+            return ProductOrm.department_id.is_(None)
+        return and_(
+            ProductOrm.department_id.is_not(None),
+            ProductOrm.department_id == self.department_id,
+        )
+
+
+class ProductPriceRangeSpecification(ParameterizedSpecification[Product]):
+    """Products whose sell price is within the inclusive bounds given."""
+
+    def __init__(
+        self, min_price: Optional[Decimal] = None, max_price: Optional[Decimal] = None
+    ):
+        super().__init__(min_price, max_price)
+        self.min_price = min_price
+        self.max_price = max_price
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        price = candidate.sell_price
+        if price is None:
+            return self.min_price is None and self.max_price is None
+        if self.min_price is not None and price < self.min_price:
+            return False
+        if self.max_price is not None and price > self.max_price:
+            return False
+        return True
+
+    def to_sqlalchemy_filter(self):
+        conditions = []
+        if self.min_price is not None:
+            conditions.append(ProductOrm.sell_price >= self.min_price)
+        if self.max_price is not None:
+            conditions.append(ProductOrm.sell_price <= self.max_price)
+        if not conditions:
+            return None
+        return and_(ProductOrm.sell_price.is_not(None), *conditions)
+
+
+class ProductCodeLikeSpecification(ParameterizedSpecification[Product]):
+    """Products whose code contains the term, ignoring case."""
+
+    def __init__(self, term: str):
+        super().__init__(term)
+        self.term = term
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return self.term.lower() in (candidate.code or "").lower()
+
+    def to_sqlalchemy_filter(self):
+        return func.lower(ProductOrm.code).like(_like_pattern(self.term), escape="\\")
+
+
+class ProductDescriptionLikeSpecification(ParameterizedSpecification[Product]):
+    """Products whose description contains the term, ignoring case."""
+
+    def __init__(self, term: str):
+        super().__init__(term)
+        self.term = term
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return self.term.lower() in (candidate.description or "").lower()
+
+    def to_sqlalchemy_filter(self):
+        return func.lower(ProductOrm.description).like(
+            _like_pattern(self.term), escape="\\"
+        )
+
+
+class ProductActiveSpecification(Specification[Product]):
+    """Products that are active (not discontinued)."""
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return bool(candidate.is_active)
+
+    def to_sqlalchemy_filter(self):
+        return ProductOrm.is_active == true()
+
+
+class ProductUsesInventorySpecification(Specification[Product]):
+    """Products whose stock is tracked."""
+
+    def is_satisfied_by(self, candidate: Product) -> bool:
+        return bool(candidate.uses_inventory)
+
+    def to_sqlalchemy_filter(self):
+        return ProductOrm.uses_inventory == true()
+
+
+# --- Factory functions ---
+
+
+def products_in_stock() -> ProductInStockSpecification:
+    return ProductInStockSpecification()
+
+
+def products_out_of_stock() -> ProductOutOfStockSpecification:
+    return ProductOutOfStockSpecification()
+
+
+def products_low_stock() -> ProductLowStockSpecification:
+    return ProductLowStockSpecification()
+
+
+def products_in_department(department_id: Any) -> ProductInDepartmentSpecification:
+    return ProductInDepartmentSpecification(department_id)
+
+
+def products_in_price_range(
+    min_price: Optional[Decimal] = None, max_price: Optional[Decimal] = None
+) -> ProductPriceRangeSpecification:
+    return ProductPriceRangeSpecification(min_price, max_price)
+
+
+def products_code_like(term: str) -> ProductCodeLikeSpecification:
+    return ProductCodeLikeSpecification(term)
+
+
+def products_description_like(term: str) -> ProductDescriptionLikeSpecification:
+    return ProductDescriptionLikeSpecification(term)
+
+
+def products_active() -> ProductActiveSpecification:
+    return ProductActiveSpecification()
+
+
+def products_using_inventory() -> ProductUsesInventorySpecification:
+    return ProductUsesInventorySpecification()
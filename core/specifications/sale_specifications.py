@@ -0,0 +1,210 @@
+"""
+Specifications over sales.
+
+Rules are evaluated in memory against a Sale (its ``timestamp`` and its
+``total`` computed from the items) and compile to filters on SaleOrm's
+``date_time`` and stored ``total_amount``. Payment types are given as a
+PaymentType, its value ("Efectivo"), its name ("EFECTIVO") or the English
+shorthands "cash", "card" and "credit".
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional, Union
+
+from sqlalchemy import and_, or_, true
+
+from core.models.enums import PaymentType
+from core.models.sale import Sale
+from core.specifications.base import ParameterizedSpecification, Specification
+from infrastructure.persistence.sqlite.models_mapping import SaleOrm
+
+_PAYMENT_TYPE_ALIASES = {
+    "cash": PaymentType.EFECTIVO,
+    "card": PaymentType.TARJETA,
+    "credit": PaymentType.CREDITO,
+}
+
+
+def to_payment_type(payment_type: Union[PaymentType, str]) -> PaymentType:
+    """Resolves a PaymentType from its value, its name or an English shorthand."""
+    if isinstance(payment_type, PaymentType):
+        return payment_type
+    alias = _PAYMENT_TYPE_ALIASES.get(payment_type.lower())
+    if alias is not None:
+        return alias
+    for member in PaymentType:
+        if payment_type in (member.value, member.name):
+            return member
+    raise ValueError(f"Unknown payment type: {payment_type!r}")
+
+
+def _payment_type_of(sale: Sale):
+    try:
+        return to_payment_type(sale.payment_type) if sale.payment_type else None
+    except ValueError:
+        return None
+
+
+class SaleByDateRangeSpecification(ParameterizedSpecification[Sale]):
+    """Sales made between two instants, both included; a None bound is open."""
+
+    def __init__(self, start: Optional[datetime], end: Optional[datetime]):
+        super().__init__(start, end)
+        self.start = start
+        self.end = end
+
+    def is_satisfied_by(self, candidate: Sale) -> bool:
+        if self.start is not None and candidate.timestamp < self.start:
+            return False
+        if self.end is not None and candidate.timestamp > self.end:
+            return False
+        return True
+
+    def to_sqlalchemy_filter(self):
+        conditions = []
+        if self.start is not None:
+            conditions.append(SaleOrm.date_time >= self.start)
+        if self.end is not None:
+            conditions.append(SaleOrm.date_time <= self.end)
+        return and_(*conditions) if conditions else None
+
+
+class SaleByCustomerSpecification(ParameterizedSpecification[Sale]):
+    """Sales made to one customer."""
+
+    def __init__(self, customer_id: Any):
+        super().__init__(customer_id)
+        self.customer_id = customer_id
+
+    def is_satisfied_by(self, candidate: Sale) -> bool:
+        return candidate.customer_id == self.customer_id
+
+    def to_sqlalchemy_filter(self):
+        if self.customer_id is None:
+            return SaleOrm.customer_id.is_(None)
+        return and_(
+            SaleOrm.customer_id.is_not(None), SaleOrm.customer_id == self.customer_id
+        )
+
+
+class SaleByUserSpecification(ParameterizedSpecification[Sale]):
+    """Sales rung up by one user."""
+
+    def __init__(self, user_id: Any):
+        super().__init__(user_id)
+        self.user_id = user_id
+
+    def is_satisfied_by(self, candidate: Sale) -> bool:
+        return candidate.user_id == self.user_id
+
+    def to_sqlalchemy_filter(self):
+        if self.user_id is None:
+            return SaleOrm.user_id.is_(None)
+        return and_(SaleOrm.user_id.is_not(None), SaleOrm.user_id == self.user_id)
+
+
+class SaleByPaymentTypeSpecification(ParameterizedSpecification[Sale]):
+    """Sales paid with one payment type."""
+
+    def __init__(self, payment_type: Union[PaymentType, str]):
+        self.payment_type = to_payment_type(payment_type)
+        super().__init__(self.payment_type.value)
+
+    def is_satisfied_by(self, candidate: Sale) -> bool:
+        return _payment_type_of(candidate) == self.payment_type
+
+    def to_sqlalchemy_filter(self):
+        return and_(
+            SaleOrm.payment_type.is_not(None),
+            SaleOrm.payment_type == self.payment_type,
+        )
+
+
+class SaleAboveAmountSpecification(ParameterizedSpecification[Sale]):
+    """Sales whose total is strictly above an amount."""
+
+    def __init__(self, amount: Decimal):
+        super().__init__(amount)
+        self.amount = amount
+
+    def is_satisfied_by(self, candidate: Sale) -> bool:
+        return candidate.total > self.amount
+
+    def to_sqlalchemy_filter(self):
+        return SaleOrm.total_amount > self.amount
+
+
+class SaleBelowAmountSpecification(ParameterizedSpecification[Sale]):
+    """Sales whose total is strictly below an amount."""
+
+    def __init__(self, amount: Decimal):
+        super().__init__(amount)
+        self.amount = amount
+
+    def is_satisfied_by(self, candidate: Sale) -> bool:
+        return candidate.total < self.amount
+
+    def to_sqlalchemy_filter(self):
+        return SaleOrm.total_amount < self.amount
+
+
+class SaleCreditSaleSpecification(Specification[Sale]):
+    """Sales on credit: flagged as such or paid with the credit payment type."""
+
+    def is_satisfied_by(self, candidate: Sale) -> bool:
+        return bool(candidate.is_credit_sale) or (
+            _payment_type_of(candidate) == PaymentType.CREDITO
+        )
+
+    def to_sqlalchemy_filter(self):
+        return or_(
+            SaleOrm.is_credit_sale == true(),
+            and_(
+                SaleOrm.payment_type.is_not(None),
+                SaleOrm.payment_type == PaymentType.CREDITO,
+            ),
+        )
+
+
+# --- Factory functions ---
+
+
+def sales_by_date_range(
+    start: Optional[datetime], end: Optional[datetime]
+) -> SaleByDateRangeSpecification:
+    return SaleByDateRangeSpecification(start, end)
+
+
+def sales_by_customer(customer_id: Any) -> SaleByCustomerSpecification:
+    return SaleByCustomerSpecification(customer_id)
+
+
+def sales_by_user(user_id: Any) -> SaleByUserSpecification:
+    return SaleByUserSpecification(user_id)
+
+
+def sales_by_payment_type(
+    payment_type: Union[PaymentType, str]
+) -> SaleByPaymentTypeSpecification:
+    return SaleByPaymentTypeSpecification(payment_type)
+
+
+def sales_above_amount(amount: Decimal) -> SaleAboveAmountSpecification:
+    return SaleAboveAmountSpecification(amount)
+
+
+def sales_below_amount(amount: Decimal) -> SaleBelowAmountSpecification:
+    return SaleBelowAmountSpecification(amount)
+
+
+def credit_sales() -> SaleCreditSaleSpecification:
+    return SaleCreditSaleSpecification()
+
+
+def cash_sales() -> SaleByPaymentTypeSpecification:
+    return SaleByPaymentTypeSpecification(PaymentType.EFECTIVO)
+
+
+def card_sales() -> SaleByPaymentTypeSpecification:
+    return SaleByPaymentTypeSpecification(PaymentType.TARJETA)
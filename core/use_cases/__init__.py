@@ -0,0 +1,12 @@
+"""
+Application use cases: operations run on behalf of a caller that report
+their outcome as a UseCaseResult instead of raising.
+"""
+
+from core.use_cases.base import UseCase, UseCaseResult, UseCaseStatus
+
+__all__ = [
+    "UseCase",
+    "UseCaseResult",
+    "UseCaseStatus",
+]
@@ -0,0 +1,75 @@
+"""
+Results of application operations.
+
+Use cases and CQRS command handlers return a UseCaseResult, so the UI can
+tell a validation problem, a missing record and a conflict apart without
+parsing exception messages.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Generic, Optional, TypeVar
+
+TRequest = TypeVar("TRequest")
+
+
+class UseCaseStatus(Enum):
+    """Outcome of a use case."""
+
+    SUCCESS = "success"
+    FAILURE = "failure"
+    VALIDATION_ERROR = "validation_error"
+    NOT_FOUND = "not_found"
+    CONFLICT = "conflict"
+
+
+@dataclass(frozen=True)
+class UseCaseResult:
+    """
+    Outcome of a use case: its data on success, its error otherwise.
+
+    ``errors`` maps field names to messages for validation errors.
+    """
+
+    status: UseCaseStatus
+    data: Any = None
+    error: Optional[str] = None
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_success(self) -> bool:
+        return self.status == UseCaseStatus.SUCCESS
+
+    @property
+    def is_failure(self) -> bool:
+        return not self.is_success
+
+    @classmethod
+    def success(cls, data: Any = None) -> "UseCaseResult":
+        return cls(UseCaseStatus.SUCCESS, data=data)
+
+    @classmethod
+    def failure(cls, error: str) -> "UseCaseResult":
+        return cls(UseCaseStatus.FAILURE, error=error)
+
+    @classmethod
+    def validation_error(cls, errors: Dict[str, str]) -> "UseCaseResult":
+        return cls(UseCaseStatus.VALIDATION_ERROR, error="Validation failed", errors=dict(errors))
+
+    @classmethod
+    def not_found(cls, entity: str, entity_id: Any = None) -> "UseCaseResult":
+        suffix = f": {entity_id}" if entity_id is not None else ""
+        return cls(UseCaseStatus.NOT_FOUND, error=f"{entity} not found{suffix}")
+
+    @classmethod
+    def conflict(cls, error: str) -> "UseCaseResult":
+        return cls(UseCaseStatus.CONFLICT, error=error)
+
+
+class UseCase(ABC, Generic[TRequest]):
+    """An application operation taking a request and returning a UseCaseResult."""
+
+    @abstractmethod
+    def execute(self, request: TRequest) -> UseCaseResult:
+        """Runs the use case; expected problems are reported in the result, not raised."""
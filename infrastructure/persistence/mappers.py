@@ -87,6 +87,7 @@ class ModelMapper:
             last_updated=prod_orm.last_updated,
             notes=prod_orm.notes,
             is_active=prod_orm.is_active,
+            version=prod_orm.version,
         )
 
     @staticmethod
@@ -103,6 +104,7 @@ class ModelMapper:
             product_code=item_orm.product_code,
             product_description=item_orm.product_description,
             product_unit=getattr(item_orm, "product_unit", "Unidad"),
+            cost_price=getattr(item_orm, "cost_price", None),
         )
 
     @staticmethod
@@ -0,0 +1,394 @@
+"""
+Transactional outbox for domain events.
+
+Without an outbox, the events a unit of work collects live only in memory
+and are published after the commit, so a crash between the two loses them.
+With an outbox relay set (set_outbox_relay()), UnitOfWork instead writes its
+events to the ``outbox`` table in the same transaction as the changes that
+raised them, runs only the inline handlers (e.g. cache invalidation) right
+away, and leaves the rest to the relay:
+
+- OutboxRelay reads pending messages in id order, ``batch_size`` at a time,
+  on a background thread (or on demand with deliver_pending()).
+- Each event goes to its EventPublisher handlers, and the events of one type
+  go together to its batch handlers (EventPublisher.subscribe_batch), e.g.
+  500 ProductPriceChanged in one call.
+- A message is marked delivered only after its handlers succeed. A handler
+  that fails makes the message (for a batch handler, the whole batch) be
+  retried after ``retry_delay`` seconds times its attempts, up to
+  ``max_attempts``. Delivery is therefore at least once: handlers can see an
+  event again, and should use its event_id (the message's idempotency key)
+  to ignore repeats. Recording the same event_id twice keeps one message.
+- The messages of one aggregate (``aggregate_key``, e.g. "product_id:7")
+  are delivered in order: while a message waits for a retry, the later
+  messages of its aggregate are held back, without an attempt counted.
+  A message given up on no longer holds the others back.
+- Delivered messages older than ``retention_days`` are pruned.
+
+Handlers run outside the transactions that read and mark the messages, so
+they never hold the SQLite write lock. One relay per database is assumed.
+"""
+
+import importlib
+import json
+import logging
+import threading
+import time
+from dataclasses import fields
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from core.domain_events import DomainEvent, EventPublisher
+from core.event_dispatcher import aggregate_key
+from infrastructure.persistence.sqlite.models_mapping import OutboxMessageOrm
+
+logger = logging.getLogger(__name__)
+
+# Relay whose presence makes units of work write to the outbox, if any
+_active_relay: Optional["OutboxRelay"] = None
+
+
+# --- Serialization ---
+
+
+def event_type_name(event_type: type) -> str:
+    """The stored type of an event class: "module.ClassName"."""
+    return f"{event_type.__module__}.{event_type.__qualname__}"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, UUID):
+        return {"__uuid__": str(value)}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot store {type(value).__name__} in the outbox")
+
+
+def _decode_value(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        (tag, value), = obj.items()
+        if tag == "__decimal__":
+            return Decimal(value)
+        if tag == "__uuid__":
+            return UUID(value)
+        if tag == "__datetime__":
+            return datetime.fromisoformat(value)
+        if tag == "__date__":
+            return date.fromisoformat(value)
+    return obj
+
+
+def encode_event(event: DomainEvent) -> str:
+    """The event's init fields as JSON, with Decimals, UUIDs and dates tagged."""
+    values = {f.name: getattr(event, f.name) for f in fields(event) if f.init}
+    return json.dumps(values, default=_encode_value, ensure_ascii=False)
+
+
+def decode_event(event_type: str, payload: str, idempotency_key: str) -> DomainEvent:
+    """Rebuilds an event from its stored type and payload, keeping its event_id."""
+    module_name, _, class_name = event_type.rpartition(".")
+    event_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(event_class, type) and issubclass(event_class, DomainEvent)):
+        raise ValueError(f"{event_type} is not a domain event")
+    event = event_class(**json.loads(payload, object_hook=_decode_value))
+    object.__setattr__(event, "event_id", UUID(idempotency_key))
+    return event
+
+
+# --- Writing ---
+
+
+def record_events(session, events: Iterable[DomainEvent]) -> None:
+    """Adds events to the outbox in the session's transaction; known event_ids are skipped."""
+    now = datetime.now()
+    rows = []
+    for event in events:
+        key = aggregate_key(event)
+        rows.append(
+            {
+                "idempotency_key": str(event.event_id),
+                "event_type": event_type_name(type(event)),
+                "aggregate_key": f"{key[0]}:{key[1]}" if key else None,
+                "payload": encode_event(event),
+                "occurred_at": event.occurred_at,
+                "created_at": now,
+                "attempts": 0,
+                "available_at": now,
+            }
+        )
+    if not rows:
+        return
+    session.execute(
+        sqlite_insert(OutboxMessageOrm)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["idempotency_key"])
+    )
+
+
+def set_outbox_relay(relay: Optional["OutboxRelay"]) -> None:
+    """Makes units of work write their events to the outbox for ``relay`` (None: publish directly)."""
+    global _active_relay
+    _active_relay = relay
+
+
+def outbox_relay() -> Optional["OutboxRelay"]:
+    """The relay set with set_outbox_relay(), or None."""
+    return _active_relay
+
+
+# --- Delivery ---
+
+
+class OutboxRelay:
+    """Delivers pending outbox messages to the event handlers, in batches."""
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        poll_interval: float = 1.0,
+        max_attempts: int = 10,
+        retry_delay: float = 30.0,
+        retention_days: float = 7.0,
+        prune_interval: float = 3600.0,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._delivery_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Starts delivering in the background."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="OutboxRelay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the relay, letting a batch in progress finish."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Delivers new messages now instead of at the next poll."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        last_prune = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                delivered = self.deliver_pending()
+                if time.monotonic() - last_prune >= self.prune_interval:
+                    self.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {e}", exc_info=True)
+                delivered = 0
+            if delivered < self.batch_size:
+                # A full batch means more may be pending: go on without waiting
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def deliver_pending(self) -> int:
+        """
+        Delivers one batch of pending messages.
+
+        Returns:
+            The number of messages delivered.
+        """
+        with self._delivery_lock:
+            messages = self._fetch_pending()
+            if not messages:
+                return 0
+
+            errors: Dict[int, str] = {}
+            aggregates: Dict[int, Optional[str]] = {}
+            events: List[Tuple[int, DomainEvent]] = []
+            for message_id, key, aggregate, event_type, payload in messages:
+                aggregates[message_id] = aggregate
+                try:
+                    events.append((message_id, decode_event(event_type, payload, key)))
+                except Exception as e:
+                    logger.error(f"Cannot decode outbox message {message_id} ({event_type}): {e}")
+                    errors[message_id] = f"Undecodable: {e}"
+
+            held = self._run_handlers(events, errors, aggregates)
+            delivered = [
+                message_id for message_id, _ in events if message_id not in errors and message_id not in held
+            ]
+            self._mark(delivered, errors)
+            return len(delivered)
+
+    def _fetch_pending(self) -> List[Tuple[int, str, Optional[str], str, str]]:
+        from infrastructure.persistence.unit_of_work import unit_of_work
+
+        now = datetime.now()
+        earlier = aliased(OutboxMessageOrm)
+        # An earlier message of the aggregate waiting for a retry
+        waiting_for_retry = exists().where(
+            earlier.aggregate_key == OutboxMessageOrm.aggregate_key,
+            earlier.id < OutboxMessageOrm.id,
+            earlier.delivered_at.is_(None),
+            earlier.attempts < self.max_attempts,
+            earlier.available_at > now,
+        )
+        with unit_of_work(read_only=True) as uow:
+            return [
+                tuple(row)
+                for row in uow.session.execute(
+                    select(
+                        OutboxMessageOrm.id,
+                        OutboxMessageOrm.idempotency_key,
+                        OutboxMessageOrm.aggregate_key,
+                        OutboxMessageOrm.event_type,
+                        OutboxMessageOrm.payload,
+                    )
+                    .where(
+                        OutboxMessageOrm.delivered_at.is_(None),
+                        OutboxMessageOrm.attempts < self.max_attempts,
+                        OutboxMessageOrm.available_at <= now,
+                        ~waiting_for_retry,
+                    )
+                    .order_by(OutboxMessageOrm.id)
+                    .limit(self.batch_size)
+                )
+            ]
+
+    def _run_handlers(
+        self,
+        events: List[Tuple[int, DomainEvent]],
+        errors: Dict[int, str],
+        aggregates: Dict[int, Optional[str]],
+    ) -> Set[int]:
+        """
+        Runs the handlers of a batch, adding the messages that failed to errors.
+
+        Returns:
+            The messages held back behind a failed message of their aggregate.
+        """
+        held: Set[int] = set()
+        by_type: Dict[type, List[Tuple[int, DomainEvent]]] = {}
+        for message_id, event in events:
+            if _follows_failure(message_id, aggregates, errors):
+                held.add(message_id)
+                continue
+            by_type.setdefault(type(event), []).append((message_id, event))
+            for handler in EventPublisher.handlers_for(event, include_inline=False):
+                error = _call(handler, event)
+                if error:
+                    errors.setdefault(message_id, error)
+
+        for event_type, group in by_type.items():
+            for handler in EventPublisher.get_batch_handlers(event_type):
+                error = _call(handler, [event for _, event in group])
+                if error:
+                    for message_id, _ in group:
+                        errors.setdefault(message_id, error)
+
+        # A failed batch handler also holds back the later messages of its aggregates;
+        # their handlers ran, so they will see them again
+        held.update(
+            message_id
+            for message_id, _ in events
+            if message_id not in errors and _follows_failure(message_id, aggregates, errors)
+        )
+        return held
+
+    def _mark(self, delivered: List[int], errors: Dict[int, str]) -> None:
+        from infrastructure.persistence.unit_of_work import unit_of_work
+
+        now = datetime.now()
+        with unit_of_work() as uow:
+            if delivered:
+                uow.session.execute(
+                    update(OutboxMessageOrm)
+                    .where(OutboxMessageOrm.id.in_(delivered))
+                    .values(delivered_at=now)
+                )
+            for message_id, error in errors.items():
+                message = uow.session.get(OutboxMessageOrm, message_id)
+                message.attempts += 1
+                message.last_error = error[:1000]
+                message.available_at = now + timedelta(seconds=self.retry_delay * message.attempts)
+                if message.attempts >= self.max_attempts:
+                    logger.error(
+                        f"Giving up on outbox message {message_id} ({message.event_type}) "
+                        f"after {message.attempts} attempts: {error}"
+                    )
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Deletes messages delivered more than retention_days ago; returns how many."""
+        from infrastructure.persistence.unit_of_work import unit_of_work
+
+        cutoff = (now or datetime.now()) - timedelta(days=self.retention_days)
+        with unit_of_work() as uow:
+            result = uow.session.execute(
+                delete(OutboxMessageOrm).where(
+                    OutboxMessageOrm.delivered_at.is_not(None),
+                    OutboxMessageOrm.delivered_at < cutoff,
+                )
+            )
+        if result.rowcount:
+            logger.info(f"Pruned {result.rowcount} delivered outbox messages")
+        return result.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Messages pending delivery, delivered, and given up on."""
+        from infrastructure.persistence.unit_of_work import unit_of_work
+
+        with unit_of_work(read_only=True) as uow:
+            def count(*conditions):
+                return uow.session.scalar(
+                    select(func.count()).select_from(OutboxMessageOrm).where(*conditions)
+                )
+
+            undelivered = OutboxMessageOrm.delivered_at.is_(None)
+            return {
+                "pending": count(undelivered, OutboxMessageOrm.attempts < self.max_attempts),
+                "delivered": count(OutboxMessageOrm.delivered_at.is_not(None)),
+                "failed": count(undelivered, OutboxMessageOrm.attempts >= self.max_attempts),
+            }
+
+
+def _follows_failure(message_id: int, aggregates: Dict[int, Optional[str]], errors: Dict[int, str]) -> bool:
+    """True if an earlier message of the same aggregate failed."""
+    aggregate = aggregates[message_id]
+    return aggregate is not None and any(
+        failed < message_id and aggregates[failed] == aggregate for failed in errors
+    )
+
+
+def _call(handler, argument) -> Optional[str]:
+    """Runs a handler; returns its error as text, or None if it succeeded."""
+    try:
+        handler(argument)
+        return None
+    except Exception as e:
+        logger.error(
+            f"Error in outbox handler {getattr(handler, '__name__', handler)}: {e}",
+            exc_info=True,
+        )
+        return f"{type(e).__name__}: {e}"
@@ -0,0 +1,525 @@
+"""
+Online backups of the SQLite database.
+
+Backups are page-level copies made with the SQLite online backup API
+(``sqlite3.Connection.backup``), so they include every table, index and
+trigger and are consistent without stopping the application. The copy runs
+in steps of a thousand pages with a short pause in between, which keeps
+the disk available to the till while a large database is copied.
+
+In WAL mode the source connection holds a read transaction for the whole
+copy: writers keep committing to the WAL and the backup is a snapshot of the
+moment it started. In rollback-journal mode a read transaction would block
+writers, so steps run without one; if a write from another connection
+restarts the copy, the remainder is copied in a single step instead of
+starting over indefinitely.
+
+Backups are plain SQLite files, optionally gzip-compressed. Restoring
+attaches the backup to the live database and copies every table with one
+INSERT ... SELECT inside a single transaction.
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from infrastructure.persistence.sqlite.cash_drawer_repository import rebuild_drawer_state
+from infrastructure.persistence.sqlite.product_search import (
+    PRODUCT_SEARCH_TABLE,
+    PRODUCT_SEARCH_TRIGGERS,
+    PRODUCT_SEARCH_TRIGGERS_DDL,
+)
+from infrastructure.persistence.sqlite.read_models import (
+    READ_MODEL_TABLES,
+    rebuild_statements as read_model_rebuild_statements,
+)
+from infrastructure.persistence.sqlite.sales_rollups import (
+    SALES_ROLLUP_TABLES,
+    SALES_ROLLUP_TRIGGERS,
+    SALES_ROLLUP_TRIGGERS_DDL,
+    rebuild_statements,
+)
+from infrastructure.persistence.sqlite.stock_checkpoints import (
+    STOCK_CHECKPOINT_TABLES,
+    STOCK_CHECKPOINT_TRIGGERS,
+    STOCK_CHECKPOINTS,
+    STOCK_CHECKPOINTS_DDL,
+    current_period_start,
+    refresh_statement as stock_checkpoint_refresh_statement,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pages copied per backup step (4 MB with the default 4 KB page size)
+BACKUP_PAGES_PER_STEP = 1024
+
+# Pause between steps, in seconds, so other connections get the disk
+BACKUP_STEP_PAUSE = 0.002
+
+# Favour speed over ratio: database pages compress well even at level 1
+BACKUP_COMPRESS_LEVEL = 1
+
+BACKUP_PREFIX = "respaldo_"
+BACKUP_SUFFIX = ".db"
+COMPRESSED_SUFFIX = ".db.gz"
+
+# Tables that describe the schema rather than hold data; never restored
+_SCHEMA_TABLES = ("alembic_version",)
+
+# Receives (pages copied, total pages)
+BackupProgress = Callable[[int, int], None]
+
+
+@dataclass
+class BackupResult:
+    """Outcome of a successful backup."""
+
+    path: str
+    size_bytes: int
+    pages: int
+    compressed: bool
+    duration_seconds: float
+
+
+class _BackupRestarted(Exception):
+    """Raised from the progress callback when a write restarted the copy."""
+
+
+def backup_database(
+    engine,
+    target_path: str,
+    compress: bool = False,
+    pages_per_step: int = BACKUP_PAGES_PER_STEP,
+    step_pause: float = BACKUP_STEP_PAUSE,
+    progress: Optional[BackupProgress] = None,
+) -> BackupResult:
+    """
+    Copies the engine's database to target_path with the online backup API.
+
+    The copy is written under a temporary name and moved into place when
+    complete, so target_path never holds a partial backup.
+
+    Args:
+        engine: SQLAlchemy engine of a SQLite database
+        target_path: Backup file to create; ".gz" is expected when compressing
+        compress: Gzip the backup after copying it
+        pages_per_step: Pages copied per step
+        step_pause: Seconds to wait between steps
+        progress: Called after each step with (pages copied, total pages)
+
+    Returns:
+        BackupResult describing the written file
+    """
+    if engine.dialect.name != "sqlite":
+        raise ValueError("Online backups are only supported for SQLite databases")
+
+    started = time.perf_counter()
+    target_dir = os.path.dirname(os.path.abspath(target_path))
+    os.makedirs(target_dir, exist_ok=True)
+    fd, copy_path = tempfile.mkstemp(suffix=BACKUP_SUFFIX, dir=target_dir)
+    os.close(fd)
+
+    try:
+        raw = engine.raw_connection()
+        try:
+            total_pages = _copy_database(
+                raw.driver_connection, copy_path, pages_per_step, step_pause, progress
+            )
+        finally:
+            raw.close()
+
+        if compress:
+            _compress_file(copy_path, target_path)
+        else:
+            os.replace(copy_path, target_path)
+    finally:
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
+
+    result = BackupResult(
+        path=target_path,
+        size_bytes=os.path.getsize(target_path),
+        pages=total_pages,
+        compressed=compress,
+        duration_seconds=time.perf_counter() - started,
+    )
+    logger.info(
+        f"Backed up {result.pages} pages to {target_path} "
+        f"({result.size_bytes} bytes) in {result.duration_seconds:.2f}s"
+    )
+    return result
+
+
+def _copy_database(
+    source: sqlite3.Connection,
+    copy_path: str,
+    pages_per_step: int,
+    step_pause: float,
+    progress: Optional[BackupProgress],
+) -> int:
+    """Runs the paged backup into copy_path and returns the number of pages."""
+    journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0].lower()
+    pin_snapshot = journal_mode == "wal" and not source.in_transaction
+    state = {"remaining": None, "total": 0}
+
+    def on_step(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            raise _BackupRestarted()
+        state["remaining"] = remaining
+        state["total"] = total
+        if progress:
+            progress(total - remaining, total)
+        if remaining and step_pause:
+            time.sleep(step_pause)
+
+    destination = sqlite3.connect(copy_path)
+    try:
+        if pin_snapshot:
+            # Readers in WAL mode do not block writers; the snapshot stays fixed
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        try:
+            source.backup(destination, pages=pages_per_step, progress=on_step)
+        except _BackupRestarted:
+            logger.warning("Database changed during backup; copying the rest in one step")
+            state["remaining"] = None
+            source.backup(destination, pages=-1, progress=on_step)
+        finally:
+            if pin_snapshot:
+                source.rollback()
+    finally:
+        destination.close()
+    return state["total"]
+
+
+def _compress_file(source_path: str, target_path: str) -> None:
+    partial_path = f"{target_path}.partial"
+    try:
+        with open(source_path, "rb") as src, gzip.open(
+            partial_path, "wb", compresslevel=BACKUP_COMPRESS_LEVEL
+        ) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(partial_path, target_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+@contextmanager
+def open_backup(backup_path: str) -> Iterator[str]:
+    """
+    Yields the path of a plain SQLite file with the backup's contents.
+
+    Compressed backups are decompressed to a temporary file that is removed
+    when the block exits; uncompressed backups are yielded as they are.
+    """
+    if not os.path.exists(backup_path):
+        raise FileNotFoundError(backup_path)
+    if not backup_path.endswith(".gz"):
+        yield backup_path
+        return
+
+    fd, plain_path = tempfile.mkstemp(suffix=BACKUP_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as dst, gzip.open(backup_path, "rb") as src:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        yield plain_path
+    finally:
+        os.remove(plain_path)
+
+
+def verify_backup(backup_path: str) -> List[str]:
+    """
+    Checks that a backup is a readable, uncorrupted SQLite database.
+
+    Runs PRAGMA integrity_check on the backup (decompressing it first if
+    needed); a damaged gzip stream is reported as well.
+
+    Returns:
+        The problems found; an empty list means the backup is sound
+    """
+    try:
+        with open_backup(backup_path) as plain_path:
+            connection = sqlite3.connect(f"file:{plain_path}?mode=ro", uri=True)
+            try:
+                rows = connection.execute("PRAGMA integrity_check").fetchall()
+            finally:
+                connection.close()
+    except (OSError, EOFError, sqlite3.DatabaseError) as e:
+        return [f"{type(e).__name__}: {e}"]
+    return [row[0] for row in rows if row[0] != "ok"]
+
+
+def restore_database(engine, backup_path: str) -> Dict[str, int]:
+    """
+    Replaces the contents of the engine's database with those of a backup.
+
+    The backup is attached to a connection of the live database and every
+    table present in both is emptied and refilled with one INSERT ... SELECT
+    over the columns they share, all in a single transaction. The schema of
+    the live database is kept, so a backup taken before a migration can be
+    restored after it. Foreign keys are checked once, at the end.
+
+    Args:
+        engine: SQLAlchemy engine of the SQLite database to restore into
+        backup_path: Backup file, compressed or not
+
+    Returns:
+        Number of rows restored per table
+    """
+    problems = verify_backup(backup_path)
+    if problems:
+        raise ValueError(f"The backup is damaged: {problems[0]}")
+
+    restored = {}
+    with open_backup(backup_path) as plain_path:
+        raw = engine.raw_connection()
+        connection = raw.driver_connection
+        isolation_level = connection.isolation_level
+        try:
+            connection.isolation_level = None
+            foreign_keys = connection.execute("PRAGMA foreign_keys").fetchone()[0]
+            connection.execute("PRAGMA foreign_keys = OFF")
+            connection.execute("ATTACH DATABASE ? AS backup", (plain_path,))
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    search_index = _has_table(connection, PRODUCT_SEARCH_TABLE)
+                    if search_index:
+                        # Re-indexed once below instead of row by row by the triggers
+                        for trigger in PRODUCT_SEARCH_TRIGGERS:
+                            connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                    sales_rollups = _has_table(connection, SALES_ROLLUP_TABLES[0])
+                    if sales_rollups:
+                        # Rebuilt from the restored sales below
+                        for trigger in SALES_ROLLUP_TRIGGERS:
+                            connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                    stock_checkpoints = _has_table(connection, STOCK_CHECKPOINTS)
+                    if stock_checkpoints:
+                        # Recomputed from the restored movements below
+                        for trigger in STOCK_CHECKPOINT_TRIGGERS:
+                            connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                    for table in _restorable_tables(connection):
+                        restored[table] = _restore_table(connection, table)
+                    # A backup older than the drawer state has to have it recomputed
+                    rebuild_drawer = _has_table(connection, "cash_drawer_state") and (
+                        "cash_drawer_state" not in restored
+                    )
+                    if _has_table(connection, "invoice_sequences") and (
+                        "invoice_sequences" not in restored
+                    ):
+                        # Sequences start again after the restored invoices
+                        connection.execute("DELETE FROM invoice_sequences")
+                    if sales_rollups:
+                        deletes, inserts, params = rebuild_statements()
+                        for statement in deletes + list(inserts.values()):
+                            connection.execute(statement, params)
+                        for statement in SALES_ROLLUP_TRIGGERS_DDL:
+                            connection.execute(statement)
+                    if stock_checkpoints:
+                        connection.execute(f"DELETE FROM {STOCK_CHECKPOINTS}")
+                        connection.execute(
+                            stock_checkpoint_refresh_statement(),
+                            {"until": str(current_period_start())},
+                        )
+                        for statement in STOCK_CHECKPOINTS_DDL:
+                            connection.execute(statement)
+                    if _has_table(connection, READ_MODEL_TABLES[0]):
+                        # Projected again from the restored rows
+                        deletes, inserts = read_model_rebuild_statements()
+                        for statement in deletes + list(inserts.values()):
+                            connection.execute(statement)
+                    if search_index:
+                        connection.execute(
+                            f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}) "
+                            "VALUES ('rebuild')"
+                        )
+                        for statement in PRODUCT_SEARCH_TRIGGERS_DDL:
+                            connection.execute(statement)
+                    violations = connection.execute("PRAGMA foreign_key_check").fetchall()
+                    if violations:
+                        raise ValueError(
+                            f"The backup breaks {len(violations)} foreign key references"
+                        )
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+            finally:
+                connection.execute("DETACH DATABASE backup")
+                connection.execute(f"PRAGMA foreign_keys = {int(foreign_keys)}")
+        finally:
+            connection.isolation_level = isolation_level
+            raw.close()
+
+    if rebuild_drawer:
+        with engine.begin() as connection:
+            rebuild_drawer_state(connection)
+
+    logger.info(
+        f"Restored {sum(restored.values())} rows in {len(restored)} tables from {backup_path}"
+    )
+    return restored
+
+
+def _has_table(connection: sqlite3.Connection, name: str, schema: str = "main") -> bool:
+    return (
+        connection.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?",
+            (name,),
+        ).fetchone()
+        is not None
+    )
+
+
+def _restorable_tables(connection: sqlite3.Connection) -> List[str]:
+    """
+    Ordinary tables present in both databases.
+
+    Virtual, internal and derived tables (the sales rollups, the read
+    models and the stock checkpoints) are left out.
+    """
+    rows = connection.execute(
+        "SELECT name, sql FROM main.sqlite_master WHERE type = 'table' "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+    virtual_tables = [
+        name for name, sql in rows if (sql or "").upper().startswith("CREATE VIRTUAL TABLE")
+    ]
+    return [
+        name
+        for name, _ in rows
+        if name not in _SCHEMA_TABLES
+        and name not in SALES_ROLLUP_TABLES
+        and name not in READ_MODEL_TABLES
+        and name not in STOCK_CHECKPOINT_TABLES
+        and name not in virtual_tables
+        # Shadow tables holding the data of a virtual table
+        and not any(name.startswith(f"{virtual}_") for virtual in virtual_tables)
+        and _has_table(connection, name, schema="backup")
+    ]
+
+
+def _restore_table(connection: sqlite3.Connection, table: str) -> int:
+    """Refills a live table from the attached backup; returns the rows copied."""
+    live_columns = [row[1] for row in connection.execute(f'PRAGMA main.table_info("{table}")')]
+    backup_columns = {
+        row[1] for row in connection.execute(f'PRAGMA backup.table_info("{table}")')
+    }
+    columns = ", ".join(f'"{name}"' for name in live_columns if name in backup_columns)
+    connection.execute(f'DELETE FROM main."{table}"')
+    cursor = connection.execute(
+        f'INSERT INTO main."{table}" ({columns}) SELECT {columns} FROM backup."{table}"'
+    )
+    return cursor.rowcount
+
+
+def backup_file_name(compress: bool = True, now: Optional[datetime] = None) -> str:
+    """Returns the file name of a backup taken now, e.g. respaldo_20261016_103000.db.gz."""
+    stamp = (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    return f"{BACKUP_PREFIX}{stamp}{COMPRESSED_SUFFIX if compress else BACKUP_SUFFIX}"
+
+
+def list_backups(backup_dir: str) -> List[str]:
+    """Returns the backups in backup_dir, oldest first."""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [
+        name
+        for name in os.listdir(backup_dir)
+        if name.startswith(BACKUP_PREFIX)
+        and (name.endswith(BACKUP_SUFFIX) or name.endswith(COMPRESSED_SUFFIX))
+    ]
+    # Names embed the timestamp, so they sort chronologically
+    return [os.path.join(backup_dir, name) for name in sorted(names)]
+
+
+def prune_backups(backup_dir: str, keep_last: int) -> List[str]:
+    """
+    Deletes all but the newest keep_last backups in backup_dir.
+
+    Returns:
+        Paths of the deleted backups
+    """
+    backups = list_backups(backup_dir)
+    expired = backups[: max(len(backups) - keep_last, 0)]
+    for path in expired:
+        os.remove(path)
+        logger.info(f"Deleted expired backup {path}")
+    return expired
+
+
+class BackupScheduler:
+    """
+    Takes a verified snapshot of the database at a fixed interval.
+
+    Snapshots are written to backup_dir with backup_file_name(), checked with
+    verify_backup(), and only then are old snapshots pruned down to
+    keep_last, so a failed snapshot never costs a good one. Runs on a daemon
+    thread; a failing snapshot is logged and retried at the next interval.
+    """
+
+    def __init__(
+        self,
+        engine,
+        backup_dir: str,
+        interval_seconds: float,
+        keep_last: int = 7,
+        compress: bool = True,
+    ):
+        self.engine = engine
+        self.backup_dir = backup_dir
+        self.interval_seconds = interval_seconds
+        self.keep_last = keep_last
+        self.compress = compress
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts taking snapshots in the background; the first one after one interval."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="BackupScheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the scheduler, waiting for a snapshot in progress to finish."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> Optional[BackupResult]:
+        """Takes, verifies and prunes one snapshot; returns None if it failed."""
+        target = os.path.join(self.backup_dir, backup_file_name(self.compress))
+        try:
+            result = backup_database(self.engine, target, compress=self.compress)
+        except Exception as e:
+            logger.error(f"Scheduled backup failed: {e}")
+            return None
+
+        problems = verify_backup(result.path)
+        if problems:
+            logger.error(f"Scheduled backup {result.path} failed verification: {problems[:5]}")
+            os.remove(result.path)
+            return None
+
+        prune_backups(self.backup_dir, self.keep_last)
+        return result
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
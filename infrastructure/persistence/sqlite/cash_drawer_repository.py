@@ -1,14 +1,157 @@
-from typing import List, Optional, Callable, Union
+"""
+SQLite repository for the cash drawer ledger.
+
+Every entry is appended to ``cash_drawer_entries``. add_entry also keeps,
+in the same transaction, a running state per drawer (balance of its whole
+ledger and its open session, ``cash_drawer_state``) and per-session totals
+(``cash_drawer_sessions``), so the balance and open/closed checks the till
+runs all the time read one row instead of the whole ledger.
+check_consistency() recomputes both from the ledger on demand.
+"""
+
+from typing import Dict, List, Optional, Callable, Union
 from datetime import datetime, date
 from decimal import Decimal
 from functools import wraps
 
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import and_, delete, desc, func, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from core.interfaces.repository_interfaces import ICashDrawerRepository
-from core.models.cash_drawer import CashDrawerEntry, CashDrawerEntryType
-from infrastructure.persistence.sqlite.models_mapping import CashDrawerEntryOrm
+from core.models.cash_drawer import (
+    CashDrawerEntry,
+    CashDrawerEntryType,
+    CashDrawerSession,
+)
+from infrastructure.persistence.sqlite.models_mapping import (
+    CashDrawerEntryOrm,
+    CashDrawerSessionOrm,
+    CashDrawerStateOrm,
+)
+
+# cash_drawer_state key of the entries recorded without a drawer_id
+NO_DRAWER_KEY = -1
+
+_STATUS_TYPES = (CashDrawerEntryType.START.value, CashDrawerEntryType.CLOSE.value)
+
+# Session total each movement type adds up in
+_SESSION_TOTALS = {
+    CashDrawerEntryType.IN.value: "total_in",
+    CashDrawerEntryType.OUT.value: "total_out",
+    CashDrawerEntryType.SALE.value: "total_sales",
+    CashDrawerEntryType.RETURN.value: "total_returns",
+}
+
+
+def _cents(amount) -> Decimal:
+    # SQLite adds Numeric columns as floats; compare amounts to the cent
+    return Decimal(str(amount or 0)).quantize(Decimal("0.01"))
+
+
+def drawer_key(drawer_id: Optional[int]) -> int:
+    """Returns the cash_drawer_state key of a drawer."""
+    return NO_DRAWER_KEY if drawer_id is None else drawer_id
+
+
+def rebuild_drawer_state(connection) -> int:
+    """
+    Recomputes cash_drawer_state and cash_drawer_sessions from the ledger.
+
+    Balances are summed set-based, sessions are rebuilt by replaying only
+    the START and CLOSE entries in timestamp order, and session totals are
+    filled with one UPDATE. Runs in the caller's transaction.
+
+    Args:
+        connection: SQLAlchemy connection or session
+
+    Returns:
+        Number of sessions rebuilt
+    """
+    entries = CashDrawerEntryOrm.__table__.c
+    sessions = CashDrawerSessionOrm.__table__
+    state = CashDrawerStateOrm.__table__
+    key = func.coalesce(entries.drawer_id, NO_DRAWER_KEY)
+
+    connection.execute(delete(state))
+    connection.execute(delete(sessions))
+    connection.execute(
+        insert(state).from_select(
+            ["drawer_key", "balance", "entry_count"],
+            select(key, func.sum(entries.amount), func.count(entries.id)).group_by(key),
+        )
+    )
+
+    status_entries = connection.execute(
+        select(
+            entries.drawer_id,
+            entries.entry_type,
+            entries.timestamp,
+            entries.amount,
+            entries.user_id,
+        )
+        .where(entries.entry_type.in_(_STATUS_TYPES))
+        .order_by(key, entries.timestamp, entries.id)
+    ).all()
+
+    rebuilt = []
+    last_status = {}
+    open_sessions = {}
+    for row in status_entries:
+        current = open_sessions.pop(drawer_key(row.drawer_id), None)
+        if current:
+            current["closed_at"] = row.timestamp
+            if row.entry_type == CashDrawerEntryType.CLOSE.value:
+                current["closed_by"] = row.user_id
+                current["closing_amount"] = row.amount
+        if row.entry_type == CashDrawerEntryType.START.value:
+            # The table was just emptied, so ids can be assigned in order
+            session_row = {
+                "id": len(rebuilt) + 1,
+                "drawer_id": row.drawer_id,
+                "opened_at": row.timestamp,
+                "opened_by": row.user_id,
+                "opening_amount": row.amount,
+                "closed_at": None,
+                "closed_by": None,
+                "closing_amount": None,
+            }
+            rebuilt.append(session_row)
+            open_sessions[drawer_key(row.drawer_id)] = session_row
+        last_status[drawer_key(row.drawer_id)] = row.timestamp
+
+    if rebuilt:
+        connection.execute(insert(sessions), rebuilt)
+        # Entries of a session: same drawer, from opening until the next status change
+        window = and_(
+            key == func.coalesce(sessions.c.drawer_id, NO_DRAWER_KEY),
+            entries.timestamp >= sessions.c.opened_at,
+            or_(sessions.c.closed_at.is_(None), entries.timestamp < sessions.c.closed_at),
+        )
+        totals = {
+            column: select(func.coalesce(func.sum(entries.amount), 0))
+            .where(window, entries.entry_type == entry_type)
+            .scalar_subquery()
+            for entry_type, column in _SESSION_TOTALS.items()
+        }
+        totals["entry_count"] = (
+            select(func.count(entries.id))
+            .where(window, entries.entry_type.in_(list(_SESSION_TOTALS)))
+            .scalar_subquery()
+        )
+        connection.execute(update(sessions).values(totals))
+
+    for key_value, timestamp in last_status.items():
+        open_session = open_sessions.get(key_value)
+        connection.execute(
+            update(state)
+            .where(state.c.drawer_key == key_value)
+            .values(
+                last_status_at=timestamp,
+                open_session_id=open_session["id"] if open_session else None,
+            )
+        )
+    return len(rebuilt)
 
 
 class SQLiteCashDrawerRepository(ICashDrawerRepository):
@@ -65,8 +208,10 @@ class SQLiteCashDrawerRepository(ICashDrawerRepository):
                 drawer_id=entry.drawer_id,
             )
 
-            # Add to session
+            # Add to session; the drawer state is committed together with it
             session.add(entry_orm)
+            session.flush()
+            self._apply_to_drawer_state(session, entry_orm)
             session.commit()
 
             # Update domain model with generated ID
@@ -139,16 +284,71 @@ class SQLiteCashDrawerRepository(ICashDrawerRepository):
 
         return _get_entries_by_drawer_id(drawer_id)
 
+    def _apply_to_drawer_state(self, session, entry_orm: CashDrawerEntryOrm) -> None:
+        """Adds a new ledger entry to its drawer's running state and session."""
+        key = drawer_key(entry_orm.drawer_id)
+        session.execute(
+            sqlite_insert(CashDrawerStateOrm)
+            .values(drawer_key=key, balance=0, entry_count=0)
+            .on_conflict_do_nothing(index_elements=["drawer_key"])
+        )
+        state = session.get(CashDrawerStateOrm, key)
+        # Incremented in SQL, so concurrent writers never lose an update
+        state.balance = CashDrawerStateOrm.balance + entry_orm.amount
+        state.entry_count = CashDrawerStateOrm.entry_count + 1
+
+        is_status = entry_orm.entry_type in _STATUS_TYPES
+        # A backdated START/CLOSE does not change the state of the drawer
+        if is_status and (
+            state.last_status_at is None or entry_orm.timestamp >= state.last_status_at
+        ):
+            if state.open_session_id is not None:
+                current = session.get(CashDrawerSessionOrm, state.open_session_id)
+                current.closed_at = entry_orm.timestamp
+                if entry_orm.entry_type == CashDrawerEntryType.CLOSE.value:
+                    current.closed_by = entry_orm.user_id
+                    current.closing_amount = entry_orm.amount
+            state.last_status_at = entry_orm.timestamp
+            state.open_session_id = None
+            if entry_orm.entry_type == CashDrawerEntryType.START.value:
+                opened = CashDrawerSessionOrm(
+                    drawer_id=entry_orm.drawer_id,
+                    opened_at=entry_orm.timestamp,
+                    opened_by=entry_orm.user_id,
+                    opening_amount=entry_orm.amount,
+                )
+                session.add(opened)
+                session.flush()
+                state.open_session_id = opened.id
+        elif not is_status and state.open_session_id is not None:
+            column = getattr(CashDrawerSessionOrm, _SESSION_TOTALS[entry_orm.entry_type])
+            session.execute(
+                update(CashDrawerSessionOrm)
+                .where(CashDrawerSessionOrm.id == state.open_session_id)
+                .values(
+                    {
+                        column: column + entry_orm.amount,
+                        CashDrawerSessionOrm.entry_count: CashDrawerSessionOrm.entry_count + 1,
+                    }
+                )
+            )
+        session.flush()
+
     def get_current_balance(self, drawer_id: Optional[int] = None) -> Decimal:
-        """Get the current balance of the drawer."""
+        """
+        Get the current balance of the drawer.
+
+        Reads the running balance instead of adding up the ledger; with no
+        drawer_id, the balances of all drawers are added.
+        """
 
         @self._session_wrapper
         def _get_current_balance(session, drawer_id):
-            query = session.query(func.sum(CashDrawerEntryOrm.amount).label("balance"))
+            query = session.query(func.sum(CashDrawerStateOrm.balance).label("balance"))
 
             # Apply drawer_id filter if specified
             if drawer_id is not None:
-                query = query.filter(CashDrawerEntryOrm.drawer_id == drawer_id)
+                query = query.filter(CashDrawerStateOrm.drawer_key == drawer_id)
 
             result = query.first()
             balance = (
@@ -161,29 +361,116 @@ class SQLiteCashDrawerRepository(ICashDrawerRepository):
 
         return _get_current_balance(drawer_id)
 
+    def _latest_state(self, session, drawer_id: Optional[int]) -> Optional[CashDrawerStateOrm]:
+        """State of the drawer, or with no drawer_id the one whose status changed last."""
+        query = session.query(CashDrawerStateOrm).filter(
+            CashDrawerStateOrm.last_status_at.isnot(None)
+        )
+        if drawer_id is not None:
+            query = query.filter(CashDrawerStateOrm.drawer_key == drawer_id)
+        return query.order_by(desc(CashDrawerStateOrm.last_status_at)).first()
+
     def is_drawer_open(self, drawer_id: Optional[int] = None) -> bool:
-        """Check if the drawer is currently open."""
+        """Check if the drawer is currently open (its latest START/CLOSE is a START)."""
 
         @self._session_wrapper
         def _is_drawer_open(session, drawer_id):
-            # Get the most recent entry of type START or CLOSE
-            relevant_types = [
-                CashDrawerEntryType.START.value,
-                CashDrawerEntryType.CLOSE.value,
-            ]
-            query = session.query(CashDrawerEntryOrm).filter(
-                CashDrawerEntryOrm.entry_type.in_(relevant_types)
-            )
-            if drawer_id is not None:
-                query = query.filter(CashDrawerEntryOrm.drawer_id == drawer_id)
-            # Order by timestamp descending to get the most recent relevant entry
-            last_entry = query.order_by(desc(CashDrawerEntryOrm.timestamp)).first()
-            if not last_entry:
-                return False
-            return last_entry.entry_type == CashDrawerEntryType.START.value
+            state = self._latest_state(session, drawer_id)
+            return state is not None and state.open_session_id is not None
 
         return _is_drawer_open(drawer_id)
 
+    def get_open_session(
+        self, drawer_id: Optional[int] = None
+    ) -> Optional[CashDrawerSession]:
+        """Gets the open session of the drawer, with its running totals."""
+
+        @self._session_wrapper
+        def _get_open_session(session, drawer_id):
+            state = self._latest_state(session, drawer_id)
+            if state is None or state.open_session_id is None:
+                return None
+            return CashDrawerSession.model_validate(
+                session.get(CashDrawerSessionOrm, state.open_session_id)
+            )
+
+        return _get_open_session(drawer_id)
+
+    def check_consistency(self, repair: bool = False) -> List[str]:
+        """
+        Recomputes each drawer's balance and open state from the ledger.
+
+        Args:
+            repair: Rebuild the drawer state and sessions from the ledger
+                when a difference is found
+
+        Returns:
+            Differences found, empty if the state matches the ledger
+        """
+
+        @self._session_wrapper
+        def _check_consistency(session, repair):
+            problems = []
+            state = {row.drawer_key: row for row in session.query(CashDrawerStateOrm)}
+            for key, ledger in self._ledger_totals(session).items():
+                kept = state.pop(key, None)
+                label = "without drawer" if key == NO_DRAWER_KEY else f"{key}"
+                if kept is None:
+                    problems.append(f"Drawer {label}: no running state")
+                    continue
+                if _cents(kept.balance) != ledger["balance"]:
+                    problems.append(
+                        f"Drawer {label}: balance is {kept.balance} "
+                        f"but the ledger adds up to {ledger['balance']}"
+                    )
+                if kept.entry_count != ledger["entry_count"]:
+                    problems.append(
+                        f"Drawer {label}: {kept.entry_count} entries counted "
+                        f"but the ledger has {ledger['entry_count']}"
+                    )
+                if (kept.open_session_id is not None) != ledger["is_open"]:
+                    status = "open" if ledger["is_open"] else "closed"
+                    problems.append(f"Drawer {label}: should be {status}")
+            for key in state:
+                problems.append(f"Drawer {key}: running state without ledger entries")
+
+            if problems and repair:
+                rebuild_drawer_state(session)
+                session.commit()
+            return problems
+
+        return _check_consistency(repair)
+
+    def _ledger_totals(self, session) -> Dict[int, Dict]:
+        """Balance, entry count and open state of each drawer, from the ledger."""
+        key = func.coalesce(CashDrawerEntryOrm.drawer_id, NO_DRAWER_KEY)
+        totals = {
+            row.key: {
+                "balance": _cents(row.balance),
+                "entry_count": row.entry_count,
+                "is_open": False,
+            }
+            for row in session.query(
+                key.label("key"),
+                func.sum(CashDrawerEntryOrm.amount).label("balance"),
+                func.count(CashDrawerEntryOrm.id).label("entry_count"),
+            ).group_by(key)
+        }
+        for key_value, drawer in totals.items():
+            query = session.query(CashDrawerEntryOrm.entry_type).filter(
+                CashDrawerEntryOrm.entry_type.in_(_STATUS_TYPES),
+                CashDrawerEntryOrm.drawer_id.is_(None)
+                if key_value == NO_DRAWER_KEY
+                else CashDrawerEntryOrm.drawer_id == key_value,
+            )
+            latest = query.order_by(
+                desc(CashDrawerEntryOrm.timestamp), desc(CashDrawerEntryOrm.id)
+            ).first()
+            drawer["is_open"] = bool(
+                latest and latest.entry_type == CashDrawerEntryType.START.value
+            )
+        return totals
+
     def get_today_entries(
         self, drawer_id: Optional[int] = None
     ) -> List[CashDrawerEntry]:
@@ -6,11 +6,15 @@ import sqlalchemy.pool
 
 # Import SessionScopeProvider
 from infrastructure.persistence.utils import session_scope_provider
+from infrastructure.persistence.sqlite.engine_profile import (
+    EngineProfile,
+    apply_engine_profile,
+)
 
 # Assuming config.py is in the root and the application runs from the root
 # If running scripts directly from subdirs, path adjustments might be needed.
 try:
-    from config import DATABASE_URL
+    from config import DATABASE_URL, config
 except ImportError:
     # Fallback for potential path issues during development/testing setup
     import sys
@@ -22,7 +26,7 @@ except ImportError:
     )
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
-    from config import DATABASE_URL
+    from config import DATABASE_URL, config
 
 
 # Create a declarative base directly
@@ -47,6 +51,11 @@ if "sqlite" in DATABASE_URL:
 
 engine = create_engine(DATABASE_URL, **engine_args)
 
+# Tune file databases (WAL, page cache, mmap, busy timeout, foreign keys); the
+# in-memory databases used by tests keep SQLite's defaults
+if "sqlite" in DATABASE_URL and not is_memory_db:
+    apply_engine_profile(engine, EngineProfile.from_config(config))
+
 # Each instance of SessionLocal will be a database session.
 SessionLocal = sessionmaker(autoflush=False, bind=engine)
 
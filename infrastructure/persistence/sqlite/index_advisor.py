@@ -0,0 +1,206 @@
+"""
+Index advisor: finds repository queries that scan whole tables.
+
+The advisor records the SELECT statements the repositories send to SQLite,
+runs EXPLAIN QUERY PLAN on each one with its actual parameters and flags
+every plan step of the form ``SCAN <table>``, i.e. a scan that is not
+satisfied from an index. Scans of small lookup tables are expected and can
+be ignored.
+
+Run it against a database to review the report queries:
+
+    python -m infrastructure.persistence.sqlite.index_advisor [database_url]
+
+The workload runs inside a transaction that is rolled back, so the database
+is left untouched. The exit status is 1 when full scans were found.
+"""
+
+import re
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Lookup tables (and the schema table) small enough that scanning them is cheap
+SMALL_TABLES = ("departments", "units", "users", "sqlite_master")
+
+# "SCAN sales" or "SCAN sales AS s", but not "SCAN sales USING INDEX ..."
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+# (statement, parameters) as sent to the DBAPI cursor
+CapturedStatement = Tuple[str, Sequence]
+
+
+@dataclass
+class QueryPlanFinding:
+    """A statement whose plan scans a table without using an index."""
+
+    table: str
+    statement: str
+    plan: List[str]
+
+    def __str__(self) -> str:
+        plan = "\n".join(f"    {step}" for step in self.plan)
+        return f"Full scan of {self.table}:\n  {self.statement}\n{plan}"
+
+
+@contextmanager
+def capture_statements(connection) -> Iterator[List[CapturedStatement]]:
+    """
+    Records the SELECT statements executed on a connection during the block.
+
+    Args:
+        connection: SQLAlchemy Connection (e.g. session.connection())
+
+    Yields:
+        The list the (statement, parameters) pairs are appended to
+    """
+    captured: List[CapturedStatement] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        yield captured
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+
+def explain_query_plan(connection, statement: str, parameters: Sequence = ()) -> List[str]:
+    """Returns the EXPLAIN QUERY PLAN steps of a statement, in order."""
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def full_scans(plan: Iterable[str]) -> List[str]:
+    """Returns the tables a plan reads without an index."""
+    tables = []
+    for step in plan:
+        match = _FULL_SCAN.match(step.strip())
+        if match and match.group(1) != "CONSTANT":
+            tables.append(match.group(1))
+    return tables
+
+
+def advise(
+    connection,
+    statements: Iterable[CapturedStatement],
+    ignore_tables: Sequence[str] = SMALL_TABLES,
+) -> List[QueryPlanFinding]:
+    """
+    Explains each distinct statement and reports the full table scans.
+
+    Args:
+        connection: SQLAlchemy Connection to the database the statements ran on
+        statements: Captured (statement, parameters) pairs
+        ignore_tables: Tables whose scans are not reported
+
+    Returns:
+        One finding per statement and scanned table
+    """
+    # Scans of subqueries (e.g. the union of rollup and raw rows) read a
+    # materialized result, not a table, so only real tables are reported
+    tables = set(
+        connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).scalars()
+    )
+    findings = []
+    seen = set()
+    for statement, parameters in statements:
+        if statement in seen:
+            continue
+        seen.add(statement)
+        plan = explain_query_plan(connection, statement, parameters)
+        for table in full_scans(plan):
+            if table in tables and table not in ignore_tables:
+                findings.append(QueryPlanFinding(table, " ".join(statement.split()), plan))
+    return findings
+
+
+def run_report_workload(session, days: int = 30) -> None:
+    """
+    Calls the read queries of the repositories behind the till and the reports.
+
+    Arguments are representative rather than meaningful: a date range of
+    the last `days` days, the first product and drawer 1.
+    """
+    from infrastructure.persistence.sqlite.cash_drawer_repository import (
+        SQLiteCashDrawerRepository,
+    )
+    from infrastructure.persistence.sqlite.repositories import (
+        SqliteInventoryRepository,
+        SqliteProductRepository,
+        SqliteSaleRepository,
+    )
+
+    end = datetime.now()
+    start = end - timedelta(days=days)
+
+    products = SqliteProductRepository(session)
+    products.get_by_id(1)
+    products.get_by_code("0000000000000")
+    products.search("coca")
+
+    sales = SqliteSaleRepository(session)
+    sales.get_sales_by_period(start, end)
+    sales.get_sales_summary_by_period(start, end)
+    sales.get_sales_by_payment_type(start, end)
+    sales.get_sales_by_department(start, end)
+    sales.get_sales_by_customer(start, end)
+    sales.get_top_selling_products(start, end)
+    sales.calculate_profit_for_period(start, end)
+    sales.get_cash_drawer_entries(start, end, drawer_id=1)
+    sales.get_last_start_entry(drawer_id=1)
+
+    inventory = SqliteInventoryRepository(session)
+    inventory.get_movements_for_product(1, start, end)
+    inventory.get_movements(product_id=1, start_date=start, end_date=end)
+
+    drawer = SQLiteCashDrawerRepository(session)
+    drawer.get_entries_by_date_range(start.date(), end.date(), drawer_id=1)
+    drawer.get_entries_by_drawer_id(1)
+    drawer.is_drawer_open(1)
+    drawer.get_last_start_entry(1)
+    drawer.get_entries_by_type("START", start, end)
+
+
+def main(argv=None) -> int:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        database_url = argv[0]
+    else:
+        from config import DATABASE_URL as database_url
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            session = Session(bind=connection)
+            with capture_statements(connection) as statements:
+                run_report_workload(session)
+            findings = advise(connection, statements)
+        finally:
+            transaction.rollback()
+
+    for finding in findings:
+        print(finding)
+        print()
+    print(f"{len(statements)} queries explained, {len(findings)} full table scans found.")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,9 @@ from sqlalchemy import (
     Numeric,
     Text,
     Enum,
+    Index,
 )
+from sqlalchemy import event, text
 from sqlalchemy.orm import relationship, registry
 import datetime
 import uuid
@@ -25,6 +27,11 @@ from .types import SQLiteUUID
 # Import core models after Base is initialized
 from core.models.enums import PaymentType
 
+from .product_search import create_product_search_index, drop_product_search_index
+from .sales_rollups import create_sales_rollups, drop_sales_rollups
+from .read_models import create_read_models, drop_read_models
+from .stock_checkpoints import create_stock_checkpoints, drop_stock_checkpoints
+
 # Import core models for reference if needed, but avoid direct coupling in ORM definitions
 #  as CoreSupplier
 # Order as CorePurchaseOrder, PurchaseOrderItem as CorePurchaseOrderItem
@@ -73,6 +80,10 @@ class ProductOrm(Base):
     __tablename__ = "products"
     __table_args__ = (
         UniqueConstraint("code", name="uq_product_code"),
+        # Keyset pages of the catalog seek on (description, id)
+        Index("ix_products_description_id", "description", "id"),
+        # Exact code lookups ignore case; this index lets them seek
+        Index("ix_products_code_nocase", text("code COLLATE NOCASE")),
         {"extend_existing": True},
     )
 
@@ -98,18 +109,64 @@ class ProductOrm(Base):
     last_updated = Column(DateTime, nullable=True, onupdate=datetime.datetime.now)
     notes = Column(String, nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    # Bumped by every write; ORM updates require the version they loaded
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
     # created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     # Relationship: Many-to-One (Many Products belong to One Department)
     department = relationship("DepartmentOrm", back_populates="products")
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self):
         return f"<ProductOrm(id={self.id}, code='{self.code}', description='{self.description}')>"
 
 
+# Keep the products_fts full-text index alongside the products table
+event.listen(
+    ProductOrm.__table__,
+    "after_create",
+    lambda target, connection, **kw: create_product_search_index(connection),
+)
+event.listen(
+    ProductOrm.__table__,
+    "before_drop",
+    lambda target, connection, **kw: drop_product_search_index(connection),
+)
+
+
+class ProductPriceHistoryOrm(Base):
+    """Old and new prices of a product, one row per price change."""
+
+    __tablename__ = "product_price_history"
+    __table_args__ = (
+        Index("ix_product_price_history_product_changed_at", "product_id", "changed_at"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+    )
+    changed_at = Column(DateTime, nullable=False, default=datetime.datetime.now)
+    old_sell_price = Column(Numeric(10, 2), nullable=True)
+    new_sell_price = Column(Numeric(10, 2), nullable=True)
+    old_cost_price = Column(Numeric(10, 2), nullable=True)
+    new_cost_price = Column(Numeric(10, 2), nullable=True)
+    # Set when the change was part of a percentage update
+    percentage = Column(Numeric(8, 3), nullable=True)
+
+    def __repr__(self):
+        return f"<ProductPriceHistoryOrm(product_id={self.product_id}, {self.old_sell_price} -> {self.new_sell_price})>"
+
+
 class InventoryMovementOrm(Base):
     __tablename__ = "inventory_movements"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Movement history of a product, newest first
+        Index("ix_inventory_movements_product_timestamp", "product_id", "timestamp"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
@@ -142,9 +199,30 @@ class InventoryMovementOrm(Base):
         return f"<InventoryMovementOrm(id={self.id}, product_id={self.product_id}, type='{self.movement_type}', qty={self.quantity})>"
 
 
+event.listen(
+    InventoryMovementOrm.__table__,
+    "after_create",
+    lambda target, connection, **kw: create_stock_checkpoints(connection),
+)
+event.listen(
+    InventoryMovementOrm.__table__,
+    "before_drop",
+    lambda target, connection, **kw: drop_stock_checkpoints(connection),
+)
+
+
 class SaleOrm(Base):
     __tablename__ = "sales"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Covers the period summary and payment type reports
+        Index(
+            "ix_sales_date_time_payment_type_total",
+            "date_time",
+            "payment_type",
+            "total_amount",
+        ),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     date_time = Column(
@@ -182,7 +260,18 @@ class SaleOrm(Base):
 
 class SaleItemOrm(Base):
     __tablename__ = "sale_items"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Covers the item side of the department, product and profit reports
+        Index(
+            "ix_sale_items_sale_product_quantity_prices",
+            "sale_id",
+            "product_id",
+            "quantity",
+            "unit_price",
+            "cost_price",
+        ),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False, index=True)
@@ -191,6 +280,9 @@ class SaleItemOrm(Base):
         Numeric(10, 3), nullable=False
     )  # Allow 3 decimal places for quantity
     unit_price = Column(Numeric(10, 2), nullable=False)  # Price at the time of sale
+    cost_price = Column(
+        Numeric(10, 2), nullable=True
+    )  # Cost at the time of sale (NULL when no snapshot was taken)
     product_code = Column(String, nullable=True)  # Denormalized
     product_description = Column(String, nullable=True)  # Denormalized
     product_unit = Column(String, nullable=True, default="Unidad")  # Unit of measure
@@ -209,10 +301,27 @@ class SaleItemOrm(Base):
         return f"<SaleItemOrm(id={self.id}, sale_id={self.sale_id}, product_id={self.product_id}, qty={self.quantity})>"
 
 
+# The daily sales rollups are maintained by triggers on sales, sale_items and products
+event.listen(
+    SaleItemOrm.__table__,
+    "after_create",
+    lambda target, connection, **kw: create_sales_rollups(connection),
+)
+event.listen(
+    SaleItemOrm.__table__,
+    "before_drop",
+    lambda target, connection, **kw: drop_sales_rollups(connection),
+)
+
+
 # New ORM Model for Customer
 class CustomerOrm(Base):
     __tablename__ = "customers"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Keyset pages of the customer list seek on (name, id)
+        Index("ix_customers_name_id", "name", "id"),
+        {"extend_existing": True},
+    )
 
     id = Column(SQLiteUUID, primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String, nullable=False, index=True)
@@ -312,6 +421,19 @@ class InvoiceOrm(Base):
         return f"<InvoiceOrm(id={self.id}, sale_id={self.sale_id}, invoice_number='{self.invoice_number}')>"
 
 
+class InvoiceSequenceOrm(Base):
+    """Last invoice number handed out by each point of sale."""
+
+    __tablename__ = "invoice_sequences"
+    __table_args__ = {"extend_existing": True}
+
+    point_of_sale = Column(Integer, primary_key=True, autoincrement=False)
+    last_number = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<InvoiceSequenceOrm(point_of_sale={self.point_of_sale}, last_number={self.last_number})>"
+
+
 class UnitOrm(Base):
     """ORM mapping for custom units."""
 
@@ -337,7 +459,18 @@ class CashDrawerEntryOrm(Base):
     """ORM mapping for cash drawer entries."""
 
     __tablename__ = "cash_drawer_entries"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Latest START/CLOSE entry of a drawer and entries of a drawer by type
+        Index(
+            "ix_cash_drawer_entries_drawer_type_timestamp",
+            "drawer_id",
+            "entry_type",
+            "timestamp",
+        ),
+        # Entries of a type in a period across drawers
+        Index("ix_cash_drawer_entries_type_timestamp", "entry_type", "timestamp"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     timestamp = Column(DateTime, nullable=False, index=True)
@@ -356,6 +489,114 @@ class CashDrawerEntryOrm(Base):
         return f"<CashDrawerEntryOrm(id={self.id}, type='{self.entry_type}', amount={self.amount})>"
 
 
+class CashDrawerSessionOrm(Base):
+    """
+    A drawer session, from a START entry to the next START or CLOSE.
+
+    Totals are the sums of the session's entry amounts by type (OUT amounts
+    are negative). Maintained by SQLiteCashDrawerRepository.add_entry.
+    """
+
+    __tablename__ = "cash_drawer_sessions"
+    __table_args__ = (
+        Index("ix_cash_drawer_sessions_drawer_opened_at", "drawer_id", "opened_at"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    drawer_id = Column(Integer, nullable=True)
+    opened_at = Column(DateTime, nullable=False)
+    opened_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    opening_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    closed_at = Column(DateTime, nullable=True)
+    closed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    closing_amount = Column(Numeric(12, 2), nullable=True)  # Counted at CLOSE
+    total_in = Column(Numeric(12, 2), nullable=False, default=0)
+    total_out = Column(Numeric(12, 2), nullable=False, default=0)
+    total_sales = Column(Numeric(12, 2), nullable=False, default=0)
+    total_returns = Column(Numeric(12, 2), nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CashDrawerSessionOrm(id={self.id}, drawer_id={self.drawer_id}, opened_at='{self.opened_at}')>"
+
+
+class CashDrawerStateOrm(Base):
+    """
+    Running state of one drawer: balance of its whole ledger and open session.
+
+    Entries recorded without a drawer_id are kept under drawer_key -1.
+    """
+
+    __tablename__ = "cash_drawer_state"
+    __table_args__ = {"extend_existing": True}
+
+    drawer_key = Column(Integer, primary_key=True, autoincrement=False)
+    balance = Column(Numeric(12, 2), nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+    # Timestamp of the latest START or CLOSE entry; decides the open state
+    last_status_at = Column(DateTime, nullable=True)
+    open_session_id = Column(
+        Integer, ForeignKey("cash_drawer_sessions.id"), nullable=True
+    )
+
+    def __repr__(self):
+        return f"<CashDrawerStateOrm(drawer_key={self.drawer_key}, balance={self.balance}, open_session_id={self.open_session_id})>"
+
+
+class OutboxMessageOrm(Base):
+    """
+    A domain event recorded in the transaction that raised it, until delivered.
+
+    Written by UnitOfWork and delivered by infrastructure.persistence.outbox.OutboxRelay.
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Pending messages in order: delivered_at IS NULL, then by id
+        Index("ix_outbox_delivered_at_id", "delivered_at", "id"),
+        # Earlier pending messages of an aggregate, which later ones wait for
+        Index(
+            "ix_outbox_pending_aggregate_key_id",
+            "aggregate_key",
+            "id",
+            sqlite_where=text("delivered_at IS NULL"),
+        ),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # The event_id of the event; recording the same event twice is a no-op
+    idempotency_key = Column(String(36), nullable=False, unique=True)
+    event_type = Column(String(100), nullable=False)
+    aggregate_key = Column(String(100), nullable=True)
+    payload = Column(Text, nullable=False)  # JSON of the event's fields
+    occurred_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.now)
+    attempts = Column(Integer, nullable=False, default=0)
+    # A failed delivery is retried from this time on
+    available_at = Column(DateTime, nullable=False, default=datetime.datetime.now)
+    last_error = Column(Text, nullable=True)
+    delivered_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxMessageOrm(id={self.id}, event_type='{self.event_type}', delivered_at={self.delivered_at})>"
+
+
+# The read model tables are projected from products, departments, units and
+# sales, so they are created once every table is
+event.listen(
+    Base.metadata,
+    "after_create",
+    lambda target, connection, **kw: create_read_models(connection),
+)
+event.listen(
+    Base.metadata,
+    "before_drop",
+    lambda target, connection, **kw: drop_read_models(connection),
+)
+
+
 def ensure_all_models_mapped():
     """
     Ensure all ORM model classes inheriting from Base are recognized by SQLAlchemy's metadata.
@@ -367,14 +608,19 @@ def ensure_all_models_mapped():
         UserOrm,
         DepartmentOrm,
         ProductOrm,
+        ProductPriceHistoryOrm,
         InventoryMovementOrm,
         SaleOrm,
         SaleItemOrm,
         CustomerOrm,
         CreditPaymentOrm,
         InvoiceOrm,
+        InvoiceSequenceOrm,
         UnitOrm,
         CashDrawerEntryOrm,
+        CashDrawerSessionOrm,
+        CashDrawerStateOrm,
+        OutboxMessageOrm,
     ]
 
     print(f"Verifying mapping for {len(model_classes)} models...")
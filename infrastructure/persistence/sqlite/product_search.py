@@ -0,0 +1,216 @@
+"""
+Full-text search index for products (SQLite FTS5).
+
+The ``products_fts`` virtual table is an external-content FTS5 index over
+``products.code`` and ``products.description``. Triggers on ``products`` keep
+it in sync, so repositories never write to it directly.
+
+Tokenization uses ``unicode61`` with ``remove_diacritics 2`` so that "cafe"
+matches "Café", and prefix indexes for 2 and 3 characters keep the
+as-you-type prefix queries of the sales screen fast on large catalogs.
+"""
+
+import re
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import bindparam, text
+
+PRODUCT_SEARCH_TABLE = "products_fts"
+
+# Code matches weigh more than description matches when ranking with bm25
+PRODUCT_SEARCH_RANK = "bm25(10.0, 1.0)"
+
+# Most matches ranked per search. bm25 costs a few microseconds per match, so a
+# short prefix that matches a large part of the catalog only ranks its first
+# matches; the user is still typing and the next keystroke narrows it down.
+PRODUCT_SEARCH_RANK_WINDOW = 500
+
+PRODUCT_SEARCH_TRIGGERS = (
+    "products_fts_after_insert",
+    "products_fts_after_delete",
+    "products_fts_after_update",
+)
+
+PRODUCT_SEARCH_TABLE_DDL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {PRODUCT_SEARCH_TABLE} USING fts5(
+        code,
+        description,
+        content='products',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """
+
+# CREATE statements of PRODUCT_SEARCH_TRIGGERS, in the same order
+PRODUCT_SEARCH_TRIGGERS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_after_insert
+    AFTER INSERT ON products BEGIN
+        INSERT INTO {PRODUCT_SEARCH_TABLE}(rowid, code, description)
+        VALUES (new.id, new.code, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_after_delete
+    AFTER DELETE ON products BEGIN
+        INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rowid, code, description)
+        VALUES ('delete', old.id, old.code, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_after_update
+    AFTER UPDATE OF code, description ON products BEGIN
+        INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rowid, code, description)
+        VALUES ('delete', old.id, old.code, old.description);
+        INSERT INTO {PRODUCT_SEARCH_TABLE}(rowid, code, description)
+        VALUES (new.id, new.code, new.description);
+    END
+    """,
+]
+
+PRODUCT_SEARCH_RANK_DDL = f"""
+    INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rank)
+    VALUES ('rank', '{PRODUCT_SEARCH_RANK}')
+    """
+
+PRODUCT_SEARCH_DDL = [
+    PRODUCT_SEARCH_TABLE_DDL,
+    *PRODUCT_SEARCH_TRIGGERS_DDL,
+    PRODUCT_SEARCH_RANK_DDL,
+]
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Engines known to carry the index, so the check runs once per database
+_index_presence = {}
+
+
+def create_product_search_index(connection) -> None:
+    """
+    Creates the FTS5 table and sync triggers, then indexes existing products.
+
+    Safe to call repeatedly. Does nothing on non-SQLite connections.
+
+    Args:
+        connection: SQLAlchemy connection with the products table present
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(text(PRODUCT_SEARCH_TABLE_DDL))
+    for statement in PRODUCT_SEARCH_TRIGGERS_DDL:
+        connection.execute(text(statement))
+    connection.execute(text(PRODUCT_SEARCH_RANK_DDL))
+    rebuild_product_search_index(connection)
+    _index_presence.pop(connection.engine, None)
+
+
+def drop_product_search_index(connection) -> None:
+    """Drops the FTS5 table; its triggers are dropped together with products."""
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(text(f"DROP TABLE IF EXISTS {PRODUCT_SEARCH_TABLE}"))
+    _index_presence.pop(connection.engine, None)
+
+
+def rebuild_product_search_index(connection) -> None:
+    """Re-indexes every product from the products table."""
+    connection.execute(
+        text(
+            f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}) "
+            "VALUES ('rebuild')"
+        )
+    )
+
+
+@contextmanager
+def bulk_product_search_sync(session, codes: List[str]):
+    """
+    Keeps the index in sync for a bulk write of the products with the given codes.
+
+    Per-row trigger maintenance of FTS5 is about ten times slower than
+    indexing the same rows with one INSERT ... SELECT, so the sync triggers
+    are dropped for the duration of the block and the affected rows are
+    re-indexed set-based afterwards. DDL in SQLite is transactional: other
+    connections never see the triggers missing.
+
+    Args:
+        session: Session whose transaction performs the bulk write
+        codes: Codes of every product inserted or updated inside the block
+    """
+    if not codes or not has_product_search_index(session):
+        yield
+        return
+
+    affected = {"codes": list(codes)}
+    session.execute(
+        text(
+            f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rowid, code, description) "
+            "SELECT 'delete', id, code, description FROM products WHERE code IN :codes"
+        ).bindparams(bindparam("codes", expanding=True)),
+        affected,
+    )
+    for trigger in PRODUCT_SEARCH_TRIGGERS:
+        session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    try:
+        yield
+        session.execute(
+            text(
+                f"INSERT INTO {PRODUCT_SEARCH_TABLE}(rowid, code, description) "
+                "SELECT id, code, description FROM products WHERE code IN :codes"
+            ).bindparams(bindparam("codes", expanding=True)),
+            affected,
+        )
+    finally:
+        for statement in PRODUCT_SEARCH_TRIGGERS_DDL:
+            session.execute(text(statement))
+
+
+def rank_window_bound(session, match_query: str) -> Optional[int]:
+    """
+    Returns the rowid past the first PRODUCT_SEARCH_RANK_WINDOW matches.
+
+    FTS5 yields matches in rowid order without ranking them, so this costs
+    a fraction of ranking them. None if the query matches fewer rows.
+    """
+    return session.execute(
+        text(
+            f"SELECT rowid FROM {PRODUCT_SEARCH_TABLE} "
+            f"WHERE {PRODUCT_SEARCH_TABLE} MATCH :match_query "
+            "LIMIT 1 OFFSET :window"
+        ),
+        {"match_query": match_query, "window": PRODUCT_SEARCH_RANK_WINDOW},
+    ).scalar()
+
+
+def has_product_search_index(session) -> bool:
+    """Returns True if the session's database carries the products_fts index."""
+    bind = session.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    engine = getattr(bind, "engine", bind)
+    if engine not in _index_presence:
+        found = session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": PRODUCT_SEARCH_TABLE},
+        ).first()
+        _index_presence[engine] = found is not None
+    return _index_presence[engine]
+
+
+def build_match_query(term: str) -> Optional[str]:
+    """
+    Turns free text typed by the user into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix query and all words must match,
+    e.g. "coca col" -> '"coca"* "col"*'. Quoting keeps FTS5 operators and
+    punctuation typed by the user from being interpreted.
+
+    Returns:
+        The MATCH expression, or None if the term contains no words
+    """
+    tokens = _TOKEN_PATTERN.findall(term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
@@ -0,0 +1,321 @@
+"""
+SQL instrumentation: per-operation query counts, slow queries and N+1 detection.
+
+A QueryProfiler listens to the engine's cursor events and attributes every
+statement, the rows it wrote and its elapsed time to the operation that is
+running it. An operation is one unit of work, named after the service method
+that opened it (e.g. "ReportingService.get_daily_sales_report"); statements
+run outside a unit of work are grouped under OUTSIDE_UNIT_OF_WORK.
+
+Within one operation the profiler also:
+
+- flags a statement executed ``n_plus_one_threshold`` times or more (with
+  different parameters) as a probable N+1, e.g. a lookup per sale line;
+- logs statements slower than ``slow_query_ms`` with their EXPLAIN QUERY
+  PLAN, so a missing index shows up in the log next to the query.
+
+Totals are kept per operation name and exposed through snapshot(), which the
+debug dialog shows, and dump_json(), which writes the same data to a file
+that can be collected from a store:
+
+    profiler = install_query_profiler(engine, slow_query_ms=200)
+    ...
+    profiler.dump_json("query_profile.json")
+
+Profiling is off unless installed (see config.sql_profiling); when off, the
+unit of work skips naming its operation, so it costs nothing.
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+from infrastructure.persistence.sqlite.index_advisor import explain_query_plan
+
+logger = logging.getLogger(__name__)
+
+OUTSIDE_UNIT_OF_WORK = "(outside unit of work)"
+
+# Slow queries kept for the report; older ones are only in the log
+MAX_SLOW_QUERIES = 50
+
+# Start times of the statements running on a connection, in connection.info
+_STARTED_KEY = "query_profiler_started"
+
+# Profiler installed with install_query_profiler(), if any
+_active_profiler: Optional["QueryProfiler"] = None
+
+
+@dataclass
+class OperationStats:
+    """Totals of every run of one operation."""
+
+    name: str
+    calls: int = 0
+    statements: int = 0
+    rows: int = 0
+    elapsed_ms: float = 0.0
+    max_statements: int = 0
+    slow_queries: int = 0
+    n_plus_one: int = 0
+
+    @property
+    def statements_per_call(self) -> float:
+        return self.statements / self.calls if self.calls else 0.0
+
+
+@dataclass
+class NPlusOneFinding:
+    """A statement repeated within one run of an operation."""
+
+    operation: str
+    statement: str
+    executions: int
+
+
+@dataclass
+class SlowQuery:
+    """A statement slower than the threshold, with its plan."""
+
+    operation: str
+    statement: str
+    elapsed_ms: float
+    plan: List[str]
+
+
+@dataclass
+class _Scope:
+    """Statements of one running operation."""
+
+    name: str
+    statements: int = 0
+    rows: int = 0
+    elapsed_ms: float = 0.0
+    slow_queries: int = 0
+    executions: Counter = field(default_factory=Counter)
+
+
+class QueryProfiler:
+    """Attributes the statements run on an engine to the operations running them."""
+
+    def __init__(
+        self,
+        slow_query_ms: float = 200.0,
+        n_plus_one_threshold: int = 5,
+        explain_slow_queries: bool = True,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.explain_slow_queries = explain_slow_queries
+
+        self._lock = threading.Lock()
+        self._current: contextvars.ContextVar[Optional[_Scope]] = contextvars.ContextVar(
+            "query_profiler_scope", default=None
+        )
+        self._operations: Dict[str, OperationStats] = {}
+        self._n_plus_one: Dict[tuple, NPlusOneFinding] = {}
+        self._slow_queries: deque = deque(maxlen=MAX_SLOW_QUERIES)
+        self._started_at = datetime.now()
+        self._engine = None
+
+    # --- Engine events ---
+
+    def install(self, engine) -> None:
+        """Starts listening to the statements run on an engine."""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engine = engine
+
+    def remove(self) -> None:
+        """Stops listening to the engine."""
+        if self._engine is None:
+            return
+        event.remove(self._engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self._engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engine = None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get(_STARTED_KEY)
+        if not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+        # sqlite3 reports rows written by DML; SELECTs leave it at -1
+        rows = max(cursor.rowcount, 0)
+        if not rows and context is not None and context.isinsert and cursor.description is not None:
+            # INSERT ... RETURNING counts its rows only once they are fetched;
+            # a VALUES insert writes one per parameter set
+            rows = len(parameters) if executemany else 1
+
+        scope = self._current.get()
+        if scope is None:
+            with self._lock:
+                stats = self._stats(OUTSIDE_UNIT_OF_WORK)
+                stats.statements += 1
+                stats.rows += rows
+                stats.elapsed_ms += elapsed_ms
+            operation = OUTSIDE_UNIT_OF_WORK
+        else:
+            scope.statements += 1
+            scope.rows += rows
+            scope.elapsed_ms += elapsed_ms
+            scope.executions[statement] += 1
+            if scope.executions[statement] == self.n_plus_one_threshold:
+                logger.warning(
+                    "Probable N+1 in %s: statement executed %d times: %s",
+                    scope.name, self.n_plus_one_threshold, " ".join(statement.split()),
+                )
+            operation = scope.name
+
+        if elapsed_ms >= self.slow_query_ms:
+            if scope is not None:
+                scope.slow_queries += 1
+            self._record_slow_query(conn, operation, statement, parameters, executemany, elapsed_ms)
+
+    def _record_slow_query(self, conn, operation, statement, parameters, executemany, elapsed_ms):
+        plan: List[str] = []
+        is_query = statement.lstrip().upper().startswith(("SELECT", "WITH"))
+        if self.explain_slow_queries and is_query and not executemany:
+            try:
+                plan = explain_query_plan(conn, statement, parameters)
+            except Exception as e:
+                logger.debug(f"Could not explain slow query: {e}")
+        flat = " ".join(statement.split())
+        logger.warning(
+            "Slow query in %s (%.1f ms): %s%s",
+            operation, elapsed_ms, flat, "".join(f"\n    {step}" for step in plan),
+        )
+        with self._lock:
+            if operation == OUTSIDE_UNIT_OF_WORK:
+                self._stats(operation).slow_queries += 1
+            self._slow_queries.append(SlowQuery(operation, flat, round(elapsed_ms, 3), plan))
+
+    # --- Operations ---
+
+    def begin_operation(self, name: str) -> contextvars.Token:
+        """Makes ``name`` the operation the following statements belong to."""
+        return self._current.set(_Scope(name))
+
+    def end_operation(self, token: contextvars.Token) -> None:
+        """Ends the operation begun with ``token`` and adds it to the totals."""
+        scope = self._current.get()
+        self._current.reset(token)
+        if scope is None:
+            return
+        with self._lock:
+            stats = self._stats(scope.name)
+            stats.calls += 1
+            stats.statements += scope.statements
+            stats.rows += scope.rows
+            stats.elapsed_ms += scope.elapsed_ms
+            stats.slow_queries += scope.slow_queries
+            stats.max_statements = max(stats.max_statements, scope.statements)
+            for statement, executions in scope.executions.items():
+                if executions < self.n_plus_one_threshold:
+                    continue
+                key = (scope.name, statement)
+                finding = self._n_plus_one.get(key)
+                if finding is None:
+                    stats.n_plus_one += 1
+                    self._n_plus_one[key] = NPlusOneFinding(
+                        scope.name, " ".join(statement.split()), executions
+                    )
+                else:
+                    finding.executions = max(finding.executions, executions)
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[None]:
+        """Attributes the statements run in the block to the operation ``name``."""
+        token = self.begin_operation(name)
+        try:
+            yield
+        finally:
+            self.end_operation(token)
+
+    def _stats(self, name: str) -> OperationStats:
+        stats = self._operations.get(name)
+        if stats is None:
+            stats = self._operations[name] = OperationStats(name)
+        return stats
+
+    # --- Reports ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals per operation (most statements first), N+1 findings and slow queries."""
+        with self._lock:
+            operations = sorted(
+                self._operations.values(), key=lambda s: s.statements, reverse=True
+            )
+            return {
+                "started_at": self._started_at.isoformat(timespec="seconds"),
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "slow_query_ms": self.slow_query_ms,
+                "n_plus_one_threshold": self.n_plus_one_threshold,
+                "totals": {
+                    "statements": sum(s.statements for s in operations),
+                    "rows": sum(s.rows for s in operations),
+                    "elapsed_ms": round(sum(s.elapsed_ms for s in operations), 3),
+                },
+                "operations": [
+                    dict(
+                        asdict(s),
+                        elapsed_ms=round(s.elapsed_ms, 3),
+                        statements_per_call=round(s.statements_per_call, 2),
+                    )
+                    for s in operations
+                ],
+                "n_plus_one": [asdict(f) for f in self._n_plus_one.values()],
+                "slow_queries": [asdict(q) for q in self._slow_queries],
+            }
+
+    def dump_json(self, path: str) -> None:
+        """Writes snapshot() to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+    def reset(self) -> None:
+        """Drops the totals collected so far."""
+        with self._lock:
+            self._operations.clear()
+            self._n_plus_one.clear()
+            self._slow_queries.clear()
+            self._started_at = datetime.now()
+
+
+def install_query_profiler(engine, **settings) -> QueryProfiler:
+    """
+    Profiles the engine's statements and makes the profiler the active one.
+
+    Units of work name their operations for the active profiler. A profiler
+    installed before is removed first.
+    """
+    global _active_profiler
+    uninstall_query_profiler()
+    profiler = QueryProfiler(**settings)
+    profiler.install(engine)
+    _active_profiler = profiler
+    return profiler
+
+
+def uninstall_query_profiler() -> None:
+    """Removes the active profiler, if any."""
+    global _active_profiler
+    if _active_profiler is not None:
+        _active_profiler.remove()
+        _active_profiler = None
+
+
+def active_query_profiler() -> Optional[QueryProfiler]:
+    """The profiler installed with install_query_profiler(), or None."""
+    return _active_profiler
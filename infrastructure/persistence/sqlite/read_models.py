@@ -0,0 +1,661 @@
+"""
+Read model tables for the query side of core.cqrs.
+
+Three tables hold the data the product and sales screens show, already
+joined and computed:
+
+- ``read_products``: one row per product with its department and unit
+  names and its stock figures (in stock, low stock, stock value), indexed
+  for the product grid (description order), code lookups, the department
+  filter and the low stock list
+- ``read_sales``: one row per sale with its line count and quantity
+- ``read_catalog_summary``: a single row with the product counts and stock
+  value of the active catalog
+
+Unlike the sales rollups, which triggers keep in the writing transaction,
+these tables are projected from domain events once the write has committed
+(core.cqrs.projections.ReadModelProjector), so they trail the write tables
+by the time a handler takes. A projection re-reads the products or sales an
+event batch names, set-based: one INSERT ... SELECT ... ON CONFLICT for the
+whole batch, and two delta UPDATEs of the summary row (subtracting the old
+rows, adding the new ones). The dashboard reads the summary row and the
+day's sales rollup in one statement.
+
+Rebuild the tables from the write tables (e.g. after editing the database
+outside the application) with:
+
+    python -m infrastructure.persistence.sqlite.read_models [database_url]
+"""
+
+import argparse
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Enum,
+    Integer,
+    Numeric,
+    String,
+    column,
+    func,
+    literal_column,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.orm import Session
+
+from core.cqrs.read_models import (
+    DashboardSummaryReadModel,
+    ProductListItemReadModel,
+    ProductReadModel,
+    SaleReadModel,
+)
+from core.models.enums import PaymentType
+from infrastructure.persistence.sqlite.sales_rollups import SALES_DAILY_PAYMENT
+from infrastructure.persistence.sqlite.types import SQLiteUUID
+
+READ_PRODUCTS = "read_products"
+READ_SALES = "read_sales"
+READ_CATALOG_SUMMARY = "read_catalog_summary"
+READ_MODEL_TABLES = (READ_PRODUCTS, READ_SALES, READ_CATALOG_SUMMARY)
+
+# Write tables the projections read
+_SOURCE_TABLES = ("products", "departments", "units", "sales", "sale_items")
+
+# Per-connection lists of the ids a projection is working on
+_PRODUCT_IDS = "read_model_product_ids"
+_SALE_IDS = "read_model_sale_ids"
+
+_PRODUCT_COLUMNS = (
+    "product_id",
+    "code",
+    "description",
+    "sell_price",
+    "cost_price",
+    "quantity_in_stock",
+    "min_stock",
+    "max_stock",
+    "uses_inventory",
+    "is_active",
+    "department_id",
+    "department_name",
+    "unit_id",
+    "unit_name",
+    "in_stock",
+    "is_low_stock",
+    "stock_value",
+)
+
+# Same low stock rule as SqliteProductRepository.get_low_stock
+_PRODUCT_SELECT = """
+    SELECT p.id, p.code, p.description, p.sell_price, p.cost_price,
+        coalesce(p.quantity_in_stock, 0), p.min_stock, p.max_stock,
+        p.uses_inventory, p.is_active, p.department_id, d.name, u.id, p.unit,
+        coalesce(p.quantity_in_stock, 0) > 0,
+        p.uses_inventory AND p.min_stock IS NOT NULL
+            AND coalesce(p.quantity_in_stock, 0) <= p.min_stock,
+        round(coalesce(p.quantity_in_stock, 0) * coalesce(p.cost_price, 0), 2)
+    FROM products p
+    LEFT JOIN departments d ON d.id = p.department_id
+    LEFT JOIN units u ON u.name = p.unit
+"""
+
+_SALE_COLUMNS = (
+    "sale_id",
+    "date_time",
+    "total_amount",
+    "payment_type",
+    "is_credit_sale",
+    "customer_id",
+    "user_id",
+    "item_count",
+    "total_quantity",
+)
+
+_SALE_SELECT = """
+    SELECT s.id, s.date_time, coalesce(s.total_amount, 0), s.payment_type,
+        s.is_credit_sale, s.customer_id, s.user_id,
+        count(i.id), coalesce(sum(i.quantity), 0)
+    FROM sales s
+    LEFT JOIN sale_items i ON i.sale_id = s.id
+"""
+
+_SUMMARY_MEASURES = {
+    "product_count": "count(*)",
+    "low_stock_count": "coalesce(sum(is_low_stock), 0)",
+    "out_of_stock_count": "coalesce(sum(uses_inventory AND NOT in_stock), 0)",
+    "stock_value": "round(coalesce(sum(stock_value), 0), 2)",
+}
+
+READ_MODEL_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {READ_PRODUCTS} (
+        product_id INTEGER PRIMARY KEY,
+        code TEXT NOT NULL,
+        description TEXT NOT NULL,
+        sell_price NUMERIC,
+        cost_price NUMERIC,
+        quantity_in_stock NUMERIC NOT NULL DEFAULT 0,
+        min_stock NUMERIC,
+        max_stock NUMERIC,
+        uses_inventory INTEGER NOT NULL,
+        is_active INTEGER NOT NULL,
+        department_id INTEGER,
+        department_name TEXT,
+        unit_id INTEGER,
+        unit_name TEXT,
+        in_stock INTEGER NOT NULL,
+        is_low_stock INTEGER NOT NULL,
+        stock_value NUMERIC NOT NULL DEFAULT 0
+    )
+    """,
+    # The product grid, in description order
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_{READ_PRODUCTS}_description
+    ON {READ_PRODUCTS} (description, product_id)
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_{READ_PRODUCTS}_code
+    ON {READ_PRODUCTS} (code COLLATE NOCASE)
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_{READ_PRODUCTS}_department
+    ON {READ_PRODUCTS} (department_id, description, product_id)
+    """,
+    # Only the few products at or below their minimum are indexed
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_{READ_PRODUCTS}_low_stock
+    ON {READ_PRODUCTS} (description, product_id) WHERE is_low_stock = 1
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {READ_SALES} (
+        sale_id INTEGER PRIMARY KEY,
+        date_time DATETIME NOT NULL,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        payment_type TEXT,
+        is_credit_sale INTEGER NOT NULL DEFAULT 0,
+        customer_id CHAR(36),
+        user_id INTEGER,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        total_quantity NUMERIC NOT NULL DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_{READ_SALES}_date_time
+    ON {READ_SALES} (date_time, sale_id)
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {READ_CATALOG_SUMMARY} (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        product_count INTEGER NOT NULL DEFAULT 0,
+        low_stock_count INTEGER NOT NULL DEFAULT 0,
+        out_of_stock_count INTEGER NOT NULL DEFAULT 0,
+        stock_value NUMERIC NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+# Lightweight table constructs for the queries, typed so values come back as
+# Decimal, bool, datetime and PaymentType
+read_products = table(
+    READ_PRODUCTS,
+    column("product_id", Integer),
+    column("code", String),
+    column("description", String),
+    column("sell_price", Numeric(10, 2)),
+    column("cost_price", Numeric(10, 2)),
+    column("quantity_in_stock", Numeric(10, 3)),
+    column("min_stock", Numeric(10, 3)),
+    column("max_stock", Numeric(10, 3)),
+    column("uses_inventory", Boolean),
+    column("is_active", Boolean),
+    column("department_id", Integer),
+    column("department_name", String),
+    column("unit_id", Integer),
+    column("unit_name", String),
+    column("in_stock", Boolean),
+    column("is_low_stock", Boolean),
+    column("stock_value", Numeric(14, 2)),
+)
+read_sales = table(
+    READ_SALES,
+    column("sale_id", Integer),
+    column("date_time", DateTime),
+    column("total_amount", Numeric(12, 2)),
+    column("payment_type", Enum(PaymentType)),
+    column("is_credit_sale", Boolean),
+    column("customer_id", SQLiteUUID),
+    column("user_id", Integer),
+    column("item_count", Integer),
+    column("total_quantity", Numeric(12, 3)),
+)
+read_catalog_summary = table(
+    READ_CATALOG_SUMMARY,
+    column("id", Integer),
+    column("product_count", Integer),
+    column("low_stock_count", Integer),
+    column("out_of_stock_count", Integer),
+    column("stock_value", Numeric(14, 2)),
+)
+_daily_payment = table(
+    SALES_DAILY_PAYMENT,
+    column("day", String),
+    column("num_sales", Integer),
+    column("total_amount", Numeric(12, 2)),
+)
+_customers = table("customers", column("id", SQLiteUUID), column("name", String))
+_users = table("users", column("id", Integer), column("username", String))
+
+
+def _upsert(target: str, columns: Tuple[str, ...], source: str) -> str:
+    # The WHERE or GROUP BY in source keeps "ON CONFLICT" from parsing as a join constraint
+    assignments = ", ".join(f"{name} = excluded.{name}" for name in columns[1:])
+    return (
+        f"INSERT INTO {target} ({', '.join(columns)}) {source} "
+        f"ON CONFLICT ({columns[0]}) DO UPDATE SET {assignments}"
+    )
+
+
+def _summary_change(sign: str) -> str:
+    """Adds (or with sign "-" removes) the active products being projected to the summary."""
+    measures = ", ".join(f"{sql} AS delta_{name}" for name, sql in _SUMMARY_MEASURES.items())
+    assignments = ", ".join(
+        f"{name} = {name} {sign} t.delta_{name}" for name in _SUMMARY_MEASURES if name != "stock_value"
+    )
+    return (
+        f"UPDATE {READ_CATALOG_SUMMARY} SET {assignments}, "
+        f"stock_value = round(stock_value {sign} t.delta_stock_value, 2) "
+        f"FROM (SELECT {measures} FROM {READ_PRODUCTS} "
+        f"WHERE is_active AND product_id IN (SELECT id FROM temp.{_PRODUCT_IDS})) AS t "
+        f"WHERE {READ_CATALOG_SUMMARY}.id = 1"
+    )
+
+
+_PRODUCT_PROJECTION = [
+    _summary_change("-"),
+    f"DELETE FROM {READ_PRODUCTS} WHERE product_id IN (SELECT id FROM temp.{_PRODUCT_IDS}) "
+    "AND product_id NOT IN (SELECT id FROM products)",
+    _upsert(
+        READ_PRODUCTS,
+        _PRODUCT_COLUMNS,
+        f"{_PRODUCT_SELECT} WHERE p.id IN (SELECT id FROM temp.{_PRODUCT_IDS})",
+    ),
+    _summary_change("+"),
+]
+
+_SALE_PROJECTION = [
+    f"DELETE FROM {READ_SALES} WHERE sale_id IN (SELECT id FROM temp.{_SALE_IDS}) "
+    "AND sale_id NOT IN (SELECT id FROM sales)",
+    _upsert(
+        READ_SALES,
+        _SALE_COLUMNS,
+        f"{_SALE_SELECT} WHERE s.id IN (SELECT id FROM temp.{_SALE_IDS}) GROUP BY s.id",
+    ),
+]
+
+
+def _has_tables(connection, names: Iterable[str]) -> bool:
+    names = list(names)
+    found = connection.execute(
+        text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' "
+            f"AND name IN ({', '.join(f':t{n}' for n in range(len(names)))})"
+        ),
+        {f"t{n}": name for n, name in enumerate(names)},
+    ).scalar()
+    return found == len(names)
+
+
+def create_read_models(connection) -> None:
+    """
+    Creates the read model tables, then fills them from the write tables.
+
+    Safe to call repeatedly. Does nothing on non-SQLite connections, or
+    before the tables the projections read exist.
+
+    Args:
+        connection: SQLAlchemy connection
+    """
+    if connection.dialect.name != "sqlite" or not _has_tables(connection, _SOURCE_TABLES):
+        return
+    for statement in READ_MODEL_DDL:
+        connection.execute(text(statement))
+    rebuild_read_models(connection)
+
+
+def drop_read_models(connection) -> None:
+    """Drops the read model tables."""
+    if connection.dialect.name != "sqlite":
+        return
+    for name in READ_MODEL_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+
+def rebuild_statements():
+    """
+    Returns the SQL of rebuild_read_models, for callers on a raw sqlite3 connection.
+
+    Returns:
+        Tuple of (DELETE statements, INSERT statement per table)
+    """
+    deletes = [f"DELETE FROM {name}" for name in READ_MODEL_TABLES]
+    summary_columns = ", ".join(_SUMMARY_MEASURES)
+    inserts = {
+        READ_PRODUCTS: f"INSERT INTO {READ_PRODUCTS} ({', '.join(_PRODUCT_COLUMNS)}) {_PRODUCT_SELECT}",
+        READ_SALES: f"INSERT INTO {READ_SALES} ({', '.join(_SALE_COLUMNS)}) {_SALE_SELECT} GROUP BY s.id",
+        READ_CATALOG_SUMMARY: (
+            f"INSERT INTO {READ_CATALOG_SUMMARY} (id, {summary_columns}) "
+            f"SELECT 1, {', '.join(_SUMMARY_MEASURES.values())} FROM {READ_PRODUCTS} WHERE is_active"
+        ),
+    }
+    return deletes, inserts
+
+
+def rebuild_read_models(connection) -> Dict[str, int]:
+    """
+    Recomputes every read model table from the write tables.
+
+    Runs set-based, one INSERT ... SELECT per table, within the caller's
+    transaction.
+
+    Args:
+        connection: SQLAlchemy connection or session
+
+    Returns:
+        Number of rows written per table
+    """
+    deletes, inserts = rebuild_statements()
+    for statement in deletes:
+        connection.execute(text(statement))
+    return {name: connection.execute(text(statement)).rowcount for name, statement in inserts.items()}
+
+
+def _load_ids(connection, temp_table: str, ids=None, source: Optional[str] = None, params=None) -> None:
+    """Fills a temporary id list from ids, or from a SELECT of ids."""
+    connection.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {temp_table} (id INTEGER PRIMARY KEY)"))
+    connection.execute(text(f"DELETE FROM temp.{temp_table}"))
+    if source is not None:
+        connection.execute(text(f"INSERT OR IGNORE INTO temp.{temp_table} (id) {source}"), params or {})
+    elif ids:
+        connection.execute(
+            text(f"INSERT OR IGNORE INTO temp.{temp_table} (id) VALUES (:id)"),
+            [{"id": value} for value in ids],
+        )
+
+
+def project_products(connection, product_ids: Optional[Iterable[int]] = None, department_id=None) -> int:
+    """
+    Brings the read rows of some products up to date with the write tables.
+
+    Products that no longer exist lose their row. With neither argument,
+    every product is projected.
+
+    Args:
+        connection: SQLAlchemy connection or session
+        product_ids: The products to project
+        department_id: Project the products in this department (and those
+            the read rows still list in it)
+
+    Returns:
+        Number of read rows written
+    """
+    if product_ids is not None:
+        _load_ids(connection, _PRODUCT_IDS, ids=set(product_ids))
+    elif department_id is not None:
+        _load_ids(
+            connection,
+            _PRODUCT_IDS,
+            source=(
+                "SELECT id FROM products WHERE department_id = :department_id "
+                f"UNION SELECT product_id FROM {READ_PRODUCTS} WHERE department_id = :department_id"
+            ),
+            params={"department_id": department_id},
+        )
+    else:
+        _load_ids(
+            connection,
+            _PRODUCT_IDS,
+            source=f"SELECT id FROM products UNION SELECT product_id FROM {READ_PRODUCTS}",
+        )
+
+    # Without it the delta updates below have no row to change
+    connection.execute(text(f"INSERT OR IGNORE INTO {READ_CATALOG_SUMMARY} (id) VALUES (1)"))
+    written = 0
+    for statement in _PRODUCT_PROJECTION:
+        result = connection.execute(text(statement))
+        if statement.startswith(f"INSERT INTO {READ_PRODUCTS}"):
+            written = result.rowcount
+    return written
+
+
+def project_sales(connection, sale_ids: Iterable[int]) -> int:
+    """
+    Brings the read rows of some sales up to date; deleted sales lose their row.
+
+    Returns:
+        Number of read rows written
+    """
+    _load_ids(connection, _SALE_IDS, ids=set(sale_ids))
+    connection.execute(text(_SALE_PROJECTION[0]))
+    return connection.execute(text(_SALE_PROJECTION[1])).rowcount
+
+
+def _product_read_model(row) -> ProductReadModel:
+    return ProductReadModel(
+        id=row.product_id,
+        code=row.code,
+        description=row.description,
+        sell_price=row.sell_price,
+        cost_price=row.cost_price,
+        quantity_in_stock=row.quantity_in_stock,
+        min_stock=row.min_stock,
+        max_stock=row.max_stock,
+        uses_inventory=row.uses_inventory,
+        department_id=row.department_id,
+        department_name=row.department_name,
+        unit_id=row.unit_id,
+        unit_name=row.unit_name,
+        in_stock=row.in_stock,
+        is_low_stock=row.is_low_stock,
+        stock_value=row.stock_value,
+    )
+
+
+_LIST_ITEM_COLUMNS = (
+    read_products.c.product_id,
+    read_products.c.code,
+    read_products.c.description,
+    read_products.c.sell_price,
+    read_products.c.quantity_in_stock,
+    read_products.c.department_name,
+    read_products.c.in_stock,
+    read_products.c.is_low_stock,
+)
+
+
+def _list_item(row) -> ProductListItemReadModel:
+    return ProductListItemReadModel(
+        id=row.product_id,
+        code=row.code,
+        description=row.description,
+        sell_price=row.sell_price,
+        quantity_in_stock=row.quantity_in_stock,
+        department_name=row.department_name,
+        in_stock=row.in_stock,
+        is_low_stock=row.is_low_stock,
+    )
+
+
+class SqliteReadModelRepository:
+    """Queries over the read model tables, and their projection from the write tables."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    # --- Products ---
+
+    def get_product(self, product_id: int) -> Optional[ProductReadModel]:
+        row = self.session.execute(
+            select(read_products).where(read_products.c.product_id == product_id)
+        ).first()
+        return _product_read_model(row) if row else None
+
+    def get_product_by_code(self, code: str) -> Optional[ProductReadModel]:
+        row = self.session.execute(
+            select(read_products).where(read_products.c.code == code)
+        ).first()
+        return _product_read_model(row) if row else None
+
+    def search_products(
+        self,
+        search_term: Optional[str] = None,
+        department_id: Optional[int] = None,
+        in_stock_only: bool = False,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        limit: Optional[int] = 100,
+        offset: int = 0,
+    ) -> List[ProductListItemReadModel]:
+        """A page of products in description order; the term matches code or description."""
+        stmt = select(*_LIST_ITEM_COLUMNS)
+        if search_term:
+            stmt = stmt.where(
+                read_products.c.code.contains(search_term, autoescape=True)
+                | read_products.c.description.contains(search_term, autoescape=True)
+            )
+        if department_id is not None:
+            stmt = stmt.where(read_products.c.department_id == department_id)
+        if in_stock_only:
+            stmt = stmt.where(read_products.c.in_stock == 1)
+        if min_price is not None:
+            stmt = stmt.where(read_products.c.sell_price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(read_products.c.sell_price <= max_price)
+        stmt = stmt.order_by(read_products.c.description, read_products.c.product_id)
+        stmt = stmt.limit(limit).offset(offset)
+        return [_list_item(row) for row in self.session.execute(stmt)]
+
+    def get_low_stock_products(
+        self, department_id: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[ProductReadModel]:
+        """Products at or below their minimum stock, read through the partial index."""
+        # A literal 1, not a parameter, so SQLite matches the index's WHERE clause
+        stmt = select(read_products).where(read_products.c.is_low_stock == literal_column("1"))
+        if department_id is not None:
+            stmt = stmt.where(read_products.c.department_id == department_id)
+        stmt = stmt.order_by(read_products.c.description, read_products.c.product_id).limit(limit)
+        return [_product_read_model(row) for row in self.session.execute(stmt)]
+
+    # --- Sales ---
+
+    def get_sales(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = 100,
+        offset: int = 0,
+    ) -> List[SaleReadModel]:
+        """Sales between start and end, inclusive, newest first."""
+        stmt = (
+            select(read_sales, _customers.c.name.label("customer_name"), _users.c.username)
+            .select_from(read_sales)
+            .outerjoin(_customers, _customers.c.id == read_sales.c.customer_id)
+            .outerjoin(_users, _users.c.id == read_sales.c.user_id)
+        )
+        if start is not None:
+            stmt = stmt.where(read_sales.c.date_time >= start)
+        if end is not None:
+            stmt = stmt.where(read_sales.c.date_time <= end)
+        stmt = stmt.order_by(read_sales.c.date_time.desc(), read_sales.c.sale_id.desc())
+        stmt = stmt.limit(limit).offset(offset)
+        return [
+            SaleReadModel(
+                id=row.sale_id,
+                date_time=row.date_time,
+                total_amount=row.total_amount,
+                payment_type=row.payment_type.value if row.payment_type else None,
+                is_credit_sale=row.is_credit_sale,
+                customer_id=row.customer_id,
+                customer_name=row.customer_name,
+                user_id=row.user_id,
+                username=row.username,
+                item_count=row.item_count,
+                total_quantity=row.total_quantity,
+            )
+            for row in self.session.execute(stmt)
+        ]
+
+    # --- Dashboard ---
+
+    def get_dashboard_summary(self, day: Optional[date] = None) -> DashboardSummaryReadModel:
+        """The catalog summary and the day's sales, in one statement."""
+        day = day or date.today()
+        day_sales = select(_daily_payment).where(_daily_payment.c.day == day.isoformat()).subquery()
+        stmt = select(
+            read_catalog_summary.c.product_count,
+            read_catalog_summary.c.low_stock_count,
+            read_catalog_summary.c.out_of_stock_count,
+            read_catalog_summary.c.stock_value,
+            select(func.coalesce(func.sum(day_sales.c.num_sales), 0, type_=Integer))
+            .scalar_subquery()
+            .label("sales_count"),
+            select(func.coalesce(func.sum(day_sales.c.total_amount), 0, type_=Numeric(12, 2)))
+            .scalar_subquery()
+            .label("sales_total"),
+        ).where(read_catalog_summary.c.id == 1)
+        row = self.session.execute(stmt).first()
+        if row is None:
+            return DashboardSummaryReadModel(day, 0, Decimal("0.00"), 0, 0, 0, Decimal("0.00"))
+        return DashboardSummaryReadModel(
+            day=day,
+            sales_count=row.sales_count,
+            sales_total=row.sales_total,
+            product_count=row.product_count,
+            low_stock_count=row.low_stock_count,
+            out_of_stock_count=row.out_of_stock_count,
+            stock_value=row.stock_value,
+        )
+
+    # --- Projection ---
+
+    def project_products(self, product_ids: Optional[Iterable[int]] = None, department_id=None) -> int:
+        return project_products(self.session, product_ids, department_id)
+
+    def project_sales(self, sale_ids: Iterable[int]) -> int:
+        return project_sales(self.session, sale_ids)
+
+    def rebuild(self) -> Dict[str, int]:
+        return rebuild_read_models(self.session)
+
+
+def main(argv=None) -> int:
+    from sqlalchemy import create_engine
+
+    parser = argparse.ArgumentParser(description="Rebuild the read model tables.")
+    parser.add_argument("database_url", nargs="?")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        from config import DATABASE_URL as database_url
+
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            for statement in READ_MODEL_DDL:
+                connection.execute(text(statement))
+            written = rebuild_read_models(connection)
+    finally:
+        engine.dispose()
+    for name, rows in written.items():
+        print(f"{name}: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
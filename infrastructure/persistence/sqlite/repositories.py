@@ -1,6 +1,6 @@
 import sys
 import os
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from decimal import Decimal
 import logging
@@ -13,9 +13,24 @@ from sqlalchemy import (
     desc,
     asc,
     text,
+    update,
+    table,
+    column,
+    literal,
+    type_coerce,
+    union_all,
+    case,
+    cast,
+    bindparam,
+    Integer,
+    Numeric,
+    String,
+    tuple_,
 )
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
 # Note: sys.path manipulation is a workaround for import issues
 # Consider fixing the project structure instead
@@ -36,14 +51,22 @@ from core.interfaces.repository_interfaces import (
     IUserRepository,
     IInvoiceRepository,
     IUnitRepository,
+    Page,
 )
-from core.models.product import Department, Product
-from core.models.inventory import InventoryMovement
+from core.interfaces.specification_repository import (
+    IProductSpecificationRepository,
+    ISaleSpecificationRepository,
+    SpecificationRepositoryMixin,
+)
+from core.exceptions import ConcurrentUpdateError
+from core.models.product import Department, Product, ProductRow, StockLevel
+from core.specifications.sale_specifications import sales_by_date_range
+from core.models.inventory import InventoryMovement, StockDrift
 from core.models.sale import Sale
 from core.models.customer import Customer
 from core.models.credit_payment import CreditPayment
 from core.models.user import User
-from core.models.invoice import Invoice
+from core.models.invoice import Invoice, format_invoice_number
 from core.models.cash_drawer import CashDrawerEntry, CashDrawerEntryType
 from core.models.unit import Unit
 
@@ -51,12 +74,14 @@ from core.models.unit import Unit
 from infrastructure.persistence.sqlite.models_mapping import (
     UserOrm,
     ProductOrm,
+    ProductPriceHistoryOrm,
     DepartmentOrm,
     CustomerOrm,
     SaleOrm,
     SaleItemOrm,
     InventoryMovementOrm,
     InvoiceOrm,
+    InvoiceSequenceOrm,
     CashDrawerEntryOrm,
     CreditPaymentOrm,
     UnitOrm,
@@ -66,6 +91,23 @@ from infrastructure.persistence.sqlite.models_mapping import (
 from infrastructure.persistence.sqlite.cash_drawer_repository import (
     SQLiteCashDrawerRepository,
 )
+from infrastructure.persistence.sqlite.product_search import (
+    PRODUCT_SEARCH_TABLE,
+    build_match_query,
+    bulk_product_search_sync,
+    has_product_search_index,
+    rank_window_bound,
+)
+from infrastructure.persistence.sqlite.sales_rollups import (
+    RollupPeriod,
+    sales_daily_department,
+    sales_daily_payment,
+    sales_daily_product,
+)
+from infrastructure.persistence.sqlite.stock_checkpoints import (
+    refresh_stock_checkpoints,
+    stock_checkpoints,
+)
 from infrastructure.persistence.mappers import ModelMapper
 
 import bcrypt
@@ -73,6 +115,58 @@ import bcrypt
 # All ORM-to-Domain mapping functions have been centralized in infrastructure.persistence.mappers.ModelMapper
 # This provides better maintainability and consistency across the codebase.
 
+
+def _keyset_page(
+    session, stmt, keys, after, limit, to_domain, descending=False, columns=False
+) -> Page:
+    """
+    Run one keyset page of a select ordered by ``keys``.
+
+    The page seeks past the ``after`` row value instead of skipping rows with
+    OFFSET, so with an index on ``keys`` every page costs the same however
+    deep it is. One extra row is read to tell whether another page follows.
+    ``columns`` marks a select of plain columns rather than of an ORM entity.
+    """
+    if after is not None:
+        position = tuple_(*keys)
+        bound = tuple_(*(literal(value, key.type) for value, key in zip(after, keys)))
+        stmt = stmt.where(position < bound if descending else position > bound)
+    stmt = stmt.order_by(*(key.desc() if descending else key for key in keys))
+    result = session.execute(stmt.limit(limit + 1))
+    rows = result.all() if columns else result.scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = tuple(getattr(rows[-1], key.key) for key in keys)
+    return Page([to_domain(row) for row in rows], next_cursor)
+
+
+# Columns of a ProductRow, in its constructor order
+_PRODUCT_ROW_COLUMNS = (
+    ProductOrm.id,
+    ProductOrm.code,
+    ProductOrm.description,
+    ProductOrm.sell_price,
+    ProductOrm.cost_price,
+    ProductOrm.quantity_in_stock,
+    ProductOrm.min_stock,
+    ProductOrm.uses_inventory,
+    ProductOrm.unit,
+    ProductOrm.department_id,
+    DepartmentOrm.name.label("department_name"),
+)
+
+
+def _product_rows_select():
+    """Select of the ProductRow columns, with the department name joined in."""
+    return select(*_PRODUCT_ROW_COLUMNS).outerjoin(
+        DepartmentOrm, ProductOrm.department_id == DepartmentOrm.id
+    )
+
+
+def _to_product_row(row) -> ProductRow:
+    return ProductRow(*row)
+
 # --- Repository Implementation ---
 
 
@@ -205,12 +299,29 @@ class SqliteDepartmentRepository(IDepartmentRepository):
 # --- Product Repository Implementation ---
 
 
-class SqliteProductRepository(IProductRepository):
+class SqliteProductRepository(
+    SpecificationRepositoryMixin[Product],
+    IProductRepository,
+    IProductSpecificationRepository,
+):
     """SQLite implementation of the product repository interface."""
 
+    _entity_class = ProductOrm
+
     def __init__(self, session: Session):
         self.session = session
 
+    # --- Specification queries (see SpecificationRepositoryMixin) ---
+
+    def _entity_to_domain(self, entity: ProductOrm) -> Product:
+        return ModelMapper.product_orm_to_domain(entity)
+
+    def _specification_select(self):
+        return select(ProductOrm).options(joinedload(ProductOrm.department))
+
+    def _specification_order(self):
+        return [ProductOrm.description, ProductOrm.id]
+
     def _create_product_orm(self, product: Product) -> ProductOrm:
         """Helper to map Product domain model to ProductOrm."""
         # Ensure department exists if ID is provided
@@ -284,6 +395,20 @@ class SqliteProductRepository(IProductRepository):
         product_orm = self.session.scalars(stmt).first()
         return ModelMapper.product_orm_to_domain(product_orm)
 
+    def get_by_ids(self, product_ids) -> Dict[int, Product]:
+        """Retrieves several products with one IN query, keyed by id; unknown ids are left out."""
+        if not product_ids:
+            return {}
+        stmt = (
+            select(ProductOrm)
+            .options(joinedload(ProductOrm.department))
+            .where(ProductOrm.id.in_(product_ids))
+        )
+        return {
+            product_orm.id: ModelMapper.product_orm_to_domain(product_orm)
+            for product_orm in self.session.scalars(stmt)
+        }
+
     def get_by_code(self, code: str) -> Optional[Product]:
         """Retrieves a product by its code, eagerly loading the department."""
         stmt = (
@@ -351,6 +476,31 @@ class SqliteProductRepository(IProductRepository):
         results_orm = self.session.scalars(stmt).all()
         return [ModelMapper.product_orm_to_domain(prod) for prod in results_orm]
 
+    def get_page(self, after: Optional[Tuple] = None, limit: int = 100) -> Page[Product]:
+        """Retrieves the products after a (description, id) cursor, ordered by description."""
+        return _keyset_page(
+            self.session,
+            select(ProductOrm).options(joinedload(ProductOrm.department)),
+            (ProductOrm.description, ProductOrm.id),
+            after,
+            limit,
+            ModelMapper.product_orm_to_domain,
+        )
+
+    def get_row_page(
+        self, after: Optional[Tuple] = None, limit: int = 100
+    ) -> Page[ProductRow]:
+        """Like get_page(), but the page holds ProductRow projections."""
+        return _keyset_page(
+            self.session,
+            _product_rows_select(),
+            (ProductOrm.description, ProductOrm.id),
+            after,
+            limit,
+            _to_product_row,
+            columns=True,
+        )
+
     def get_by_department_id(self, department_id: int) -> List[Product]:
         """Retrieves all products for a specific department."""
         stmt = (
@@ -375,9 +525,15 @@ class SqliteProductRepository(IProductRepository):
                     f"Another product with code '{product.code}' already exists."
                 )
 
-        product_orm = self.session.get(ProductOrm, product.id)
+        # Fresh from the row: stock updates bypass the loaded objects' versions
+        product_orm = self.session.get(ProductOrm, product.id, populate_existing=True)
         if not product_orm:
             raise ValueError(f"Product with ID {product.id} not found.")
+        if product.version is not None and product.version != product_orm.version:
+            raise ConcurrentUpdateError(
+                f"Product {product_orm.code} was changed by another user "
+                f"(version {product_orm.version}, expected {product.version}); reload it and try again"
+            )
 
         # Ensure department exists if ID is provided and changing
         if (
@@ -433,106 +589,242 @@ class SqliteProductRepository(IProductRepository):
                 f"Database integrity error updating product {product.id}: {e}"
             )
             raise ValueError(f"Could not update product: {e}")
+        except StaleDataError:
+            self.session.rollback()
+            raise ConcurrentUpdateError(
+                f"Product {product.code} was changed by another user; reload it and try again"
+            )
         except Exception as e:
             self.session.rollback()
             logging.error(f"Unexpected error updating product {product.id}: {e}")
             raise
 
     def delete(self, product_id: int) -> bool:
-        """Deletes a product by its ID."""
-        # Consider adding checks for related entities (sales, inventory) if needed
-        product_orm = self.session.get(ProductOrm, product_id)
+        """
+        Deletes a product by its ID.
+
+        Raises:
+            ValueError: If sale lines or inventory movements reference the product
+        """
+        product_orm = self.session.get(ProductOrm, product_id, populate_existing=True)
         if product_orm:
+            # Sales and movements keep their product; the foreign keys forbid the delete
+            sale_lines = self.session.scalar(
+                select(func.count(SaleItemOrm.id)).where(SaleItemOrm.product_id == product_id)
+            )
+            movements = self.session.scalar(
+                select(func.count(InventoryMovementOrm.id)).where(
+                    InventoryMovementOrm.product_id == product_id
+                )
+            )
+            if sale_lines or movements:
+                raise ValueError(
+                    f"Product '{product_orm.code}' cannot be deleted because it has "
+                    f"{sale_lines} sale lines and {movements} inventory movements; "
+                    "deactivate it instead"
+                )
             try:
                 self.session.delete(product_orm)
                 self.session.flush()
                 return True
-            except Exception as e:
-                self.session.rollback()
-                logging.error(f"Error deleting product {product_id}: {e}")
-                raise
+            except IntegrityError as e:
+                # A reference not checked above
+                logging.error(f"Integrity error deleting product {product_id}: {e}")
+                raise ValueError(
+                    f"Product '{product_orm.code}' cannot be deleted because it is in use"
+                ) from e
         return False
 
-    def search(self, term: str) -> List[Product]:
-        """Searches products by code or description, prioritizing exact matches."""
+    def search(self, term: str, limit: Optional[int] = None) -> List[Product]:
+        """
+        Searches products by code or description, prioritizing exact code matches.
+
+        Uses the products_fts full-text index when the database has it: every
+        word of the term is matched as a prefix, accents are ignored and results
+        are ranked by relevance. Falls back to LIKE scans otherwise.
+
+        Args:
+            term: Text typed by the user or a scanned code
+            limit: Maximum number of products to return (all matches if None)
+
+        Returns:
+            Exact code matches first, followed by the remaining matches
+        """
+        return self._search(
+            term,
+            limit,
+            select(ProductOrm).options(joinedload(ProductOrm.department)),
+            lambda stmt: [
+                ModelMapper.product_orm_to_domain(prod)
+                for prod in self.session.scalars(stmt).all()
+            ],
+        )
+
+    def search_rows(self, term: str, limit: Optional[int] = None) -> List[ProductRow]:
+        """Searches products like search(), returning ProductRow projections."""
+        return self._search(
+            term,
+            limit,
+            _product_rows_select(),
+            lambda stmt: [_to_product_row(row) for row in self.session.execute(stmt)],
+        )
+
+    def _search(self, term: str, limit: Optional[int], base_stmt, fetch) -> list:
+        """
+        Runs a product search over ``base_stmt``.
+
+        ``fetch`` runs a statement derived from ``base_stmt`` and returns its
+        results as objects with an ``id``, so the same ranking serves both
+        full products and row projections.
+        """
+        match_query = build_match_query(term)
+        if match_query is None or not has_product_search_index(self.session):
+            return self._search_like(term, limit, base_stmt, fetch)
+
+        # Exact code matches go first; the NOCASE index on code serves them
+        results = fetch(base_stmt.where(self._code_equals(term)))
+        if limit is not None and len(results) >= limit:
+            return results[:limit]
+
+        fts = table(PRODUCT_SEARCH_TABLE, column("rowid"), column("rank"))
+        ranked_stmt = (
+            base_stmt.join(fts, fts.c.rowid == ProductOrm.id)
+            .where(text(f"{PRODUCT_SEARCH_TABLE} MATCH :match_query"))
+            .order_by(fts.c.rank, ProductOrm.description)
+            .params(match_query=match_query)
+        )
+        window_bound = rank_window_bound(self.session, match_query)
+        if window_bound is not None:
+            ranked_stmt = ranked_stmt.where(fts.c.rowid < window_bound)
+        if results:
+            ranked_stmt = ranked_stmt.where(
+                ProductOrm.id.not_in([found.id for found in results])
+            )
+        if limit is not None:
+            ranked_stmt = ranked_stmt.limit(limit - len(results))
+        results.extend(fetch(ranked_stmt))
+        return results
+
+    @staticmethod
+    def _code_equals(term: str):
+        """Case-insensitive exact match on the product code."""
+        return ProductOrm.code.collate("NOCASE") == term
+
+    def _search_like(self, term: str, limit: Optional[int], base_stmt, fetch) -> list:
+        """LIKE based search used when the full-text index is not available."""
         search_term = f"%{term}%"
 
         # First try exact matches for code
-        exact_code_stmt = (
-            select(ProductOrm)
-            .options(joinedload(ProductOrm.department))
-            .where(ProductOrm.code.ilike(term))
-        )
-        exact_code_results = self.session.scalars(exact_code_stmt).all()
+        exact_code_results = fetch(base_stmt.where(self._code_equals(term)))
 
-        # If we found exact code matches, return them first
-        if exact_code_results:
-            exact_products = [
-                ModelMapper.product_orm_to_domain(prod) for prod in exact_code_results
-            ]
-
-            # Also get partial matches but exclude the exact ones
-            partial_stmt = (
-                select(ProductOrm)
-                .options(joinedload(ProductOrm.department))
-                .where(
-                    and_(
-                        or_(
-                            ProductOrm.code.ilike(search_term),
-                            ProductOrm.description.ilike(search_term),
-                        ),
-                        ~ProductOrm.code.ilike(term),  # Exclude exact code matches
-                    )
-                )
-                .order_by(ProductOrm.description)
+        partial_stmt = base_stmt.where(
+            or_(
+                ProductOrm.code.ilike(search_term),
+                ProductOrm.description.ilike(search_term),
             )
-            partial_results = self.session.scalars(partial_stmt).all()
-            partial_products = [
-                ModelMapper.product_orm_to_domain(prod) for prod in partial_results
-            ]
+        ).order_by(ProductOrm.description)
+        if exact_code_results:
+            # Exclude exact code matches, they are returned first
+            partial_stmt = partial_stmt.where(~self._code_equals(term))
+        if limit is not None:
+            partial_stmt = partial_stmt.limit(max(limit - len(exact_code_results), 0))
 
-            # Return exact matches first, then partial matches
-            return exact_products + partial_products
-        else:
-            # No exact code matches, return all partial matches
-            stmt = (
-                select(ProductOrm)
-                .options(joinedload(ProductOrm.department))
-                .where(
-                    or_(
-                        ProductOrm.code.ilike(search_term),
-                        ProductOrm.description.ilike(search_term),
-                    )
-                )
-                .order_by(ProductOrm.description)
+        results = exact_code_results + fetch(partial_stmt)
+        if limit is not None:
+            results = results[:limit]
+        return results
+
+    def get_ids_by_codes(self, codes: List[str]) -> Dict[str, int]:
+        """Maps product codes to ids with a single query; unknown codes are left out."""
+        if not codes:
+            return {}
+        stmt = select(ProductOrm.code, ProductOrm.id).where(ProductOrm.code.in_(codes))
+        return {code: product_id for code, product_id in self.session.execute(stmt)}
+
+    def bulk_upsert(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Inserts products, updating the existing product when the code is taken.
+
+        All rows are written with one executemany INSERT ... ON CONFLICT(code)
+        DO UPDATE. Rows are dicts of products column values and must share
+        the same keys; codes must be unique within the batch.
+        """
+        if not rows:
+            return
+        # Core insert on the table skips the ORM bulk persistence bookkeeping
+        stmt = sqlite_insert(ProductOrm.__table__)
+        update_columns = {
+            column: stmt.excluded[column] for column in rows[0] if column != "code"
+        }
+        update_columns["last_updated"] = datetime.now()
+        update_columns["version"] = ProductOrm.__table__.c.version + 1
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductOrm.__table__.c.code], set_=update_columns
+        )
+        with bulk_product_search_sync(self.session, [row["code"] for row in rows]):
+            self.session.execute(stmt, rows)
+
+    def count(self) -> int:
+        """Returns the number of products in the catalog."""
+        return self.session.scalar(select(func.count(ProductOrm.id))) or 0
+
+    def iter_export_rows(self, batch_size: int = 1000) -> Iterator[Tuple]:
+        """
+        Streams the columns of the product export, ordered by description.
+
+        Rows are plain tuples (code, description, cost_price, sell_price,
+        quantity_in_stock, min_stock, unit, uses_inventory, department name)
+        fetched batch_size at a time with yield_per, so neither ORM objects
+        nor the whole result are ever held in memory.
+        """
+        stmt = (
+            select(
+                ProductOrm.code,
+                ProductOrm.description,
+                ProductOrm.cost_price,
+                ProductOrm.sell_price,
+                ProductOrm.quantity_in_stock,
+                ProductOrm.min_stock,
+                ProductOrm.unit,
+                ProductOrm.uses_inventory,
+                DepartmentOrm.name,
             )
-            results_orm = self.session.scalars(stmt).all()
-            return [ModelMapper.product_orm_to_domain(prod) for prod in results_orm]
+            .outerjoin(DepartmentOrm, ProductOrm.department_id == DepartmentOrm.id)
+            .order_by(ProductOrm.description, ProductOrm.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in self.session.execute(stmt).partitions():
+            yield from partition
 
     def get_low_stock(
         self, threshold: Optional[Decimal] = None
     ) -> List[Product]:  # Changed threshold to Decimal
         """Retrieves products where stock <= min_stock or below optional threshold."""
         stmt = select(ProductOrm).options(joinedload(ProductOrm.department))
+        stmt = self._where_low_stock(stmt, threshold).order_by(ProductOrm.description)
+        results_orm = self.session.scalars(stmt).all()
+        return [ModelMapper.product_orm_to_domain(prod) for prod in results_orm]
+
+    def get_low_stock_rows(self, threshold: Optional[Decimal] = None) -> List[ProductRow]:
+        """Retrieves the products get_low_stock() would, as ProductRow projections."""
+        stmt = self._where_low_stock(_product_rows_select(), threshold)
+        stmt = stmt.order_by(ProductOrm.description)
+        return [_to_product_row(row) for row in self.session.execute(stmt)]
 
+    @staticmethod
+    def _where_low_stock(stmt, threshold: Optional[Decimal]):
         # Only include products that use inventory
         stmt = stmt.where(ProductOrm.uses_inventory)
 
         if threshold is not None:
-            stmt = stmt.where(ProductOrm.quantity_in_stock <= threshold)
-        else:
-            # Default: stock <= min_stock (only for products that have min_stock set)
-            stmt = stmt.where(
-                and_(
-                    ProductOrm.min_stock
-                    is not None,  # Only products with min_stock configured
-                    ProductOrm.quantity_in_stock <= ProductOrm.min_stock,
-                )
+            return stmt.where(ProductOrm.quantity_in_stock <= threshold)
+        # Default: stock <= min_stock (only for products that have min_stock set)
+        return stmt.where(
+            and_(
+                ProductOrm.min_stock.is_not(None),
+                ProductOrm.quantity_in_stock <= ProductOrm.min_stock,
             )
-
-        stmt = stmt.order_by(ProductOrm.description)
-        results_orm = self.session.scalars(stmt).all()
-        return [ModelMapper.product_orm_to_domain(prod) for prod in results_orm]
+        )
 
     def get_low_stock_products(
         self, threshold: Optional[Decimal] = None
@@ -548,42 +840,214 @@ class SqliteProductRepository(IProductRepository):
         results_orm = self.session.scalars(stmt).all()
         return [ModelMapper.product_orm_to_domain(prod) for prod in results_orm]
 
+    def get_inventory_rows(self, department_id: Optional[int] = None) -> List[ProductRow]:
+        """Returns the inventory tracked products as ProductRow projections, by description."""
+        stmt = _product_rows_select().where(ProductOrm.uses_inventory)
+        if department_id is not None:
+            stmt = stmt.where(ProductOrm.department_id == department_id)
+        stmt = stmt.order_by(ProductOrm.description)
+        return [_to_product_row(row) for row in self.session.execute(stmt)]
+
     def update_stock(
         self,
         product_id: int,
         quantity_change: Decimal,
         cost_price: Optional[Decimal] = None,
-    ) -> Optional[Product]:  # Changed types to Decimal
-        """Updates the stock quantity and optionally the cost price of a specific product."""
-        product_orm = self.session.get(ProductOrm, product_id)
-        if product_orm:
-            try:
-                # Ensure quantity_in_stock is treated as Decimal if it comes from DB as Numeric
-                (
-                    product_orm.quantity_in_stock
-                    if isinstance(product_orm.quantity_in_stock, Decimal)
-                    else Decimal(str(product_orm.quantity_in_stock))
+        expected_version: Optional[int] = None,
+    ) -> Optional[Product]:
+        """
+        Adds quantity_change (negative to subtract) to a product's stock.
+
+        The change is applied by one guarded UPDATE relative to the stored
+        stock, like change_stock, together with the cost price if given.
+
+        Returns:
+            The updated product, or None if it does not exist
+
+        Raises:
+            ValueError: If the change would take the stock below zero
+            ConcurrentUpdateError: If expected_version no longer matches
+        """
+        changes = {product_id: Decimal(str(quantity_change))}
+        expected_versions = {product_id: expected_version} if expected_version is not None else None
+        stmt = self._stock_change_statement(changes, expected_versions)
+        if cost_price is not None:
+            stmt = stmt.values(cost_price=Decimal(str(cost_price)))
+        if not self.session.execute(stmt).all():
+            if self.session.get(ProductOrm, product_id) is None:
+                return None
+            self._raise_refused_stock_change(changes, {}, expected_versions)
+        product_orm = self.session.get(ProductOrm, product_id, populate_existing=True)
+        return ModelMapper.product_orm_to_domain(product_orm)
+
+    def change_stock(
+        self,
+        changes: Dict[int, Decimal],
+        expected_versions: Optional[Dict[int, int]] = None,
+    ) -> Dict[int, StockLevel]:
+        """
+        Adds signed quantities, keyed by product id, to several products' stock.
+
+        A whole ticket is one UPDATE ... WHERE id IN (...) RETURNING, with a
+        CASE picking each product's change. Stock is changed relative to the
+        stored value (quantity_in_stock = quantity_in_stock + change), so two
+        tills writing at once never lose each other's changes, and a
+        decrement only applies while the stock covers it. Every change bumps
+        the product's version; with expected_versions, the UPDATE also needs
+        the versions the caller read.
+
+        Returns:
+            The new stock and version of each product
+
+        Raises:
+            ValueError: If a product is missing or does not have enough stock
+            ConcurrentUpdateError: If a product's version no longer matches
+            In both cases the caller's transaction must be rolled back.
+        """
+        if not changes:
+            return {}
+        stmt = self._stock_change_statement(changes, expected_versions)
+        levels = {row.id: StockLevel(*row) for row in self.session.execute(stmt)}
+        if len(levels) != len(changes):
+            self._raise_refused_stock_change(changes, levels, expected_versions)
+        return levels
+
+    def decrease_stock(self, quantities: Dict[int, Decimal]) -> None:
+        """
+        Subtracts quantities from the stock of several products.
+
+        The stock check is part of the UPDATE (see change_stock), so two
+        checkouts racing for the last units cannot both succeed.
+
+        Raises:
+            ValueError: If a product is missing or does not have enough stock;
+                the caller's transaction must then be rolled back
+        """
+        self.change_stock({product_id: -quantity for product_id, quantity in quantities.items()})
+
+    def _stock_change_statement(
+        self, changes: Dict[int, Decimal], expected_versions: Optional[Dict[int, int]] = None
+    ):
+        change = case(changes, value=ProductOrm.id)
+        # Rounded to the column's scale, so repeated fractional sales do not drift
+        new_quantity = type_coerce(
+            func.round(ProductOrm.quantity_in_stock + change, 3), ProductOrm.quantity_in_stock.type
+        )
+        conditions = [ProductOrm.id.in_(changes), or_(change >= 0, new_quantity >= 0)]
+        if expected_versions:
+            conditions.append(
+                ProductOrm.version
+                == case(expected_versions, value=ProductOrm.id, else_=ProductOrm.version)
+            )
+        # ORM enabled, so the products already loaded in the session see the new stock
+        return (
+            update(ProductOrm)
+            .where(*conditions)
+            .values(
+                quantity_in_stock=new_quantity,
+                version=ProductOrm.version + 1,
+                last_updated=datetime.now(),
+            )
+            .returning(ProductOrm.id, ProductOrm.quantity_in_stock, ProductOrm.version)
+            .execution_options(synchronize_session="fetch")
+        )
+
+    def _raise_refused_stock_change(
+        self,
+        changes: Dict[int, Decimal],
+        applied: Dict[int, StockLevel],
+        expected_versions: Optional[Dict[int, int]],
+    ) -> None:
+        refused = [product_id for product_id in changes if product_id not in applied]
+        rows = {
+            row.id: row
+            for row in self.session.execute(
+                select(ProductOrm.id, ProductOrm.code, ProductOrm.quantity_in_stock, ProductOrm.version)
+                .where(ProductOrm.id.in_(refused))
+            )
+        }
+        for product_id in refused:
+            if product_id not in rows:
+                raise ValueError(f"Product with ID {product_id} not found")
+            row = rows[product_id]
+            expected = (expected_versions or {}).get(product_id)
+            if expected is not None and row.version != expected:
+                raise ConcurrentUpdateError(
+                    f"Product {row.code} was changed by another user "
+                    f"(version {row.version}, expected {expected}); reload it and try again"
                 )
-                # Set the new quantity directly (assume quantity_change is the new total)
-                product_orm.quantity_in_stock = quantity_change
-
-                if cost_price is not None:
-                    # Ensure cost_price is Decimal for assignment to Numeric column
-                    product_orm.cost_price = (
-                        cost_price
-                        if isinstance(cost_price, Decimal)
-                        else Decimal(str(cost_price))
-                    )
+        product_id = refused[0]
+        row = rows[product_id]
+        raise ValueError(
+            f"Insufficient stock for product {row.code} "
+            f"(requires {-changes[product_id]}, has {row.quantity_in_stock})"
+        )
 
-                product_orm.last_updated = datetime.now()
-                self.session.flush()
-                self.session.refresh(product_orm, attribute_names=["department"])
-                return ModelMapper.product_orm_to_domain(product_orm)
-            except Exception as e:
-                self.session.rollback()
-                logging.error(f"Error updating stock for product {product_id}: {e}")
-                raise
-        return None
+    def update_prices_by_percentage(
+        self, percentage: Decimal, department_id: Optional[int] = None
+    ) -> int:
+        """
+        Changes the sell and cost prices of many products by a percentage.
+
+        The old and new prices go into product_price_history with one
+        INSERT ... SELECT, then one UPDATE reprices the products. Prices are
+        rounded to cents and never go below zero.
+
+        Args:
+            percentage: Change in percent, e.g. 10 for a 10% increase
+            department_id: Only reprice this department's products
+
+        Returns:
+            Number of products repriced
+        """
+        factor = bindparam(
+            "factor", Decimal("1") + Decimal(percentage) / Decimal("100"), type_=Numeric(12, 6)
+        )
+
+        def repriced(price):
+            return type_coerce(func.max(0, func.round(price * factor, 2)), price.type)
+
+        scope = [ProductOrm.sell_price.isnot(None)]
+        if department_id is not None:
+            scope.append(ProductOrm.department_id == department_id)
+        now = datetime.now()
+
+        history = ProductPriceHistoryOrm.__table__
+        self.session.execute(
+            history.insert().from_select(
+                [
+                    history.c.product_id,
+                    history.c.changed_at,
+                    history.c.old_sell_price,
+                    history.c.new_sell_price,
+                    history.c.old_cost_price,
+                    history.c.new_cost_price,
+                    history.c.percentage,
+                ],
+                select(
+                    ProductOrm.id,
+                    literal(now, history.c.changed_at.type),
+                    ProductOrm.sell_price,
+                    repriced(ProductOrm.sell_price),
+                    ProductOrm.cost_price,
+                    repriced(ProductOrm.cost_price),
+                    literal(percentage, history.c.percentage.type),
+                ).where(*scope),
+            )
+        )
+        # ORM enabled, so the products already loaded in the session see the new version
+        result = self.session.execute(
+            update(ProductOrm)
+            .where(*scope)
+            .values(
+                sell_price=repriced(ProductOrm.sell_price),
+                cost_price=repriced(ProductOrm.cost_price),
+                version=ProductOrm.version + 1,
+                last_updated=now,
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+        return result.rowcount
 
 
 # --- Inventory Movement Repository Implementation ---
@@ -618,40 +1082,47 @@ class SqliteInventoryRepository(IInventoryRepository):
             logging.error(f"Error adding inventory movement: {e}")
             raise
 
+    def add_movements(self, movements: List[InventoryMovement]) -> None:
+        """Adds several inventory movement records with one executemany INSERT."""
+        if not movements:
+            return
+        # Core insert on the table skips the ORM bookkeeping of one object per row
+        self.session.execute(
+            InventoryMovementOrm.__table__.insert(),
+            [
+                {
+                    "product_id": movement.product_id,
+                    "user_id": movement.user_id,
+                    "timestamp": movement.timestamp,
+                    "movement_type": movement.movement_type,
+                    "quantity": movement.quantity,
+                    "description": movement.description,
+                    "related_id": movement.related_id,
+                }
+                for movement in movements
+            ],
+        )
+
     def get_movements_for_product(
         self,
         product_id: int,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
     ) -> List[InventoryMovement]:
-        """Retrieves all inventory movements for a specific product, ordered by timestamp."""
-        stmt = select(InventoryMovementOrm).where(
-            InventoryMovementOrm.product_id == product_id
+        """Retrieves a product's inventory movements, newest first; at most limit of them."""
+        return self.get_movements(
+            product_id=product_id, start_date=start_date, end_date=end_date, limit=limit
         )
-        if start_date:
-            stmt = stmt.where(InventoryMovementOrm.timestamp >= start_date)
-        if end_date:
-            stmt = stmt.where(InventoryMovementOrm.timestamp <= end_date)
-        stmt = stmt.order_by(InventoryMovementOrm.timestamp.desc())
-        results_orm = self.session.scalars(stmt).all()
-        return [
-            ModelMapper.inventory_movement_orm_to_domain(move) for move in results_orm
-        ]
 
     def get_all_movements(
-        self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
     ) -> List[InventoryMovement]:
-        """Retrieves all inventory movements within an optional date range."""
-        stmt = select(InventoryMovementOrm)
-        if start_date:
-            stmt = stmt.where(InventoryMovementOrm.timestamp >= start_date)
-        if end_date:
-            stmt = stmt.where(InventoryMovementOrm.timestamp <= end_date)
-        stmt = stmt.order_by(InventoryMovementOrm.timestamp.desc())
-        results_orm = self.session.scalars(stmt).all()
-        return [
-            ModelMapper.inventory_movement_orm_to_domain(move) for move in results_orm
-        ]
+        """Retrieves the inventory movements within an optional date range, newest first."""
+        return self.get_movements(start_date=start_date, end_date=end_date, limit=limit)
 
     def get_movements(
         self,
@@ -659,8 +1130,9 @@ class SqliteInventoryRepository(IInventoryRepository):
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         movement_type: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> List[InventoryMovement]:
-        """Retrieves inventory movements with optional filters."""
+        """Retrieves inventory movements with optional filters, newest first."""
         stmt = select(InventoryMovementOrm)
 
         if product_id is not None:
@@ -672,25 +1144,162 @@ class SqliteInventoryRepository(IInventoryRepository):
         if movement_type:
             stmt = stmt.where(InventoryMovementOrm.movement_type == movement_type)
 
-        stmt = stmt.order_by(InventoryMovementOrm.timestamp.desc())
+        stmt = stmt.order_by(InventoryMovementOrm.timestamp.desc(), InventoryMovementOrm.id.desc())
+        if limit is not None:
+            stmt = stmt.limit(limit)
         results_orm = self.session.scalars(stmt).all()
         return [
             ModelMapper.inventory_movement_orm_to_domain(move) for move in results_orm
         ]
 
+    def _ledger_quantity(self, at: Optional[datetime] = None):
+        """
+        The ledger stock of the product in the enclosing query, at an instant or now.
+
+        Its latest stock checkpoint at or before the instant, plus its
+        movements from that checkpoint on: one primary key seek and one
+        bounded range of ix_inventory_movements_product_timestamp.
+        """
+        latest = stock_checkpoints.alias("latest")
+        checkpoint_scope = [latest.c.product_id == ProductOrm.id]
+        movement_scope = [InventoryMovementOrm.product_id == ProductOrm.id]
+        if at is not None:
+            # A checkpoint holds the stock at the start of its day
+            checkpoint_scope.append(latest.c.day <= at.date().isoformat())
+            movement_scope.append(InventoryMovementOrm.timestamp <= at)
+        # Correlated to the product, also where it is nested in the queries below
+        checkpoint_day = (
+            select(func.max(latest.c.day)).where(*checkpoint_scope).correlate(ProductOrm).scalar_subquery()
+        )
+        checkpoint_quantity = (
+            select(stock_checkpoints.c.quantity)
+            .where(stock_checkpoints.c.product_id == ProductOrm.id, stock_checkpoints.c.day == checkpoint_day)
+            .correlate(ProductOrm)
+            .scalar_subquery()
+        )
+        moved = (
+            select(func.sum(InventoryMovementOrm.quantity))
+            .where(*movement_scope, InventoryMovementOrm.timestamp >= func.coalesce(checkpoint_day, ""))
+            .correlate(ProductOrm)
+            .scalar_subquery()
+        )
+        return type_coerce(
+            func.round(func.coalesce(checkpoint_quantity, 0) + func.coalesce(moved, 0), 3),
+            InventoryMovementOrm.quantity.type,
+        )
+
+    def stock_as_of(self, product_ids: List[int], timestamp: datetime) -> Dict[int, Decimal]:
+        """
+        Returns the products' stock at an instant, according to the movement ledger.
+
+        Movements at the instant itself count. The answer reads each
+        product's nearest stock checkpoint and the movements after it, so
+        its cost does not grow with the age of the ledger. Stock a product
+        got without a movement (e.g. when it was created or imported) is
+        not in the ledger; find_stock_drift lists it.
+
+        Returns:
+            Stock per product id; ids of missing products are left out
+        """
+        if not product_ids:
+            return {}
+        stmt = select(ProductOrm.id, self._ledger_quantity(timestamp)).where(
+            ProductOrm.id.in_(product_ids)
+        )
+        return {product_id: quantity for product_id, quantity in self.session.execute(stmt)}
+
+    def refresh_stock_checkpoints(self, granularity: str = "month", rebuild: bool = False) -> int:
+        """Adds the checkpoints of the periods closed since the last refresh; returns how many."""
+        return refresh_stock_checkpoints(self.session, granularity, rebuild=rebuild)
+
+    def find_stock_drift(self) -> List[StockDrift]:
+        """
+        Returns the inventory tracked products whose stock differs from their ledger, by code.
+
+        Every product is compared in one query, each against its latest
+        checkpoint plus the movements since.
+        """
+        compared = select(
+            ProductOrm.id,
+            ProductOrm.code,
+            ProductOrm.quantity_in_stock,
+            self._ledger_quantity().label("ledger_quantity"),
+        ).where(ProductOrm.uses_inventory).subquery()
+        stmt = (
+            select(compared)
+            # Below the stock column's 3 decimals, a difference is float noise
+            .where(func.abs(compared.c.quantity_in_stock - compared.c.ledger_quantity) >= 0.0005)
+            .order_by(compared.c.code)
+        )
+        return [StockDrift(*row) for row in self.session.execute(stmt)]
+
 
 # --- Sale Repository Implementation ---
 
 
-class SqliteSaleRepository(ISaleRepository):
+class SqliteSaleRepository(
+    SpecificationRepositoryMixin[Sale],
+    ISaleRepository,
+    ISaleSpecificationRepository,
+):
     """SQLite implementation of the sale repository interface."""
 
+    _entity_class = SaleOrm
+
     def __init__(self, session: Session):  # Changed from __init__(self, session)
         self.session = session
 
+    # --- Specification queries (see SpecificationRepositoryMixin) ---
+
+    def _entity_to_domain(self, entity: SaleOrm) -> Sale:
+        return ModelMapper.sale_orm_to_domain(entity)
+
+    def _specification_select(self):
+        # selectinload keeps LIMIT on the sales, not on the joined item rows
+        return select(SaleOrm).options(selectinload(SaleOrm.items))
+
+    def _specification_order(self):
+        return [SaleOrm.date_time.desc(), SaleOrm.id.desc()]
+
+    def _current_cost_prices(self, product_ids) -> Dict[int, Decimal]:
+        """Returns the current cost price of the given products in one query."""
+        if not product_ids:
+            return {}
+        stmt = select(ProductOrm.id, ProductOrm.cost_price).where(
+            ProductOrm.id.in_(product_ids)
+        )
+        return {
+            row.id: row.cost_price or Decimal("0.00")
+            for row in self.session.execute(stmt)
+        }
+
+    @staticmethod
+    def _cost_snapshot(item, current_costs: Dict[int, Decimal]) -> Optional[Decimal]:
+        """The item's own cost if it has one (zero included), else its product's current cost."""
+        cost_price = getattr(item, "cost_price", None)
+        if cost_price is not None:
+            return cost_price
+        return current_costs.get(item.product_id)
+
     def add_sale(self, sale: Sale) -> Sale:
-        """Adds a new sale and its items to the database."""
+        """
+        Adds a new sale and its items to the database.
+
+        Each item's cost_price is stored as the cost at the time of sale.
+        Items that arrive without one are snapshotted from the product's
+        current cost so margin reports never need to join products.
+        Triggers add the sale to the daily sales rollups in the same
+        transaction.
+        """
         try:
+            current_costs = self._current_cost_prices(
+                {
+                    item.product_id
+                    for item in sale.items
+                    if getattr(item, "cost_price", None) is None
+                }
+            )
+
             # Map Sale domain model to SaleOrm
             sale_orm = SaleOrm(
                 date_time=sale.timestamp,
@@ -701,20 +1310,29 @@ class SqliteSaleRepository(ISaleRepository):
                 total_amount=sale.total,  # Assuming total is calculated and passed in Sale model?
             )
 
-            # Map SaleItem domain models to SaleItemOrm and associate with SaleOrm
-            for item_model in sale.items:
-                item_orm = SaleItemOrm(
-                    product_id=item_model.product_id,
-                    quantity=item_model.quantity,  # Decimal -> Numeric
-                    unit_price=item_model.unit_price,  # Decimal -> Numeric
-                    product_code=item_model.product_code,
-                    product_description=item_model.product_description,
-                    product_unit=getattr(item_model, "product_unit", "Unidad"),
-                )
-                sale_orm.items.append(item_orm)
-
             self.session.add(sale_orm)
             self.session.flush()
+
+            # Items go in with one executemany INSERT instead of one
+            # INSERT ... RETURNING per item from the ORM flush
+            if sale.items:
+                self.session.execute(
+                    SaleItemOrm.__table__.insert(),
+                    [
+                        {
+                            "sale_id": sale_orm.id,
+                            "product_id": item_model.product_id,
+                            "quantity": item_model.quantity,  # Decimal -> Numeric
+                            "unit_price": item_model.unit_price,  # Decimal -> Numeric
+                            "product_code": item_model.product_code,
+                            "product_description": item_model.product_description,
+                            "product_unit": getattr(item_model, "product_unit", "Unidad"),
+                            "cost_price": self._cost_snapshot(item_model, current_costs),
+                        }
+                        for item_model in sale.items
+                    ],
+                )
+            # Reloads the items too, their relationship being eager
             self.session.refresh(sale_orm)
             # Need to eager load items when refreshing/mapping back if required by caller
             # Or map back manually here including items
@@ -742,63 +1360,55 @@ class SqliteSaleRepository(ISaleRepository):
     def get_sales_by_period(
         self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
     ) -> List[Sale]:
-        """Retrieves all sales within the specified time period."""
-        stmt = select(SaleOrm).options(joinedload(SaleOrm.items))
-        if start_time:
-            stmt = stmt.where(SaleOrm.date_time >= start_time)
-        if end_time:
-            # Add a small delta for inclusive end_time check if needed
-            # end_time_inclusive = end_time + timedelta(seconds=1)
-            stmt = stmt.where(SaleOrm.date_time <= end_time)
-        stmt = stmt.order_by(SaleOrm.date_time.desc())
-
-        # Use unique() to handle eager loading with collections
-        results_orm = self.session.scalars(stmt).unique().all()
-        return [ModelMapper.sale_orm_to_domain(sale) for sale in results_orm]
-
-    # Aggregation methods remain largely the same, as they return Dicts, not domain models directly
-    # (Ensure they query the ORM models correctly)
+        """Retrieves all sales within the specified time period, newest first."""
+        return self.find_by_specification(
+            sales_by_date_range(start_time or None, end_time or None)
+        )
+
+    # Period reports read whole days from the daily rollups (see sales_rollups)
+    # and only the partial days at the edges of the period from the raw rows.
     def get_sales_summary_by_period(
         self, start_date=None, end_date=None, group_by: str = "day"
     ) -> List[Dict[str, Any]]:
         """Retrieves aggregated sales data grouped by a time period."""
-        # Convert date objects to datetime if needed
-        if start_date and not isinstance(start_date, datetime):
-            start_date = datetime.combine(start_date, datetime.min.time())
-        if end_date and not isinstance(end_date, datetime):
-            end_date = datetime.combine(end_date, datetime.max.time())
-
-        # Date formatting depends on the database engine (SQLite specific functions)
+        # Rollup days are "YYYY-MM-DD" strings, the prefix of the same format
         if group_by == "day":
-            date_format_str = "%Y-%m-%d"
-            date_func = func.strftime(date_format_str, SaleOrm.date_time)
+            date_format_str, key_length = "%Y-%m-%d", 10
         elif group_by == "month":
-            date_format_str = "%Y-%m"
-            date_func = func.strftime(date_format_str, SaleOrm.date_time)
+            date_format_str, key_length = "%Y-%m", 7
         elif group_by == "year":
-            date_format_str = "%Y"
-            date_func = func.strftime(date_format_str, SaleOrm.date_time)
+            date_format_str, key_length = "%Y", 4
         else:
             raise ValueError("Invalid group_by value. Use 'day', 'month', or 'year'.")
 
-        # Use SQLAlchemy for aggregation
-        query = self.session.query(
-            date_func.label("date"),
-            func.sum(SaleOrm.total_amount).label("total_sales"),
-            func.count(SaleOrm.id).label("num_sales"),
-        )
-
-        if start_date:
-            query = query.filter(SaleOrm.date_time >= start_date)
-        if end_date:
-            query = query.filter(SaleOrm.date_time <= end_date)
-
-        query = query.group_by(date_func).order_by(date_func)
+        period = RollupPeriod.split(start_date, end_date)
+        rollup = sales_daily_payment
+        parts = union_all(
+            select(
+                func.substr(rollup.c.day, 1, key_length).label("date"),
+                rollup.c.total_amount.label("total_amount"),
+                rollup.c.num_sales.label("num_sales"),
+            ).where(period.day_filter(rollup.c.day)),
+            select(
+                func.strftime(date_format_str, SaleOrm.date_time),
+                SaleOrm.total_amount,
+                literal(1),
+            ).where(period.raw_filter(SaleOrm.date_time)),
+        ).subquery()
 
-        results = query.all()
+        stmt = (
+            select(
+                parts.c.date,
+                func.sum(parts.c.total_amount).label("total_sales"),
+                func.sum(parts.c.num_sales).label("num_sales"),
+            )
+            .group_by(parts.c.date)
+            .order_by(parts.c.date)
+        )
+        results = self.session.execute(stmt).all()
 
         # Convert results to the expected dictionary format
-        result_list = [
+        return [
             {
                 "date": row.date,
                 "total_sales": (
@@ -809,30 +1419,39 @@ class SqliteSaleRepository(ISaleRepository):
             for row in results
         ]
 
-        # Debug print the raw results
-        # print(f"Raw query results: {result_list}") # Keep this commented out or remove for production
-
-        return result_list
-
     def get_sales_by_payment_type(
         self, start_date=None, end_date=None
     ) -> List[Dict[str, Any]]:
         """Retrieves sales data aggregated by payment type for a period."""
+        period = RollupPeriod.split(start_date, end_date)
+        rollup = sales_daily_payment
+        parts = union_all(
+            select(
+                rollup.c.payment_type.label("payment_type"),
+                rollup.c.total_amount.label("total_amount"),
+                rollup.c.num_sales.label("num_sales"),
+            ).where(period.day_filter(rollup.c.day)),
+            select(
+                type_coerce(SaleOrm.payment_type, String),
+                SaleOrm.total_amount,
+                literal(1),
+            ).where(period.raw_filter(SaleOrm.date_time)),
+        ).subquery()
+
+        # The rollups store a sale without payment type as ''
+        payment_type = type_coerce(
+            func.nullif(parts.c.payment_type, ""), SaleOrm.payment_type.type
+        ).label("payment_type")
         stmt = (
             select(
-                SaleOrm.payment_type.label("payment_type"),
-                func.sum(SaleOrm.total_amount).label("total_amount"),
-                func.count(SaleOrm.id).label("num_sales"),
+                payment_type,
+                func.sum(parts.c.total_amount).label("total_amount"),
+                func.sum(parts.c.num_sales).label("num_sales"),
             )
-            .group_by(SaleOrm.payment_type)
+            .group_by(payment_type)
             .order_by(desc("total_amount"))
         )
 
-        if start_date:
-            stmt = stmt.where(SaleOrm.date_time >= start_date)
-        if end_date:
-            stmt = stmt.where(SaleOrm.date_time <= end_date)
-
         results = self.session.execute(stmt).mappings().all()
         return [
             {
@@ -851,27 +1470,42 @@ class SqliteSaleRepository(ISaleRepository):
         self, start_date=None, end_date=None
     ) -> List[Dict[str, Any]]:
         """Retrieves sales data aggregated by product department for a period."""
-        stmt = select(
-            DepartmentOrm.id.label("department_id"),
-            DepartmentOrm.name.label("department_name"),
-            func.sum(SaleItemOrm.quantity * SaleItemOrm.unit_price).label(
-                "total_amount"
-            ),
-            func.sum(SaleItemOrm.quantity).label("quantity_sold"),
-            func.count(SaleOrm.id).label("num_sales"),  # Count distinct sales
-        )
-        stmt = stmt.select_from(SaleOrm)
-        stmt = stmt.join(SaleItemOrm, SaleOrm.id == SaleItemOrm.sale_id)
-        stmt = stmt.join(ProductOrm, SaleItemOrm.product_id == ProductOrm.id)
-        stmt = stmt.join(DepartmentOrm, ProductOrm.department_id == DepartmentOrm.id)
-
-        if start_date:
-            stmt = stmt.where(SaleOrm.date_time >= start_date)
-        if end_date:
-            stmt = stmt.where(SaleOrm.date_time <= end_date)
+        period = RollupPeriod.split(start_date, end_date)
+        rollup = sales_daily_department
+        parts = union_all(
+            select(
+                rollup.c.department_id.label("department_id"),
+                rollup.c.total_amount.label("total_amount"),
+                rollup.c.total_cost.label("total_cost"),
+                rollup.c.quantity_sold.label("quantity_sold"),
+                rollup.c.num_lines.label("num_sales"),
+            ).where(period.day_filter(rollup.c.day)),
+            select(
+                ProductOrm.department_id,
+                SaleItemOrm.quantity * SaleItemOrm.unit_price,
+                SaleItemOrm.quantity * func.coalesce(SaleItemOrm.cost_price, 0),
+                SaleItemOrm.quantity,
+                literal(1),
+            )
+            .select_from(SaleOrm)
+            .join(SaleItemOrm, SaleOrm.id == SaleItemOrm.sale_id)
+            .join(ProductOrm, SaleItemOrm.product_id == ProductOrm.id)
+            .where(period.raw_filter(SaleOrm.date_time)),
+        ).subquery()
 
-        stmt = stmt.group_by(DepartmentOrm.id, DepartmentOrm.name).order_by(
-            desc("total_amount")
+        stmt = (
+            select(
+                DepartmentOrm.id.label("department_id"),
+                DepartmentOrm.name.label("department_name"),
+                func.sum(parts.c.total_amount).label("total_amount"),
+                func.sum(parts.c.total_cost).label("total_cost"),
+                func.sum(parts.c.quantity_sold).label("quantity_sold"),
+                func.sum(parts.c.num_sales).label("num_sales"),  # Sale lines
+            )
+            .select_from(parts)
+            .join(DepartmentOrm, parts.c.department_id == DepartmentOrm.id)
+            .group_by(DepartmentOrm.id, DepartmentOrm.name)
+            .order_by(desc("total_amount"))
         )
 
         results = self.session.execute(stmt).mappings().all()
@@ -882,6 +1516,7 @@ class SqliteSaleRepository(ISaleRepository):
                 "total_sales": (
                     float(row["total_amount"]) if row["total_amount"] else 0.0
                 ),  # Convert to float and use total_sales key
+                "total_cost": float(row["total_cost"]) if row["total_cost"] else 0.0,
                 "quantity_sold": (
                     float(row["quantity_sold"]) if row["quantity_sold"] else 0.0
                 ),  # Convert to float for consistency
@@ -931,25 +1566,30 @@ class SqliteSaleRepository(ISaleRepository):
         self, start_date=None, end_date=None, limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Retrieves the top selling products for a period by quantity."""
+        period = RollupPeriod.split(start_date, end_date)
+        rollup = sales_daily_product
+        parts = union_all(
+            select(
+                rollup.c.product_id.label("product_id"),
+                rollup.c.quantity_sold.label("quantity_sold"),
+            ).where(period.day_filter(rollup.c.day)),
+            select(SaleItemOrm.product_id, SaleItemOrm.quantity)
+            .join(SaleOrm, SaleOrm.id == SaleItemOrm.sale_id)
+            .where(period.raw_filter(SaleOrm.date_time)),
+        ).subquery()
+
         stmt = (
             select(
                 ProductOrm.id.label("product_id"),
                 ProductOrm.code.label("product_code"),
                 ProductOrm.description.label("product_description"),
-                func.sum(SaleItemOrm.quantity).label("quantity_sold"),
+                type_coerce(
+                    func.sum(parts.c.quantity_sold), SaleItemOrm.quantity.type
+                ).label("quantity_sold"),
             )
-            .select_from(SaleOrm)
-            .join(SaleItemOrm, SaleOrm.id == SaleItemOrm.sale_id)
-            .join(ProductOrm, SaleItemOrm.product_id == ProductOrm.id)
-        )
-
-        if start_date:
-            stmt = stmt.where(SaleOrm.date_time >= start_date)
-        if end_date:
-            stmt = stmt.where(SaleOrm.date_time <= end_date)
-
-        stmt = (
-            stmt.group_by(ProductOrm.id, ProductOrm.code, ProductOrm.description)
+            .select_from(parts)
+            .join(ProductOrm, parts.c.product_id == ProductOrm.id)
+            .group_by(ProductOrm.id, ProductOrm.code, ProductOrm.description)
             .order_by(desc("quantity_sold"))
             .limit(limit)
         )
@@ -971,6 +1611,14 @@ class SqliteSaleRepository(ISaleRepository):
         """
         Calculates the total profit for a period (revenue - cost).
 
+        Revenue and cost are aggregated in a single SQL statement that adds
+        the product rollups of the whole days to the raw lines of the
+        partial days, so the number of queries does not grow with the
+        number of sale lines. The cost of each line is its
+        ``sale_items.cost_price`` snapshot, so the result stays historically
+        correct after product costs change. Rows recorded before snapshots
+        existed are filled in by backfill_cost_snapshots.
+
         Args:
             start_time: The start of the period
             end_time: The end of the period
@@ -978,40 +1626,33 @@ class SqliteSaleRepository(ISaleRepository):
         Returns:
             Dictionary with profit data
             Example: {'revenue': 5000.0, 'cost': 3000.0, 'profit': 2000.0, 'margin': 0.4}
+            The same values are also provided under the 'total_revenue',
+            'total_cost', 'total_profit' and 'profit_margin' keys.
         """
-        # Convert date objects to datetime if needed
-        if not isinstance(start_time, datetime):
-            start_time = datetime.combine(start_time, datetime.min.time())
-        if not isinstance(end_time, datetime):
-            end_time = datetime.combine(end_time, datetime.max.time())
-
-        # Initialize result values
-        total_revenue = Decimal("0.00")
-        total_cost = Decimal("0.00")
-
-        # Use join load to get all sales with their items in a single query
-        sales_with_items = (
-            self.session.query(SaleOrm)
-            .options(joinedload(SaleOrm.items))
-            .filter(SaleOrm.date_time >= start_time)
-            .filter(SaleOrm.date_time <= end_time)
-            .all()
-        )
+        period = RollupPeriod.split(start_time, end_time)
+        rollup = sales_daily_product
+        parts = union_all(
+            select(
+                rollup.c.total_amount.label("revenue"),
+                rollup.c.total_cost.label("cost"),
+            ).where(period.day_filter(rollup.c.day)),
+            select(
+                SaleItemOrm.quantity * SaleItemOrm.unit_price,
+                SaleItemOrm.quantity * func.coalesce(SaleItemOrm.cost_price, 0),
+            )
+            .join(SaleOrm, SaleOrm.id == SaleItemOrm.sale_id)
+            .where(period.raw_filter(SaleOrm.date_time)),
+        ).subquery()
 
-        # Calculate revenue from all sale items
-        for sale in sales_with_items:
-            for item in sale.items:
-                total_revenue += item.quantity * item.unit_price
+        stmt = select(
+            func.coalesce(func.sum(parts.c.revenue), 0).label("revenue"),
+            func.coalesce(func.sum(parts.c.cost), 0).label("cost"),
+        )
+        row = self.session.execute(stmt).one()
 
-                # Get the product cost price and calculate cost
-                product = (
-                    self.session.query(ProductOrm)
-                    .filter(ProductOrm.id == item.product_id)
-                    .first()
-                )
-                if product and product.cost_price:
-                    item_cost = product.cost_price * item.quantity
-                    total_cost += item_cost
+        # SQLite returns floats for arithmetic on Numeric columns; quantize to cents
+        total_revenue = Decimal(str(row.revenue)).quantize(Decimal("0.01"))
+        total_cost = Decimal(str(row.cost)).quantize(Decimal("0.01"))
 
         # Calculate profit
         total_profit = total_revenue - total_cost
@@ -1022,12 +1663,66 @@ class SqliteSaleRepository(ISaleRepository):
             profit_margin = total_profit / total_revenue
 
         # Convert all Decimal values to float to avoid type comparison issues
-        return {
+        result = {
             "revenue": float(total_revenue),
             "cost": float(total_cost),
             "profit": float(total_profit),
             "margin": float(profit_margin),
         }
+        # Key names used by ReportingService and the reports view
+        result.update(
+            {
+                "total_revenue": result["revenue"],
+                "total_cost": result["cost"],
+                "total_profit": result["profit"],
+                "profit_margin": result["margin"],
+            }
+        )
+        return result
+
+    def backfill_cost_snapshots(
+        self, after_id: int = 0, batch_size: int = 1000
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Fills one batch of sale items that have no cost snapshot (NULL cost).
+
+        Items are processed in primary key order starting after ``after_id``
+        and receive their product's current cost. Callers loop, passing the
+        returned id back in, and commit between batches so long backfills
+        never hold the write lock for more than one batch.
+
+        Args:
+            after_id: Only sale items with a greater id are considered
+            batch_size: Maximum number of sale items to update
+
+        Returns:
+            Tuple of (number of items updated, last item id processed),
+            where the id is None once no items remain.
+        """
+        ids_stmt = (
+            select(SaleItemOrm.id)
+            .where(SaleItemOrm.id > after_id)
+            .where(SaleItemOrm.cost_price.is_(None))
+            .order_by(SaleItemOrm.id)
+            .limit(batch_size)
+        )
+        item_ids = self.session.scalars(ids_stmt).all()
+        if not item_ids:
+            return 0, None
+
+        product_cost = (
+            select(func.coalesce(ProductOrm.cost_price, 0))
+            .where(ProductOrm.id == SaleItemOrm.product_id)
+            .scalar_subquery()
+        )
+        result = self.session.execute(
+            update(SaleItemOrm)
+            .where(SaleItemOrm.id.in_(item_ids))
+            .values(cost_price=func.coalesce(product_cost, 0))
+            .execution_options(synchronize_session=False)
+        )
+        self.session.flush()
+        return result.rowcount, item_ids[-1]
 
     def get_cash_drawer_entries(
         self, start_date=None, end_date=None, drawer_id=None
@@ -1238,6 +1933,17 @@ class SqliteCustomerRepository(ICustomerRepository):
         customers_orm = query.all()
         return [ModelMapper.customer_orm_to_domain(orm) for orm in customers_orm]
 
+    def get_page(self, after: Optional[Tuple] = None, limit: int = 100) -> Page[Customer]:
+        """Get the customers after a (name, id) cursor, ordered by name."""
+        return _keyset_page(
+            self.session,
+            select(CustomerOrm),
+            (CustomerOrm.name, CustomerOrm.id),
+            after,
+            limit,
+            ModelMapper.customer_orm_to_domain,
+        )
+
     def update(self, customer: Customer) -> Customer:
         """Update an existing customer."""
         try:
@@ -1385,6 +2091,138 @@ class SqliteInvoiceRepository(IInvoiceRepository):
             if orm is not None
         ]
 
+    def get_page(self, after: Optional[Tuple] = None, limit: int = 100) -> Page[Invoice]:
+        """Get the invoices after an (invoice_date, id) cursor, newest first."""
+        return _keyset_page(
+            self.session,
+            select(InvoiceOrm),
+            (InvoiceOrm.invoice_date, InvoiceOrm.id),
+            after,
+            limit,
+            ModelMapper.invoice_orm_to_domain,
+            descending=True,
+        )
+
+    def allocate_invoice_number(self, point_of_sale: int) -> int:
+        """
+        Take the next number of a point of sale's invoice sequence.
+
+        The sequence row is bumped with UPDATE ... RETURNING in the caller's
+        transaction. SQLite keeps the write lock until the invoice is committed,
+        so concurrent invoices get consecutive numbers, and an invoice that is
+        rolled back gives its number back.
+        """
+        allocate = (
+            update(InvoiceSequenceOrm)
+            .where(InvoiceSequenceOrm.point_of_sale == point_of_sale)
+            .values(last_number=InvoiceSequenceOrm.last_number + 1)
+            .returning(InvoiceSequenceOrm.last_number)
+            .execution_options(synchronize_session=False)
+        )
+        number = self.session.execute(allocate).scalar()
+        if number is None:
+            # First invoice of this point of sale since it got a sequence:
+            # carry on after the numbers it has already issued
+            highest = self.session.execute(
+                select(func.coalesce(func.max(self._issued_number(point_of_sale)), 0))
+                .where(self._issued_by(point_of_sale))
+            ).scalar()
+            self.session.execute(
+                sqlite_insert(InvoiceSequenceOrm)
+                .values(point_of_sale=point_of_sale, last_number=highest)
+                .on_conflict_do_nothing()
+            )
+            number = self.session.execute(allocate).scalar()
+        return number
+
+    def verify_invoice_sequence(self, point_of_sale: int) -> List[str]:
+        """
+        Check that a point of sale's invoice numbers run from 1 without gaps.
+
+        Returns:
+            Duplicated and missing numbers, and any mismatch between the
+            sequence and the numbers issued; empty if everything is in order
+        """
+        issued = (
+            select(self._issued_number(point_of_sale).label("number"))
+            .where(self._issued_by(point_of_sale))
+            .subquery()
+        )
+        problems = []
+
+        duplicates = self.session.execute(
+            select(issued.c.number, func.count().label("times"))
+            .group_by(issued.c.number)
+            .having(func.count() > 1)
+            .order_by(issued.c.number)
+        )
+        for number, times in duplicates:
+            problems.append(
+                f"Invoice number {format_invoice_number(point_of_sale, number)} "
+                f"was issued {times} times"
+            )
+
+        numbers = select(issued.c.number).distinct().subquery()
+        steps = select(
+            numbers.c.number,
+            func.lag(numbers.c.number, 1, 0)
+            .over(order_by=numbers.c.number)
+            .label("previous"),
+        ).subquery()
+        gaps = self.session.execute(
+            select(steps.c.previous + 1, steps.c.number - 1)
+            .where(steps.c.number - steps.c.previous > 1)
+            .order_by(steps.c.number)
+        )
+        for first, last in gaps:
+            problems.append(self._missing_numbers(point_of_sale, first, last))
+
+        highest = self.session.execute(select(func.coalesce(func.max(issued.c.number), 0))).scalar()
+        last_number = self.session.execute(
+            select(InvoiceSequenceOrm.last_number).where(
+                InvoiceSequenceOrm.point_of_sale == point_of_sale
+            )
+        ).scalar()
+        if last_number is not None and last_number < highest:
+            problems.append(
+                f"The sequence is at {format_invoice_number(point_of_sale, last_number)} "
+                f"but {format_invoice_number(point_of_sale, highest)} was already issued"
+            )
+        elif last_number is not None and last_number > highest:
+            problems.append(self._missing_numbers(point_of_sale, highest + 1, last_number))
+        return problems
+
+    @staticmethod
+    def _number_prefix(point_of_sale: int) -> str:
+        return format_invoice_number(point_of_sale, 0).rsplit("-", 1)[0] + "-"
+
+    @classmethod
+    def _issued_by(cls, point_of_sale: int):
+        """Invoices numbered by a point of sale, found through the invoice_number index."""
+        prefix = cls._number_prefix(point_of_sale)
+        return and_(
+            InvoiceOrm.invoice_number > prefix,
+            InvoiceOrm.invoice_number < prefix[:-1] + ".",
+            # Longer or non-numeric numbers were not taken from the sequence
+            func.length(InvoiceOrm.invoice_number)
+            <= len(format_invoice_number(point_of_sale, 0)),
+            InvoiceOrm.invoice_number.op("NOT GLOB")(prefix + "*[^0-9]*"),
+        )
+
+    @classmethod
+    def _issued_number(cls, point_of_sale: int):
+        prefix = cls._number_prefix(point_of_sale)
+        return cast(func.substr(InvoiceOrm.invoice_number, len(prefix) + 1), Integer)
+
+    @staticmethod
+    def _missing_numbers(point_of_sale: int, first: int, last: int) -> str:
+        if first == last:
+            return f"Invoice number {format_invoice_number(point_of_sale, first)} is missing"
+        return (
+            f"Invoice numbers {format_invoice_number(point_of_sale, first)} to "
+            f"{format_invoice_number(point_of_sale, last)} are missing"
+        )
+
     def update(self, invoice: Invoice) -> Invoice:
         """Update an existing invoice."""
         try:
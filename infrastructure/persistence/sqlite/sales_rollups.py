@@ -0,0 +1,478 @@
+"""
+Daily sales rollups for the period reports.
+
+Three tables hold one row per day and dimension, with the measures the
+reports add up:
+
+- ``sales_daily_payment``: sales count and total per day and payment type
+- ``sales_daily_product``: lines, quantity, revenue and cost per day and product
+- ``sales_daily_department``: the same measures per day and department
+
+Triggers on ``sales``, ``sale_items`` and ``products`` keep them current in
+the same transaction as the write, so a sale recorded by
+SqliteSaleRepository.add_sale (or edited by update) is in the rollups as
+soon as it commits. Departments follow the product: when a product moves to
+another department its history moves with it, which keeps the department
+rollup equal to what the raw join over products returns.
+
+RollupPeriod splits a report period into the whole days answered from the
+rollups and the partial days at its edges, which are read from the raw
+rows. Rebuild the rollups from the raw rows (e.g. after editing sales
+outside the application) with:
+
+    python -m infrastructure.persistence.sqlite.sales_rollups [database_url] [--from DAY] [--to DAY]
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Union
+
+from sqlalchemy import and_, column, false, or_, table, text, true
+
+SALES_DAILY_PAYMENT = "sales_daily_payment"
+SALES_DAILY_PRODUCT = "sales_daily_product"
+SALES_DAILY_DEPARTMENT = "sales_daily_department"
+SALES_ROLLUP_TABLES = (SALES_DAILY_PAYMENT, SALES_DAILY_PRODUCT, SALES_DAILY_DEPARTMENT)
+
+SALES_ROLLUP_TRIGGERS = (
+    "sales_rollup_after_sale_insert",
+    "sales_rollup_after_sale_delete",
+    "sales_rollup_after_sale_update",
+    "sales_rollup_after_sale_day_change",
+    "sales_rollup_after_item_insert",
+    "sales_rollup_after_item_delete",
+    "sales_rollup_after_item_update",
+    "sales_rollup_after_product_department_change",
+    "sales_rollup_after_product_delete",
+)
+
+# Lightweight table constructs for the report queries
+sales_daily_payment = table(
+    SALES_DAILY_PAYMENT,
+    column("day"),
+    column("payment_type"),
+    column("num_sales"),
+    column("total_amount"),
+)
+sales_daily_product = table(
+    SALES_DAILY_PRODUCT,
+    column("day"),
+    column("product_id"),
+    column("num_lines"),
+    column("quantity_sold"),
+    column("total_amount"),
+    column("total_cost"),
+)
+sales_daily_department = table(
+    SALES_DAILY_DEPARTMENT,
+    column("day"),
+    column("department_id"),
+    column("num_lines"),
+    column("quantity_sold"),
+    column("total_amount"),
+    column("total_cost"),
+)
+
+_LINE_MEASURES = ("num_lines", "quantity_sold", "total_amount", "total_cost")
+
+
+def _add_on_conflict(key: str, measures) -> str:
+    assignments = ", ".join(f"{name} = {name} + excluded.{name}" for name in measures)
+    return f"ON CONFLICT ({key}) DO UPDATE SET {assignments}"
+
+
+def _line_values(item: str, sign: str = "") -> str:
+    """Measures contributed by one sale line (item is new, old or a table alias)."""
+    return (
+        f"{sign}1, {sign}{item}.quantity, {sign}{item}.quantity * {item}.unit_price, "
+        f"{sign}{item}.quantity * coalesce({item}.cost_price, 0)"
+    )
+
+
+def _payment_upsert(sale: str, sign: str = "") -> str:
+    # The WHERE clause also keeps "ON CONFLICT" from parsing as a join constraint
+    return (
+        f"INSERT INTO {SALES_DAILY_PAYMENT} (day, payment_type, num_sales, total_amount) "
+        f"SELECT date({sale}.date_time), coalesce({sale}.payment_type, ''), {sign}1, "
+        f"{sign}coalesce({sale}.total_amount, 0) WHERE {sale}.date_time IS NOT NULL "
+        + _add_on_conflict("day, payment_type", ("num_sales", "total_amount"))
+    )
+
+
+def _payment_cleanup(sale: str) -> str:
+    return (
+        f"DELETE FROM {SALES_DAILY_PAYMENT} WHERE day = date({sale}.date_time) "
+        f"AND payment_type = coalesce({sale}.payment_type, '') AND num_sales = 0"
+    )
+
+
+def _line_upserts(day: str, item: str, source: str, sign: str = "") -> str:
+    """Adds (or with sign "-" removes) sale lines to the product and department rollups."""
+    columns = ", ".join(_LINE_MEASURES)
+    return (
+        f"INSERT INTO {SALES_DAILY_PRODUCT} (day, product_id, {columns}) "
+        f"SELECT {day}, {item}.product_id, {_line_values(item, sign)} {source} "
+        + _add_on_conflict("day, product_id", _LINE_MEASURES)
+        + f";\nINSERT INTO {SALES_DAILY_DEPARTMENT} (day, department_id, {columns}) "
+        f"SELECT {day}, p.department_id, {_line_values(item, sign)} {source} "
+        f"AND p.department_id IS NOT NULL "
+        + _add_on_conflict("day, department_id", _LINE_MEASURES)
+    )
+
+
+def _line_cleanup(day: str) -> str:
+    return (
+        f"DELETE FROM {SALES_DAILY_PRODUCT} WHERE day = {day} AND num_lines = 0;\n"
+        f"DELETE FROM {SALES_DAILY_DEPARTMENT} WHERE day = {day} AND num_lines = 0"
+    )
+
+
+# Products are left joined: a line whose product row is gone still counts in
+# the product rollup, as it does in the raw queries and in a rebuild
+def _item_source(item: str) -> str:
+    return (
+        f"FROM sales s LEFT JOIN products p ON p.id = {item}.product_id "
+        f"WHERE s.id = {item}.sale_id"
+    )
+
+
+# Lines of a sale, for moving them between days when its date changes
+_SALE_ITEMS_SOURCE = (
+    "FROM sale_items i LEFT JOIN products p ON p.id = i.product_id WHERE i.sale_id = new.id"
+)
+
+
+def _department_move(department: str, product: str, sign: str = "") -> str:
+    values = ", ".join(f"{sign}{name}" for name in _LINE_MEASURES)
+    return (
+        f"INSERT INTO {SALES_DAILY_DEPARTMENT} (day, department_id, {', '.join(_LINE_MEASURES)}) "
+        f"SELECT day, {department}, {values} FROM {SALES_DAILY_PRODUCT} "
+        f"WHERE product_id = {product}.id AND {department} IS NOT NULL "
+        + _add_on_conflict("day, department_id", _LINE_MEASURES)
+    )
+
+
+SALES_ROLLUP_TABLES_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SALES_DAILY_PAYMENT} (
+        day TEXT NOT NULL,
+        payment_type TEXT NOT NULL DEFAULT '',
+        num_sales INTEGER NOT NULL DEFAULT 0,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, payment_type)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {SALES_DAILY_PRODUCT} (
+        day TEXT NOT NULL,
+        product_id INTEGER NOT NULL,
+        num_lines INTEGER NOT NULL DEFAULT 0,
+        quantity_sold NUMERIC NOT NULL DEFAULT 0,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        total_cost NUMERIC NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, product_id)
+    ) WITHOUT ROWID
+    """,
+    # History of one product, used when it changes department
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_{SALES_DAILY_PRODUCT}_product_day
+    ON {SALES_DAILY_PRODUCT} (product_id, day)
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {SALES_DAILY_DEPARTMENT} (
+        day TEXT NOT NULL,
+        department_id INTEGER NOT NULL,
+        num_lines INTEGER NOT NULL DEFAULT 0,
+        quantity_sold NUMERIC NOT NULL DEFAULT 0,
+        total_amount NUMERIC NOT NULL DEFAULT 0,
+        total_cost NUMERIC NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, department_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+SALES_ROLLUP_TRIGGERS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_insert
+    AFTER INSERT ON sales BEGIN
+        {_payment_upsert("new")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_delete
+    AFTER DELETE ON sales BEGIN
+        {_payment_upsert("old", "-")};
+        {_payment_cleanup("old")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_update
+    AFTER UPDATE OF date_time, payment_type, total_amount ON sales BEGIN
+        {_payment_upsert("old", "-")};
+        {_payment_upsert("new")};
+        {_payment_cleanup("old")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_sale_day_change
+    AFTER UPDATE OF date_time ON sales
+    WHEN date(old.date_time) IS NOT date(new.date_time) BEGIN
+        {_line_upserts("date(old.date_time)", "i", _SALE_ITEMS_SOURCE, "-")};
+        {_line_upserts("date(new.date_time)", "i", _SALE_ITEMS_SOURCE)};
+        {_line_cleanup("date(old.date_time)")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_insert
+    AFTER INSERT ON sale_items BEGIN
+        {_line_upserts("date(s.date_time)", "new", _item_source("new"))};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_delete
+    AFTER DELETE ON sale_items BEGIN
+        {_line_upserts("date(s.date_time)", "old", _item_source("old"), "-")};
+        {_line_cleanup("(SELECT date(date_time) FROM sales WHERE id = old.sale_id)")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_item_update
+    AFTER UPDATE OF sale_id, product_id, quantity, unit_price, cost_price ON sale_items BEGIN
+        {_line_upserts("date(s.date_time)", "old", _item_source("old"), "-")};
+        {_line_upserts("date(s.date_time)", "new", _item_source("new"))};
+        {_line_cleanup("(SELECT date(date_time) FROM sales WHERE id = old.sale_id)")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_product_department_change
+    AFTER UPDATE OF department_id ON products
+    WHEN old.department_id IS NOT new.department_id BEGIN
+        {_department_move("old.department_id", "old", "-")};
+        {_department_move("new.department_id", "new")};
+        DELETE FROM {SALES_DAILY_DEPARTMENT}
+        WHERE department_id = old.department_id AND num_lines = 0;
+    END
+    """,
+    # The lines stay in the product rollup, but no longer have a department
+    f"""
+    CREATE TRIGGER IF NOT EXISTS sales_rollup_after_product_delete
+    AFTER DELETE ON products
+    WHEN old.department_id IS NOT NULL BEGIN
+        {_department_move("old.department_id", "old", "-")};
+        DELETE FROM {SALES_DAILY_DEPARTMENT}
+        WHERE department_id = old.department_id AND num_lines = 0;
+    END
+    """,
+]
+
+
+def create_sales_rollups(connection) -> None:
+    """
+    Creates the rollup tables and triggers, then fills them from existing sales.
+
+    Safe to call repeatedly. Does nothing on non-SQLite connections.
+
+    Args:
+        connection: SQLAlchemy connection with the sales, sale_items and
+            products tables present
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SALES_ROLLUP_TABLES_DDL + SALES_ROLLUP_TRIGGERS_DDL:
+        connection.execute(text(statement))
+    rebuild_sales_rollups(connection)
+
+
+def drop_sales_rollups(connection) -> None:
+    """Drops the rollup triggers and tables."""
+    if connection.dialect.name != "sqlite":
+        return
+    for trigger in SALES_ROLLUP_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for name in SALES_ROLLUP_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+
+DayLike = Union[date, str, None]
+
+
+def rebuild_sales_rollups(connection, start_day: DayLike = None, end_day: DayLike = None) -> Dict[str, int]:
+    """
+    Recomputes the rollups of a range of days from the raw sales rows.
+
+    Rows of the range are deleted and re-aggregated set-based, one INSERT
+    ... SELECT per table, within the caller's transaction.
+
+    Args:
+        connection: SQLAlchemy connection or session
+        start_day: First day to rebuild (date or "YYYY-MM-DD"); None for no lower bound
+        end_day: Last day to rebuild, inclusive; None for no upper bound
+
+    Returns:
+        Number of rollup rows written per table
+    """
+    deletes, inserts, params = rebuild_statements(start_day, end_day)
+    for statement in deletes:
+        connection.execute(text(statement), params)
+    return {
+        name: connection.execute(text(statement), params).rowcount
+        for name, statement in inserts.items()
+    }
+
+
+def rebuild_statements(start_day: DayLike = None, end_day: DayLike = None):
+    """
+    Returns the SQL of rebuild_sales_rollups, for callers on a raw sqlite3 connection.
+
+    Returns:
+        Tuple of (DELETE statements, INSERT statement per table, named parameters)
+    """
+    params = {}
+    day_filter = []
+    sale_filter = []
+    if start_day is not None:
+        params["start_day"] = str(start_day)
+        day_filter.append("day >= :start_day")
+        sale_filter.append("s.date_time >= :start_day")
+    if end_day is not None:
+        params["end_day"] = str(end_day)
+        day_filter.append("day <= :end_day")
+        sale_filter.append("s.date_time < date(:end_day, '+1 day')")
+    day_where = f"WHERE {' AND '.join(day_filter)}" if day_filter else ""
+    sale_where = " AND ".join(["s.date_time IS NOT NULL"] + sale_filter)
+
+    deletes = [f"DELETE FROM {name} {day_where}" for name in SALES_ROLLUP_TABLES]
+    line_measures = (
+        "COUNT(*), SUM(i.quantity), SUM(i.quantity * i.unit_price), "
+        "SUM(i.quantity * coalesce(i.cost_price, 0))"
+    )
+    columns = ", ".join(_LINE_MEASURES)
+    inserts = {
+        SALES_DAILY_PAYMENT: (
+            f"INSERT INTO {SALES_DAILY_PAYMENT} (day, payment_type, num_sales, total_amount) "
+            "SELECT date(s.date_time), coalesce(s.payment_type, ''), COUNT(*), "
+            f"coalesce(SUM(s.total_amount), 0) FROM sales s WHERE {sale_where} "
+            "GROUP BY 1, 2"
+        ),
+        SALES_DAILY_PRODUCT: (
+            f"INSERT INTO {SALES_DAILY_PRODUCT} (day, product_id, {columns}) "
+            f"SELECT date(s.date_time), i.product_id, {line_measures} "
+            f"FROM sales s JOIN sale_items i ON i.sale_id = s.id WHERE {sale_where} "
+            "GROUP BY 1, 2"
+        ),
+        SALES_DAILY_DEPARTMENT: (
+            f"INSERT INTO {SALES_DAILY_DEPARTMENT} (day, department_id, {columns}) "
+            f"SELECT date(s.date_time), p.department_id, {line_measures} "
+            "FROM sales s JOIN sale_items i ON i.sale_id = s.id "
+            "JOIN products p ON p.id = i.product_id "
+            f"WHERE {sale_where} AND p.department_id IS NOT NULL GROUP BY 1, 2"
+        ),
+    }
+    return deletes, inserts, params
+
+
+@dataclass(frozen=True)
+class RollupPeriod:
+    """
+    A report period split into whole days and the partial days at its edges.
+
+    Whole days are answered from the rollups; the remainder of the period
+    (e.g. today until now, or a range starting at 14:00) from the raw rows.
+    A bound of None leaves that side of the period open.
+    """
+
+    start: Optional[datetime]
+    end: Optional[datetime]
+    first_day: Optional[date]
+    last_day: Optional[date]
+
+    @classmethod
+    def split(cls, start=None, end=None) -> "RollupPeriod":
+        """Builds the split of [start, end]; dates cover the whole day."""
+        if start is not None and not isinstance(start, datetime):
+            start = datetime.combine(start, datetime.min.time())
+        if end is not None and not isinstance(end, datetime):
+            end = datetime.combine(end, datetime.max.time())
+
+        first_day = last_day = None
+        if start is not None:
+            first_day = start.date()
+            if start.time() != datetime.min.time():
+                first_day += timedelta(days=1)
+        if end is not None:
+            last_day = end.date()
+            if end.time() != datetime.max.time():
+                last_day -= timedelta(days=1)
+        return cls(start, end, first_day, last_day)
+
+    @property
+    def has_whole_days(self) -> bool:
+        """False when the period lies within a single day and its neighbours."""
+        return (
+            self.first_day is None
+            or self.last_day is None
+            or self.first_day <= self.last_day
+        )
+
+    def day_filter(self, day_column):
+        """Condition on a rollup day column selecting the whole days."""
+        if not self.has_whole_days:
+            return false()
+        conditions = []
+        if self.first_day is not None:
+            conditions.append(day_column >= self.first_day.isoformat())
+        if self.last_day is not None:
+            conditions.append(day_column <= self.last_day.isoformat())
+        return and_(true(), *conditions)
+
+    def raw_filter(self, date_column):
+        """Condition on a raw timestamp column selecting the partial days."""
+        if not self.has_whole_days:
+            return and_(date_column >= self.start, date_column <= self.end)
+
+        conditions = []
+        if self.start is not None:
+            first_midnight = datetime.combine(self.first_day, datetime.min.time())
+            if self.start < first_midnight:
+                conditions.append(
+                    and_(date_column >= self.start, date_column < first_midnight)
+                )
+        if self.end is not None:
+            after_last = datetime.combine(
+                self.last_day + timedelta(days=1), datetime.min.time()
+            )
+            if self.end >= after_last:
+                conditions.append(
+                    and_(date_column >= after_last, date_column <= self.end)
+                )
+        return or_(false(), *conditions)
+
+
+def main(argv=None) -> int:
+    from sqlalchemy import create_engine
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily sales rollups.")
+    parser.add_argument("database_url", nargs="?")
+    parser.add_argument("--from", dest="start_day", help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end_day", help="last day, YYYY-MM-DD")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        from config import DATABASE_URL as database_url
+
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            written = rebuild_sales_rollups(connection, args.start_day, args.end_day)
+    finally:
+        engine.dispose()
+    for name, rows in written.items():
+        print(f"{name}: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
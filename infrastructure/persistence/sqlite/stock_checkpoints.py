@@ -0,0 +1,236 @@
+"""
+Stock checkpoints of the inventory movement ledger.
+
+``stock_checkpoints`` holds, per product and period boundary, the sum of the
+product's movements before that boundary: the stock at the start of
+``day`` according to the ledger. Checkpoints are sparse. A product only gets
+one at the end of a period in which it moved, since its stock did not change
+in the periods between.
+
+The stock at any instant is then the product's latest checkpoint at or
+before it plus the movements from that checkpoint up to the instant, a
+range bounded by the period length (see SqliteInventoryRepository.stock_as_of).
+
+refresh_stock_checkpoints adds the checkpoints of the periods closed since
+the last refresh, for every product, in one INSERT ... SELECT with a running
+sum. Triggers on ``inventory_movements`` drop the checkpoints a backdated
+(or edited, or deleted) movement invalidates; the next refresh recomputes
+them. Rebuild them all (e.g. after editing movements outside the
+application) with:
+
+    python -m infrastructure.persistence.sqlite.stock_checkpoints [database_url] [--granularity day|month] [--rebuild]
+"""
+
+import argparse
+import sys
+from datetime import date, datetime
+from typing import Optional, Union
+
+from sqlalchemy import column, table, text
+
+STOCK_CHECKPOINTS = "stock_checkpoints"
+STOCK_CHECKPOINT_TABLES = (STOCK_CHECKPOINTS,)
+
+STOCK_CHECKPOINT_TRIGGERS = (
+    "stock_checkpoints_after_movement_insert",
+    "stock_checkpoints_after_movement_delete",
+    "stock_checkpoints_after_movement_update",
+)
+
+# SQLite date modifiers giving the boundary that closes a movement's period
+GRANULARITIES = {
+    "day": "'start of day', '+1 day'",
+    "month": "'start of month', '+1 month'",
+}
+
+# Lightweight table construct for the ledger queries
+stock_checkpoints = table(
+    STOCK_CHECKPOINTS,
+    column("product_id"),
+    column("day"),
+    column("quantity"),
+    column("movement_count"),
+)
+
+
+def _invalidate(movement: str) -> str:
+    # day > timestamp: the checkpoint counts movements before the start of day
+    return (
+        f"DELETE FROM {STOCK_CHECKPOINTS} "
+        f"WHERE product_id = {movement}.product_id AND day > {movement}.timestamp"
+    )
+
+
+STOCK_CHECKPOINTS_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {STOCK_CHECKPOINTS} (
+        product_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        quantity NUMERIC NOT NULL DEFAULT 0,
+        movement_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (product_id, day)
+    ) WITHOUT ROWID
+    """,
+    # A movement recorded now finds no later checkpoint, so these are index seeks
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_checkpoints_after_movement_insert
+    AFTER INSERT ON inventory_movements BEGIN
+        {_invalidate("new")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_checkpoints_after_movement_delete
+    AFTER DELETE ON inventory_movements BEGIN
+        {_invalidate("old")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_checkpoints_after_movement_update
+    AFTER UPDATE OF product_id, timestamp, quantity ON inventory_movements BEGIN
+        {_invalidate("old")};
+        {_invalidate("new")};
+    END
+    """,
+]
+
+
+def create_stock_checkpoints(connection) -> None:
+    """
+    Creates the checkpoint table and triggers, then fills it from the ledger.
+
+    Safe to call repeatedly. Does nothing on non-SQLite connections.
+
+    Args:
+        connection: SQLAlchemy connection with the inventory_movements and
+            products tables present
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in STOCK_CHECKPOINTS_DDL:
+        connection.execute(text(statement))
+    refresh_stock_checkpoints(connection)
+
+
+def drop_stock_checkpoints(connection) -> None:
+    """Drops the checkpoint triggers and table."""
+    if connection.dialect.name != "sqlite":
+        return
+    for trigger in STOCK_CHECKPOINT_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for name in STOCK_CHECKPOINT_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+
+def current_period_start(granularity: str = "month", now: Optional[datetime] = None) -> date:
+    """First day of the period containing now; checkpoints stop there."""
+    now = now or datetime.now()
+    if granularity == "day":
+        return now.date()
+    if granularity == "month":
+        return now.date().replace(day=1)
+    raise ValueError(f"Unknown checkpoint granularity {granularity!r}; use one of {sorted(GRANULARITIES)}")
+
+
+def refresh_statement(granularity: str = "month") -> str:
+    """
+    Returns the SQL adding checkpoints up to the boundary :until.
+
+    Each product continues from its latest checkpoint, so only the
+    movements after it are read: the outer loop runs over products and
+    seeks their movements on ix_inventory_movements_product_timestamp.
+    Products without a checkpoint start from an empty ledger. New
+    checkpoints always lie after the latest one, so none is overwritten.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown checkpoint granularity {granularity!r}; use one of {sorted(GRANULARITIES)}")
+    running = "OVER (PARTITION BY d.product_id ORDER BY d.day)"
+    return f"""
+        INSERT INTO {STOCK_CHECKPOINTS} (product_id, day, quantity, movement_count)
+        SELECT d.product_id, d.day,
+               round(coalesce(c.quantity, 0) + sum(d.quantity) {running}, 3),
+               coalesce(c.movement_count, 0) + sum(d.movements) {running}
+        FROM (
+            SELECT p.id AS product_id,
+                   date(m.timestamp, {GRANULARITIES[granularity]}) AS day,
+                   sum(m.quantity) AS quantity,
+                   count(*) AS movements
+            FROM products p
+            LEFT JOIN (
+                SELECT product_id, max(day) AS day FROM {STOCK_CHECKPOINTS} GROUP BY product_id
+            ) AS latest ON latest.product_id = p.id
+            JOIN inventory_movements m
+                ON m.product_id = p.id
+                AND m.timestamp >= coalesce(latest.day, '')
+                AND m.timestamp < :until
+            GROUP BY p.id, 2
+        ) AS d
+        LEFT JOIN (
+            SELECT c.product_id, c.quantity, c.movement_count
+            FROM {STOCK_CHECKPOINTS} c
+            WHERE c.day = (SELECT max(day) FROM {STOCK_CHECKPOINTS} WHERE product_id = c.product_id)
+        ) AS c ON c.product_id = d.product_id
+    """
+
+
+DayLike = Union[date, str, None]
+
+
+def refresh_stock_checkpoints(
+    connection,
+    granularity: str = "month",
+    until: DayLike = None,
+    rebuild: bool = False,
+) -> int:
+    """
+    Adds the checkpoints of every product for the periods closed since the last refresh.
+
+    Runs within the caller's transaction. Checkpoints of day and month
+    granularity can be mixed: each refresh continues from whatever
+    checkpoint a product has last.
+
+    Args:
+        connection: SQLAlchemy connection or session
+        granularity: "month" for a checkpoint per month, "day" per day
+        until: Boundary to stop at (date or "YYYY-MM-DD"); defaults to the
+            start of the current period, so the open period is left out
+        rebuild: Delete all checkpoints first and recompute them from the
+            whole ledger
+
+    Returns:
+        Number of checkpoints written
+    """
+    if until is None:
+        until = current_period_start(granularity)
+    if rebuild:
+        connection.execute(text(f"DELETE FROM {STOCK_CHECKPOINTS}"))
+    # Bound as text: a boundary is midnight, and the ledger stores timestamps as text
+    result = connection.execute(text(refresh_statement(granularity)), {"until": str(until)})
+    return result.rowcount
+
+
+def main(argv=None) -> int:
+    from sqlalchemy import create_engine
+
+    parser = argparse.ArgumentParser(description="Refresh the stock checkpoints of the inventory ledger.")
+    parser.add_argument("database_url", nargs="?")
+    parser.add_argument("--granularity", choices=sorted(GRANULARITIES), default="month")
+    parser.add_argument("--until", help="boundary to stop at, YYYY-MM-DD")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all checkpoints")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        from config import DATABASE_URL as database_url
+
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            written = refresh_stock_checkpoints(connection, args.granularity, args.until, args.rebuild)
+    finally:
+        engine.dispose()
+    print(f"{STOCK_CHECKPOINTS}: {written} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
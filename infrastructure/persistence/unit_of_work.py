@@ -6,13 +6,40 @@ repository operations.
 
 Enhanced with Domain Events support - automatically collects and publishes
 events from aggregates after successful commits.
+
+Query paths can open a read-only unit of work (``unit_of_work(read_only=True)``):
+autoflush is off and the session is released without a commit. A session the
+unit of work opened also refuses ORM writes, and when it has a connection of
+its own runs with PRAGMA query_only. A connection shared with other sessions
+(StaticPool or SingletonThreadPool engines, or a session handed in by the
+caller) is left untouched, so a background read never makes the GUI's writes
+fail, and a caller's session is never rolled back.
+Repositories are created on first access in both modes, so a lookup only pays
+for the repository it uses.
+
+When an outbox relay is set (see outbox.py), collected events are written to
+the outbox table in the committing transaction instead of being published
+from memory; only inline handlers run right after the commit.
+
+When a query profiler is installed (see sqlite.query_profiler), each unit of
+work is an operation of the profiler, named after the service method that
+opened it, so statements and time are attributed to that method.
 """
 
-from typing import Optional, List
+from typing import Callable, Optional, List
 from contextlib import contextmanager
+import contextlib
 import logging
+import sys
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 
 from .utils import session_scope_provider
+from .sqlite.query_profiler import active_query_profiler
+from .outbox import outbox_relay, record_events
 from core.domain_events import DomainEvent, EventPublisher
 from .sqlite.repositories import (
     SqliteDepartmentRepository,
@@ -26,6 +53,40 @@ from .sqlite.repositories import (
     SqliteCashDrawerRepository,
     SqliteUnitRepository,
 )
+from .sqlite.read_models import SqliteReadModelRepository
+
+# Called with a committing unit of work and its events, in its transaction
+_transaction_projector: Optional[Callable[["UnitOfWork", List[DomainEvent]], None]] = None
+
+
+def set_transaction_projector(
+    projector: Optional[Callable[["UnitOfWork", List[DomainEvent]], None]]
+) -> None:
+    """Makes units of work hand their events to ``projector`` before committing (None: stop)."""
+    global _transaction_projector
+    _transaction_projector = projector
+
+
+class _LazyRepository:
+    """Creates a repository on first access and keeps it for the rest of the unit of work."""
+
+    def __init__(self, repository_class):
+        self.repository_class = repository_class
+
+    def __set_name__(self, owner, name):
+        self.attribute = f"_{name}"
+
+    def __get__(self, uow, owner=None):
+        if uow is None:
+            return self
+        repository = uow.__dict__.get(self.attribute)
+        if repository is None and uow.session is not None:
+            repository = self.repository_class(uow.session)
+            uow.__dict__[self.attribute] = repository
+        return repository
+
+    def __set__(self, uow, repository):
+        uow.__dict__[self.attribute] = repository
 
 
 class UnitOfWork:
@@ -42,34 +103,62 @@ class UnitOfWork:
             product.price = 100
             uow.products.update(product)
             # Transaction is automatically committed on successful exit
+
+        with UnitOfWork(read_only=True) as uow:
+            product = uow.products.get_by_code("7790001")
+            # Nothing is committed; writes raise ValueError (or, on a connection
+            # of its own, "attempt to write a readonly database")
     """
 
-    def __init__(self):
-        """Initialize the Unit of Work."""
+    # Repositories are created from the shared session on first access
+    departments = _LazyRepository(SqliteDepartmentRepository)
+    products = _LazyRepository(SqliteProductRepository)
+    inventory = _LazyRepository(SqliteInventoryRepository)
+    sales = _LazyRepository(SqliteSaleRepository)
+    customers = _LazyRepository(SqliteCustomerRepository)
+    invoices = _LazyRepository(SqliteInvoiceRepository)
+    credit_payments = _LazyRepository(SqliteCreditPaymentRepository)
+    users = _LazyRepository(SqliteUserRepository)
+    # Note: SQLiteCashDrawerRepository has a different interface and uses _session internally
+    cash_drawer = _LazyRepository(SqliteCashDrawerRepository)
+    units = _LazyRepository(SqliteUnitRepository)
+    # Query side of core.cqrs
+    read_models = _LazyRepository(SqliteReadModelRepository)
+
+    _REPOSITORIES = (
+        "departments", "products", "inventory", "sales", "customers",
+        "invoices", "credit_payments", "users", "cash_drawer", "units",
+        "read_models",
+    )
+
+    def __init__(self, read_only: bool = False):
+        """Initialize the Unit of Work.
+
+        Args:
+            read_only: Run the session with autoflush off and writes refused
+                (plus PRAGMA query_only on an unshared connection), and release
+                it without committing.
+        """
         self.session_factory = session_scope_provider.get_session_factory()
         self.session = None
+        self.read_only = read_only
         self._collected_events: List[DomainEvent] = []
-
-        # Repository instances (initialized in __enter__)
-        self.departments: Optional[SqliteDepartmentRepository] = None
-        self.products: Optional[SqliteProductRepository] = None
-        self.inventory: Optional[SqliteInventoryRepository] = None
-        self.sales: Optional[SqliteSaleRepository] = None
-        self.customers: Optional[SqliteCustomerRepository] = None
-        self.invoices: Optional[SqliteInvoiceRepository] = None
-        self.credit_payments: Optional[SqliteCreditPaymentRepository] = None
-        self.users: Optional[SqliteUserRepository] = None
-        self.cash_drawer: Optional[SqliteCashDrawerRepository] = None
-        self.units: Optional[SqliteUnitRepository] = None
+        # Seconds spent inside the last `with` block, set on exit
+        self.elapsed: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._previous_autoflush = True
+        self._query_only = False
+        self._profiler = None
+        self._profiler_token = None
 
     def __enter__(self):
         """Enter the Unit of Work context.
 
-        Creates a new database session and initializes all repositories
-        with the shared session.
+        Creates a new database session; repositories are created from it
+        on first access.
 
         Returns:
-            UnitOfWork: The Unit of Work instance with initialized repositories.
+            UnitOfWork: The Unit of Work instance.
         """
         if self.session_factory is None:
             raise ValueError(
@@ -78,40 +167,49 @@ class UnitOfWork:
             )
 
         try:
-            # Check if we're in a test environment where get_session should be used instead
-            # This allows tests to provide a pre-configured session with proper isolation
-            try:
-                self.session = session_scope_provider.get_session()
-                self._session_created_by_factory = False  # Test session, don't close it
+            # Tests can provide a pre-configured session with proper isolation;
+            # it belongs to the test, so it is not closed here
+            test_session = session_scope_provider.get_test_session()
+            if test_session is not None:
+                self.session = test_session
+                self._session_created_by_factory = False
                 logging.debug("Using test session from session_scope_provider")
-            except Exception as e:
-                # Fallback to session factory if get_session doesn't work
-                logging.debug(
-                    f"get_session failed with {type(e).__name__}: {e}, falling back to session factory"
-                )
+            else:
                 self.session = self.session_factory()
-                self._session_created_by_factory = (
-                    True  # We created it, we should close it
-                )
+                self._session_created_by_factory = True  # We created it, we close it
         except Exception as e:
             logging.error(f"Failed to create database session: {e}")
             raise ValueError(f"Database connection error: {e}") from e
 
-        # Initialize all repositories with the shared session
-        self.departments = SqliteDepartmentRepository(self.session)
-        self.products = SqliteProductRepository(self.session)
-        self.inventory = SqliteInventoryRepository(self.session)
-        self.sales = SqliteSaleRepository(self.session)
-        self.customers = SqliteCustomerRepository(self.session)
-        self.invoices = SqliteInvoiceRepository(self.session)
-        self.credit_payments = SqliteCreditPaymentRepository(self.session)
-        self.users = SqliteUserRepository(self.session)
-        # Note: SQLiteCashDrawerRepository has a different interface and uses _session internally
-        self.cash_drawer = SqliteCashDrawerRepository(self.session)
-        self.units = SqliteUnitRepository(self.session)
+        self._started_at = time.perf_counter()
+        self._profiler = active_query_profiler()
+        if self._profiler is not None:
+            self._profiler_token = self._profiler.begin_operation(_caller_name())
+        if self.read_only:
+            self._previous_autoflush = self.session.autoflush
+            self.session.autoflush = False
+            if self._owns_session():
+                # A caller's session may be writing elsewhere; only ours is guarded
+                event.listen(self.session, "before_flush", _refuse_flush)
+                event.listen(self.session, "do_orm_execute", _refuse_dml)
+            self._query_only = not self._connection_is_shared()
+            if self._query_only:
+                self.session.execute(text("PRAGMA query_only = ON"))
 
         return self
 
+    def _owns_session(self) -> bool:
+        return getattr(self, "_session_created_by_factory", True)
+
+    def _connection_is_shared(self) -> bool:
+        """True if other sessions may use this session's connection while it is open."""
+        if not self._owns_session():
+            return True
+        bind = self.session.get_bind()
+        if isinstance(bind, Connection):
+            return True
+        return isinstance(bind.pool, (StaticPool, SingletonThreadPool))
+
     def collect_events(self, aggregate) -> None:
         """
         Collect domain events from an aggregate.
@@ -122,7 +220,11 @@ class UnitOfWork:
 
         Args:
             aggregate: Domain aggregate with events to collect
+
+        Raises:
+            ValueError: If the unit of work is read-only.
         """
+        self._ensure_writable()
         if hasattr(aggregate, 'get_domain_events'):
             events = aggregate.get_domain_events()
             self._collected_events.extend(events)
@@ -137,10 +239,34 @@ class UnitOfWork:
 
         Args:
             event: Domain event to publish
+
+        Raises:
+            ValueError: If the unit of work is read-only.
         """
+        self._ensure_writable()
         self._collected_events.append(event)
         logging.debug(f"Added event: {type(event).__name__}")
 
+    def _ensure_writable(self) -> None:
+        if self.read_only:
+            raise ValueError("A read-only unit of work cannot record changes")
+
+    def _project_events(self, projector) -> None:
+        """
+        Hands the collected events to the transaction projector before the commit.
+
+        The projection runs in a savepoint: if it fails, only the projection
+        is rolled back and logged, and the changes still commit.
+        """
+        try:
+            with self.session.begin_nested():
+                projector(self, list(self._collected_events))
+        except Exception as e:
+            logging.error(
+                f"Error projecting {len(self._collected_events)} domain events: {e}",
+                exc_info=True
+            )
+
     def _publish_events(self) -> None:
         """
         Publish all collected domain events.
@@ -156,6 +282,15 @@ class UnitOfWork:
         if not self._collected_events:
             return
 
+        relay = outbox_relay()
+        if relay is not None:
+            # The relay delivers them to the other handlers from the outbox
+            for event in self._collected_events:
+                EventPublisher.publish_inline(event)
+            self._collected_events.clear()
+            relay.wake()
+            return
+
         logging.info(f"Publishing {len(self._collected_events)} domain events")
 
         for event in self._collected_events:
@@ -187,6 +322,10 @@ class UnitOfWork:
         if self.session is None:
             return
 
+        if self.read_only:
+            self._release_read_only()
+            return
+
         try:
             if exc_type is not None:
                 # An exception occurred, rollback the transaction
@@ -197,6 +336,11 @@ class UnitOfWork:
             else:
                 # No exception, commit the transaction
                 # Always commit to ensure data persists across UnitOfWork instances
+                if self._collected_events and outbox_relay() is not None:
+                    # Events commit with the changes that raised them
+                    record_events(self.session, self._collected_events)
+                elif self._collected_events and _transaction_projector is not None:
+                    self._project_events(_transaction_projector)
                 self.session.commit()
 
                 # After successful commit, publish all collected domain events
@@ -221,21 +365,49 @@ class UnitOfWork:
                 except Exception as close_error:
                     logging.error(f"Error closing session: {close_error}")
 
-            # Always clear references
-            self.session = None
-            # Clear repository references
-            self.departments = None
-            self.products = None
-            self.inventory = None
-            self.sales = None
-            self.customers = None
-            self.invoices = None
-            self.credit_payments = None
-            self.users = None
-            self.cash_drawer = None
-            self.units = None
-            # Clear collected events
-            self._collected_events.clear()
+            self._clear()
+
+    def _release_read_only(self) -> None:
+        """Release a read-only session: restore the connection and close without committing."""
+        try:
+            if event.contains(self.session, "before_flush", _refuse_flush):
+                event.remove(self.session, "before_flush", _refuse_flush)
+                event.remove(self.session, "do_orm_execute", _refuse_dml)
+            if self._query_only:
+                # Only set on sessions this unit of work opened, so the rollback
+                # discards nothing of the caller's, just refused or failed writes
+                self.session.rollback()
+                # The connection must not go back to the pool still read-only
+                self.session.execute(text("PRAGMA query_only = OFF"))
+            self.session.autoflush = self._previous_autoflush
+        except Exception as e:
+            logging.error(f"Error restoring read-only session: {e}")
+        finally:
+            self._query_only = False
+            if getattr(self, "_session_created_by_factory", True):
+                try:
+                    self.session.close()
+                except Exception as close_error:
+                    logging.error(f"Error closing session: {close_error}")
+            self._clear()
+
+    def _clear(self) -> None:
+        """Record the elapsed time and drop the session and repository references."""
+        if self._started_at is not None:
+            self.elapsed = time.perf_counter() - self._started_at
+            self._started_at = None
+            logging.debug(
+                f"{'Read-only ' if self.read_only else ''}UnitOfWork finished "
+                f"in {self.elapsed * 1000:.2f} ms"
+            )
+        if self._profiler_token is not None:
+            self._profiler.end_operation(self._profiler_token)
+            self._profiler = None
+            self._profiler_token = None
+        self.session = None
+        for name in self._REPOSITORIES:
+            setattr(self, name, None)
+        self._collected_events.clear()
 
     def commit(self):
         """Manually commit the current transaction.
@@ -249,10 +421,11 @@ class UnitOfWork:
         operations complete before events are emitted.
 
         Raises:
-            ValueError: If no active session exists.
+            ValueError: If no active session exists or the unit of work is read-only.
         """
         if self.session is None:
             raise ValueError("No active session to commit")
+        self._ensure_writable()
 
         try:
             self.session.commit()
@@ -289,8 +462,32 @@ class UnitOfWork:
             raise ValueError(f"Database rollback error: {e}") from e
 
 
+def _caller_name() -> str:
+    """Name of the function that opened the unit of work, e.g. "ProductService.get_product"."""
+    frame = sys._getframe(1)
+    skipped = (__file__, contextlib.__file__)
+    while frame is not None and frame.f_code.co_filename in skipped:
+        frame = frame.f_back
+    if frame is None:
+        return "UnitOfWork"
+    code = frame.f_code
+    owner = frame.f_locals.get("self")
+    if owner is not None:
+        return f"{type(owner).__name__}.{code.co_name}"
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_name}"
+
+
+def _refuse_flush(session, flush_context, instances):
+    raise ValueError("A read-only unit of work cannot record changes")
+
+
+def _refuse_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        raise ValueError("A read-only unit of work cannot record changes")
+
+
 @contextmanager
-def unit_of_work():
+def unit_of_work(read_only: bool = False):
     """Context manager for creating a Unit of Work.
 
     This is a convenience function that provides a more concise way
@@ -301,8 +498,14 @@ def unit_of_work():
             product = uow.products.get_by_id(1)
             uow.products.update(product)
 
+        with unit_of_work(read_only=True) as uow:
+            product = uow.products.get_by_code("7790001")
+
+    Args:
+        read_only: Open a read-only Unit of Work for query paths.
+
     Yields:
         UnitOfWork: A configured Unit of Work instance.
     """
-    with UnitOfWork() as uow:
+    with UnitOfWork(read_only=read_only) as uow:
         yield uow
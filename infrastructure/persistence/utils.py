@@ -57,6 +57,10 @@ class SessionScopeProvider:
         """
         self._test_session = session
 
+    def get_test_session(self) -> Optional[Any]:
+        """Returns the session set with set_test_session, or None outside test mode."""
+        return self._test_session
+
     def get_session(self) -> Any:
         """
         Get a session. In test mode, returns the test session. Otherwise, creates a new session.
@@ -69,6 +69,115 @@ def run_migrations():
         # and exit gracefully.
         sys.exit(1)
 
+def start_database_maintenance():
+    """Refreshes planner statistics now and schedules a periodic ANALYZE."""
+    from infrastructure.persistence.sqlite.database import engine
+    from infrastructure.persistence.sqlite.engine_profile import (
+        MaintenanceScheduler,
+        engine_diagnostics,
+        optimize_database,
+    )
+
+    try:
+        optimize_database(engine)
+        settings = engine_diagnostics(engine)
+        print(
+            f"SQLite {settings['sqlite_version']}: journal_mode={settings['journal_mode']}, "
+            f"synchronous={settings['synchronous']}, foreign_keys={settings['foreign_keys']}"
+        )
+    except Exception as e:
+        print(f"Could not optimize the database: {e}")
+
+    if config.analyze_interval_hours <= 0:
+        return None
+    scheduler = MaintenanceScheduler(
+        engine, interval_seconds=config.analyze_interval_hours * 3600
+    )
+    scheduler.start()
+    return scheduler
+
+def start_backup_scheduler():
+    """Starts the periodic database snapshots configured in config.py."""
+    if config.backup_interval_hours <= 0:
+        return None
+    from infrastructure.persistence.sqlite.backup import BackupScheduler
+    from infrastructure.persistence.sqlite.database import engine
+
+    scheduler = BackupScheduler(
+        engine,
+        config.backup_dir,
+        interval_seconds=config.backup_interval_hours * 3600,
+        keep_last=config.backup_keep_last,
+    )
+    scheduler.start()
+    return scheduler
+
+def start_event_dispatcher():
+    """Moves domain event handlers off the GUI thread when EVENT_DISPATCH_MODE=async."""
+    if config.event_dispatch_mode.lower() != "async":
+        return None
+    import atexit
+    from core.domain_events import EventPublisher
+    from core.event_dispatcher import AsyncEventDispatcher
+
+    dispatcher = AsyncEventDispatcher(
+        workers=config.event_dispatch_workers,
+        max_queue_size=config.event_queue_size,
+        handler_timeout=config.event_handler_timeout_s or None,
+    )
+    dispatcher.start()
+    EventPublisher.set_dispatcher(dispatcher)
+    atexit.register(dispatcher.shutdown)
+    return dispatcher
+
+def start_outbox_relay():
+    """Stores domain events in the outbox and delivers them in the background."""
+    if not config.outbox_enabled:
+        return None
+    import atexit
+    from infrastructure.persistence.outbox import OutboxRelay, set_outbox_relay
+
+    relay = OutboxRelay(
+        batch_size=config.outbox_batch_size,
+        poll_interval=config.outbox_poll_interval_s,
+        max_attempts=config.outbox_max_attempts,
+        retention_days=config.outbox_retention_days,
+    )
+    set_outbox_relay(relay)
+    relay.start()
+    atexit.register(relay.stop, 10)
+    return relay
+
+def start_read_model_projector():
+    """Keeps the CQRS read model tables current from the domain events."""
+    from core.cqrs.projections import read_model_projector
+
+    if config.outbox_enabled or config.event_dispatch_mode.lower() == "async":
+        # Events are handled off the GUI thread, from the outbox in batches
+        read_model_projector.attach()
+    else:
+        # Published on the GUI thread one by one: project them with the
+        # changes, in the same commit, instead of a commit per event
+        read_model_projector.attach_to_transactions()
+    return read_model_projector
+
+def start_query_profiler():
+    """Profiles the SQL run by each service method and dumps the totals on exit."""
+    if not config.sql_profiling:
+        return None
+    import atexit
+    from infrastructure.persistence.sqlite.database import engine
+    from infrastructure.persistence.sqlite.query_profiler import install_query_profiler
+
+    profiler = install_query_profiler(
+        engine,
+        slow_query_ms=config.sql_slow_query_ms,
+        n_plus_one_threshold=config.sql_n_plus_one_threshold,
+    )
+    atexit.register(profiler.dump_json, config.sql_profile_path)
+    print(f"SQL profiling on; totals are written to {config.sql_profile_path} on exit")
+    return profiler
+
 def main(test_mode=False, test_user=None, mock_services=None):
     """
     Initializes and runs the Eleventa application.
@@ -108,6 +217,14 @@ def main(test_mode=False, test_user=None, mock_services=None):
     # init_db() # REMOVE THIS LINE
     run_migrations() # ADD THIS LINE
 
+    if not test_mode:
+        start_database_maintenance()
+        start_backup_scheduler()
+        start_query_profiler()
+        start_event_dispatcher()
+        start_outbox_relay()
+        start_read_model_projector()
+
     # --- UI Imports (AFTER QApplication and init_db) ---
     import ui.resources.resources
     import ui.main_window
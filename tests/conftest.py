@@ -132,6 +132,15 @@ def process_events():
     if app is not None:
         app.processEvents()
 
+@pytest.fixture(scope="function", autouse=True)
+def clear_product_catalog_cache():
+    """Start every test with an empty process-wide product cache."""
+    from core.services.product_catalog_cache import product_catalog_cache
+
+    product_catalog_cache.clear()
+    yield
+    product_catalog_cache.clear()
+
 @pytest.fixture(scope="function", autouse=True)
 def qt_cleanup():
     """Fixture to ensure all Qt widgets are properly cleaned up after each test."""
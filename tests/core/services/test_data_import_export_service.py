@@ -0,0 +1,257 @@
+"""
+Tests for the batched product import and the streaming product export of
+DataImportExportService.
+
+The imports run against the transactional test database provided by the
+test_db_session fixture.
+"""
+
+import csv
+import time
+import tracemalloc
+from decimal import Decimal
+
+import openpyxl
+import pytest
+from sqlalchemy import event, func, select
+
+from core.models.product import Department, Product
+from core.services.data_import_export_service import (
+    EXPORT_HEADERS,
+    IMPORT_CHUNK_SIZE,
+    DataImportExportService,
+)
+from infrastructure.persistence.sqlite.models_mapping import ProductOrm
+from infrastructure.persistence.sqlite.repositories import (
+    SqliteDepartmentRepository,
+    SqliteProductRepository,
+)
+from infrastructure.persistence.unit_of_work import unit_of_work
+
+CSV_HEADER = [
+    "codigo",
+    "descripcion",
+    "precio_costo",
+    "precio_venta",
+    "stock",
+    "stock_minimo",
+    "unidad",
+    "usa_inventario",
+    "departamento",
+]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def service():
+    return DataImportExportService()
+
+
+@pytest.fixture
+def bebidas(test_db_session):
+    return SqliteDepartmentRepository(test_db_session).add(Department(name="Bebidas"))
+
+
+def test_import_csv_inserts_updates_and_reports_errors(test_db_session, service, bebidas, tmp_path):
+    products = SqliteProductRepository(test_db_session)
+    products.add(Product(code="EXIST", description="Old description", sell_price=Decimal("1.00"), cost_price=Decimal("0.50")))
+
+    path = tmp_path / "products.csv"
+    write_csv(path, [
+        ["NEW1", "Agua 500ml", "50", "80", "10", "2", "Unidad", "Si", "bebidas"],
+        ["EXIST", "New description", "1.5", "2.5", "", "", "", "", ""],
+        ["", "Sin código", "1", "2", "0", "0", "U", "Si", ""],
+        ["BAD", "Precio inválido", "abc", "2", "0", "0", "U", "Si", ""],
+        ["NEW1", "Agua 500ml (repetido)", "55", "85", "12", "2", "Unidad", "No", "-"],
+    ])
+    progress = []
+
+    results = service.import_products_from_csv(str(path), progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert results["success"] is True
+    assert results["total_rows"] == 5
+    assert results["imported"] == 1
+    assert results["updated"] == 2  # EXIST and the repeated NEW1
+    assert results["skipped"] == 2
+    assert len(results["errors"]) == 2
+    assert results["errors"][0].startswith("Fila 4:")
+    assert results["errors"][1].startswith("Fila 5:")
+    assert progress == [(5, None)]
+
+    existing = products.get_by_code("EXIST")
+    assert existing.description == "New description"
+    assert existing.sell_price == Decimal("2.50")
+    assert existing.uses_inventory is True
+
+    # The last row for a repeated code wins
+    new = products.get_by_code("NEW1")
+    assert new.description == "Agua 500ml (repetido)"
+    assert new.sell_price == Decimal("85.00")
+    assert new.uses_inventory is False
+    assert new.department_id is None
+
+
+def test_import_excel_resolves_departments(test_db_session, service, bebidas, tmp_path):
+    path = tmp_path / "products.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Código", "Descripción", "Precio Costo", "Precio Venta", "Stock", "Stock Mínimo", "Unidad", "Usa Inventario", "Departamento"])
+    ws.append(["XL1", "Gaseosa 2L", 100, 150, 24, 6, "Unidad", "Sí", "BEBIDAS"])
+    ws.append([None, None, None, None, None, None, None, None, None])
+    ws.append(["XL2", "Servicio", 10, 20])
+    wb.save(path)
+
+    results = service.import_products_from_excel(str(path))
+
+    assert results["success"] is True
+    assert results["total_rows"] == 2
+    assert results["imported"] == 2
+    assert results["errors"] == []
+
+    products = SqliteProductRepository(test_db_session)
+    gaseosa = products.get_by_code("XL1")
+    assert gaseosa.department_id == bebidas.id
+    assert gaseosa.quantity_in_stock == Decimal("24")
+    assert products.get_by_code("XL2").unit == "U"
+
+
+def test_import_is_searchable_after_bulk_upsert(test_db_session, service, tmp_path):
+    """Bulk upserts keep the full-text product index in sync."""
+    path = tmp_path / "products.csv"
+    write_csv(path, [["FTS-IMP", "Yerba orgánica", "1", "2", "0", "0", "U", "Si", ""]])
+
+    service.import_products_from_csv(str(path))
+    write_csv(path, [["FTS-IMP", "Té en hebras", "1", "2", "0", "0", "U", "Si", ""]])
+    service.import_products_from_csv(str(path))
+
+    products = SqliteProductRepository(test_db_session)
+    assert products.search("yerba") == []
+    assert [p.code for p in products.search("hebras")] == ["FTS-IMP"]
+
+
+@pytest.mark.timeout(60)
+def test_import_100k_rows_uses_batched_statements(test_db_session, service, bebidas, tmp_path):
+    """Statement count grows with the number of chunks, not with the rows."""
+    num_rows = 100_000
+    path = tmp_path / "large.csv"
+    write_csv(path, (
+        [f"BULK{i:06d}", f"Producto {i}", "1.25", "2.50", "5", "1", "Unidad", "Si", "Bebidas"]
+        for i in range(num_rows)
+    ))
+
+    statements = []
+    connection = test_db_session.connection()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", count)
+    started = time.perf_counter()
+    try:
+        results = service.import_products_from_csv(str(path))
+    finally:
+        event.remove(connection, "before_cursor_execute", count)
+    elapsed = time.perf_counter() - started
+
+    assert results["imported"] == num_rows
+    assert results["skipped"] == 0
+    chunks = -(-num_rows // IMPORT_CHUNK_SIZE)
+    assert len(statements) <= 10 * chunks + 10
+    assert elapsed < 30
+    assert test_db_session.scalar(
+        select(func.count()).select_from(ProductOrm).where(ProductOrm.code.like("BULK%"))
+    ) == num_rows
+
+
+def test_export_csv_streams_rows_with_department_names(test_db_session, service, bebidas, tmp_path):
+    products = SqliteProductRepository(test_db_session)
+    products.add(Product(code="B1", description="Agua", sell_price=Decimal("80"), cost_price=Decimal("50.5"), department_id=bebidas.id))
+    products.add(Product(code="A1", description="Servicio", sell_price=Decimal("20"), uses_inventory=False))
+    path = tmp_path / "export.csv"
+    progress = []
+
+    results = service.export_products_to_csv(str(path), progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert results["success"] is True
+    assert results["products_exported"] == 2
+    assert progress == [(2, 2)]
+    assert not (tmp_path / "export.csv.tmp").exists()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == EXPORT_HEADERS
+    assert rows[1] == ["B1", "Agua", "50.5", "80.0", "0", "0", "Unidad", "Sí", "Bebidas"]
+    assert rows[2][0] == "A1"
+    assert rows[2][7:] == ["No", ""]
+
+
+def test_export_reads_through_a_read_only_unit_of_work(test_db_session, service, bebidas, tmp_path, monkeypatch):
+    from core.services import data_import_export_service as module
+
+    opened = []
+
+    def recording_unit_of_work(*args, **kwargs):
+        opened.append(kwargs)
+        return unit_of_work(*args, **kwargs)
+
+    monkeypatch.setattr(module, "unit_of_work", recording_unit_of_work)
+    SqliteProductRepository(test_db_session).add(Product(code="RO1", description="Jugo", sell_price=Decimal("90"), cost_price=Decimal("60"), department_id=bebidas.id))
+
+    results = service.export_products_to_csv(str(tmp_path / "export.csv"))
+
+    assert results["products_exported"] == 1
+    assert opened == [{"read_only": True}]
+
+
+def test_export_excel_round_trips_through_import(test_db_session, service, bebidas, tmp_path):
+    products = SqliteProductRepository(test_db_session)
+    products.add(Product(code="XL1", description="Gaseosa 2L", sell_price=Decimal("150"), cost_price=Decimal("100"), quantity_in_stock=Decimal("24"), department_id=bebidas.id))
+    path = tmp_path / "export.xlsx"
+
+    results = service.export_products_to_excel(str(path))
+
+    assert results["success"] is True
+    assert results["products_exported"] == 1
+    wb = openpyxl.load_workbook(path, read_only=True)
+    rows = list(wb.active.iter_rows(values_only=True))
+    wb.close()
+    assert list(rows[0]) == EXPORT_HEADERS
+    assert list(rows[1]) == ["XL1", "Gaseosa 2L", 100, 150, 24, 0, "Unidad", "Sí", "Bebidas"]
+
+    reimported = service.import_products_from_excel(str(path))
+    assert reimported["updated"] == 1
+    assert reimported["errors"] == []
+    assert products.get_by_code("XL1").department_id == bebidas.id
+
+
+def test_export_memory_does_not_grow_with_catalog(test_db_session, service, tmp_path):
+    """Peak memory of the export stays flat when the catalog grows tenfold."""
+    products = SqliteProductRepository(test_db_session)
+
+    def load_catalog(start, count):
+        products.bulk_upsert([
+            {"code": f"EXP{i:06d}", "description": f"Producto de exportación {i}", "cost_price": Decimal("1.25"), "sell_price": Decimal("2.50"), "quantity_in_stock": Decimal("5"), "unit": "Unidad", "uses_inventory": True}
+            for i in range(start, start + count)
+        ])
+
+    def export_peak():
+        tracemalloc.start()
+        try:
+            results = service.export_products_to_csv(str(tmp_path / "export.csv"))
+            return results, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    load_catalog(0, 2_000)
+    small_results, small_peak = export_peak()
+    load_catalog(2_000, 18_000)
+    large_results, large_peak = export_peak()
+
+    assert small_results["products_exported"] == 2_000
+    assert large_results["products_exported"] == 20_000
+    assert large_peak < small_peak * 2
@@ -351,6 +351,27 @@ def test_decrease_stock_for_sale_success(inventory_service, mock_product_repo, m
     assert movement.related_id == sale_id
     assert movement.user_id == user_id
 
+def test_decrease_stock_for_sale_publishes_stock_movement(mock_product_repo, mock_inventory_repo, sample_product):
+    """Stock movements are announced so cached product stock can be dropped."""
+    from core.events.inventory_events import StockMovementRecorded
+
+    with patch('core.services.inventory_service.unit_of_work') as mock_uow:
+        mock_uow_instance = MagicMock()
+        mock_uow_instance.products = mock_product_repo
+        mock_uow_instance.inventory = mock_inventory_repo
+        mock_uow.return_value.__enter__.return_value = mock_uow_instance
+        mock_product_repo.get_by_id.return_value = sample_product
+
+        InventoryService().decrease_stock_for_sale(sample_product.id, Decimal('2'), 55, 3)
+
+    mock_uow_instance.add_event.assert_called_once()
+    event = mock_uow_instance.add_event.call_args[0][0]
+    assert isinstance(event, StockMovementRecorded)
+    assert event.product_id == sample_product.id
+    assert event.quantity == Decimal('-2')
+    assert event.movement_type == "SALE"
+    assert event.related_id == 55
+
 def test_decrease_stock_for_sale_product_not_found(inventory_service, mock_product_repo):
     """Test decreasing stock fails when product not found."""
     mock_product_repo.get_by_id.return_value = None
@@ -458,7 +479,7 @@ def test_get_inventory_movements_all(inventory_service, mock_inventory_repo):
 
     # Assert
     assert movements == expected_movements # Check it returns the movements from the repo
-    mock_inventory_repo.get_movements.assert_called_once_with(product_id=None, start_date=None, end_date=None, movement_type=None) # Check repo method called
+    mock_inventory_repo.get_movements.assert_called_once_with(product_id=None, start_date=None, end_date=None, movement_type=None, limit=None) # Check repo method called
 
 def test_get_inventory_movements_for_product(inventory_service, mock_inventory_repo, sample_product):
     """Test retrieving inventory movements for a specific product."""
@@ -474,7 +495,7 @@ def test_get_inventory_movements_for_product(inventory_service, mock_inventory_r
 
     # Assert
     assert movements == expected_movements # Check it returns the movements from the repo
-    mock_inventory_repo.get_movements.assert_called_once_with(product_id=product_id_to_filter, start_date=None, end_date=None, movement_type=None)
+    mock_inventory_repo.get_movements.assert_called_once_with(product_id=product_id_to_filter, start_date=None, end_date=None, movement_type=None, limit=None)
 
 # Remove the old unittest runner if it exists
 # if __name__ == '__main__':
@@ -67,7 +67,7 @@ class TestInvoicingService(unittest.TestCase):
         mock_context.sales.get_by_id.return_value = mock_sale
         mock_context.customers.get_by_id.return_value = mock_customer
         mock_context.invoices.get_by_sale_id.return_value = None  # No existing invoice
-        mock_context.invoices.get_all.return_value = []  # No existing invoices for numbering
+        mock_context.invoices.allocate_invoice_number.return_value = 1  # First number of the sequence
         
         # Mock the added invoice
         mock_invoice = MagicMock(spec=Invoice)
@@ -202,40 +202,32 @@ class TestInvoicingService(unittest.TestCase):
     @patch('core.services.invoicing_service.unit_of_work')
     def test_get_next_invoice_number(self, mock_uow):
         """Test invoice number generation logic."""
-        # Mock existing invoices with numbers
-        mock_invoice1 = Mock(spec=Invoice)
-        mock_invoice1.invoice_number = "0001-00000001"
-        mock_invoice2 = Mock(spec=Invoice)
-        mock_invoice2.invoice_number = "0001-00000005"  # Highest number
-        mock_invoice3 = Mock(spec=Invoice)
-        mock_invoice3.invoice_number = "0001-00000003"
-        
         # Set up Unit of Work mock
         mock_context = MagicMock()
         mock_uow.return_value.__enter__.return_value = mock_context
-        mock_context.invoices.get_all.return_value = [mock_invoice1, mock_invoice2, mock_invoice3]
+        mock_context.invoices.allocate_invoice_number.return_value = 6
         
         # Call the method directly
         result = self.service._generate_next_invoice_number(mock_context.invoices)
         
-        # Verify correct number generation
-        self.assertEqual(result, "0001-00000006")  # Next after highest (5)
-        mock_context.invoices.get_all.assert_called_once()
+        # Verify the number comes from the point of sale's sequence
+        self.assertEqual(result, "0001-00000006")
+        mock_context.invoices.allocate_invoice_number.assert_called_once_with(1)
+        mock_context.invoices.get_all.assert_not_called()
 
     @patch('core.services.invoicing_service.unit_of_work')
-    def test_get_next_invoice_number_first_invoice(self, mock_uow):
-        """Test invoice number generation for first invoice."""
-        # Set up Unit of Work mock
+    def test_verify_invoice_numbers(self, mock_uow):
+        """Test that numbering problems are reported for the configured point of sale."""
         mock_context = MagicMock()
         mock_uow.return_value.__enter__.return_value = mock_context
-        mock_context.invoices.get_all.return_value = []
+        mock_context.invoices.verify_invoice_sequence.return_value = [
+            "Invoice number 0001-00000003 is missing"
+        ]
         
-        # Call the method
-        result = self.service._generate_next_invoice_number(mock_context.invoices)
+        result = self.service.verify_invoice_numbers()
         
-        # Verify first invoice number
-        self.assertEqual(result, "0001-00000001")
-        mock_context.invoices.get_all.assert_called_once()
+        self.assertEqual(result, ["Invoice number 0001-00000003 is missing"])
+        mock_context.invoices.verify_invoice_sequence.assert_called_once_with(1)
 
     def test_determine_invoice_type(self):
         """Test invoice type determination based on IVA condition."""
@@ -20,28 +20,21 @@ def make_service():
 def test_generate_next_invoice_number_first(mock_uow):
     mock_context = MagicMock()
     mock_uow.return_value.__enter__.return_value = mock_context
-    mock_context.invoices.get_all.return_value = []
+    mock_context.invoices.allocate_invoice_number.return_value = 1
     
     svc = make_service()
     assert svc._generate_next_invoice_number(mock_context.invoices) == "0001-00000001"
 
 
-@patch('core.services.invoicing_service.unit_of_work')
-def test_generate_next_invoice_number_increment(mock_uow):
-    inv1 = Invoice(
-        sale_id=1,
-        invoice_number="0001-00000005",
-        subtotal=Decimal('10'),
-        iva_amount=Decimal('0'),
-        total=Decimal('10'),
-        customer_id=1
-    )
-    mock_context = MagicMock()
-    mock_uow.return_value.__enter__.return_value = mock_context
-    mock_context.invoices.get_all.return_value = [inv1]
+@patch('core.services.invoicing_service.config')
+def test_generate_next_invoice_number_other_point_of_sale(mock_config):
+    mock_config.invoice_point_of_sale = 12
+    invoices = MagicMock()
+    invoices.allocate_invoice_number.return_value = 345
     
     svc = make_service()
-    assert svc._generate_next_invoice_number(mock_context.invoices) == "0001-00000006"
+    assert svc._generate_next_invoice_number(invoices) == "0012-00000345"
+    invoices.allocate_invoice_number.assert_called_once_with(12)
 
 
 def test_determine_invoice_type_various():
@@ -138,7 +131,7 @@ def test_create_invoice_success(mock_uow):
     mock_context.sales.get_by_id.return_value = sale
     mock_context.invoices.get_by_sale_id.return_value = None
     mock_context.customers.get_by_id.return_value = cust
-    mock_context.invoices.get_all.return_value = []
+    mock_context.invoices.allocate_invoice_number.return_value = 1
     
     # Mock the add method to return the invoice with an ID
     def mock_add(invoice):
@@ -178,7 +171,7 @@ def test_create_invoice_duplicate_on_save(mock_uow):
     mock_context.sales.get_by_id.return_value = sale
     mock_context.invoices.get_by_sale_id.return_value = None
     mock_context.customers.get_by_id.return_value = cust
-    mock_context.invoices.get_all.return_value = []
+    mock_context.invoices.allocate_invoice_number.return_value = 1
     
     # Mock the add method to raise a duplicate entry error
     mock_context.invoices.add.side_effect = ValueError("Duplicate entry in DB")
@@ -0,0 +1,239 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from decimal import Decimal
+
+from core.domain_events import EventPublisher
+from core.events.inventory_events import StockMovementRecorded
+from core.events.product_events import (
+    BulkPriceChanged,
+    DepartmentUpdated,
+    ProductCreated,
+    ProductDeleted,
+    ProductPriceChanged,
+)
+from core.models.product import Product, ProductRow
+from core.services.product_catalog_cache import ProductCatalogCache
+from core.services.product_service import ProductService
+
+
+def make_product(product_id, code=None, description="Cached Product", department_id=None):
+    return Product(
+        id=product_id,
+        code=code or f"C{product_id:03d}",
+        description=description,
+        department_id=department_id,
+        sell_price=Decimal("10.00"),
+        cost_price=Decimal("5.00"),
+    )
+
+
+@pytest.fixture
+def cache():
+    return ProductCatalogCache(max_entries=3)
+
+
+def test_lookup_by_id_and_code_share_entries(cache):
+    """A product loaded by id is also served by code without calling the loader."""
+    loader = MagicMock(return_value=make_product(1))
+
+    assert cache.get_by_id(1, loader).code == "C001"
+    assert cache.get_by_code("C001", MagicMock(side_effect=AssertionError)).id == 1
+    assert cache.get_by_id(1, MagicMock(side_effect=AssertionError)).id == 1
+
+    loader.assert_called_once()
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_returned_products_are_copies(cache):
+    """Modifying a returned product does not change the cached one."""
+    cache.get_by_id(1, lambda: make_product(1))
+
+    product = cache.get_by_id(1, MagicMock(side_effect=AssertionError))
+    product.description = "Changed by caller"
+
+    assert cache.get_by_id(1, MagicMock(side_effect=AssertionError)).description == "Cached Product"
+
+
+def test_missing_products_are_not_cached(cache):
+    loader = MagicMock(return_value=None)
+
+    assert cache.get_by_code("NOPE", loader) is None
+    assert cache.get_by_code("NOPE", loader) is None
+
+    assert loader.call_count == 2
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for product_id in (1, 2, 3):
+        cache.get_by_id(product_id, lambda pid=product_id: make_product(pid))
+    cache.get_by_id(1, MagicMock(side_effect=AssertionError))  # 2 is now the oldest
+
+    cache.get_by_id(4, lambda: make_product(4))
+
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+    reload = MagicMock(return_value=make_product(2))
+    cache.get_by_code("C002", reload)
+    reload.assert_called_once()
+
+
+def test_memory_cap_evicts_entries():
+    product = make_product(1)
+    cache = ProductCatalogCache(max_bytes=1)
+
+    cache.get_by_id(1, lambda: product)
+
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_search_results_are_cached_until_invalidated(cache):
+    loader = MagicMock(return_value=[make_product(1), make_product(2)])
+
+    assert [p.id for p in cache.search("cach", 10, loader)] == [1, 2]
+    assert [p.id for p in cache.search("cach", 10, loader)] == [1, 2]
+    loader.assert_called_once()
+
+    cache.invalidate_searches()
+    cache.search("cach", 10, loader)
+    assert loader.call_count == 2
+
+
+def test_events_invalidate_entries(cache):
+    """Published product and stock events drop the affected products."""
+    EventPublisher.clear_handlers()
+    cache.attach()
+    cache.attach()  # Idempotent
+    try:
+        for product_id in (1, 2, 3):
+            cache.get_by_id(product_id, lambda pid=product_id: make_product(pid))
+
+        EventPublisher.publish(
+            ProductPriceChanged(product_id=1, code="C001", old_price=Decimal("10"), new_price=Decimal("12"))
+        )
+        EventPublisher.publish(
+            StockMovementRecorded(product_id=2, quantity=Decimal("-1"), movement_type="SALE")
+        )
+        EventPublisher.publish(ProductDeleted(product_id=3, code="C003", description="Gone"))
+
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["invalidations"] == 3
+        assert EventPublisher.get_handlers(ProductCreated) == [cache.handle_event]
+    finally:
+        EventPublisher.clear_handlers()
+
+
+def test_bulk_price_change_drops_every_entry(cache):
+    """One BulkPriceChanged event empties the cache instead of one event per product."""
+    EventPublisher.clear_handlers()
+    cache.attach()
+    try:
+        for product_id in (1, 2, 3):
+            cache.get_by_id(product_id, lambda pid=product_id: make_product(pid))
+        cache.search("cached", None, lambda: [make_product(1)])
+
+        EventPublisher.publish(BulkPriceChanged(percentage=Decimal("10"), product_count=60000))
+
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["searches"] == 0
+        assert cache.stats()["invalidations"] == 1
+    finally:
+        EventPublisher.clear_handlers()
+
+
+def test_department_change_drops_its_products(cache):
+    """Products carry their department's name, so renaming it drops them."""
+    EventPublisher.clear_handlers()
+    cache.attach()
+    try:
+        for product_id, department_id in ((1, 7), (2, 7), (3, 8)):
+            cache.get_by_id(product_id, lambda pid=product_id, d=department_id: make_product(pid, department_id=d))
+        cache.search("cached", None, lambda: [make_product(3, department_id=8)])
+
+        EventPublisher.publish(DepartmentUpdated(department_id=7, name="Abarrotes"))
+
+        assert cache.stats()["entries"] == 1
+        assert cache.stats()["searches"] == 0
+        assert cache.get_by_id(3, MagicMock(side_effect=AssertionError)).department_id == 8
+    finally:
+        EventPublisher.clear_handlers()
+
+
+def test_entries_expire_after_the_ttl():
+    """Changes made by other processes are seen once the entries expire."""
+    now = [100.0]
+    cache = ProductCatalogCache(ttl=30, clock=lambda: now[0])
+    cache.get_by_id(1, lambda: make_product(1))
+    cache.search("cached", None, lambda: [make_product(1)])
+    cache.search_rows("cached", None, lambda: [])
+
+    now[0] += 29
+    assert cache.get_by_code("C001", MagicMock(side_effect=AssertionError)).description == "Cached Product"
+    assert cache.search("cached", None, MagicMock(side_effect=AssertionError))
+    assert cache.search_rows("cached", None, MagicMock(side_effect=AssertionError)) == []
+
+    now[0] += 1
+    changed = make_product(1, description="Changed elsewhere")
+    assert cache.get_by_id(1, lambda: changed).description == "Changed elsewhere"
+    assert cache.search("cached", None, lambda: []) == []
+    assert cache.search_rows("cached", None, lambda: [MagicMock()]) != []
+    assert cache.stats()["expirations"] == 3
+
+
+def test_no_ttl_keeps_entries_until_invalidated():
+    now = [0.0]
+    cache = ProductCatalogCache(ttl=None, clock=lambda: now[0])
+    cache.get_by_id(1, lambda: make_product(1))
+
+    now[0] += 1e9
+
+    assert cache.get_by_id(1, MagicMock(side_effect=AssertionError)).id == 1
+
+
+def test_load_racing_an_invalidation_is_not_stored(cache):
+    """A value loaded before an invalidation must not be cached afterwards."""
+    def stale_loader():
+        cache.invalidate(1)  # Another thread commits a change mid-load
+        return make_product(1, description="Stale")
+
+    cache.get_by_id(1, stale_loader)
+
+    assert cache.stats()["entries"] == 0
+
+
+@patch('core.services.product_service.unit_of_work')
+def test_product_service_barcode_hit_skips_database(mock_uow):
+    """Repeated barcode lookups only open a unit of work on the first miss."""
+    mock_context = MagicMock()
+    mock_uow.return_value.__enter__.return_value = mock_context
+    mock_context.products.get_by_code.return_value = make_product(7, code="7790001")
+    service = ProductService(catalog_cache=ProductCatalogCache())
+
+    first = service.get_product_by_code("7790001")
+    second = service.get_product_by_code("7790001")
+    by_id = service.get_product_by_id(7)
+
+    assert first.id == second.id == by_id.id == 7
+    assert mock_uow.call_count == 1
+    mock_context.products.get_by_id.assert_not_called()
+    assert service.catalog_cache.stats()["hits"] == 2
+
+
+@patch('core.services.product_service.unit_of_work')
+def test_suggestion_rows_are_cached_until_a_product_changes(mock_uow):
+    """Repeated till suggestions for a term open one unit of work until an invalidation."""
+    mock_context = MagicMock()
+    mock_uow.return_value.__enter__.return_value = mock_context
+    row = ProductRow(1, "C001", "Cached Product", Decimal("10.00"), Decimal("5.00"), Decimal("3"), Decimal("1"), True)
+    mock_context.products.search_rows.return_value = [row]
+    service = ProductService(catalog_cache=ProductCatalogCache())
+
+    assert service.search_product_rows("cach", limit=50) == [row]
+    assert service.search_product_rows("cach", limit=50) == [row]
+    assert mock_uow.call_count == 1
+
+    service.catalog_cache.invalidate(1)
+    service.search_product_rows("cach", limit=50)
+    assert mock_uow.call_count == 2
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, call, patch
 from decimal import Decimal
+import uuid
 
 # Adjust path to import from the project root
 import sys
@@ -11,6 +12,7 @@ if project_root not in sys.path:
 
 from core.services.product_service import ProductService
 from core.models.product import Product, Department
+from core.events.product_events import BulkPriceChanged
 
 # Fixture for the service instance
 @pytest.fixture
@@ -265,7 +267,7 @@ def test_find_product_calls_search(mock_uow, product_service):
     
     search_term = "search term"
     product_service.find_product(search_term)
-    mock_context.products.search.assert_called_once_with(search_term)
+    mock_context.products.search.assert_called_once_with(search_term, limit=None)
     mock_context.products.get_all.assert_not_called()
 
 @patch('core.services.product_service.unit_of_work')
@@ -549,6 +551,41 @@ def test_product_service_integration(test_db_session_factory): # Depend on the f
     # Verify department is deleted
     assert not service.get_all_departments() # List should be empty
 
+def test_delete_product_with_history_on_file_db(tmp_path):
+    """With foreign keys enforced, a sold product is refused with a ValueError."""
+    from infrastructure.persistence.sqlite.engine_profile import apply_engine_profile
+    from infrastructure.persistence.sqlite.repositories import SqliteSaleRepository
+    from core.models.enums import PaymentType
+    from core.models.sale import Sale, SaleItem
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}")
+    apply_engine_profile(engine)
+    Base.metadata.create_all(bind=engine)
+    original_factory = session_scope_provider.get_session_factory()
+    session_scope_provider.set_session_factory(sessionmaker(bind=engine))
+    try:
+        service = ProductService()
+        sold = service.add_product(Product(code="SOLD01", description="Sold", sell_price=10.0, cost_price=5.0))
+        unsold = service.add_product(Product(code="NEW01", description="Never sold", sell_price=10.0, cost_price=5.0))
+        session = sessionmaker(bind=engine)()
+        try:
+            sale = Sale(payment_type=PaymentType.EFECTIVO)
+            sale.items = [SaleItem(product_id=sold.id, quantity=Decimal("1"), unit_price=Decimal("10"))]
+            SqliteSaleRepository(session).add_sale(sale)
+            session.commit()
+        finally:
+            session.close()
+
+        with pytest.raises(ValueError, match="'SOLD01' cannot be deleted because it has 1 sale lines"):
+            service.delete_product(sold.id)
+        assert service.get_product_by_id(sold.id) is not None
+
+        service.delete_product(unsold.id)
+        assert service.get_product_by_id(unsold.id) is None
+    finally:
+        session_scope_provider.set_session_factory(original_factory)
+        engine.dispose()
+
 # --- Test Cases for Update Prices by Percentage ---
 
 @patch('core.services.product_service.unit_of_work')
@@ -557,35 +594,23 @@ def test_update_prices_all_products(mock_uow, product_service):
     # Setup Unit of Work mock
     mock_context = MagicMock()
     mock_uow.return_value.__enter__.return_value = mock_context
-    
-    products = [
-        Product(id=1, code="P001", description="Prod 1", sell_price=Decimal("100.00"), cost_price=Decimal("50.00")), 
-        Product(id=2, code="P002", description="Prod 2", sell_price=Decimal("200.00"), cost_price=Decimal("100.00"))
-    ]
-    mock_context.products.get_all.return_value = products
+    mock_context.products.update_prices_by_percentage.return_value = 2
     
     updated_count = product_service.update_prices_by_percentage(Decimal("10")) # 10% increase
 
     assert updated_count == 2
-    mock_context.products.get_all.assert_called_once()
-    mock_context.products.get_by_department_id.assert_not_called()
-    
-    # Check that update was called for each product with correct new prices
-    assert mock_context.products.update.call_count == 2
-    
-    # First product: 100 * 1.10 = 110, 50 * 1.10 = 55
-    call_args_1, _ = mock_context.products.update.call_args_list[0]
-    updated_product_1 = call_args_1[0]
-    assert updated_product_1.id == 1
-    assert updated_product_1.sell_price == Decimal("110.00")
-    assert updated_product_1.cost_price == Decimal("55.00")
-
-    # Second product: 200 * 1.10 = 220, 100 * 1.10 = 110
-    call_args_2, _ = mock_context.products.update.call_args_list[1]
-    updated_product_2 = call_args_2[0]
-    assert updated_product_2.id == 2
-    assert updated_product_2.sell_price == Decimal("220.00")
-    assert updated_product_2.cost_price == Decimal("110.00")
+    mock_context.products.update_prices_by_percentage.assert_called_once_with(Decimal("10"), None)
+    # Repriced in one statement, not product by product
+    mock_context.products.get_all.assert_not_called()
+    mock_context.products.update.assert_not_called()
+
+    # One event for the whole change
+    mock_context.add_event.assert_called_once()
+    event = mock_context.add_event.call_args[0][0]
+    assert isinstance(event, BulkPriceChanged)
+    assert event.percentage == Decimal("10")
+    assert event.product_count == 2
+    assert event.department_id is None
 
 @patch('core.services.product_service.unit_of_work')
 def test_update_prices_by_department(mock_uow, product_service):
@@ -593,52 +618,27 @@ def test_update_prices_by_department(mock_uow, product_service):
     # Setup Unit of Work mock
     mock_context = MagicMock()
     mock_uow.return_value.__enter__.return_value = mock_context
+    mock_context.products.update_prices_by_percentage.return_value = 1
     
     dept_id = 1
-    products_in_dept = [
-        Product(id=3, code="P003", description="Prod 3 Dept 1", sell_price=Decimal("100.00"), department_id=dept_id, cost_price=Decimal("80.00") ),
-    ]
-    mock_context.products.get_by_department_id.return_value = products_in_dept
-    
     updated_count = product_service.update_prices_by_percentage(Decimal("-20"), department_id=dept_id) # 20% decrease
 
     assert updated_count == 1
-    mock_context.products.get_by_department_id.assert_called_once_with(dept_id)
-    mock_context.products.get_all.assert_not_called()
-    
-    mock_context.products.update.assert_called_once()
-    call_args, _ = mock_context.products.update.call_args
-    updated_product = call_args[0]
-    assert updated_product.id == 3
-    # 100 * 0.80 = 80
-    # 80 * 0.80 = 64
-    assert updated_product.sell_price == Decimal("80.00") 
-    assert updated_product.cost_price == Decimal("64.00")
+    mock_context.products.update_prices_by_percentage.assert_called_once_with(Decimal("-20"), dept_id)
+    event = mock_context.add_event.call_args[0][0]
+    assert event.department_id == dept_id
 
 @patch('core.services.product_service.unit_of_work')
-def test_update_prices_no_products_found_all(mock_uow, product_service):
-    """Test updating prices when no products exist."""
+def test_update_prices_no_products_found(mock_uow, product_service):
+    """Test updating prices when no products match."""
     # Setup Unit of Work mock
     mock_context = MagicMock()
     mock_uow.return_value.__enter__.return_value = mock_context
-    
-    mock_context.products.get_all.return_value = []
-    updated_count = product_service.update_prices_by_percentage(Decimal("10"))
-    assert updated_count == 0
-    mock_context.products.update.assert_not_called()
+    mock_context.products.update_prices_by_percentage.return_value = 0
 
-@patch('core.services.product_service.unit_of_work')
-def test_update_prices_no_products_found_department(mock_uow, product_service):
-    """Test updating prices when no products exist in the specified department."""
-    # Setup Unit of Work mock
-    mock_context = MagicMock()
-    mock_uow.return_value.__enter__.return_value = mock_context
-    
-    dept_id = 5
-    mock_context.products.get_by_department_id.return_value = []
-    updated_count = product_service.update_prices_by_percentage(Decimal("10"), department_id=dept_id)
+    updated_count = product_service.update_prices_by_percentage(Decimal("10"), department_id=5)
     assert updated_count == 0
-    mock_context.products.update.assert_not_called()
+    mock_context.add_event.assert_not_called()
 
 @pytest.mark.parametrize("invalid_percentage", [
     Decimal("-100"), 
@@ -654,62 +654,58 @@ def test_update_prices_invalid_percentage(mock_uow, product_service, invalid_per
     
     with pytest.raises(ValueError, match="Percentage must be a number greater than -100."):
         product_service.update_prices_by_percentage(invalid_percentage)
-    mock_context.products.update.assert_not_called()
+    mock_context.products.update_prices_by_percentage.assert_not_called()
 
-@patch('core.services.product_service.unit_of_work')
-def test_update_prices_product_with_no_sell_price(mock_uow, product_service):
-    """Test that products with no sell_price are skipped."""
-    # Setup Unit of Work mock
-    mock_context = MagicMock()
-    mock_uow.return_value.__enter__.return_value = mock_context
-    
-    products = [
-        Product(id=1, code="P001", description="Prod 1", sell_price=None, cost_price=Decimal("50.00")),
-        Product(id=2, code="P002", description="Prod 2", sell_price=Decimal("200.00"), cost_price=Decimal("100.00"))
-    ]
-    mock_context.products.get_all.return_value = products
-    
-    updated_count = product_service.update_prices_by_percentage(Decimal("10"))
-    assert updated_count == 1 # Only one product should be updated
-    mock_context.products.update.assert_called_once() # Called only for the second product
-    call_args, _ = mock_context.products.update.call_args
-    updated_product = call_args[0]
-    assert updated_product.id == 2 # Ensure the correct product was updated
-    assert updated_product.sell_price == Decimal("220.00")
-    assert updated_product.cost_price == Decimal("110.00")
+@pytest.mark.parametrize("percentage", [Decimal("-99.99"), Decimal("0.01"), Decimal("500")])
+def test_update_prices_percentage_bounds_integration(test_db_session_factory, percentage):
+    """Test that any percentage above -100% reprices, and prices never go below zero."""
+    service = ProductService()
+    product = service.add_product(Product(code="BOUND01", description="Bounds", sell_price=Decimal("1.00"), cost_price=Decimal("0.50")))
 
-@patch('core.services.product_service.unit_of_work')
-def test_update_prices_rounding_and_zero_floor(mock_uow, product_service):
-    """Test price rounding to two decimal places and that prices don't go below zero."""
-    # Setup Unit of Work mock
-    mock_context = MagicMock()
-    mock_uow.return_value.__enter__.return_value = mock_context
-    
-    products = [
-        Product(id=1, code="P001", description="Prod Round", sell_price=Decimal("10.33"), cost_price=Decimal("5.11")),
-        Product(id=2, code="P002", description="Prod To Zero", sell_price=Decimal("1.00"), cost_price=Decimal("0.50"))
-    ]
-    mock_context.products.get_all.return_value = products
-
-    # Test positive percentage with rounding
-    product_service.update_prices_by_percentage(Decimal("10.555")) # 10.555% increase
-    call_args_1, _ = mock_context.products.update.call_args_list[0]
-    updated_product_1 = call_args_1[0]
-    # 10.33 * 1.10555 = 11.4236315 -> 11.42
-    # 5.11 * 1.10555 = 5.6513605 -> 5.65
-    assert updated_product_1.sell_price == Decimal("11.42")
-    assert updated_product_1.cost_price == Decimal("5.65")
-
-    # Test negative percentage that would make price negative (should be floored at 0.00)
-    mock_context.products.update.reset_mock() # Reset mock for the second part of the test
-    mock_context.products.get_all.return_value = [ # Provide a fresh list to avoid state issues from previous mock calls
-         Product(id=2, code="P002", description="Prod To Zero", sell_price=Decimal("1.00"), cost_price=Decimal("0.50"))
-    ]
-    product_service.update_prices_by_percentage(Decimal("-99.5")) # 99.5% decrease
-    
-    call_args_2_new, _ = mock_context.products.update.call_args_list[0]
-    updated_product_2_new = call_args_2_new[0]
-    # Sell: 1.00 * (1 - 0.995) = 1.00 * 0.005 = 0.005 -> 0.01 (due to rounding)
-    # Cost: 0.50 * (1 - 0.995) = 0.50 * 0.005 = 0.0025 -> 0.00 (due to rounding to 0.01 then max with 0.00)
-    assert updated_product_2_new.sell_price == Decimal("0.00") # 1.00 * 0.005 = 0.005, rounds to 0.01 but floored to 0.00
-    assert updated_product_2_new.cost_price == Decimal("0.00") # 0.50 * 0.005 = 0.0025, rounds to 0.00
+    assert service.update_prices_by_percentage(percentage) == 1
+
+    repriced = service.get_product_by_id(product.id)
+    assert repriced.sell_price >= Decimal("0.00")
+    assert repriced.sell_price == (Decimal("1.00") * (1 + percentage / 100)).quantize(Decimal("0.01"))
+
+    with pytest.raises(ValueError, match="Percentage must be a number greater than -100."):
+        service.update_prices_by_percentage(Decimal("-100"))
+    assert service.get_product_by_id(product.id).sell_price == repriced.sell_price
+
+def test_update_prices_department_history_and_event_integration(test_db_session_factory):
+    """Test the department filter, the price history rows and the BulkPriceChanged payload."""
+    from infrastructure.persistence.sqlite.models_mapping import ProductPriceHistoryOrm
+
+    service = ProductService()
+    dept = service.add_department(Department(name="Pricing Dept"))
+    other_dept = service.add_department(Department(name="Untouched Dept"))
+    in_dept = service.add_product(Product(code="DEPT01", description="In dept", sell_price=Decimal("100.00"),
+                                          cost_price=Decimal("80.00"), department_id=dept.id))
+    elsewhere = service.add_product(Product(code="DEPT02", description="Elsewhere", sell_price=Decimal("100.00"),
+                                            cost_price=Decimal("50.00"), department_id=other_dept.id))
+
+    with patch('infrastructure.persistence.unit_of_work.EventPublisher.publish') as publish:
+        assert service.update_prices_by_percentage(Decimal("-20"), department_id=dept.id, user_id=uuid.UUID(int=7)) == 1
+
+    # 100 * 0.80 = 80, 80 * 0.80 = 64
+    repriced = service.get_product_by_id(in_dept.id)
+    assert (repriced.sell_price, repriced.cost_price) == (Decimal("80.00"), Decimal("64.00"))
+    untouched = service.get_product_by_id(elsewhere.id)
+    assert (untouched.sell_price, untouched.cost_price) == (Decimal("100.00"), Decimal("50.00"))
+
+    session = test_db_session_factory()
+    try:
+        history = session.query(ProductPriceHistoryOrm).all()
+        assert [(h.product_id, h.old_sell_price, h.new_sell_price, h.old_cost_price, h.new_cost_price, h.percentage)
+                for h in history] == [
+            (in_dept.id, Decimal("100.00"), Decimal("80.00"), Decimal("80.00"), Decimal("64.00"), Decimal("-20"))
+        ]
+    finally:
+        session.close()
+
+    events = [call.args[0] for call in publish.call_args_list if isinstance(call.args[0], BulkPriceChanged)]
+    assert len(events) == 1
+    assert events[0].percentage == Decimal("-20")
+    assert events[0].product_count == 1
+    assert events[0].department_id == dept.id
+    assert events[0].user_id == uuid.UUID(int=7)
@@ -12,7 +12,7 @@ def patch_unit_of_work(monkeypatch):
     mock_uow = MagicMock()
     
     @contextmanager
-    def mock_unit_of_work():
+    def mock_unit_of_work(read_only=False):
         yield mock_uow
         
     monkeypatch.setattr('core.services.product_service.unit_of_work', mock_unit_of_work)
@@ -28,7 +28,8 @@ def product1():
         description="Test Product 1",
         sell_price=Decimal("10.00"),
         cost_price=Decimal("5.00"),
-        department_id=1
+        department_id=1,
+        quantity_in_stock=Decimal("10")
     )
 
 @pytest.fixture
@@ -57,7 +58,7 @@ def test_create_sale_success(mock_unit_of_work, mock_sale_service, product1, sam
     # Setup Unit of Work mock
     mock_uow = MagicMock()
     mock_uow.sales.add_sale.return_value = mock_sale
-    mock_uow.products.get_by_id.return_value = product1
+    mock_uow.products.get_by_ids.return_value = {1: product1}
     mock_unit_of_work.return_value.__enter__.return_value = mock_uow
 
     # Act
@@ -94,7 +95,7 @@ def test_create_sale_with_credit(mock_unit_of_work, mock_sale_service, product1,
     # Setup Unit of Work mock
     mock_uow = MagicMock()
     mock_uow.sales.add_sale.return_value = mock_sale
-    mock_uow.products.get_by_id.return_value = product1
+    mock_uow.products.get_by_ids.return_value = {1: product1}
     mock_unit_of_work.return_value.__enter__.return_value = mock_uow
 
     # Act
@@ -116,6 +117,84 @@ def test_create_sale_with_credit(mock_unit_of_work, mock_sale_service, product1,
     mock_unit_of_work.assert_called_once()
     mock_uow.sales.add_sale.assert_called_once()
 
+@patch('core.services.sale_service.unit_of_work')
+def test_create_sale_snapshots_cost_price(mock_unit_of_work, mock_sale_service, product1):
+    """Test that each sale item records the product cost at the time of sale."""
+    mock_uow = MagicMock()
+    mock_uow.products.get_by_ids.return_value = {1: product1}
+    mock_unit_of_work.return_value.__enter__.return_value = mock_uow
+
+    mock_sale_service.create_sale(
+        items_data=[{'product_id': 1, 'quantity': '3'}],
+        user_id=1,
+        payment_type=PaymentType.EFECTIVO
+    )
+
+    saved_sale = mock_uow.sales.add_sale.call_args[0][0]
+    assert saved_sale.items[0].cost_price == Decimal("5.00")
+    assert saved_sale.items[0].unit_price == Decimal("10.00")
+
+@patch('core.services.sale_service.unit_of_work')
+def test_create_sale_batches_stock_changes(mock_unit_of_work, mock_sale_service, product1):
+    """Test that a ticket loads its products once and writes stock in one batch."""
+    product2 = Product(id=2, code="PROD2", description="Test Product 2",
+                       sell_price=Decimal("3.00"), quantity_in_stock=Decimal("0"),
+                       uses_inventory=False)
+    mock_uow = MagicMock()
+    mock_uow.products.get_by_ids.return_value = {1: product1, 2: product2}
+    mock_uow.sales.add_sale.side_effect = lambda sale: Sale(id=7, items=sale.items)
+    mock_unit_of_work.return_value.__enter__.return_value = mock_uow
+
+    mock_sale_service.create_sale(
+        items_data=[{'product_id': 1, 'quantity': '2'}, {'product_id': 2, 'quantity': '5'},
+                    {'product_id': 1, 'quantity': '1.5'}],
+        user_id=1,
+        payment_type=PaymentType.EFECTIVO
+    )
+
+    mock_uow.products.get_by_ids.assert_called_once_with({1, 2})
+    mock_uow.products.get_by_id.assert_not_called()
+    mock_uow.products.decrease_stock.assert_called_once_with({1: Decimal("3.5")})
+    movements = mock_uow.inventory.add_movements.call_args[0][0]
+    assert [(m.product_id, m.quantity, m.related_id) for m in movements] == [(1, Decimal("-3.5"), 7)]
+    events = [call.args[0] for call in mock_uow.add_event.call_args_list]
+    assert [type(e).__name__ for e in events] == ["StockMovementRecorded", "SaleCompleted"]
+    assert events[1].sale_id == 7
+
+@patch('core.services.sale_service.unit_of_work')
+def test_create_sale_insufficient_stock(mock_unit_of_work, mock_sale_service, product1):
+    """Test that a ticket the guarded stock update rejects is not written."""
+    mock_uow = MagicMock()
+    mock_uow.products.get_by_ids.return_value = {1: product1}
+    mock_uow.products.decrease_stock.side_effect = ValueError(
+        "Insufficient stock for product PROD1 (requires 12, has 10)"
+    )
+    mock_unit_of_work.return_value.__enter__.return_value = mock_uow
+
+    with pytest.raises(ValueError, match="Insufficient stock for product PROD1"):
+        mock_sale_service.create_sale(
+            items_data=[{'product_id': 1, 'quantity': '6'}, {'product_id': 1, 'quantity': '6'}],
+            user_id=1,
+            payment_type=PaymentType.EFECTIVO
+        )
+
+    mock_uow.products.decrease_stock.assert_called_once_with({1: Decimal("12")})
+    mock_uow.sales.add_sale.assert_not_called()
+    mock_uow.inventory.add_movements.assert_not_called()
+
+@patch('core.services.sale_service.unit_of_work')
+def test_backfill_cost_snapshots_runs_batches(mock_unit_of_work, mock_sale_service):
+    """Test that the backfill commits one unit of work per batch until done."""
+    mock_uow = MagicMock()
+    mock_uow.sales.backfill_cost_snapshots.side_effect = [(2, 10), (1, 15), (0, None)]
+    mock_unit_of_work.return_value.__enter__.return_value = mock_uow
+
+    updated = mock_sale_service.backfill_cost_snapshots(batch_size=2)
+
+    assert updated == 3
+    assert mock_unit_of_work.call_count == 3
+    mock_uow.sales.backfill_cost_snapshots.assert_called_with(after_id=15, batch_size=2)
+
 @patch('core.services.sale_service.unit_of_work')
 def test_get_sale_by_id(mock_unit_of_work, mock_sale_service):
     """Test retrieving a sale by ID."""
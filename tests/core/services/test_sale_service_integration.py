@@ -0,0 +1,100 @@
+"""
+Integration tests for sale checkout against a real database.
+"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from core.models.enums import InventoryMovementType, PaymentType
+from core.models.product import Product
+from core.services.sale_service import SaleService
+from infrastructure.persistence.sqlite.repositories import (
+    SqliteInventoryRepository,
+    SqliteProductRepository,
+)
+
+
+@pytest.fixture
+def sale_service():
+    return SaleService(inventory_service=None, customer_service=None)
+
+
+@pytest.fixture
+def stocked_products(test_db_session):
+    repository = SqliteProductRepository(test_db_session)
+    return [
+        repository.add(
+            Product(
+                code=f"CHK{i:03d}",
+                description=f"Checkout product {i}",
+                sell_price=Decimal("2.50"),
+                cost_price=Decimal("1.00"),
+                quantity_in_stock=Decimal("100"),
+            )
+        )
+        for i in range(50)
+    ]
+
+
+def checkout_statements(test_db_session, sale_service, products):
+    """Runs one ticket with a line per product and returns the SQL statements it issued."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        sale_service.create_sale(
+            items_data=[{"product_id": p.id, "quantity": Decimal("2")} for p in products],
+            user_id=None,
+            payment_type=PaymentType.EFECTIVO,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def test_checkout_statements_do_not_grow_with_ticket_lines(test_db_session, sale_service, stocked_products):
+    small = checkout_statements(test_db_session, sale_service, stocked_products[:5])
+    large = checkout_statements(test_db_session, sale_service, stocked_products)
+
+    assert len(large) == len(small)
+    assert sum(statement.lstrip().upper().startswith("UPDATE PRODUCTS") for statement in large) == 1
+
+    products = SqliteProductRepository(test_db_session).get_by_ids([p.id for p in stocked_products])
+    assert products[stocked_products[0].id].quantity_in_stock == Decimal("96")
+    assert products[stocked_products[-1].id].quantity_in_stock == Decimal("98")
+    movements = SqliteInventoryRepository(test_db_session).get_movements_for_product(stocked_products[-1].id)
+    assert [(m.movement_type, m.quantity) for m in movements] == [
+        (InventoryMovementType.SALE, Decimal("-2"))
+    ]
+
+
+def test_checkout_without_stock_writes_nothing(test_db_session, sale_service, stocked_products):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = test_db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with pytest.raises(ValueError, match="Insufficient stock for product CHK001"):
+            sale_service.create_sale(
+                items_data=[
+                    {"product_id": stocked_products[0].id, "quantity": Decimal("1")},
+                    {"product_id": stocked_products[1].id, "quantity": Decimal("60")},
+                    {"product_id": stocked_products[1].id, "quantity": Decimal("41")},
+                ],
+                user_id=None,
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    # Rejected by the guarded stock update, before the sale is inserted
+    verbs = [statement.split()[0].upper() for statement in statements]
+    assert verbs.count("UPDATE") == 1
+    assert not {"INSERT", "DELETE"} & set(verbs)
@@ -7,7 +7,6 @@ Tests commands, queries, handlers, and read models.
 import pytest
 from unittest.mock import Mock, MagicMock
 from decimal import Decimal
-from uuid import UUID, uuid4
 
 from core.cqrs.commands import (
     CreateProductCommand,
@@ -54,7 +53,7 @@ def mock_product_service():
 def test_product():
     """Create a test product."""
     return Product(
-        id=uuid4(),
+        id=1,
         code="TEST001",
         description="Test Product",
         sell_price=Decimal('99.99'),
@@ -115,7 +114,7 @@ class TestQueries:
 
     def test_get_product_by_id_query(self):
         """Test product query by ID."""
-        product_id = uuid4()
+        product_id = 1
         query = GetProductByIdQuery(product_id=product_id)
 
         assert query.product_id == product_id
@@ -124,7 +123,7 @@ class TestQueries:
         """Test search query with multiple filters."""
         query = SearchProductsQuery(
             search_term="laptop",
-            department_id=uuid4(),
+            department_id=3,
             in_stock_only=True,
             min_price=Decimal('100'),
             max_price=Decimal('1000'),
@@ -155,7 +154,7 @@ class TestReadModels:
     def test_product_read_model_is_immutable(self):
         """Test that read models are immutable."""
         read_model = ProductReadModel(
-            id=uuid4(),
+            id=1,
             code="TEST",
             description="Test",
             sell_price=Decimal('99.99'),
@@ -179,7 +178,7 @@ class TestReadModels:
     def test_product_read_model_has_denormalized_fields(self):
         """Test that read model includes denormalized data."""
         read_model = ProductReadModel(
-            id=uuid4(),
+            id=1,
             code="TEST",
             description="Test",
             sell_price=Decimal('99.99'),
@@ -188,9 +187,9 @@ class TestReadModels:
             min_stock=Decimal('5'),
             max_stock=None,
             uses_inventory=True,
-            department_id=uuid4(),
+            department_id=3,
             department_name="Electronics",  # Denormalized!
-            unit_id=uuid4(),
+            unit_id=2,
             unit_name="pieces",  # Denormalized!
             in_stock=True,
             is_low_stock=False,
@@ -204,7 +203,7 @@ class TestReadModels:
     def test_product_read_model_has_computed_fields(self):
         """Test that read model includes computed fields."""
         read_model = ProductReadModel(
-            id=uuid4(),
+            id=1,
             code="TEST",
             description="Test",
             sell_price=Decimal('99.99'),
@@ -229,7 +228,7 @@ class TestReadModels:
     def test_product_list_item_read_model_is_lightweight(self):
         """Test that list item model only has essential fields."""
         list_item = ProductListItemReadModel(
-            id=uuid4(),
+            id=1,
             code="TEST",
             description="Test",
             sell_price=Decimal('99.99'),
@@ -335,7 +334,7 @@ class TestCommandHandlers:
         handler = UpdateProductCommandHandler(mock_product_service)
 
         command = UpdateProductCommand(
-            product_id=uuid4(),
+            product_id=999,
             sell_price=Decimal('149.99')
         )
 
@@ -373,7 +372,7 @@ class TestQueryHandlers:
         mock_product_service.get_product_by_id.return_value = None
         handler = GetProductByIdQueryHandler(mock_product_service)
 
-        query = GetProductByIdQuery(product_id=uuid4())
+        query = GetProductByIdQuery(product_id=999)
 
         # Execute
         result = handler.handle(query)
@@ -402,15 +401,15 @@ class TestQueryHandlers:
         # Setup products
         products = [
             Product(
-                id=uuid4(), code="LAPTOP001", description="Dell Laptop",
+                id=1, code="LAPTOP001", description="Dell Laptop",
                 sell_price=Decimal('999'), quantity_in_stock=Decimal('5')
             ),
             Product(
-                id=uuid4(), code="LAPTOP002", description="HP Laptop",
+                id=2, code="LAPTOP002", description="HP Laptop",
                 sell_price=Decimal('899'), quantity_in_stock=Decimal('3')
             ),
             Product(
-                id=uuid4(), code="MOUSE001", description="Wireless Mouse",
+                id=3, code="MOUSE001", description="Wireless Mouse",
                 sell_price=Decimal('25'), quantity_in_stock=Decimal('50')
             ),
         ]
@@ -431,11 +430,11 @@ class TestQueryHandlers:
         """Test search with multiple filters."""
         products = [
             Product(
-                id=uuid4(), code="PROD001", description="Product 1",
+                id=1, code="PROD001", description="Product 1",
                 sell_price=Decimal('100'), quantity_in_stock=Decimal('5')
             ),
             Product(
-                id=uuid4(), code="PROD002", description="Product 2",
+                id=2, code="PROD002", description="Product 2",
                 sell_price=Decimal('200'), quantity_in_stock=Decimal('0')  # Out of stock
             ),
         ]
@@ -454,7 +453,7 @@ class TestQueryHandlers:
     def test_search_products_pagination(self, mock_product_service):
         """Test search pagination."""
         products = [
-            Product(id=uuid4(), code=f"PROD{i:03d}", description=f"Product {i}",
+            Product(id=i, code=f"PROD{i:03d}", description=f"Product {i}",
                    sell_price=Decimal('100'), quantity_in_stock=Decimal('10'))
             for i in range(1, 101)  # 100 products
         ]
@@ -493,9 +492,10 @@ class TestCQRSSeparation:
     def test_queries_never_modify_state(self, mock_product_service):
         """Test that queries never modify state."""
         handler = GetProductByIdQueryHandler(mock_product_service)
-        query = GetProductByIdQuery(product_id=uuid4())
+        query = GetProductByIdQuery(product_id=1)
 
-        handler.handle(query)
+        # The bare mock service returns a Mock, not a Product: no answer, no error
+        assert handler.handle(query) is None
 
         # Verify only read method was called (no modifications)
         mock_product_service.get_product_by_id.assert_called_once()
@@ -523,7 +523,7 @@ class TestCQRSSeparation:
         mock_product_service.get_product_by_id.return_value = None
 
         # Query for non-existent product
-        result = handler.handle(GetProductByIdQuery(product_id=uuid4()))
+        result = handler.handle(GetProductByIdQuery(product_id=999))
 
         # Returns None, doesn't raise or return error
         assert result is None
@@ -536,3 +536,12 @@ class TestCQRSSeparation:
 
         # Returns empty list, doesn't raise or return error
         assert results == []
+
+    def test_queries_skip_values_that_are_not_products(self, mock_product_service, test_product, caplog):
+        """Test that unexpected values from the service are logged and left out."""
+        mock_product_service.get_all_products.return_value = [test_product, Mock(), None]
+
+        results = SearchProductsQueryHandler(mock_product_service).handle(SearchProductsQuery())
+
+        assert [r.code for r in results] == [test_product.code]
+        assert "expected a Product from the service, got Mock" in caplog.text
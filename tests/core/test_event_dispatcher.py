@@ -0,0 +1,236 @@
+"""
+Tests for the asynchronous event dispatcher: worker threads, per-aggregate
+ordering, inline handlers, timeouts, metrics and flush.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+import pytest
+
+from core.domain_events import DomainEvent, EventPublisher
+from core.event_dispatcher import AsyncEventDispatcher, aggregate_key
+from core.events.product_events import ProductPriceChanged
+
+
+@dataclass(frozen=True)
+class PingEvent(DomainEvent):
+    """Event without an aggregate."""
+    n: int
+
+
+@pytest.fixture(autouse=True)
+def clear_event_handlers():
+    EventPublisher.clear_handlers()
+    yield
+    EventPublisher.clear_handlers()
+    EventPublisher.set_dispatcher(None)
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = AsyncEventDispatcher(workers=4, max_queue_size=100)
+    dispatcher.start()
+    EventPublisher.set_dispatcher(dispatcher)
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+def _price_changed(product_id, new_price):
+    return ProductPriceChanged(
+        product_id=product_id, code=f"P{product_id}", old_price=Decimal("1"), new_price=Decimal(new_price)
+    )
+
+
+def test_aggregate_key_uses_the_aggregate_id():
+    assert aggregate_key(_price_changed(7, "2")) == ("product_id", 7)
+    assert aggregate_key(PingEvent(n=1)) is None
+
+
+def test_handlers_run_on_workers_and_flush_waits_for_them(dispatcher):
+    threads = []
+
+    @EventPublisher.subscribe(PingEvent)
+    def slow_handler(event):
+        time.sleep(0.01)
+        threads.append(threading.current_thread().name)
+
+    for n in range(10):
+        EventPublisher.publish(PingEvent(n=n))
+
+    assert dispatcher.flush(timeout=5)
+    assert len(threads) == 10
+    assert all(name.startswith("event-dispatcher-") for name in threads)
+    assert dispatcher.metrics()["processed"] == 10
+
+
+def test_events_of_one_aggregate_are_handled_in_order(dispatcher):
+    handled = []
+    lock = threading.Lock()
+
+    @EventPublisher.subscribe(ProductPriceChanged)
+    def record(event):
+        time.sleep(random.random() / 1000)
+        with lock:
+            handled.append((event.product_id, event.new_price))
+
+    for sequence in range(1, 41):
+        for product_id in range(5):
+            EventPublisher.publish(_price_changed(product_id, sequence))
+
+    assert dispatcher.flush(timeout=10)
+    assert len(handled) == 200
+    for product_id in range(5):
+        prices = [price for pid, price in handled if pid == product_id]
+        assert prices == [Decimal(n) for n in range(1, 41)]
+
+
+def test_inline_handlers_run_on_the_publishing_thread(dispatcher):
+    seen = []
+
+    EventPublisher.subscribe(
+        PingEvent, lambda event: seen.append(threading.current_thread()), inline=True
+    )
+    EventPublisher.publish(PingEvent(n=1))
+
+    assert seen == [threading.current_thread()]
+
+
+def test_failures_and_latency_are_counted_per_handler(dispatcher):
+    @EventPublisher.subscribe(PingEvent)
+    def failing_handler(event):
+        raise ValueError("boom")
+
+    @EventPublisher.subscribe(PingEvent)
+    def working_handler(event):
+        pass
+
+    for n in range(3):
+        EventPublisher.publish(PingEvent(n=n))
+    dispatcher.flush(timeout=5)
+
+    handlers = dispatcher.metrics()["handlers"]
+    failing = next(m for name, m in handlers.items() if name.endswith("failing_handler"))
+    working = next(m for name, m in handlers.items() if name.endswith("working_handler"))
+    assert failing["calls"] == 3 and failing["failures"] == 3
+    assert working["calls"] == 3 and working["failures"] == 0
+    assert working["max_ms"] >= working["average_ms"] >= 0
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_a_handler_over_its_timeout_is_abandoned_until_the_next_event():
+    release = threading.Event()
+    handled = []
+
+    def stuck_handler(event):
+        release.wait(5)
+
+    def next_handler(event):
+        handled.append(event.n)
+
+    dispatcher = AsyncEventDispatcher(workers=1, handler_timeouts={stuck_handler: 0.05})
+    dispatcher.start()
+    EventPublisher.set_dispatcher(dispatcher)
+    EventPublisher.subscribe(PingEvent, stuck_handler)
+    EventPublisher.subscribe(PingEvent, next_handler)
+    try:
+        EventPublisher.publish(PingEvent(n=1))
+        EventPublisher.publish(PingEvent(n=2))
+
+        # The event's other handlers go on without the stuck one...
+        assert _wait_until(lambda: handled == [1])
+        # ...but the next event waits for it
+        assert not dispatcher.flush(timeout=0.2)
+        assert handled == [1]
+
+        release.set()
+        assert dispatcher.flush(timeout=2)
+        assert handled == [1, 2]
+        [stuck] = [m for name, m in dispatcher.metrics()["handlers"].items() if "stuck" in name]
+        assert stuck["timeouts"] == 1
+    finally:
+        release.set()
+        dispatcher.shutdown()
+
+
+def test_a_full_queue_handles_events_on_the_publishing_thread():
+    release = threading.Event()
+    threads = []
+
+    @EventPublisher.subscribe(PingEvent)
+    def blocking_handler(event):
+        threads.append(threading.current_thread())
+        if event.n == 1:
+            release.wait(5)
+
+    dispatcher = AsyncEventDispatcher(workers=1, max_queue_size=1, enqueue_timeout=0.01)
+    dispatcher.start()
+    EventPublisher.set_dispatcher(dispatcher)
+    try:
+        EventPublisher.publish(PingEvent(n=1))  # taken by the worker, which blocks
+        time.sleep(0.05)
+        EventPublisher.publish(PingEvent(n=2))  # waits in the lane
+        EventPublisher.publish(PingEvent(n=3))  # lane full: handled here
+        release.set()
+
+        assert dispatcher.flush(timeout=5)
+        metrics = dispatcher.metrics()
+        assert metrics["ran_inline"] == 1
+        assert metrics["max_queue_depth"] == 1
+        assert threading.current_thread() in threads
+        assert len(threads) == 3
+    finally:
+        release.set()
+        dispatcher.shutdown()
+
+
+def test_a_full_queue_waits_for_the_earlier_events_of_the_aggregate():
+    release = threading.Event()
+    handled = []
+
+    @EventPublisher.subscribe(ProductPriceChanged)
+    def blocking_handler(event):
+        if event.new_price == Decimal("1"):
+            release.wait(5)
+        handled.append((event.new_price, threading.current_thread()))
+
+    dispatcher = AsyncEventDispatcher(workers=1, max_queue_size=1, enqueue_timeout=0.01)
+    dispatcher.start()
+    EventPublisher.set_dispatcher(dispatcher)
+    try:
+        EventPublisher.publish(_price_changed(7, "1"))  # taken by the worker, which blocks
+        time.sleep(0.05)
+        EventPublisher.publish(_price_changed(7, "2"))  # waits in the lane
+        publisher = threading.Thread(target=EventPublisher.publish, args=(_price_changed(7, "3"),))
+        publisher.start()  # lane full, and the product has earlier events: waits
+
+        time.sleep(0.1)
+        assert publisher.is_alive()
+        release.set()
+        publisher.join(5)
+
+        assert dispatcher.flush(timeout=5)
+        assert [price for price, _ in handled] == [Decimal("1"), Decimal("2"), Decimal("3")]
+        assert {thread.name for _, thread in handled} == {"event-dispatcher-0"}
+        assert dispatcher.metrics()["ran_inline"] == 0
+    finally:
+        release.set()
+        dispatcher.shutdown()
+
+
+def test_without_a_dispatcher_publish_stays_synchronous():
+    seen = []
+    EventPublisher.subscribe(PingEvent, lambda event: seen.append(event.n))
+
+    EventPublisher.publish(PingEvent(n=1))
+
+    assert seen == [1]
@@ -13,10 +13,10 @@ Tests cover:
 import pytest
 from decimal import Decimal
 from datetime import datetime
-from uuid import uuid4
 
+from core.models.enums import PaymentType
 from core.models.product import Product
-from core.models.sale import Sale
+from core.models.sale import Sale, SaleItem
 from core.specifications.base import (
     Specification,
     ParameterizedSpecification,
@@ -61,6 +61,11 @@ from core.specifications.sale_specifications import (
 )
 
 
+def _sale(total, **fields):
+    """A sale whose items add up to total."""
+    return Sale(items=[SaleItem(product_id=1, quantity=Decimal("1"), unit_price=total)], **fields)
+
+
 class TestBaseSpecification:
     """Tests for base specification classes."""
 
@@ -282,7 +287,7 @@ class TestProductSpecifications:
 
     def test_product_in_department_satisfied(self):
         """Test product in department specification."""
-        dept_id = uuid4()
+        dept_id = 1
         spec = products_in_department(dept_id)
 
         product = Product(
@@ -295,8 +300,8 @@ class TestProductSpecifications:
 
     def test_product_in_department_not_satisfied(self):
         """Test product in department specification - wrong department."""
-        dept_id = uuid4()
-        other_dept_id = uuid4()
+        dept_id = 1
+        other_dept_id = 2
         spec = products_in_department(dept_id)
 
         product = Product(
@@ -410,7 +415,7 @@ class TestProductSpecifications:
 
     def test_product_specification_composition(self):
         """Test composing multiple product specifications."""
-        dept_id = uuid4()
+        dept_id = 1
 
         # in_stock AND in_department AND price <= 100
         spec = (
@@ -444,7 +449,7 @@ class TestProductSpecifications:
             code="P003",
             description="Test",
             quantity_in_stock=Decimal("10"),
-            department_id=uuid4(),
+            department_id=dept_id + 1,
             sell_price=Decimal("50"),
         )
         assert not spec.is_satisfied_by(product3)
@@ -469,10 +474,10 @@ class TestSaleSpecifications:
         end = datetime(2024, 1, 31)
         spec = sales_by_date_range(start, end)
 
-        sale = Sale(
-            created_at=datetime(2024, 1, 15),
+        sale = _sale(
+            timestamp=datetime(2024, 1, 15),
             total=Decimal("100"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
 
         assert spec.is_satisfied_by(sale)
@@ -484,18 +489,18 @@ class TestSaleSpecifications:
         spec = sales_by_date_range(start, end)
 
         # Before range
-        sale1 = Sale(
-            created_at=datetime(2023, 12, 31),
+        sale1 = _sale(
+            timestamp=datetime(2023, 12, 31),
             total=Decimal("100"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
         assert not spec.is_satisfied_by(sale1)
 
         # After range
-        sale2 = Sale(
-            created_at=datetime(2024, 2, 1),
+        sale2 = _sale(
+            timestamp=datetime(2024, 2, 1),
             total=Decimal("100"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
         assert not spec.is_satisfied_by(sale2)
 
@@ -506,44 +511,44 @@ class TestSaleSpecifications:
         spec = sales_by_date_range(start, end)
 
         # At start boundary
-        sale1 = Sale(
-            created_at=start,
+        sale1 = _sale(
+            timestamp=start,
             total=Decimal("100"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
         assert spec.is_satisfied_by(sale1)
 
         # At end boundary
-        sale2 = Sale(
-            created_at=end,
+        sale2 = _sale(
+            timestamp=end,
             total=Decimal("100"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
         assert spec.is_satisfied_by(sale2)
 
     def test_sale_by_customer_satisfied(self):
         """Test sale by customer specification."""
-        customer_id = uuid4()
+        customer_id = 1
         spec = sales_by_customer(customer_id)
 
-        sale = Sale(
+        sale = _sale(
             customer_id=customer_id,
             total=Decimal("100"),
-            payment_type="credit",
+            payment_type=PaymentType.CREDITO,
         )
 
         assert spec.is_satisfied_by(sale)
 
     def test_sale_by_customer_not_satisfied(self):
         """Test sale by customer specification - wrong customer."""
-        customer_id = uuid4()
-        other_customer_id = uuid4()
+        customer_id = 1
+        other_customer_id = 2
         spec = sales_by_customer(customer_id)
 
-        sale = Sale(
+        sale = _sale(
             customer_id=other_customer_id,
             total=Decimal("100"),
-            payment_type="credit",
+            payment_type=PaymentType.CREDITO,
         )
 
         assert not spec.is_satisfied_by(sale)
@@ -552,84 +557,84 @@ class TestSaleSpecifications:
         """Test sale by payment type specification."""
         spec = sales_by_payment_type("cash")
 
-        sale1 = Sale(total=Decimal("100"), payment_type="cash")
+        sale1 = _sale(total=Decimal("100"), payment_type=PaymentType.EFECTIVO)
         assert spec.is_satisfied_by(sale1)
 
-        sale2 = Sale(total=Decimal("100"), payment_type="credit")
+        sale2 = _sale(total=Decimal("100"), payment_type=PaymentType.CREDITO)
         assert not spec.is_satisfied_by(sale2)
 
     def test_sale_above_amount_satisfied(self):
         """Test sale above amount specification."""
         spec = sales_above_amount(Decimal("100"))
 
-        sale1 = Sale(total=Decimal("150"), payment_type="cash")
+        sale1 = _sale(total=Decimal("150"), payment_type=PaymentType.EFECTIVO)
         assert spec.is_satisfied_by(sale1)
 
-        sale2 = Sale(total=Decimal("100"), payment_type="cash")
+        sale2 = _sale(total=Decimal("100"), payment_type=PaymentType.EFECTIVO)
         assert not spec.is_satisfied_by(sale2)
 
-        sale3 = Sale(total=Decimal("50"), payment_type="cash")
+        sale3 = _sale(total=Decimal("50"), payment_type=PaymentType.EFECTIVO)
         assert not spec.is_satisfied_by(sale3)
 
     def test_sale_below_amount_satisfied(self):
         """Test sale below amount specification."""
         spec = sales_below_amount(Decimal("100"))
 
-        sale1 = Sale(total=Decimal("50"), payment_type="cash")
+        sale1 = _sale(total=Decimal("50"), payment_type=PaymentType.EFECTIVO)
         assert spec.is_satisfied_by(sale1)
 
-        sale2 = Sale(total=Decimal("100"), payment_type="cash")
+        sale2 = _sale(total=Decimal("100"), payment_type=PaymentType.EFECTIVO)
         assert not spec.is_satisfied_by(sale2)
 
-        sale3 = Sale(total=Decimal("150"), payment_type="cash")
+        sale3 = _sale(total=Decimal("150"), payment_type=PaymentType.EFECTIVO)
         assert not spec.is_satisfied_by(sale3)
 
     def test_credit_sales_specification(self):
         """Test credit sales specification."""
         spec = credit_sales()
 
-        sale1 = Sale(total=Decimal("100"), payment_type="credit")
+        sale1 = _sale(total=Decimal("100"), payment_type=PaymentType.CREDITO)
         assert spec.is_satisfied_by(sale1)
 
-        sale2 = Sale(total=Decimal("100"), payment_type="cash")
+        sale2 = _sale(total=Decimal("100"), payment_type=PaymentType.EFECTIVO)
         assert not spec.is_satisfied_by(sale2)
 
     def test_cash_sales_specification(self):
         """Test cash sales specification."""
         spec = cash_sales()
 
-        sale1 = Sale(total=Decimal("100"), payment_type="cash")
+        sale1 = _sale(total=Decimal("100"), payment_type=PaymentType.EFECTIVO)
         assert spec.is_satisfied_by(sale1)
 
-        sale2 = Sale(total=Decimal("100"), payment_type="credit")
+        sale2 = _sale(total=Decimal("100"), payment_type=PaymentType.CREDITO)
         assert not spec.is_satisfied_by(sale2)
 
     def test_card_sales_specification(self):
         """Test card sales specification."""
         spec = card_sales()
 
-        sale1 = Sale(total=Decimal("100"), payment_type="card")
+        sale1 = _sale(total=Decimal("100"), payment_type=PaymentType.TARJETA)
         assert spec.is_satisfied_by(sale1)
 
-        sale2 = Sale(total=Decimal("100"), payment_type="cash")
+        sale2 = _sale(total=Decimal("100"), payment_type=PaymentType.EFECTIVO)
         assert not spec.is_satisfied_by(sale2)
 
     def test_sale_by_user_specification(self):
         """Test sale by user specification."""
-        user_id = uuid4()
+        user_id = 1
         spec = SaleByUserSpecification(user_id)
 
-        sale1 = Sale(
+        sale1 = _sale(
             user_id=user_id,
             total=Decimal("100"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
         assert spec.is_satisfied_by(sale1)
 
-        sale2 = Sale(
-            user_id=uuid4(),
+        sale2 = _sale(
+            user_id=user_id + 1,
             total=Decimal("100"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
         assert not spec.is_satisfied_by(sale2)
 
@@ -646,34 +651,34 @@ class TestSaleSpecifications:
         )
 
         # Matches all criteria
-        sale1 = Sale(
-            created_at=datetime(2024, 1, 15),
+        sale1 = _sale(
+            timestamp=datetime(2024, 1, 15),
             total=Decimal("1000"),
-            payment_type="credit",
+            payment_type=PaymentType.CREDITO,
         )
         assert spec.is_satisfied_by(sale1)
 
         # Doesn't match: wrong date
-        sale2 = Sale(
-            created_at=datetime(2024, 2, 1),
+        sale2 = _sale(
+            timestamp=datetime(2024, 2, 1),
             total=Decimal("1000"),
-            payment_type="credit",
+            payment_type=PaymentType.CREDITO,
         )
         assert not spec.is_satisfied_by(sale2)
 
         # Doesn't match: not credit
-        sale3 = Sale(
-            created_at=datetime(2024, 1, 15),
+        sale3 = _sale(
+            timestamp=datetime(2024, 1, 15),
             total=Decimal("1000"),
-            payment_type="cash",
+            payment_type=PaymentType.EFECTIVO,
         )
         assert not spec.is_satisfied_by(sale3)
 
         # Doesn't match: too small
-        sale4 = Sale(
-            created_at=datetime(2024, 1, 15),
+        sale4 = _sale(
+            timestamp=datetime(2024, 1, 15),
             total=Decimal("100"),
-            payment_type="credit",
+            payment_type=PaymentType.CREDITO,
         )
         assert not spec.is_satisfied_by(sale4)
 
@@ -708,7 +713,7 @@ class TestSpecificationRepresentation:
 
     def test_product_in_department_repr(self):
         """Test string representation of parameterized spec."""
-        dept_id = uuid4()
+        dept_id = 1
         spec = products_in_department(dept_id)
         assert f"ProductInDepartment({dept_id})" == repr(spec)
 
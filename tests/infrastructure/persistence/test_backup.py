@@ -0,0 +1,249 @@
+"""
+Tests for the online SQLite backup subsystem.
+
+These tests need a file database of their own: the online backup API and
+ATTACH do not work against the in-memory, savepoint-wrapped test session.
+"""
+
+import gzip
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from core.models.product import Department, Product
+from core.services.data_import_export_service import DataImportExportService
+from infrastructure.persistence.sqlite.backup import (
+    BackupScheduler,
+    backup_database,
+    backup_file_name,
+    list_backups,
+    prune_backups,
+    restore_database,
+    verify_backup,
+)
+from infrastructure.persistence.sqlite.database import Base
+from infrastructure.persistence.sqlite.models_mapping import (
+    ProductOrm,
+    ensure_all_models_mapped,
+)
+from infrastructure.persistence.sqlite.repositories import (
+    SqliteDepartmentRepository,
+    SqliteProductRepository,
+)
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    ensure_all_models_mapped()
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def file_session(file_engine):
+    session = sessionmaker(bind=file_engine)()
+    yield session
+    session.close()
+
+
+def add_products(session, count, prefix="P"):
+    department = SqliteDepartmentRepository(session).add(Department(name=f"Dept {prefix}"))
+    SqliteProductRepository(session).bulk_upsert([
+        {
+            "code": f"{prefix}{i:05d}",
+            "description": f"Producto {prefix} {i}",
+            "cost_price": Decimal("1.00"),
+            "sell_price": Decimal("2.00"),
+            "quantity_in_stock": Decimal("3"),
+            "department_id": department.id,
+        }
+        for i in range(count)
+    ])
+    session.commit()
+
+
+@contextmanager
+def sqlite_connection(path):
+    """Plain sqlite3 connection that commits on exit, to tamper with a backup."""
+    connection = sqlite3.connect(path)
+    try:
+        yield connection
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def count_products(engine):
+    with engine.connect() as connection:
+        return connection.scalar(select(func.count()).select_from(ProductOrm))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_backup_copies_database_in_steps(file_engine, file_session, tmp_path, compress):
+    add_products(file_session, 2000)
+    target = str(tmp_path / "backups" / backup_file_name(compress=compress))
+    progress = []
+
+    result = backup_database(
+        file_engine, target, compress=compress, pages_per_step=16,
+        progress=lambda copied, total: progress.append((copied, total)),
+    )
+
+    assert result.path == target
+    assert result.compressed is compress
+    assert result.size_bytes == os.path.getsize(target)
+    assert len(progress) > 1
+    assert [copied for copied, _ in progress] == sorted(copied for copied, _ in progress)
+    assert progress[-1] == (result.pages, result.pages)
+    assert os.listdir(tmp_path / "backups") == [os.path.basename(target)]
+    if compress:
+        with gzip.open(target, "rb") as f:
+            assert f.read(16) == b"SQLite format 3\x00"
+    assert verify_backup(target) == []
+
+
+def test_verify_backup_reports_damaged_files(tmp_path):
+    garbage = tmp_path / "respaldo_garbage.db"
+    garbage.write_bytes(b"not a database" * 100)
+    truncated = tmp_path / "respaldo_truncated.db.gz"
+    truncated.write_bytes(gzip.compress(b"SQLite format 3\x00" + b"\x00" * 5000)[:40])
+
+    assert verify_backup(str(garbage)) != []
+    assert verify_backup(str(truncated)) != []
+    assert verify_backup(str(tmp_path / "missing.db")) != []
+
+
+def test_wal_backup_is_a_snapshot_while_writers_continue(file_engine, file_session, tmp_path):
+    with file_engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    add_products(file_session, 3000)
+    stop = threading.Event()
+    writes = []
+
+    def writer():
+        repo_session = sessionmaker(bind=file_engine)()
+        repo = SqliteProductRepository(repo_session)
+        while not stop.is_set():
+            repo.add(Product(code=f"W{len(writes):05d}", description="Venta en curso", sell_price=Decimal("1")))
+            repo_session.commit()
+            writes.append(1)
+        repo_session.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        # Pausing after every step gives the writer time to commit mid-copy
+        result = backup_database(
+            file_engine, str(tmp_path / "snapshot.db"), pages_per_step=8, step_pause=0.01
+        )
+    finally:
+        stop.set()
+        thread.join()
+
+    assert writes
+    assert verify_backup(result.path) == []
+    backup_engine = create_engine(f"sqlite:///{result.path}")
+    try:
+        snapshot_count = count_products(backup_engine)
+    finally:
+        backup_engine.dispose()
+    assert 3000 <= snapshot_count < 3000 + len(writes)
+
+
+def test_restore_replaces_data_and_reindexes_search(file_engine, file_session, tmp_path):
+    add_products(file_session, 50, prefix="ORIG")
+    backup = backup_database(file_engine, str(tmp_path / "before.db.gz"), compress=True)
+
+    products = SqliteProductRepository(file_session)
+    products.delete(products.get_by_code("ORIG00001").id)
+    products.add(Product(code="LATER", description="Cargado después", sell_price=Decimal("1")))
+    file_session.commit()
+    file_session.close()
+
+    restored = restore_database(file_engine, backup.path)
+
+    assert restored["products"] == 50
+    assert restored["departments"] == 1
+    assert count_products(file_engine) == 50
+    products = SqliteProductRepository(file_session)
+    assert products.get_by_code("LATER") is None
+    assert [p.code for p in products.search("ORIG00001")] == ["ORIG00001"]
+    assert products.search("cargado") == []
+    # The sync triggers are back after the restore
+    products.add(Product(code="AFTER", description="Yerba restaurada", sell_price=Decimal("1")))
+    assert [p.code for p in products.search("yerba")] == ["AFTER"]
+
+
+def test_restore_keeps_live_schema_and_rolls_back_on_error(file_engine, file_session, tmp_path):
+    add_products(file_session, 10)
+    backup = backup_database(file_engine, str(tmp_path / "before.db"))
+
+    with sqlite_connection(backup.path) as connection:
+        # A backup taken before a column existed, with a dangling department
+        connection.execute("ALTER TABLE products DROP COLUMN notes")
+        connection.execute("UPDATE products SET department_id = 999 WHERE code = 'P00000'")
+    file_session.close()
+
+    with pytest.raises(ValueError, match="foreign key"):
+        restore_database(file_engine, backup.path)
+    assert count_products(file_engine) == 10
+
+    with sqlite_connection(backup.path) as connection:
+        connection.execute("UPDATE products SET department_id = NULL WHERE code = 'P00000'")
+    restore_database(file_engine, backup.path)
+    with file_engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM products WHERE notes IS NULL")).scalar() == 10
+
+
+def test_scheduler_snapshots_and_prunes(file_engine, file_session, tmp_path):
+    add_products(file_session, 5)
+    backup_dir = tmp_path / "scheduled"
+    backup_dir.mkdir()
+    for stamp in ("20260101_000000", "20260102_000000", "20260103_000000"):
+        (backup_dir / f"respaldo_{stamp}.db.gz").write_bytes(b"old")
+    (backup_dir / "notes.txt").write_text("not a backup")
+    scheduler = BackupScheduler(file_engine, str(backup_dir), interval_seconds=3600, keep_last=2)
+
+    result = scheduler.run_once()
+
+    assert result is not None
+    assert verify_backup(result.path) == []
+    assert list_backups(str(backup_dir)) == [
+        str(backup_dir / "respaldo_20260103_000000.db.gz"),
+        result.path,
+    ]
+    assert (backup_dir / "notes.txt").exists()
+    assert prune_backups(str(backup_dir), keep_last=1) == [
+        str(backup_dir / "respaldo_20260103_000000.db.gz")
+    ]
+
+
+def test_service_backup_and_restore(file_engine, file_session, tmp_path):
+    add_products(file_session, 20)
+    file_session.close()
+    service = DataImportExportService(engine=file_engine)
+    path = str(tmp_path / "respaldo.db.gz")
+
+    created = service.create_database_backup(path)
+    assert created["success"] is True
+    assert created["file_path"] == path
+    assert service.verify_database_backup(path)["success"] is True
+
+    with file_engine.begin() as connection:
+        connection.execute(text("DELETE FROM products"))
+
+    restored = service.restore_database_backup(path)
+    assert restored["success"] is True
+    assert restored["products_restored"] == 20
+    assert count_products(file_engine) == 20
+
+    missing = service.restore_database_backup(str(tmp_path / "missing.db"))
+    assert missing["success"] is False
@@ -1,9 +1,10 @@
 import pytest
 from datetime import datetime, timedelta, date
 from decimal import Decimal
-from core.models.cash_drawer import CashDrawerEntry, CashDrawerEntryType
+from sqlalchemy import event
+from core.models.cash_drawer import CashDrawerEntry, CashDrawerEntryType, CashDrawerSession
 from infrastructure.persistence.sqlite.cash_drawer_repository import SQLiteCashDrawerRepository
-from infrastructure.persistence.sqlite.models_mapping import CashDrawerEntryOrm
+from infrastructure.persistence.sqlite.models_mapping import CashDrawerEntryOrm, CashDrawerSessionOrm
 
 class TestSQLiteCashDrawerRepository:
     def create_entry(self, entry_type, amount, user_id=1, drawer_id=1, description="Test entry", ts=None):
@@ -174,4 +175,86 @@ class TestSQLiteCashDrawerRepository:
         repo.add_entry(self.create_entry(CashDrawerEntryType.OUT, "10"))
 
         last_start = repo.get_last_start_entry()
-        assert last_start is None
\ No newline at end of file
+        assert last_start is None
+    def test_balance_and_status_read_running_state(self, test_db_session):
+        repo = SQLiteCashDrawerRepository(test_db_session)
+        now = datetime.now()
+        repo.add_entry(self.create_entry(CashDrawerEntryType.START, "100.00", drawer_id=1, ts=now))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.SALE, "35.50", drawer_id=1))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.START, "20.00", drawer_id=2, ts=now))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.CLOSE, "20.00", drawer_id=2, ts=now + timedelta(minutes=1)))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.IN, "5.00", drawer_id=None))
+
+        statements = []
+        connection = test_db_session.connection()
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            assert repo.get_current_balance(1) == Decimal("135.50")
+            assert repo.get_current_balance(2) == Decimal("40.00")
+            assert repo.get_current_balance() == Decimal("180.50")
+            assert repo.is_drawer_open(1)
+            assert not repo.is_drawer_open(2)
+            # Drawer 2 changed status last
+            assert not repo.is_drawer_open()
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+        assert not any("cash_drawer_entries" in statement for statement in statements)
+
+    def test_sessions_keep_totals(self, test_db_session):
+        repo = SQLiteCashDrawerRepository(test_db_session)
+        now = datetime.now()
+        repo.add_entry(self.create_entry(CashDrawerEntryType.START, "100.00", ts=now - timedelta(hours=2)))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.IN, "50.00"))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.OUT, "-20.00"))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.SALE, "30.00"))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.SALE, "12.25"))
+
+        session = repo.get_open_session(1)
+        assert session.opening_amount == Decimal("100.00")
+        assert (session.total_in, session.total_out, session.total_sales) == (
+            Decimal("50.00"), Decimal("-20.00"), Decimal("42.25")
+        )
+        assert session.entry_count == 4
+        assert session.expected_amount == Decimal("172.25")
+
+        # A backdated START does not reopen anything
+        repo.add_entry(self.create_entry(CashDrawerEntryType.CLOSE, "172.25", ts=now - timedelta(minutes=1)))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.START, "1.00", ts=now - timedelta(hours=3)))
+        assert repo.get_open_session(1) is None
+        assert not repo.is_drawer_open(1)
+        closed = test_db_session.query(CashDrawerSessionOrm).one()
+        assert closed.closing_amount == Decimal("172.25")
+
+    def test_consistency_check_finds_and_repairs_drift(self, test_db_session):
+        repo = SQLiteCashDrawerRepository(test_db_session)
+        now = datetime.now()
+        repo.add_entry(self.create_entry(CashDrawerEntryType.START, "100.00", ts=now - timedelta(hours=1)))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.SALE, "10.10"))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.SALE, "20.20"))
+        repo.add_entry(self.create_entry(CashDrawerEntryType.IN, "0.10", drawer_id=None))
+        assert repo.check_consistency() == []
+        incremental = repo.get_open_session(1)
+
+        # Ledger rows written behind the repository's back
+        test_db_session.add(CashDrawerEntryOrm(
+            timestamp=now + timedelta(minutes=1), entry_type="CLOSE", amount=Decimal("130.30"),
+            user_id=1, drawer_id=1,
+        ))
+        test_db_session.commit()
+        problems = repo.check_consistency()
+        assert any("balance" in problem for problem in problems)
+        assert any("should be closed" in problem for problem in problems)
+        assert repo.is_drawer_open(1)
+
+        assert repo.check_consistency(repair=True) == problems
+        assert repo.check_consistency() == []
+        assert not repo.is_drawer_open(1)
+        assert repo.get_current_balance(1) == Decimal("260.60")
+        rebuilt = CashDrawerSession.model_validate(test_db_session.query(CashDrawerSessionOrm).one())
+        assert rebuilt.total_sales == incremental.total_sales
+        assert rebuilt.entry_count == incremental.entry_count
+        assert rebuilt.closing_amount == Decimal("130.30")
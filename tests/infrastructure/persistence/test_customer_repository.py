@@ -270,3 +270,18 @@ def test_search_customers_filtering_and_sorting(repository, test_db_session):
     # Search with no results
     no_results = repository.search(term="Nonexistent")
     assert len(no_results) == 0
+
+
+def test_get_page_by_name_and_id(repository, test_db_session):
+    """Customers sharing a name are split across pages by id, none repeated or skipped."""
+    for i in range(5):
+        _add_sample_customer(test_db_session, name=f"Page Customer {i % 2}", cuit=f"5500{i}", email=None)
+
+    first = repository.get_page(limit=2)
+    second = repository.get_page(first.next_cursor, limit=2)
+    last = repository.get_page(second.next_cursor, limit=2)
+
+    names = [c.name for c in first.items + second.items + last.items]
+    assert names == sorted(names)
+    assert len({c.id for c in first.items + second.items + last.items}) == 5
+    assert last.next_cursor is None
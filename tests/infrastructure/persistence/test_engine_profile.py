@@ -0,0 +1,139 @@
+"""
+Tests for the SQLite engine tuning profile.
+
+Each test builds its own file database, since WAL and memory-mapped I/O do
+not apply to the in-memory database used by the rest of the suite.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from infrastructure.persistence.sqlite.database import Base
+from infrastructure.persistence.sqlite.engine_profile import (
+    EngineProfile,
+    MaintenanceScheduler,
+    analyze_database,
+    apply_engine_profile,
+    engine_diagnostics,
+    optimize_database,
+)
+from infrastructure.persistence.sqlite.models_mapping import ensure_all_models_mapped
+
+
+def make_engine(tmp_path, profile=None):
+    ensure_all_models_mapped()
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}")
+    apply_engine_profile(engine, profile)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def tuned_engine(tmp_path):
+    engine = make_engine(tmp_path, EngineProfile(busy_timeout_ms=200))
+    yield engine
+    engine.dispose()
+
+
+def test_profile_is_applied_to_every_connection(tuned_engine):
+    settings = engine_diagnostics(tuned_engine)
+
+    assert settings["journal_mode"] == "wal"
+    assert settings["synchronous"] == "NORMAL"
+    assert settings["cache_size_kib"] == 64 * 1024
+    assert settings["mmap_size_bytes"] == 256 * 1024 * 1024
+    assert settings["temp_store"] == "MEMORY"
+    assert settings["busy_timeout_ms"] == 200
+    assert settings["foreign_keys"] is True
+    assert settings["page_count"] > 0
+    assert settings["profile"]["journal_mode"] == "WAL"
+
+    # Fresh pooled connections get the same settings
+    tuned_engine.dispose()
+    assert engine_diagnostics(tuned_engine)["synchronous"] == "NORMAL"
+
+
+def test_profile_from_config_and_without_profile(tmp_path):
+    class Settings:
+        sqlite_journal_mode = "DELETE"
+        sqlite_synchronous = "FULL"
+        sqlite_cache_size_mb = 8
+        sqlite_mmap_size_mb = 0
+        sqlite_busy_timeout_ms = 1000
+        sqlite_foreign_keys = False
+
+    engine = make_engine(tmp_path, EngineProfile.from_config(Settings()))
+    try:
+        settings = engine_diagnostics(engine)
+        assert settings["journal_mode"] == "delete"
+        assert settings["synchronous"] == "FULL"
+        assert settings["cache_size_kib"] == 8 * 1024
+        assert settings["mmap_size_bytes"] == 0
+        assert settings["foreign_keys"] is False
+    finally:
+        engine.dispose()
+
+    plain = create_engine("sqlite://")
+    assert engine_diagnostics(plain)["profile"] is None
+
+
+def test_foreign_keys_are_enforced(tuned_engine):
+    with pytest.raises(IntegrityError):
+        with tuned_engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO products (code, description, cost_price, sell_price, "
+                    "unit, uses_inventory, quantity_in_stock, is_active, department_id) "
+                    "VALUES ('FK', 'Huérfano', 0, 0, 'U', 1, 0, 1, 999)"
+                )
+            )
+
+
+def write_product(engine, code):
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO products (code, description, cost_price, sell_price, "
+                "unit, uses_inventory, quantity_in_stock, is_active) "
+                "VALUES (:code, 'Venta', 0, 0, 'U', 1, 0, 1)"
+            ),
+            {"code": code},
+        )
+
+
+@pytest.mark.parametrize("journal_mode, writer_blocked", [("WAL", False), ("DELETE", True)])
+def test_open_report_reader_does_not_block_the_till_in_wal(tmp_path, journal_mode, writer_blocked):
+    engine = make_engine(tmp_path, EngineProfile(journal_mode=journal_mode, busy_timeout_ms=100))
+    try:
+        write_product(engine, "FIRST")
+        with engine.connect() as report:
+            # A report in the middle of reading holds a read transaction open
+            report.exec_driver_sql("BEGIN")
+            assert report.execute(text("SELECT COUNT(*) FROM products")).scalar() == 1
+
+            if writer_blocked:
+                with pytest.raises(OperationalError, match="locked"):
+                    write_product(engine, "SALE")
+            else:
+                write_product(engine, "SALE")
+                # The report keeps reading its own snapshot
+                assert report.execute(text("SELECT COUNT(*) FROM products")).scalar() == 1
+            report.exec_driver_sql("ROLLBACK")
+    finally:
+        engine.dispose()
+
+
+def test_optimize_and_analyze_refresh_statistics(tuned_engine):
+    for i in range(50):
+        write_product(tuned_engine, f"A{i}")
+
+    optimize_database(tuned_engine)
+    assert analyze_database(tuned_engine) >= 0
+    assert MaintenanceScheduler(tuned_engine, interval_seconds=3600).run_once() is True
+
+    with tuned_engine.connect() as connection:
+        tables = connection.execute(
+            text("SELECT tbl FROM sqlite_stat1 WHERE tbl = 'products'")
+        ).scalars().all()
+    assert tables
@@ -0,0 +1,80 @@
+"""
+Tests for the EXPLAIN QUERY PLAN index advisor and the report indexes.
+"""
+
+from sqlalchemy import create_engine
+
+from infrastructure.persistence.sqlite.database import Base
+from infrastructure.persistence.sqlite.index_advisor import (
+    advise,
+    capture_statements,
+    explain_query_plan,
+    full_scans,
+    main,
+    run_report_workload,
+)
+from infrastructure.persistence.sqlite.models_mapping import ensure_all_models_mapped
+
+
+def test_full_scans_only_flags_unindexed_table_reads():
+    plan = [
+        "SCAN sales",
+        "SCAN products AS p",
+        "SCAN sales USING COVERING INDEX ix_sales_date_time_payment_type_total",
+        "SEARCH sale_items USING INDEX ix_sale_items_sale_id (sale_id=?)",
+        "SCAN products_fts VIRTUAL TABLE INDEX 0:M2",
+        "SCAN CONSTANT ROW",
+        "USE TEMP B-TREE FOR GROUP BY",
+    ]
+
+    assert full_scans(plan) == ["sales", "products"]
+
+
+def test_report_workload_has_no_full_scans(test_db_session):
+    connection = test_db_session.connection()
+
+    with capture_statements(connection) as statements:
+        run_report_workload(test_db_session)
+
+    assert len(statements) > 15
+    assert advise(connection, statements) == []
+
+
+def test_report_queries_use_covering_composite_indexes(test_db_session):
+    connection = test_db_session.connection()
+    with capture_statements(connection) as statements:
+        run_report_workload(test_db_session)
+    plans = {
+        statement: " | ".join(explain_query_plan(connection, statement, parameters))
+        for statement, parameters in statements
+    }
+
+    def plan_for(fragment):
+        return next(plan for statement, plan in plans.items() if fragment in statement)
+
+    assert "COVERING INDEX ix_sales_date_time_payment_type_total" in plan_for("sales.payment_type AS payment_type")
+    assert "COVERING INDEX ix_sale_items_sale_product_quantity_prices" in plan_for("AS revenue")
+    assert "ix_cash_drawer_entries_drawer_type_timestamp" in plan_for("cash_drawer_entries.entry_type = ? AND cash_drawer_entries.drawer_id = ?")
+
+
+def test_advise_reports_scans_with_their_plan(test_db_session):
+    connection = test_db_session.connection()
+    statement = "SELECT * FROM sales WHERE is_credit_sale = ?"
+
+    findings = advise(connection, [(statement, (1,)), (statement, (0,))])
+
+    assert len(findings) == 1
+    assert findings[0].table == "sales"
+    assert findings[0].plan == ["SCAN sales"]
+    assert "Full scan of sales" in str(findings[0])
+
+
+def test_command_line_runs_against_a_database(tmp_path, capsys):
+    ensure_all_models_mapped()
+    url = f"sqlite:///{tmp_path / 'store.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    assert main([url]) == 0
+    assert "0 full table scans found" in capsys.readouterr().out
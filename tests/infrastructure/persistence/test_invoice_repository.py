@@ -16,7 +16,7 @@ from infrastructure.persistence.sqlite.repositories import (
     SqliteSaleRepository
 )
 from infrastructure.persistence.sqlite.models_mapping import (
-    InvoiceOrm, SaleOrm, CustomerOrm, SaleItemOrm, ProductOrm, DepartmentOrm
+    InvoiceOrm, InvoiceSequenceOrm, SaleOrm, CustomerOrm, SaleItemOrm, ProductOrm, DepartmentOrm
 )
 from core.models.department import Department
 from core.models.product import Product
@@ -237,3 +237,93 @@ def test_duplicate_sale_id_raises_error(invoice_repo, test_db_session, request,
     # def finalizer():
     #     test_db_session.rollback()
     # request.addfinalizer(finalizer)
+
+
+def add_numbered_invoices(invoice_repo, test_db_session, create_customer, create_department, create_product, create_sale, numbers):
+    """Adds one invoice per given invoice number, each on its own sale."""
+    customer, dept, product, _ = create_customer_department_product_sale(
+        test_db_session, create_customer, create_department, create_product, create_sale, numbers[0][-2:]
+    )
+    for number in numbers:
+        sale = create_sale(customer.id, product)
+        invoice_repo.add(Invoice(sale_id=sale.id, customer_id=customer.id, invoice_number=number, total=sale.total))
+
+
+def test_allocate_invoice_number_continues_after_issued_numbers(invoice_repo, test_db_session, create_customer, create_department, create_product, create_sale):
+    add_numbered_invoices(
+        invoice_repo, test_db_session, create_customer, create_department, create_product, create_sale,
+        ["0001-00000001", "0001-00000002", "0001-00000041", "0002-00000007", "0001-20250101120000"],
+    )
+
+    assert invoice_repo.allocate_invoice_number(1) == 42
+    assert invoice_repo.allocate_invoice_number(1) == 43
+    assert invoice_repo.allocate_invoice_number(2) == 8
+    assert invoice_repo.allocate_invoice_number(3) == 1
+
+    # A rolled back invoice gives its number back
+    savepoint = test_db_session.begin_nested()
+    assert invoice_repo.allocate_invoice_number(1) == 44
+    savepoint.rollback()
+    assert invoice_repo.allocate_invoice_number(1) == 44
+
+
+def test_verify_invoice_sequence_reports_gaps_and_duplicates(invoice_repo, test_db_session, create_customer, create_department, create_product, create_sale):
+    add_numbered_invoices(
+        invoice_repo, test_db_session, create_customer, create_department, create_product, create_sale,
+        ["0001-00000001", "0001-00000002", "0001-00000003"],
+    )
+    assert invoice_repo.verify_invoice_sequence(1) == []
+
+    add_numbered_invoices(
+        invoice_repo, test_db_session, create_customer, create_department, create_product, create_sale,
+        ["0001-00000006", "0001-00000009", "0001-6"],
+    )
+    assert invoice_repo.verify_invoice_sequence(1) == [
+        "Invoice number 0001-00000006 was issued 2 times",
+        "Invoice numbers 0001-00000004 to 0001-00000005 are missing",
+        "Invoice numbers 0001-00000007 to 0001-00000008 are missing",
+    ]
+
+    # Allocated but never used by an invoice
+    assert invoice_repo.allocate_invoice_number(1) == 10
+    assert invoice_repo.verify_invoice_sequence(1)[-1] == "Invoice number 0001-00000010 is missing"
+
+    test_db_session.query(InvoiceSequenceOrm).filter_by(point_of_sale=1).update({"last_number": 5})
+    assert invoice_repo.verify_invoice_sequence(1)[-1] == (
+        "The sequence is at 0001-00000005 but 0001-00000009 was already issued"
+    )
+
+
+def test_get_page_newest_first_by_date_and_id(invoice_repo, test_db_session, create_customer, create_department, create_product, create_sale):
+    """Invoices sharing a date are split across pages by id, none repeated or skipped."""
+    customer, dept, product, _ = create_customer_department_product_sale(
+        test_db_session, create_customer, create_department, create_product, create_sale, "page"
+    )
+    day = datetime.datetime(2024, 3, 1, 10, 0, 0)
+    for i in range(5):
+        sale = create_sale(customer.id, product)
+        invoice_repo.add(Invoice(
+            sale_id=sale.id,
+            customer_id=customer.id,
+            invoice_number=f"0009-0000000{i}",
+            invoice_date=day + datetime.timedelta(days=i // 2),
+            total=sale.total,
+        ))
+
+    first = invoice_repo.get_page(limit=2)
+    second = invoice_repo.get_page(first.next_cursor, limit=2)
+    last = invoice_repo.get_page(second.next_cursor, limit=2)
+
+    invoices = first.items + second.items + last.items
+    keys = [(inv.invoice_date, inv.id) for inv in invoices]
+    assert keys == sorted(keys, reverse=True)
+    assert [inv.invoice_number for inv in invoices] == [f"0009-0000000{i}" for i in (4, 3, 2, 1, 0)]
+    assert len(last.items) == 1
+    assert last.next_cursor is None
+
+
+def test_get_page_without_invoices_is_empty(invoice_repo):
+    page = invoice_repo.get_page(limit=10)
+
+    assert page.items == []
+    assert page.next_cursor is None
@@ -0,0 +1,223 @@
+"""
+Tests for the transactional outbox: events are stored with the unit of work's
+changes and delivered by the relay in batches, at least once.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from core.domain_events import EventPublisher
+from core.events.product_events import ProductCreated, ProductPriceChanged
+from infrastructure.persistence.outbox import (
+    OutboxRelay,
+    decode_event,
+    encode_event,
+    event_type_name,
+    record_events,
+    set_outbox_relay,
+)
+from infrastructure.persistence.sqlite.models_mapping import OutboxMessageOrm
+from infrastructure.persistence.unit_of_work import unit_of_work
+
+
+@pytest.fixture(autouse=True)
+def clear_event_handlers():
+    EventPublisher.clear_handlers()
+    yield
+    EventPublisher.clear_handlers()
+
+
+@pytest.fixture
+def relay(clean_db):
+    relay = OutboxRelay(batch_size=500, retry_delay=0, max_attempts=3)
+    set_outbox_relay(relay)
+    yield relay
+    set_outbox_relay(None)
+
+
+def _price_changed(product_id, new_price="2.50"):
+    return ProductPriceChanged(
+        product_id=product_id, code=f"P{product_id}", old_price=Decimal("2.00"), new_price=Decimal(new_price)
+    )
+
+
+def _messages(session):
+    return session.execute(select(OutboxMessageOrm).order_by(OutboxMessageOrm.id)).scalars().all()
+
+
+def test_events_round_trip_through_their_payload():
+    event = _price_changed(7, "3.10")
+
+    decoded = decode_event(event_type_name(ProductPriceChanged), encode_event(event), str(event.event_id))
+
+    assert decoded == event
+    assert decoded.event_id == event.event_id
+    assert decoded.new_price == Decimal("3.10")
+    assert decoded.price_change_percent == Decimal("55.00")
+
+
+def test_events_are_stored_in_the_unit_of_work_and_delivered_by_the_relay(clean_db, relay):
+    session, _ = clean_db
+    delivered, inline = [], []
+    EventPublisher.subscribe(ProductPriceChanged, delivered.append)
+    EventPublisher.subscribe(ProductPriceChanged, inline.append, inline=True)
+
+    event = _price_changed(1)
+    with unit_of_work() as uow:
+        uow.add_event(event)
+
+    [message] = _messages(session)
+    assert message.idempotency_key == str(event.event_id)
+    assert message.aggregate_key == "product_id:1"
+    assert message.delivered_at is None
+    assert inline == [event]  # inline handlers still run at commit
+    assert delivered == []
+
+    assert relay.deliver_pending() == 1
+
+    assert delivered == [event]
+    assert inline == [event]
+    session.refresh(message)
+    assert message.delivered_at is not None
+    assert relay.deliver_pending() == 0
+
+
+def test_a_rolled_back_unit_of_work_stores_no_events(clean_db, relay):
+    session, _ = clean_db
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work() as uow:
+            uow.add_event(_price_changed(1))
+            raise RuntimeError("abort")
+
+    assert _messages(session) == []
+
+
+def test_batch_handlers_get_every_pending_event_of_their_type_at_once(clean_db, relay):
+    batches, single = [], []
+    EventPublisher.subscribe_batch(ProductPriceChanged, batches.append)
+    EventPublisher.subscribe(ProductCreated, single.append)
+
+    with unit_of_work() as uow:
+        for product_id in range(500):
+            uow.add_event(_price_changed(product_id))
+        uow.add_event(
+            ProductCreated(
+                product_id=501, code="NEW", description="New", sell_price=None, department_id=None, user_id=None
+            )
+        )
+
+    assert relay.deliver_pending() == 500  # one batch
+    assert relay.deliver_pending() == 1
+
+    assert len(batches) == 1
+    assert [event.product_id for event in batches[0]] == list(range(500))
+    assert [event.code for event in single] == ["NEW"]
+
+
+def test_published_events_reach_batch_handlers_one_by_one():
+    batches = []
+    EventPublisher.subscribe_batch(ProductPriceChanged, batches.append)
+
+    EventPublisher.publish(_price_changed(1))
+
+    assert [len(batch) for batch in batches] == [1]
+
+
+def test_failed_deliveries_are_retried_with_the_same_idempotency_key(clean_db, relay):
+    session, _ = clean_db
+    seen = []
+
+    def flaky_handler(event):
+        seen.append(event.event_id)
+        if len(seen) == 1:
+            raise ConnectionError("label printer offline")
+
+    EventPublisher.subscribe(ProductPriceChanged, flaky_handler)
+    with unit_of_work() as uow:
+        uow.add_event(_price_changed(1))
+
+    assert relay.deliver_pending() == 0
+    [message] = _messages(session)
+    assert message.attempts == 1
+    assert "label printer offline" in message.last_error
+
+    assert relay.deliver_pending() == 1
+    assert len(seen) == 2 and seen[0] == seen[1]
+    assert relay.stats() == {"pending": 0, "delivered": 1, "failed": 0}
+
+
+def test_a_message_is_given_up_after_max_attempts(clean_db, relay):
+    def broken_handler(event):
+        raise ValueError("always fails")
+
+    EventPublisher.subscribe(ProductPriceChanged, broken_handler)
+    with unit_of_work() as uow:
+        uow.add_event(_price_changed(1))
+
+    for _ in range(relay.max_attempts + 2):
+        relay.deliver_pending()
+
+    assert relay.stats() == {"pending": 0, "delivered": 0, "failed": 1}
+
+
+def test_later_messages_of_an_aggregate_wait_for_a_failed_one(clean_db, relay):
+    session, _ = clean_db
+    relay.retry_delay = 60
+    seen = []
+
+    def flaky_handler(event):
+        seen.append((event.product_id, event.new_price))
+        if len(seen) == 1:
+            raise ConnectionError("label printer offline")
+
+    EventPublisher.subscribe(ProductPriceChanged, flaky_handler)
+    with unit_of_work() as uow:
+        uow.add_event(_price_changed(1, "3.00"))
+        uow.add_event(_price_changed(2, "5.00"))
+        uow.add_event(_price_changed(1, "4.00"))
+
+    # Product 1's second change is held back behind its failed first one
+    assert relay.deliver_pending() == 1
+    assert relay.deliver_pending() == 0
+    first, second, later = _messages(session)
+    assert (first.attempts, second.delivered_at is not None, later.attempts) == (1, True, 0)
+
+    first.available_at = datetime.now() - timedelta(seconds=1)
+    session.flush()
+    assert relay.deliver_pending() == 2
+    assert [price for product_id, price in seen if product_id == 1] == [
+        Decimal("3.00"),
+        Decimal("3.00"),
+        Decimal("4.00"),
+    ]
+    assert relay.stats() == {"pending": 0, "delivered": 3, "failed": 0}
+
+
+def test_recording_an_event_twice_keeps_one_message(clean_db):
+    session, _ = clean_db
+    event = _price_changed(1)
+
+    record_events(session, [event])
+    record_events(session, [event])
+
+    assert session.scalar(select(func.count()).select_from(OutboxMessageOrm)) == 1
+
+
+def test_prune_deletes_only_old_delivered_messages(clean_db, relay):
+    session, _ = clean_db
+    with unit_of_work() as uow:
+        uow.add_event(_price_changed(1))
+    relay.deliver_pending()
+    with unit_of_work() as uow:
+        uow.add_event(_price_changed(2))  # still pending
+
+    assert relay.prune() == 0
+    assert relay.prune(now=datetime.now() + timedelta(days=relay.retention_days + 1)) == 1
+
+    [pending] = _messages(session)
+    assert pending.aggregate_key == "product_id:2"
+    assert pending.delivered_at is None
@@ -4,7 +4,7 @@ import uuid
 import datetime
 from decimal import Decimal
 import time
-from sqlalchemy import delete, text
+from sqlalchemy import delete, event, text
 import sys
 import os
 
@@ -13,10 +13,10 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from core.models.product import Product, Department
+from core.models.product import Product, ProductRow, Department
 from infrastructure.persistence.sqlite.repositories import SqliteProductRepository, SqliteDepartmentRepository
 from infrastructure.persistence.sqlite.database import Base, engine
-from infrastructure.persistence.sqlite.models_mapping import ProductOrm, DepartmentOrm
+from infrastructure.persistence.sqlite.models_mapping import ProductOrm, DepartmentOrm, ProductPriceHistoryOrm
 
 # --- Helper Functions ---
 
@@ -248,6 +248,69 @@ def test_search_product(test_db_session, setup_department):
     results = repo.search("NoSuchProduct")
     assert len(results) == 0
 
+def test_search_product_full_text(test_db_session, setup_department):
+    """Full-text search ignores accents, matches word prefixes and honours limit."""
+    dept = setup_department
+    repo = SqliteProductRepository(test_db_session)
+
+    cafe = repo.add(Product(code="FTS01", description="Café molido 500g", department_id=dept.id))
+    coca = repo.add(Product(code="FTS02", description="Coca Cola 2L", department_id=dept.id))
+    repo.add(Product(code="FTS03", description="Coca Cola Zero 2L", department_id=dept.id))
+    repo.add(Product(code="FTS04", description="Cola de ratón", department_id=dept.id))
+
+    assert [p.id for p in repo.search("cafe")] == [cafe.id]
+    assert [p.id for p in repo.search("MOLI")] == [cafe.id]
+
+    # Every word must match as a prefix
+    results = repo.search("coca co")
+    assert {p.code for p in results} == {"FTS02", "FTS03"}
+    assert len(repo.search("cola", limit=2)) == 2
+
+    # Exact code match comes first even when other products match too
+    results = repo.search("FTS02", limit=1)
+    assert [p.id for p in results] == [coca.id]
+    # ...whatever the case the code was typed in
+    assert [p.id for p in repo.search("fts02", limit=1)] == [coca.id]
+    assert [r.id for r in repo.search_rows("fts02", limit=1)] == [coca.id]
+
+    # Punctuation and FTS operators typed by the user are treated as text
+    assert repo.search('coca "OR') == []
+    assert [p.id for p in repo.search("café*")] == [cafe.id]
+
+def test_search_index_follows_updates_and_deletes(test_db_session, setup_department):
+    """The full-text index is kept in sync with product changes."""
+    dept = setup_department
+    repo = SqliteProductRepository(test_db_session)
+
+    product = repo.add(Product(code="SYNC01", description="Yerba mate", department_id=dept.id))
+    assert [p.id for p in repo.search("yerba")] == [product.id]
+
+    product.description = "Té verde"
+    repo.update(product)
+    assert repo.search("yerba") == []
+    assert [p.id for p in repo.search("te verde")] == [product.id]
+
+    repo.delete(product.id)
+    assert repo.search("verde") == []
+    assert repo.search("SYNC01") == []
+
+def test_decrease_stock_checks_stock_in_the_update(test_db_session, setup_department):
+    """Decrements apply only while every product still has the stock they need."""
+    repo = SqliteProductRepository(test_db_session)
+    first = repo.add(Product(code="DEC01", description="First", quantity_in_stock=Decimal("5")))
+    second = repo.add(Product(code="DEC02", description="Second", quantity_in_stock=Decimal("5")))
+
+    repo.decrease_stock({first.id: Decimal("4"), second.id: Decimal("5")})
+    stock = {p.id: p.quantity_in_stock for p in repo.get_by_ids([first.id, second.id]).values()}
+    assert stock == {first.id: Decimal("1"), second.id: Decimal("0")}
+
+    # A checkout that read the stock before the first one wrote is refused
+    with pytest.raises(ValueError, match=r"Insufficient stock for product DEC01 \(requires 4, has 1"):
+        repo.decrease_stock({first.id: Decimal("4")})
+    with pytest.raises(ValueError, match="Product with ID 999999 not found"):
+        repo.decrease_stock({999999: Decimal("1")})
+    assert repo.get_by_id(first.id).quantity_in_stock == Decimal("1")
+
 def test_update_stock(test_db_session, setup_department, request):
     """Test updating product stock with transactional isolation."""
     
@@ -261,15 +324,22 @@ def test_update_stock(test_db_session, setup_department, request):
     ))
     original_id = prod.id
     
-    # Update stock and commit
-    updated_stock_value = Decimal("35.5")
-    repo.update_stock(original_id, updated_stock_value)
+    # The change is added to the stored stock
+    returned = repo.update_stock(original_id, Decimal("35.5"))
+    assert returned.quantity_in_stock == Decimal("60.5")
+    repo.update_stock(original_id, Decimal("-10.5"), cost_price=Decimal("4.20"))
 
     # Verify update by fetching fresh
     retrieved_prod = repo.get_by_id(original_id)
     assert retrieved_prod is not None
-    # Convert both to float for comparison
-    assert abs(float(retrieved_prod.quantity_in_stock) - float(updated_stock_value)) < 0.0001
+    assert retrieved_prod.quantity_in_stock == Decimal("50")
+    assert retrieved_prod.cost_price == Decimal("4.20")
+    assert retrieved_prod.version == 3
+
+    # A decrement the stock does not cover changes nothing
+    with pytest.raises(ValueError, match=r"Insufficient stock for product STOCK01 \(requires 51, has 50"):
+        repo.update_stock(original_id, Decimal("-51"))
+    assert repo.get_by_id(original_id).quantity_in_stock == Decimal("50")
 
     # Test update stock for non-existent product
     try:
@@ -280,6 +350,60 @@ def test_update_stock(test_db_session, setup_department, request):
         pytest.fail(f"update_stock on non-existent product raised an error: {e}")
     
 
+def test_update_prices_by_percentage_records_history(test_db_session, setup_department):
+    """Test the set-based repricing: rounding, zero floor, department scope and history."""
+    dept = setup_department
+    other_dept = create_department(test_db_session, name="Other Pricing Dept")
+    repo = SqliteProductRepository(test_db_session)
+    rounded = repo.add(Product(code="PRICE01", description="Rounded", sell_price=Decimal("10.33"),
+                               cost_price=Decimal("5.11"), department_id=dept.id))
+    second = repo.add(Product(code="PRICE02", description="Second", sell_price=Decimal("200.00"),
+                              cost_price=Decimal("80.00"), department_id=dept.id))
+    elsewhere = repo.add(Product(code="PRICE03", description="Other department",
+                                 sell_price=Decimal("100.00"), cost_price=Decimal("50.00"),
+                                 department_id=other_dept.id))
+
+    assert repo.update_prices_by_percentage(Decimal("10.555"), department_id=dept.id) == 2
+
+    # 10.33 * 1.10555 = 11.4236315 -> 11.42, 5.11 * 1.10555 = 5.6493605 -> 5.65
+    assert repo.get_by_id(rounded.id).sell_price == Decimal("11.42")
+    assert repo.get_by_id(rounded.id).cost_price == Decimal("5.65")
+    assert repo.get_by_id(second.id).sell_price == Decimal("221.11")
+    assert repo.get_by_id(second.id).cost_price == Decimal("88.44")
+    assert repo.get_by_id(elsewhere.id).sell_price == Decimal("100.00")
+
+    history = test_db_session.query(ProductPriceHistoryOrm).order_by(ProductPriceHistoryOrm.product_id).all()
+    assert [(h.product_id, h.old_sell_price, h.new_sell_price) for h in history] == [
+        (rounded.id, Decimal("10.33"), Decimal("11.42")),
+        (second.id, Decimal("200.00"), Decimal("221.11")),
+    ]
+    assert history[0].percentage == Decimal("10.555")
+
+    # Deep cuts still leave prices rounded to the cent
+    assert repo.update_prices_by_percentage(Decimal("-99.9")) == 3
+    assert repo.get_by_id(elsewhere.id).sell_price == Decimal("0.10")
+    assert repo.get_by_id(rounded.id).cost_price == Decimal("0.01")
+    assert test_db_session.query(ProductPriceHistoryOrm).count() == 5
+
+
+def test_update_prices_by_percentage_keeps_loaded_products_current(test_db_session, setup_department):
+    """Products already loaded in the session see the repricing and its version bump."""
+    repo = SqliteProductRepository(test_db_session)
+    added = repo.add(Product(code="PRICE10", description="Loaded", sell_price=Decimal("10.00"),
+                             cost_price=Decimal("4.00"), department_id=setup_department.id))
+    loaded = test_db_session.get(ProductOrm, added.id)
+    version = loaded.version
+
+    repo.update_prices_by_percentage(Decimal("10"))
+
+    assert loaded.version == version + 1
+    assert loaded.sell_price == Decimal("11.00")
+    # The session's copy is current, so editing it is not a stale write
+    loaded.description = "Edited after repricing"
+    test_db_session.flush()
+    assert repo.get_by_id(added.id).version == version + 2
+
+
 def test_get_low_stock(test_db_session, setup_department, request):
     """Test retrieving products with low stock with transactional isolation."""
     
@@ -372,3 +496,118 @@ def test_get_all_products_sorting(test_db_session, setup_department, request):
     # Sort by code descending
     sorted_code = repo.get_all(sort_params={"sort_by": "code", "sort_order": "desc"})
     assert [p.code for p in sorted_code] == ["SORT04", "SORT03", "SORT02", "SORT01"]
+
+
+def test_get_page_walks_the_catalog_by_keyset(test_db_session, setup_department):
+    """Keyset pages cover every product once, in description order, without OFFSET."""
+    repo = SqliteProductRepository(test_db_session)
+    # Repeated descriptions make the id part of the cursor matter
+    for i in range(7):
+        repo.add(Product(code=f"PAGE{i}", description=f"Item {i % 3}", sell_price=Decimal("1.00")))
+    expected = [p.code for p in repo.get_all(sort_params={"sort_by": "description"})]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(test_db_session.bind, "before_cursor_execute", listener)
+    try:
+        seen, after = [], None
+        while True:
+            page = repo.get_page(after, limit=3)
+            seen.extend(page.items)
+            after = page.next_cursor
+            if after is None:
+                break
+    finally:
+        event.remove(test_db_session.bind, "before_cursor_execute", listener)
+
+    assert sorted(p.code for p in seen) == sorted(expected)
+    assert [p.description for p in seen] == sorted(p.description for p in seen)
+    assert len(statements) == 3
+    # Later pages seek past the previous page's last row
+    assert all("(products.description, products.id) >" in s for s in statements[1:])
+    assert len(repo.get_page(limit=7).items) == 7
+    assert repo.get_page(limit=7).next_cursor is None
+
+
+def test_row_projections_match_the_full_products(test_db_session, setup_department):
+    """ProductRow listings show the same rows and columns as the Product ones."""
+    repo = SqliteProductRepository(test_db_session)
+    repo.add(Product(code="ROW1", description="Row Low", sell_price=Decimal("2.00"), cost_price=Decimal("1.00"),
+                     quantity_in_stock=Decimal("1"), min_stock=Decimal("5"), department_id=setup_department.id))
+    repo.add(Product(code="ROW2", description="Row Plenty", sell_price=Decimal("3.00"),
+                     quantity_in_stock=Decimal("50"), min_stock=Decimal("5")))
+    repo.add(Product(code="ROW3", description="Row Service", sell_price=Decimal("4.00"), uses_inventory=False))
+
+    rows = repo.search_rows("Row")
+    assert [r.code for r in rows] == [p.code for p in repo.search("Row")]
+    low = rows[0]
+    assert isinstance(low, ProductRow)
+    assert (low.sell_price, low.cost_price, low.quantity_in_stock) == (Decimal("2.00"), Decimal("1.00"), Decimal("1"))
+    assert low.department_name == setup_department.name
+    assert not hasattr(low, "__dict__")
+
+    assert [r.code for r in repo.get_inventory_rows()] == [p.code for p in repo.get_inventory_report()]
+    assert [r.code for r in repo.get_inventory_rows(setup_department.id)] == ["ROW1"]
+    assert [r.code for r in repo.get_low_stock_rows()] == [p.code for p in repo.get_low_stock()] == ["ROW1"]
+
+    first = repo.get_row_page(limit=2)
+    rest = repo.get_row_page(first.next_cursor, limit=2)
+    assert [r.code for r in first.items + rest.items] == [p.code for p in repo.get_page(limit=3).items]
+    assert rest.next_cursor is None
+
+
+def test_specifications_are_answered_in_sql(test_db_session, setup_department):
+    """find/count/exists filter in SQL and agree with the in-memory evaluation."""
+    from core.interfaces.specification_repository import InMemorySpecificationRepository
+    from core.specifications.product_specifications import (
+        products_description_like,
+        products_in_department,
+        products_in_stock,
+        products_low_stock,
+    )
+
+    repo = SqliteProductRepository(test_db_session)
+    other_dept = create_department(test_db_session, "Spec Other Dept")
+    for i in range(6):
+        repo.add(Product(
+            code=f"SPEC{i}",
+            description=f"Spec product {i}",
+            sell_price=Decimal("10"),
+            quantity_in_stock=Decimal(i % 3),
+            min_stock=Decimal("1") if i % 2 else None,
+            department_id=setup_department.id if i < 4 else other_dept.id,
+        ))
+    spec = products_in_department(setup_department.id).and_(
+        products_in_stock().or_(products_low_stock().not_())
+    )
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = test_db_session.connection()
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        found = repo.find_by_specification(spec)
+        count = repo.count_by_specification(spec)
+        exists = repo.exists_by_specification(products_description_like("spec product 5"))
+        missing = repo.exists_by_specification(products_description_like("no such"))
+        page = repo.find_by_specification_paginated(spec, limit=2, offset=1)
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+    in_memory = InMemorySpecificationRepository[Product]()
+    for product in repo.get_all():
+        in_memory.add(product)
+    expected = sorted(p.code for p in in_memory.find_by_specification(spec))
+
+    # SPEC0 is stored with the default min_stock of 0, so it counts as low stock
+    assert sorted(p.code for p in found) == expected == ["SPEC1", "SPEC2"]
+    assert count == 2
+    assert exists is True and missing is False
+    assert [p.code for p in page] == ["SPEC2"]
+    assert found[0].department.name == setup_department.name
+    assert len(statements) == 5
+    assert "count(*)" in statements[1]
+    assert "EXISTS" in statements[2]
@@ -0,0 +1,83 @@
+"""
+Latency benchmark of product search on a large catalog.
+
+Seeds 200k SKUs and times the as-you-type searches of the sales screen:
+a scanned code typed in another case, a word prefix and a multi-word
+prefix. Each must answer within the per-keystroke budget. Run with ``-s``
+to see the figures.
+"""
+
+import time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from infrastructure.persistence.sqlite.models_mapping import DepartmentOrm, ProductOrm
+from infrastructure.persistence.sqlite.product_search import bulk_product_search_sync
+from infrastructure.persistence.sqlite.repositories import SqliteProductRepository
+
+BENCHMARK_PRODUCTS = 200_000
+SEARCH_LIMIT = 20
+# Per-keystroke budget of the suggestion list, in seconds
+SEARCH_BUDGET = 0.010
+WORDS = ("aceite", "arroz", "azucar", "cafe", "galletas", "harina", "leche", "yerba")
+BRANDS = tuple(f"marca{i:02d}" for i in range(40))
+
+
+def seed_products(session, num_products: int):
+    """Bulk insert a catalog, indexing it set-based like the importer does."""
+    dept_id = session.execute(
+        insert(DepartmentOrm).returning(DepartmentOrm.id),
+        [{"name": "Search Bench Dept"}],
+    ).scalar_one()
+    rows = [
+        {
+            "code": f"SKU-{i:06d}",
+            "description": (
+                f"{WORDS[i % len(WORDS)]} {BRANDS[i // len(WORDS) % len(BRANDS)]} {i % 997}g"
+            ),
+            "cost_price": Decimal("6.00"),
+            "sell_price": Decimal("10.00"),
+            "department_id": dept_id,
+        }
+        for i in range(num_products)
+    ]
+    with bulk_product_search_sync(session, [row["code"] for row in rows]):
+        session.execute(insert(ProductOrm), rows)
+    session.flush()
+
+
+def best_time(search, term):
+    """Best of a few runs, so one slow run of a shared CI box does not fail it."""
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        results = search(term, limit=SEARCH_LIMIT)
+        timings.append(time.perf_counter() - started)
+    return results, min(timings)
+
+
+@pytest.mark.timeout(300)
+def test_search_answers_within_budget_on_200k_skus(test_db_session):
+    """Exact code and prefix searches stay under 10 ms on a 200k SKU catalog."""
+    seed_products(test_db_session, BENCHMARK_PRODUCTS)
+    repository = SqliteProductRepository(test_db_session)
+
+    results, exact_time = best_time(repository.search_rows, "sku-123456")
+    assert [row.code for row in results][:1] == ["SKU-123456"]
+
+    results, prefix_time = best_time(repository.search_rows, "yerb")
+    assert len(results) == SEARCH_LIMIT
+
+    results, words_time = best_time(repository.search_rows, "cafe marca07 12")
+    assert results and all(row.description.startswith("cafe") for row in results)
+
+    print(
+        f"\nexact code: {exact_time * 1000:6.2f} ms"
+        f"\nprefix:     {prefix_time * 1000:6.2f} ms"
+        f"\nwords:      {words_time * 1000:6.2f} ms"
+    )
+    assert exact_time < SEARCH_BUDGET
+    assert prefix_time < SEARCH_BUDGET
+    assert words_time < SEARCH_BUDGET
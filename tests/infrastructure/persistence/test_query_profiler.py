@@ -0,0 +1,153 @@
+"""
+Tests for the SQL query profiler: per-operation attribution, N+1 flagging,
+slow-query plans and the JSON dump.
+"""
+
+import json
+import logging
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from core.models.product import Product
+from core.services.product_service import ProductService
+from infrastructure.persistence.sqlite.query_profiler import (
+    OUTSIDE_UNIT_OF_WORK,
+    active_query_profiler,
+    install_query_profiler,
+    uninstall_query_profiler,
+)
+from infrastructure.persistence.unit_of_work import unit_of_work
+
+
+class StockAudit:
+    """Looks products up one by one, the N+1 shape the profiler flags."""
+
+    def check(self, product_ids):
+        with unit_of_work(read_only=True) as uow:
+            return [uow.products.get_by_id(product_id) for product_id in product_ids]
+
+
+@pytest.fixture
+def products(clean_db):
+    session, _ = clean_db
+    with unit_of_work() as uow:
+        added = [
+            uow.products.add(
+                Product(
+                    code=f"PROF{n}",
+                    description=f"Profiled {n}",
+                    cost_price=Decimal("1"),
+                    sell_price=Decimal("2"),
+                    quantity_in_stock=Decimal("10"),
+                )
+            )
+            for n in range(6)
+        ]
+    session.expunge_all()
+    return added
+
+
+@pytest.fixture
+def profiler(test_engine):
+    profiler = install_query_profiler(test_engine, slow_query_ms=10_000, n_plus_one_threshold=5)
+    yield profiler
+    uninstall_query_profiler()
+
+
+def _operation(snapshot, name):
+    return next(op for op in snapshot["operations"] if op["name"] == name)
+
+
+def test_statements_are_attributed_to_the_service_method(products, profiler):
+    assert active_query_profiler() is profiler
+
+    ProductService().get_all_products()
+    ProductService().get_all_products()
+
+    operation = _operation(profiler.snapshot(), "ProductService.get_all_products")
+    assert operation["calls"] == 2
+    assert operation["statements"] >= 2
+    assert operation["max_statements"] >= 1
+    assert operation["n_plus_one"] == 0
+
+
+def test_writes_count_their_rows(clean_db, profiler):
+    class Catalog:
+        def add_products(self):
+            with unit_of_work() as uow:
+                for n in range(3):
+                    uow.products.add(Product(code=f"ROWS{n}", description=f"Rows {n}"))
+
+    Catalog().add_products()
+
+    operation = _operation(profiler.snapshot(), "Catalog.add_products")
+    assert operation["rows"] >= 3
+
+
+def test_repeated_statement_in_one_unit_of_work_is_flagged(products, profiler, caplog):
+    with caplog.at_level(logging.WARNING):
+        StockAudit().check([product.id for product in products])
+
+    snapshot = profiler.snapshot()
+    assert _operation(snapshot, "StockAudit.check")["n_plus_one"] == 1
+    [finding] = snapshot["n_plus_one"]
+    assert finding["operation"] == "StockAudit.check"
+    assert finding["executions"] == len(products)
+    assert "FROM products" in finding["statement"]
+    assert "Probable N+1 in StockAudit.check" in caplog.text
+
+
+def test_lookups_spread_over_units_of_work_are_not_flagged(products, profiler):
+    for product in products:
+        StockAudit().check([product.id])
+
+    snapshot = profiler.snapshot()
+    assert _operation(snapshot, "StockAudit.check")["calls"] == len(products)
+    assert snapshot["n_plus_one"] == []
+
+
+def test_slow_queries_are_logged_with_their_plan(products, profiler, caplog):
+    profiler.slow_query_ms = 0
+
+    with caplog.at_level(logging.WARNING):
+        ProductService().get_all_products()
+
+    slow = [q for q in profiler.snapshot()["slow_queries"] if "FROM products" in q["statement"]]
+    assert slow
+    assert slow[0]["operation"] == "ProductService.get_all_products"
+    assert any("products" in step for step in slow[0]["plan"])
+    assert "Slow query in ProductService.get_all_products" in caplog.text
+
+
+def test_statements_outside_a_unit_of_work_are_grouped(clean_db, profiler):
+    session, _ = clean_db
+
+    session.execute(text("SELECT 1"))
+
+    assert _operation(profiler.snapshot(), OUTSIDE_UNIT_OF_WORK)["statements"] >= 1
+
+
+def test_dump_json_round_trips_the_snapshot(products, profiler, tmp_path):
+    StockAudit().check([product.id for product in products])
+    path = tmp_path / "profile.json"
+
+    profiler.dump_json(str(path))
+
+    dumped = json.loads(path.read_text(encoding="utf-8"))
+    assert dumped["operations"] == profiler.snapshot()["operations"]
+    assert dumped["n_plus_one"][0]["operation"] == "StockAudit.check"
+    assert dumped["totals"]["statements"] >= len(products)
+
+
+def test_reset_and_uninstall(products, profiler):
+    ProductService().get_all_products()
+    profiler.reset()
+    assert profiler.snapshot()["operations"] == []
+
+    uninstall_query_profiler()
+    ProductService().get_all_products()
+
+    assert active_query_profiler() is None
+    assert profiler.snapshot()["operations"] == []
@@ -0,0 +1,307 @@
+"""
+Tests for the CQRS read model tables: the projection from domain events,
+the rebuild, and the query handlers answering from them.
+
+After any sequence of writes the incrementally projected tables must equal
+a rebuild from the write tables.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from core.cqrs.commands import RebuildReadModelsCommand
+from core.cqrs.handlers import (
+    GetDashboardSummaryQueryHandler,
+    GetLowStockProductsQueryHandler,
+    GetProductByCodeQueryHandler,
+    GetSalesQueryHandler,
+    RebuildReadModelsCommandHandler,
+    SearchProductsQueryHandler,
+)
+from core.cqrs.projections import ReadModelProjector
+from core.cqrs.queries import (
+    GetDashboardSummaryQuery,
+    GetLowStockProductsQuery,
+    GetProductByCodeQuery,
+    GetSalesQuery,
+    SearchProductsQuery,
+)
+from core.domain_events import EventPublisher
+from core.events.product_events import ProductPriceChanged
+from core.models.enums import PaymentType
+from core.models.product import Department, Product
+from core.services.customer_service import CustomerService
+from core.services.inventory_service import InventoryService
+from core.services.product_service import ProductService
+from core.services.sale_service import SaleService
+from infrastructure.persistence.sqlite.read_models import (
+    READ_CATALOG_SUMMARY,
+    READ_PRODUCTS,
+    READ_SALES,
+)
+
+
+@pytest.fixture(autouse=True, params=["events", "transactions"])
+def projector(request):
+    EventPublisher.clear_handlers()
+    projector = ReadModelProjector()
+    if request.param == "events":
+        projector.attach()
+    else:
+        projector.attach_to_transactions()
+    yield projector
+    projector.detach()
+    EventPublisher.clear_handlers()
+
+
+@pytest.fixture
+def services(clean_db):
+    product_service = ProductService()
+    inventory_service = InventoryService()
+    sale_service = SaleService(inventory_service, CustomerService())
+    return product_service, inventory_service, sale_service
+
+
+@pytest.fixture
+def catalog(services):
+    product_service, _, _ = services
+    bebidas = product_service.add_department(Department(name="Bebidas read"))
+    products = [
+        product_service.add_product(
+            Product(
+                code=code,
+                description=description,
+                cost_price=Decimal(cost),
+                sell_price=Decimal(price),
+                department_id=bebidas.id,
+                quantity_in_stock=Decimal(stock),
+                min_stock=Decimal("5"),
+            )
+        )
+        for code, description, cost, price, stock in [
+            ("RM-AGUA", "Agua mineral", "0.50", "1.00", "20"),
+            ("RM-COLA", "Cola 2L", "1.20", "2.50", "3"),
+            ("RM-JUGO", "Jugo de naranja", "0.90", "1.80", "0"),
+        ]
+    ]
+    return bebidas, products
+
+
+def _table(session, name, key):
+    return session.execute(text(f"SELECT * FROM {name} ORDER BY {key}")).fetchall()
+
+
+def _read_tables(session):
+    return (
+        _table(session, READ_PRODUCTS, "product_id"),
+        _table(session, READ_SALES, "sale_id"),
+        _table(session, READ_CATALOG_SUMMARY, "id"),
+    )
+
+
+def _code(code):
+    return GetProductByCodeQueryHandler().handle(GetProductByCodeQuery(code))
+
+
+def test_new_products_are_projected_with_their_department_and_stock_figures(catalog):
+    bebidas, _ = catalog
+
+    cola = _code("RM-COLA")
+
+    assert cola.department_name == "Bebidas read"
+    assert cola.unit_name == "Unidad"
+    assert cola.in_stock and cola.is_low_stock
+    assert cola.stock_value == Decimal("3.60")
+    assert not _code("RM-JUGO").in_stock
+
+
+def test_stock_price_and_delete_changes_reach_the_projection(clean_db, services, catalog):
+    product_service, inventory_service, _ = services
+    _, (agua, cola, jugo) = catalog
+
+    inventory_service.add_inventory(cola.id, Decimal("10"))
+    product_service.update_product(agua.model_copy(update={"sell_price": Decimal("1.10")}))
+    inventory_service.add_inventory(jugo.id, Decimal("1"))
+    inventory_service.adjust_inventory(jugo.id, Decimal("-1"), "Rotura")
+    sample = product_service.add_product(
+        Product(
+            code="RM-MUESTRA", description="Muestra", cost_price=Decimal("0.40"), sell_price=Decimal("1")
+        )
+    )
+    product_service.delete_product(sample.id)
+
+    assert _code("RM-COLA").quantity_in_stock == Decimal("13")
+    assert not _code("RM-COLA").is_low_stock
+    assert _code("RM-AGUA").sell_price == Decimal("1.10")
+    assert _code("RM-JUGO").quantity_in_stock == Decimal("0")
+    assert _code("RM-MUESTRA") is None
+
+
+def test_a_sale_is_projected_and_counted_on_the_dashboard(clean_db, services, catalog):
+    session, user = clean_db
+    _, _, sale_service = services
+    _, (agua, cola, _) = catalog
+    before = GetDashboardSummaryQueryHandler().handle(GetDashboardSummaryQuery())
+
+    sale = sale_service.create_sale(
+        [
+            {"product_id": agua.id, "quantity": Decimal("4")},
+            {"product_id": cola.id, "quantity": Decimal("1")},
+        ],
+        user_id=user.id,
+        payment_type=PaymentType.EFECTIVO,
+    )
+
+    [listed] = GetSalesQueryHandler().handle(GetSalesQuery(limit=1))
+    assert listed.id == sale.id
+    assert listed.total_amount == Decimal("6.50")
+    assert listed.payment_type == PaymentType.EFECTIVO.value
+    assert listed.item_count == 2
+    assert listed.total_quantity == Decimal("5")
+    assert listed.username == user.username
+
+    after = GetDashboardSummaryQueryHandler().handle(GetDashboardSummaryQuery())
+    assert after.day == date.today()
+    assert after.sales_count == before.sales_count + 1
+    assert after.sales_total == before.sales_total + Decimal("6.50")
+    # The stock sold leaves the catalog's stock value
+    assert after.stock_value == before.stock_value - Decimal("3.20")
+
+
+def test_department_rename_and_bulk_repricing_reproject_the_department(services, catalog):
+    product_service, _, _ = services
+    bebidas, _ = catalog
+
+    product_service.update_department(Department(id=bebidas.id, name="Refrescos read"))
+    product_service.update_prices_by_percentage(Decimal("10"), department_id=bebidas.id)
+
+    agua = _code("RM-AGUA")
+    assert agua.department_name == "Refrescos read"
+    assert agua.sell_price == Decimal("1.10")
+
+
+def test_incremental_projection_matches_a_rebuild(clean_db, services, catalog):
+    session, user = clean_db
+    product_service, inventory_service, sale_service = services
+    bebidas, (agua, cola, jugo) = catalog
+
+    inventory_service.add_inventory(jugo.id, Decimal("2.5"), new_cost_price=Decimal("1.00"))
+    product_service.update_prices_by_percentage(Decimal("-5"))
+    sale_service.create_sale(
+        [{"product_id": cola.id, "quantity": Decimal("2")}], user_id=user.id
+    )
+    agua = product_service.get_product_by_id(agua.id)
+    product_service.update_product(agua.model_copy(update={"min_stock": Decimal("50")}))
+    projected = _read_tables(session)
+
+    result = RebuildReadModelsCommandHandler().handle(RebuildReadModelsCommand())
+
+    assert result.is_success
+    assert result.data[READ_CATALOG_SUMMARY] == 1
+    assert _read_tables(session) == projected
+
+
+def test_search_pages_and_filters_the_projection(catalog):
+    search = SearchProductsQueryHandler()
+
+    assert [p.code for p in search.handle(SearchProductsQuery(search_term="rm-"))] == [
+        "RM-AGUA",
+        "RM-COLA",
+        "RM-JUGO",
+    ]
+    assert [p.code for p in search.handle(SearchProductsQuery(search_term="RM-", offset=1, limit=1))] == [
+        "RM-COLA"
+    ]
+    in_stock = search.handle(SearchProductsQuery(search_term="RM-", in_stock_only=True))
+    assert [p.code for p in in_stock] == ["RM-AGUA", "RM-COLA"]
+    priced = search.handle(
+        SearchProductsQuery(search_term="RM-", min_price=Decimal("1.50"), max_price=Decimal("2"))
+    )
+    assert [p.code for p in priced] == ["RM-JUGO"]
+    assert search.handle(SearchProductsQuery(search_term="100%_sin")) == []
+
+
+def test_low_stock_query_reads_the_partial_index(clean_db, catalog):
+    session, _ = clean_db
+    bebidas, _ = catalog
+
+    low = GetLowStockProductsQueryHandler().handle(GetLowStockProductsQuery(department_id=bebidas.id))
+
+    assert [p.code for p in low] == ["RM-COLA", "RM-JUGO"]
+    plan = session.execute(
+        text(f"EXPLAIN QUERY PLAN SELECT * FROM {READ_PRODUCTS} WHERE is_low_stock = 1 ORDER BY description")
+    ).fetchall()
+    assert "ix_read_products_low_stock" in str(plan)
+
+
+def test_a_batch_of_events_is_projected_at_once(clean_db, projector, catalog):
+    session, _ = clean_db
+    _, products = catalog
+    session.execute(text("UPDATE products SET sell_price = 9 WHERE code LIKE 'RM-%'"))
+
+    projector.project_products(
+        [
+            ProductPriceChanged(product_id=p.id, code=p.code, old_price=p.sell_price, new_price=Decimal("9"))
+            for p in products
+        ]
+    )
+
+    assert {p.sell_price for p in SearchProductsQueryHandler().handle(SearchProductsQuery("RM-"))} == {
+        Decimal("9.00")
+    }
+
+
+@pytest.mark.parametrize("projector", ["transactions"], indirect=True)
+def test_a_sale_is_projected_in_its_own_commit(clean_db, monkeypatch, services, catalog):
+    session, user = clean_db
+    _, _, sale_service = services
+    _, products = catalog
+    commits = []
+    commit = session.commit
+    monkeypatch.setattr(session, "commit", lambda: commits.append(1) or commit())
+
+    sale = sale_service.create_sale(
+        [{"product_id": p.id, "quantity": Decimal("1")} for p in products[:2]], user_id=user.id
+    )
+
+    assert len(commits) == 1
+    [listed] = GetSalesQueryHandler().handle(GetSalesQuery(limit=1))
+    assert (listed.id, listed.item_count) == (sale.id, 2)
+    assert _code("RM-AGUA").quantity_in_stock == Decimal("19")
+
+
+@pytest.mark.parametrize("projector", ["transactions"], indirect=True)
+def test_a_failed_projection_does_not_lose_the_sale(clean_db, monkeypatch, projector, services, catalog):
+    session, user = clean_db
+    _, _, sale_service = services
+    _, (agua, _, _) = catalog
+
+    def fail(read_models, events):
+        raise RuntimeError("read model down")
+
+    monkeypatch.setattr(projector, "_project_sales", fail)
+
+    sale = sale_service.create_sale([{"product_id": agua.id, "quantity": Decimal("1")}], user_id=user.id)
+
+    assert sale_service.get_sale_by_id(sale.id) is not None
+    # The whole projection is rolled back, stock included; a rebuild catches up
+    assert sale.id not in {s.id for s in GetSalesQueryHandler().handle(GetSalesQuery())}
+    assert _code("RM-AGUA").quantity_in_stock == Decimal("20")
+
+
+def test_query_handlers_given_a_service_use_its_products():
+    class Service:
+        def get_all_products(self, department_id=None):
+            return [
+                Product(id=1, code="A1", description="Arroz", sell_price=Decimal("2"), quantity_in_stock=Decimal("0")),
+                Product(id=2, code="F1", description="Fideos", sell_price=Decimal("3"), quantity_in_stock=Decimal("9")),
+            ]
+
+    results = SearchProductsQueryHandler(Service()).handle(SearchProductsQuery(in_stock_only=True))
+    low = GetLowStockProductsQueryHandler(Service()).handle(GetLowStockProductsQuery())
+
+    assert [p.code for p in results] == ["F1"]
+    assert [p.code for p in low] == ["A1"]
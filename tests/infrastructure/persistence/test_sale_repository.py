@@ -494,6 +494,103 @@ def test_calculate_profit_for_period(test_db_session, create_product, create_cus
     assert profit_data['profit'] == 33.0
     assert profit_data['margin'] == pytest.approx(0.367, 0.01)  # 33/90 = 0.367
 
+def test_calculate_profit_prefers_cost_snapshot(test_db_session, create_product):
+    """Lines with a cost snapshot use it instead of the product's current cost."""
+    product = create_product("SNAP", "Snapshot Product", price=10.0, cost=5.0)
+    test_db_session.commit()
+
+    repository = SqliteSaleRepository(test_db_session)
+    now = datetime.now()
+    sale = Sale(timestamp=now, payment_type=PaymentType.EFECTIVO, user_id=1)
+    sale.items = [
+        SaleItem(product_id=product.id, quantity=Decimal('4'), unit_price=Decimal('10.0'),
+                 product_code=product.code, product_description=product.description,
+                 cost_price=Decimal('7.50'))
+    ]
+    repository.add_sale(sale)
+    test_db_session.commit()
+
+    profit_data = repository.calculate_profit_for_period(now.date(), now.date())
+
+    assert profit_data['revenue'] == 40.0
+    assert profit_data['cost'] == 30.0
+    assert profit_data['total_profit'] == 10.0
+    assert profit_data['profit_margin'] == pytest.approx(0.25)
+
+def test_add_sale_snapshots_current_cost(test_db_session, create_product):
+    """Items without a cost are stored with the product's cost at the time of sale."""
+    product = create_product("COSTSNAP", "Cost Snapshot Product", price=10.0, cost=4.0)
+    test_db_session.commit()
+
+    repository = SqliteSaleRepository(test_db_session)
+    now = datetime.now()
+    sale = Sale(timestamp=now, payment_type=PaymentType.EFECTIVO, user_id=1)
+    sale.items = [
+        SaleItem(product_id=product.id, quantity=Decimal('2'), unit_price=Decimal('10.0'),
+                 product_code=product.code, product_description=product.description)
+    ]
+    saved_sale = repository.add_sale(sale)
+    test_db_session.commit()
+
+    assert saved_sale.items[0].cost_price == Decimal('4.00')
+
+    # A later cost change must not rewrite the margin of past sales
+    product_orm = test_db_session.get(ProductOrm, product.id)
+    product_orm.cost_price = Decimal('9.00')
+    test_db_session.commit()
+
+    profit_data = repository.calculate_profit_for_period(now.date(), now.date())
+    assert profit_data['cost'] == 8.0
+    assert profit_data['profit'] == 12.0
+
+def test_backfill_cost_snapshots(test_db_session, create_product):
+    """Backfill fills sale items without a snapshot in id-ordered batches."""
+    product = create_product("BACKFILL", "Backfill Product", price=10.0, cost=3.0)
+    sale_orm = SaleOrm(date_time=datetime.now(), total_amount=Decimal('50.00'))
+    test_db_session.add(sale_orm)
+    test_db_session.flush()
+    for _ in range(5):
+        test_db_session.add(SaleItemOrm(sale_id=sale_orm.id, product_id=product.id,
+                                        quantity=Decimal('1'), unit_price=Decimal('10.00'),
+                                        cost_price=None))
+    # A recorded zero cost is a snapshot, not a missing one
+    free_item = SaleItemOrm(sale_id=sale_orm.id, product_id=product.id, quantity=Decimal('1'),
+                            unit_price=Decimal('10.00'), cost_price=Decimal('0'))
+    test_db_session.add(free_item)
+    test_db_session.flush()
+
+    repository = SqliteSaleRepository(test_db_session)
+    total_updated = 0
+    batches = 0
+    last_id = 0
+    while last_id is not None:
+        updated, last_id = repository.backfill_cost_snapshots(after_id=last_id, batch_size=2)
+        total_updated += updated
+        batches += 1
+
+    assert total_updated == 5
+    assert batches == 4  # 2 + 2 + 1, then an empty batch ends the loop
+    test_db_session.expire_all()
+    costs = [item.cost_price for item in test_db_session.query(SaleItemOrm).filter_by(sale_id=sale_orm.id)]
+    assert sorted(costs) == [Decimal('0')] + [Decimal('3.00')] * 5
+    assert repository.backfill_cost_snapshots() == (0, None)
+
+def test_add_sale_keeps_zero_cost(test_db_session, create_product):
+    """A zero cost given at checkout is kept rather than replaced by the product's cost."""
+    product = create_product("ZEROCOST", "Free Sample", price=10.0, cost=4.0)
+    test_db_session.commit()
+
+    repository = SqliteSaleRepository(test_db_session)
+    sale = Sale(timestamp=datetime.now(), payment_type=PaymentType.EFECTIVO, user_id=1)
+    sale.items = [
+        SaleItem(product_id=product.id, quantity=Decimal('1'), unit_price=Decimal('10.0'),
+                 product_code=product.code, product_description=product.description,
+                 cost_price=Decimal('0'))
+    ]
+    saved_sale = repository.add_sale(sale)
+
+    assert saved_sale.items[0].cost_price == Decimal('0')
+
 def test_get_sale_by_id(test_db_session, create_product, create_customer):
     """Test retrieving a sale by ID."""
     # Create test data
@@ -591,3 +688,47 @@ def test_get_sales_by_period_filtering(test_db_session, create_product, create_c
     end_recent = now + timedelta(hours=1)
     sales_recent = repository.get_sales_by_period(start_recent, end_recent)
     assert len(sales_recent) == 2
+
+
+def test_sale_specifications_are_answered_in_sql(test_db_session, create_product, create_customer):
+    """Sale specifications compose and filter in SQL, newest sales first."""
+    from core.specifications.sale_specifications import (
+        cash_sales,
+        credit_sales,
+        sales_above_amount,
+        sales_by_customer,
+        sales_by_date_range,
+    )
+
+    product = create_product("SPECSALE", "Spec Sale Product", 10.0, 5.0)
+    customer = create_customer()
+    repository = SqliteSaleRepository(test_db_session)
+    day = datetime(2024, 5, 10, 9, 0, 0)
+    for hour, payment_type, quantity, is_credit in [
+        (0, PaymentType.EFECTIVO, 1, False),
+        (1, PaymentType.EFECTIVO, 5, False),
+        (2, PaymentType.CREDITO, 7, True),
+        (3, PaymentType.TARJETA, 2, False),
+    ]:
+        sale = Sale(
+            timestamp=day + timedelta(hours=hour),
+            payment_type=payment_type,
+            customer_id=customer.id if is_credit or hour == 1 else None,
+            is_credit_sale=is_credit,
+        )
+        sale.items = [
+            SaleItem(product_id=product.id, quantity=Decimal(quantity), unit_price=Decimal('10.0'),
+                     product_code=product.code, product_description=product.description)
+        ]
+        repository.add_sale(sale)
+
+    on_day = sales_by_date_range(day, day + timedelta(hours=23))
+    large_cash = on_day.and_(cash_sales()).and_(sales_above_amount(Decimal("20")))
+    customer_or_credit = sales_by_customer(customer.id).or_(credit_sales())
+
+    assert [s.total for s in repository.find_by_specification(large_cash)] == [Decimal("50.00")]
+    assert [s.timestamp.hour for s in repository.find_by_specification(on_day)] == [12, 11, 10, 9]
+    assert repository.count_by_specification(customer_or_credit) == 2
+    assert repository.exists_by_specification(on_day.and_(credit_sales().not_()))
+    assert [s.timestamp.hour for s in repository.find_by_specification_paginated(on_day, limit=2, offset=2)] == [10, 9]
+    assert len(repository.find_one_by_specification(on_day).items) == 1
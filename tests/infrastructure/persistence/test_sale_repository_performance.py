@@ -0,0 +1,150 @@
+"""
+Query-count benchmarks for the sale reporting paths.
+
+These tests seed a large number of sale lines and verify that the reporting
+queries issue a constant number of SQL statements regardless of how many
+lines fall in the reported period.
+"""
+
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event, insert
+
+from core.services.reporting_service import ReportingService
+from infrastructure.persistence.sqlite.models_mapping import (
+    DepartmentOrm,
+    ProductOrm,
+    SaleOrm,
+    SaleItemOrm,
+)
+from infrastructure.persistence.sqlite.repositories import SqliteSaleRepository
+
+LINES_PER_SALE = 10
+BENCHMARK_LINES = 100_000
+
+
+@contextmanager
+def count_statements(session):
+    """Count the SQL statements executed on the session's connection."""
+    statements = []
+    connection = session.connection()
+
+    def _before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", _before_cursor_execute)
+
+
+def seed_sale_lines(session, day: datetime, num_lines: int):
+    """Bulk insert sales with LINES_PER_SALE lines each, all on the given day."""
+    dept_id = session.execute(
+        insert(DepartmentOrm).returning(DepartmentOrm.id),
+        [{"name": f"Bench Dept {day:%Y%m%d}"}],
+    ).scalar_one()
+    product_ids = session.execute(
+        insert(ProductOrm).returning(ProductOrm.id),
+        [
+            {
+                "code": f"BENCH-{day:%Y%m%d}-{i}",
+                "description": f"Bench product {i}",
+                "cost_price": Decimal("6.00"),
+                "sell_price": Decimal("10.00"),
+                "department_id": dept_id,
+            }
+            for i in range(LINES_PER_SALE)
+        ],
+    ).scalars().all()
+
+    num_sales = num_lines // LINES_PER_SALE
+    sale_ids = session.execute(
+        insert(SaleOrm).returning(SaleOrm.id),
+        [
+            {"date_time": day + timedelta(seconds=i % 3600), "total_amount": 100}
+            for i in range(num_sales)
+        ],
+    ).scalars().all()
+
+    session.execute(
+        insert(SaleItemOrm),
+        [
+            {
+                "sale_id": sale_id,
+                "product_id": product_id,
+                "quantity": 1,
+                "unit_price": 10,
+                "cost_price": 6,
+            }
+            for sale_id in sale_ids
+            for product_id in product_ids
+        ],
+    )
+    session.flush()
+
+
+def test_profit_query_count_is_constant(test_db_session):
+    """calculate_profit_for_period issues one statement for 10 or 100k lines."""
+    small_day = datetime(2023, 1, 10, 9, 0, 0)
+    large_day = datetime(2023, 1, 11, 9, 0, 0)
+    seed_sale_lines(test_db_session, small_day, LINES_PER_SALE)
+    seed_sale_lines(test_db_session, large_day, BENCHMARK_LINES)
+
+    repository = SqliteSaleRepository(test_db_session)
+
+    with count_statements(test_db_session) as small_statements:
+        small = repository.calculate_profit_for_period(
+            small_day.date(), small_day.date()
+        )
+    with count_statements(test_db_session) as large_statements:
+        large = repository.calculate_profit_for_period(
+            large_day.date(), large_day.date()
+        )
+
+    assert len(small_statements) == 1
+    assert len(large_statements) == len(small_statements)
+
+    assert small["revenue"] == 100.0
+    assert small["cost"] == 60.0
+    assert large["revenue"] == BENCHMARK_LINES * 10.0
+    assert large["cost"] == BENCHMARK_LINES * 6.0
+    assert large["profit"] == BENCHMARK_LINES * 4.0
+    assert large["margin"] == pytest.approx(0.4)
+
+
+def test_reporting_service_query_count_does_not_scale(test_db_session):
+    """Daily and comparative reports issue the same statements for any line count."""
+    small_day = datetime(2023, 2, 10, 9, 0, 0)
+    large_day = datetime(2023, 2, 11, 9, 0, 0)
+    seed_sale_lines(test_db_session, small_day, LINES_PER_SALE)
+    seed_sale_lines(test_db_session, large_day, BENCHMARK_LINES)
+
+    service = ReportingService()
+
+    with count_statements(test_db_session) as small_statements:
+        small_report = service.get_daily_sales_report(small_day)
+    with count_statements(test_db_session) as large_statements:
+        large_report = service.get_daily_sales_report(large_day)
+
+    assert len(large_statements) == len(small_statements)
+    assert small_report["total_revenue"] == 100.0
+    assert large_report["total_revenue"] == BENCHMARK_LINES * 10.0
+    assert large_report["total_profit"] == BENCHMARK_LINES * 4.0
+
+    day_end = timedelta(hours=23)
+    with count_statements(test_db_session) as comparative_statements:
+        comparison = service.get_comparative_report(
+            large_day, large_day + day_end, small_day, small_day + day_end
+        )
+
+    # Two profit aggregates, two top-product and two payment-type queries;
+    # the shared test session skips the read-only unit of work's PRAGMAs
+    queries = [s for s in comparative_statements if not s.startswith("PRAGMA")]
+    assert len(queries) == 6
+    assert comparison["current_period_revenue"] == BENCHMARK_LINES * 10.0
+    assert comparison["previous_period_revenue"] == 100.0
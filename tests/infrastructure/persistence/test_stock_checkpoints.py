@@ -0,0 +1,225 @@
+"""
+Tests for the stock checkpoints of the inventory ledger, the stock at an
+instant, and the reconciliation of the stock with the ledger.
+
+Whatever checkpoints exist, the stock at an instant must equal the sum of
+all the product's movements up to it.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select, text
+
+from core.models.product import Product
+from core.services.inventory_service import InventoryService
+from infrastructure.persistence.sqlite.models_mapping import InventoryMovementOrm, ProductOrm
+from infrastructure.persistence.sqlite.repositories import (
+    SqliteInventoryRepository,
+    SqliteProductRepository,
+)
+from infrastructure.persistence.sqlite.stock_checkpoints import (
+    STOCK_CHECKPOINTS,
+    current_period_start,
+    refresh_stock_checkpoints,
+)
+
+# (product, timestamp, quantity); "0" has an opening stock the ledger lacks
+LEDGER = [
+    (0, "2026-06-03 09:15:00", "12"),
+    (0, "2026-06-20 18:00:00", "-2.5"),
+    (1, "2026-06-30 23:59:59", "40"),
+    (0, "2026-07-01 00:00:00", "-1"),
+    (1, "2026-07-14 11:30:00", "-15.25"),
+    (0, "2026-08-31 12:00:00", "6"),
+    (1, "2026-09-02 08:00:00", "-0.75"),
+    (0, "2026-09-02 17:45:00", "-3"),
+]
+
+INSTANTS = [
+    "2026-05-31 23:59:59",
+    "2026-06-03 09:15:00",
+    "2026-06-30 23:59:59",
+    "2026-07-01 00:00:00",
+    "2026-07-15 00:00:00",
+    "2026-08-31 23:59:59",
+    "2026-09-02 08:00:00",
+    "2026-10-01 00:00:00",
+]
+
+
+@pytest.fixture
+def ledger(clean_db):
+    session, _ = clean_db
+    products = SqliteProductRepository(session)
+    ids = [
+        products.add(
+            Product(code=code, description=code, quantity_in_stock=Decimal(stock), cost_price=Decimal("1"))
+        ).id
+        for code, stock in [("SC-CAFE", "20"), ("SC-AZUCAR", "0")]
+    ]
+    session.add_all(
+        InventoryMovementOrm(
+            product_id=ids[product],
+            timestamp=datetime.fromisoformat(timestamp),
+            movement_type="ADJUSTMENT",
+            quantity=Decimal(quantity),
+        )
+        for product, timestamp, quantity in LEDGER
+    )
+    session.flush()
+    return session, ids
+
+
+def _replay(session, product_id, at):
+    """The stock at an instant by summing the product's whole ledger."""
+    total = session.execute(
+        select(func.coalesce(func.sum(InventoryMovementOrm.quantity), 0)).where(
+            InventoryMovementOrm.product_id == product_id, InventoryMovementOrm.timestamp <= at
+        )
+    ).scalar_one()
+    return Decimal(str(total))
+
+
+def _checkpoints(session):
+    return session.execute(
+        text(f"SELECT product_id, day, quantity, movement_count FROM {STOCK_CHECKPOINTS} ORDER BY 1, 2")
+    ).fetchall()
+
+
+def _assert_as_of_matches_replay(session, ids):
+    repo = SqliteInventoryRepository(session)
+    for instant in INSTANTS:
+        at = datetime.fromisoformat(instant)
+        assert repo.stock_as_of(ids, at) == {pid: _replay(session, pid, at) for pid in ids}, instant
+
+
+def test_monthly_checkpoints_are_sparse_running_sums(ledger):
+    session, (cafe, azucar) = ledger
+
+    written = refresh_stock_checkpoints(session, "month", until="2026-09-01")
+
+    assert written == 5
+    assert _checkpoints(session) == [
+        (cafe, "2026-07-01", 9.5, 2),
+        (cafe, "2026-08-01", 8.5, 3),
+        (cafe, "2026-09-01", 14.5, 4),
+        (azucar, "2026-07-01", 40, 1),
+        (azucar, "2026-08-01", 24.75, 2),
+    ]
+    # Nothing closed since; the open period is never checkpointed
+    assert refresh_stock_checkpoints(session, "month", until="2026-09-01") == 0
+
+
+@pytest.mark.parametrize("granularity", ["day", "month"])
+def test_stock_as_of_matches_a_full_replay(ledger, granularity):
+    session, ids = ledger
+    _assert_as_of_matches_replay(session, ids)
+
+    refresh_stock_checkpoints(session, granularity, until="2026-10-01")
+
+    _assert_as_of_matches_replay(session, ids)
+    assert SqliteInventoryRepository(session).stock_as_of([ids[0], 999_999], datetime(2026, 7, 1)) == {
+        ids[0]: Decimal("8.5")
+    }
+
+
+def test_stock_as_of_reads_one_checkpoint_and_a_bounded_range(ledger):
+    session, ids = ledger
+    stmt = select(SqliteInventoryRepository(session)._ledger_quantity(datetime(2026, 8, 15))).where(
+        ProductOrm.id == ids[0]
+    )
+    sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+
+    plan = str(session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall())
+
+    assert "ix_inventory_movements_product_timestamp (product_id=? AND timestamp>? AND timestamp<?)" in plan
+    assert "SCAN inventory_movements" not in plan
+
+
+def test_a_backdated_movement_drops_the_checkpoints_after_it(ledger):
+    session, (cafe, azucar) = ledger
+    refresh_stock_checkpoints(session, "month", until="2026-10-01")
+
+    session.add(
+        InventoryMovementOrm(
+            product_id=cafe,
+            timestamp=datetime(2026, 7, 20, 10, 0),
+            movement_type="ADJUSTMENT",
+            quantity=Decimal("100"),
+        )
+    )
+    session.flush()
+
+    assert [day for pid, day, _, _ in _checkpoints(session) if pid == cafe] == ["2026-07-01"]
+    _assert_as_of_matches_replay(session, [cafe, azucar])
+
+    assert refresh_stock_checkpoints(session, "month", until="2026-10-01") == 3
+    _assert_as_of_matches_replay(session, [cafe, azucar])
+
+    session.execute(text("DELETE FROM inventory_movements WHERE quantity = 100"))
+    session.execute(text("UPDATE inventory_movements SET quantity = -2 WHERE quantity = -0.75"))
+    assert [pid for pid, *_ in _checkpoints(session)] == [cafe, azucar, azucar]
+    refresh_stock_checkpoints(session, "month", until="2026-10-01")
+    _assert_as_of_matches_replay(session, [cafe, azucar])
+
+
+def test_rebuild_recomputes_the_checkpoints_from_the_whole_ledger(ledger):
+    session, _ = ledger
+    refresh_stock_checkpoints(session, "month", until="2026-10-01")
+    checkpoints = _checkpoints(session)
+    session.execute(text(f"UPDATE {STOCK_CHECKPOINTS} SET quantity = quantity + 1"))
+
+    assert refresh_stock_checkpoints(session, "month", until="2026-10-01", rebuild=True) == len(checkpoints)
+    assert _checkpoints(session) == checkpoints
+
+
+def test_unknown_granularities_are_refused(clean_db):
+    session, _ = clean_db
+    with pytest.raises(ValueError, match="Unknown checkpoint granularity 'week'"):
+        refresh_stock_checkpoints(session, "week")
+    with pytest.raises(ValueError):
+        current_period_start("year")
+    assert str(current_period_start("month", datetime(2026, 10, 17, 9))) == "2026-10-01"
+
+
+def test_drift_lists_the_stock_the_ledger_does_not_account_for(ledger):
+    session, (cafe, azucar) = ledger
+    refresh_stock_checkpoints(session, "month", until="2026-09-01")
+    repo = SqliteInventoryRepository(session)
+
+    drift = {d.code: d for d in repo.find_stock_drift() if d.code.startswith("SC-")}
+
+    # Neither stock column followed the raw ledger inserts above
+    assert drift["SC-CAFE"].ledger_quantity == Decimal("11.5")
+    assert drift["SC-CAFE"].difference == Decimal("8.5")
+    assert drift["SC-AZUCAR"].difference == Decimal("-24")
+
+
+def test_reconcile_records_adjustments_that_clear_the_drift(clean_db, ledger):
+    session, user = clean_db
+    _, (cafe, azucar) = ledger
+    service = InventoryService()
+
+    drift = service.reconcile_stock(record_adjustments=True, user_id=user.id)
+
+    assert {d.product_id for d in drift} >= {cafe, azucar}
+    assert service.reconcile_stock() == []
+    # The adjustments are the newest movements, and the stock is untouched
+    [latest] = service.get_inventory_movements(product_id=cafe, limit=1)
+    assert latest.description == "Conciliación de existencias"
+    assert latest.quantity == Decimal("8.5")
+    assert service.get_stock_as_of([cafe], datetime.now()) == {cafe: Decimal("20")}
+
+
+def test_movement_getters_take_a_limit_newest_first(ledger):
+    session, (cafe, _) = ledger
+    repo = SqliteInventoryRepository(session)
+
+    newest = repo.get_movements_for_product(cafe, limit=2)
+    everything = repo.get_all_movements()
+
+    assert [m.quantity for m in newest] == [Decimal("-3"), Decimal("6")]
+    assert len(everything) >= len(LEDGER)
+    assert [m.timestamp for m in repo.get_all_movements(limit=3)] == [m.timestamp for m in everything[:3]]
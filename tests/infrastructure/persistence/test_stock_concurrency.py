@@ -0,0 +1,136 @@
+"""
+Tests for concurrent stock changes.
+
+Several threads, each with its own connection, sell and restock the same
+products on one file database, like tills sharing a store database. No
+change may be lost and no product may be oversold.
+"""
+
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from core.exceptions import ConcurrentUpdateError
+from core.models.product import Product
+from infrastructure.persistence.sqlite.database import Base
+from infrastructure.persistence.sqlite.engine_profile import EngineProfile, apply_engine_profile
+from infrastructure.persistence.sqlite.models_mapping import ensure_all_models_mapped
+from infrastructure.persistence.sqlite.repositories import SqliteProductRepository
+
+THREADS = 8
+CHANGES_PER_THREAD = 40
+
+
+@pytest.fixture
+def engine(tmp_path):
+    ensure_all_models_mapped()
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}")
+    apply_engine_profile(engine, EngineProfile(busy_timeout_ms=30000))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _add_products(engine, *stock):
+    with Session(engine) as session, session.begin():
+        repo = SqliteProductRepository(session)
+        return [
+            repo.add(
+                Product(code=f"TILL{n}", description=f"Till product {n}", quantity_in_stock=Decimal(quantity))
+            ).id
+            for n, quantity in enumerate(stock)
+        ]
+
+
+def _stock(engine, product_id):
+    with Session(engine) as session:
+        product = SqliteProductRepository(session).get_by_id(product_id)
+        return product.quantity_in_stock, product.version
+
+
+def _run_tills(engine, ticket):
+    """Runs ticket(repo, thread, n) CHANGES_PER_THREAD times on each thread; returns the refusals."""
+    start = threading.Barrier(THREADS)
+    refused, errors = [], []
+
+    def till(thread):
+        start.wait()
+        for n in range(CHANGES_PER_THREAD):
+            try:
+                with Session(engine) as session, session.begin():
+                    ticket(SqliteProductRepository(session), thread, n)
+            except ValueError as e:
+                refused.append(e)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    threads = [threading.Thread(target=till, args=(thread,)) for thread in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    return refused
+
+
+def test_concurrent_sales_and_restocks_lose_no_updates(engine):
+    [product_id] = _add_products(engine, "1000")
+
+    def ticket(repo, thread, n):
+        # Even threads sell 1.5 units, odd threads restock 1 unit
+        repo.update_stock(product_id, Decimal("-1.5") if thread % 2 == 0 else Decimal("1"))
+
+    assert _run_tills(engine, ticket) == []
+
+    changes = THREADS * CHANGES_PER_THREAD
+    expected = Decimal("1000") + (changes // 2) * (Decimal("1") - Decimal("1.5"))
+    assert _stock(engine, product_id) == (expected, 1 + changes)
+
+
+def test_concurrent_tickets_never_oversell(engine):
+    first, second = _add_products(engine, "100", "300")
+
+    def ticket(repo, thread, n):
+        # Whole tickets, listing their products in either order
+        changes = {first: Decimal("-1"), second: Decimal("-1")}
+        if thread % 2:
+            changes = dict(reversed(list(changes.items())))
+        levels = repo.change_stock(changes)
+        assert levels[first].quantity_in_stock >= 0
+
+    refused = _run_tills(engine, ticket)
+
+    # Only the first product runs out; its 100 units go to exactly 100 tickets
+    attempts = THREADS * CHANGES_PER_THREAD
+    assert len(refused) == attempts - 100
+    assert all("Insufficient stock for product TILL0" in str(e) for e in refused)
+    assert _stock(engine, first) == (Decimal("0"), 101)
+    assert _stock(engine, second) == (Decimal("200"), 101)
+
+
+def test_stock_changes_from_a_stale_snapshot_are_refused(engine):
+    [product_id] = _add_products(engine, "10")
+    with Session(engine) as session:
+        snapshot = SqliteProductRepository(session).get_by_id(product_id)
+
+    with Session(engine) as session, session.begin():
+        SqliteProductRepository(session).update_stock(product_id, Decimal("-2"))
+
+    with Session(engine) as session, session.begin():
+        repo = SqliteProductRepository(session)
+        with pytest.raises(ConcurrentUpdateError, match=r"TILL0 was changed by another user \(version 2, expected 1\)"):
+            repo.change_stock({product_id: Decimal("-1")}, expected_versions={product_id: snapshot.version})
+        with pytest.raises(ConcurrentUpdateError):
+            repo.update(snapshot.model_copy(update={"description": "Edited from a stale form"}))
+
+    with Session(engine) as session, session.begin():
+        repo = SqliteProductRepository(session)
+        levels = repo.change_stock({product_id: Decimal("-1")}, expected_versions={product_id: 2})
+        assert levels[product_id].quantity_in_stock == Decimal("7")
+        edited = repo.update(repo.get_by_id(product_id).model_copy(update={"description": "Edited"}))
+
+    assert edited.version == 4
+    assert _stock(engine, product_id) == (Decimal("7"), 4)
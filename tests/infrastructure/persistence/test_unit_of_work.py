@@ -4,10 +4,15 @@ import pytest
 from decimal import Decimal
 from datetime import datetime
 from unittest.mock import Mock, patch
+from sqlalchemy import create_engine, delete, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from infrastructure.persistence.unit_of_work import UnitOfWork, unit_of_work
 from infrastructure.persistence.utils import session_scope_provider
+from infrastructure.persistence.sqlite.database import Base
+from infrastructure.persistence.sqlite.models_mapping import DepartmentOrm
 from core.models.product import Product, Department
 from core.models.inventory import InventoryMovement
 from core.models.customer import Customer
@@ -245,6 +250,114 @@ class TestUnitOfWork:
             assert movements[0].movement_type == InventoryMovementType.INITIAL
             assert movements[0].quantity == Decimal('100')
 
+    def test_repositories_are_created_on_first_access(self, clean_db):
+        """Only the repositories a unit of work touches are constructed."""
+        session, domain_user = clean_db
+
+        with UnitOfWork() as uow:
+            assert "_products" not in uow.__dict__
+            products = uow.products
+            assert uow.products is products
+            assert "_products" in uow.__dict__
+            assert "_sales" not in uow.__dict__
+
+    def test_read_only_unit_of_work(self, clean_db):
+        """Read-only units of work can query but never commit, and leave a shared session alone."""
+        session, domain_user = clean_db
+        with UnitOfWork() as uow:
+            uow.departments.add(Department(name="Read Only Dept"))
+
+        session.autoflush = True
+        # Work the caller has pending on the shared session must survive the read
+        session.add(DepartmentOrm(name="Pending Dept"))
+        with patch.object(session, "commit") as commit, patch.object(session, "rollback") as rollback:
+            with unit_of_work(read_only=True) as uow:
+                assert uow.session is session
+                assert uow.departments.get_by_name("Read Only Dept") is not None
+                assert uow.session.autoflush is False
+                # The shared connection is never made read-only
+                assert session.execute(text("PRAGMA query_only")).scalar() == 0
+                with pytest.raises(ValueError, match="read-only"):
+                    uow.commit()
+            commit.assert_not_called()
+            rollback.assert_not_called()
+
+        assert uow.elapsed is not None and uow.elapsed >= 0
+        assert session.autoflush is True
+        assert session.query(DepartmentOrm).filter_by(name="Pending Dept").one() is not None
+        with UnitOfWork() as uow:
+            uow.departments.add(Department(name="After Read Only Dept"))
+            assert uow.departments.get_by_name("Read Only Dept") is not None
+
+
+def make_file_engine(tmp_path, **kwargs):
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}", **kwargs)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session_factory_only():
+    """Make units of work open their own sessions from a factory set by the test."""
+    original_test_session = session_scope_provider.get_test_session()
+    original_factory = session_scope_provider.get_session_factory()
+    session_scope_provider.set_test_session(None)
+    yield session_scope_provider.set_session_factory
+    session_scope_provider.set_session_factory(original_factory)
+    session_scope_provider.set_test_session(original_test_session)
+
+
+def test_read_only_unit_of_work_with_its_own_connection(tmp_path, session_factory_only):
+    """An own connection runs with query_only and goes back to the pool writable."""
+    engine = make_file_engine(tmp_path)
+    session_factory_only(sessionmaker(bind=engine))
+    try:
+        with unit_of_work(read_only=True) as uow:
+            assert uow.session.execute(text("PRAGMA query_only")).scalar() == 1
+            with pytest.raises(OperationalError, match="readonly"):
+                uow.session.execute(text("DELETE FROM departments"))
+        # A failed write leaves the session inactive; it is still released cleanly
+        with unit_of_work(read_only=True) as uow:
+            with pytest.raises(ValueError, match="read-only"):
+                uow.session.execute(delete(DepartmentOrm))
+            uow.session.add(DepartmentOrm(name="Refused Dept"))
+            with pytest.raises(ValueError, match="read-only"):
+                uow.session.flush()
+
+        with unit_of_work() as uow:
+            assert uow.session.execute(text("PRAGMA query_only")).scalar() == 0
+            uow.departments.add(Department(name="Writable Again"))
+        with unit_of_work(read_only=True) as uow:
+            assert uow.departments.get_by_name("Writable Again") is not None
+            assert uow.departments.get_by_name("Refused Dept") is None
+    finally:
+        engine.dispose()
+
+
+def test_read_only_unit_of_work_on_a_shared_connection(session_factory_only):
+    """With StaticPool every session shares one connection, so query_only is never set."""
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session_factory_only(Session)
+    writer = Session()
+    try:
+        with unit_of_work(read_only=True) as uow:
+            assert uow.departments.get_all() == []
+            assert uow.session.execute(text("PRAGMA query_only")).scalar() == 0
+            # e.g. the GUI saving while a worker thread reads
+            writer.add(DepartmentOrm(name="Written During Read"))
+            writer.commit()
+            with pytest.raises(ValueError, match="read-only"):
+                uow.session.execute(delete(DepartmentOrm))
+
+        assert writer.query(DepartmentOrm).count() == 1
+    finally:
+        writer.close()
+        engine.dispose()
+
 
 def test_unit_of_work_no_session_factory_error():
     """Test error when no session factory is set.
@@ -3,6 +3,7 @@ import pytest
 from PySide6.QtWidgets import QApplication
 from ui.main_window import MainWindow
 from core.models.user import User
+from core.interfaces.repository_interfaces import Page
 from tests.ui.qt_test_utils import process_events
 from typing import Dict
 
@@ -12,13 +13,18 @@ class MockProductService:
     def get_product_by_code(self, code): return None
     def find_product(self, search_term=None):
         return self.get_all_products()
+    def get_product_rows_page(self, after=None, limit=100): return Page([])
+    def search_product_rows(self, search_term, limit=None): return []
 
 class MockInventoryService:
     def get_low_stock_products(self): return []
+    def get_low_stock_rows(self): return []
+    def get_inventory_rows(self, department_id=None): return []
     def get_inventory_movements(self, product_id=None): return []
 
 class MockCustomerService:
     def get_all_customers(self): return []
+    def get_customers_page(self, after=None, limit=100): return Page([])
     def find_customer(self, term): return []
 
 class MockPurchaseService:
@@ -0,0 +1,48 @@
+import pytest
+
+from infrastructure.persistence.sqlite.query_profiler import QueryProfiler
+from ui.dialogs.query_profile_dialog import QueryProfileDialog
+
+
+@pytest.fixture
+def profiler():
+    profiler = QueryProfiler(slow_query_ms=float("inf"), n_plus_one_threshold=2)
+    with profiler.operation("ProductService.get_all_products"):
+        for _ in range(3):
+            profiler._after_cursor_execute(*_fake_execution("SELECT * FROM products WHERE id = ?"))
+    return profiler
+
+
+class _Cursor:
+    rowcount = -1
+
+
+class _Connection:
+    def __init__(self):
+        self.info = {"query_profiler_started": [0.0]}
+
+
+def _fake_execution(statement):
+    return _Connection(), _Cursor(), statement, (), None, False
+
+
+def test_dialog_shows_operations_and_n_plus_one(qtbot, profiler):
+    dialog = QueryProfileDialog(profiler)
+    qtbot.addWidget(dialog)
+
+    assert dialog.operations_table.rowCount() == 1
+    assert dialog.operations_table.item(0, 0).text() == "ProductService.get_all_products"
+    assert dialog.operations_table.item(0, 2).text() == "3"
+    assert dialog.n_plus_one_table.rowCount() == 1
+    assert dialog.n_plus_one_table.item(0, 1).text() == "3"
+    assert "3 consultas" in dialog.summary_label.text()
+
+
+def test_reset_clears_the_tables(qtbot, profiler):
+    dialog = QueryProfileDialog(profiler)
+    qtbot.addWidget(dialog)
+
+    dialog.reset_button.click()
+
+    assert dialog.operations_table.rowCount() == 0
+    assert dialog.n_plus_one_table.rowCount() == 0
@@ -0,0 +1,184 @@
+"""
+Tests for KeysetWindow and KeysetFetchMixin.
+Focus: Page eviction, refetching evicted pages by cursor, and canFetchMore/fetchMore.
+"""
+
+from PySide6.QtCore import Qt
+
+from core.interfaces.repository_interfaces import Page
+from core.models.customer import Customer
+from ui.models.keyset_window import KeysetWindow
+from ui.models.table_models import CustomerTableModel
+
+
+class RecordingSource:
+    """fetch_page(after, limit) over the integers 0..total-1, recording each call."""
+
+    def __init__(self, total):
+        self.rows = list(range(total))
+        self.calls = []
+
+    def __call__(self, after, limit):
+        self.calls.append(after)
+        remaining = [row for row in self.rows if after is None or row > after[0]]
+        items = remaining[:limit]
+        has_more = len(remaining) > limit
+        return Page(items, (items[-1],) if has_more else None)
+
+
+def load_all(window):
+    while window.can_fetch_more:
+        window.append(window.fetch_next())
+
+
+def test_window_appends_pages_until_the_source_is_exhausted():
+    source = RecordingSource(25)
+    window = KeysetWindow(source, page_size=10, max_pages=5)
+
+    load_all(window)
+
+    assert len(window) == 25
+    assert not window.can_fetch_more
+    assert source.calls == [None, (9,), (19,)]
+    assert [window.item_at(row) for row in (0, 10, 24)] == [0, 10, 24]
+
+
+def test_window_evicts_least_recently_used_pages():
+    source = RecordingSource(50)
+    window = KeysetWindow(source, page_size=10, max_pages=2)
+
+    load_all(window)
+
+    assert len(window) == 50
+    assert window.loaded_pages == 2
+
+
+def test_evicted_page_is_fetched_again_by_its_cursor():
+    source = RecordingSource(40)
+    window = KeysetWindow(source, page_size=10, max_pages=2)
+    load_all(window)
+    source.calls.clear()
+
+    assert window.item_at(15) == 15
+    assert source.calls == [(9,)]
+
+    # The page is kept again, so reading it once more does not refetch
+    assert window.item_at(12) == 12
+    assert source.calls == [(9,)]
+    assert window.loaded_pages == 2
+
+
+def test_recently_read_page_survives_eviction():
+    source = RecordingSource(30)
+    window = KeysetWindow(source, page_size=10, max_pages=2)
+    window.append(window.fetch_next())
+    window.append(window.fetch_next())
+
+    window.item_at(0)  # Page 0 becomes the most recently used one
+    window.append(window.fetch_next())  # Evicts page 1, not page 0
+    source.calls.clear()
+
+    assert window.item_at(5) == 5
+    assert source.calls == []
+    assert window.item_at(15) == 15
+    assert source.calls == [(9,)]
+
+
+def test_out_of_range_and_shrunk_pages_return_none():
+    source = RecordingSource(20)
+    window = KeysetWindow(source, page_size=10, max_pages=1)
+    load_all(window)
+
+    assert window.item_at(-1) is None
+    assert window.item_at(20) is None
+
+    # Rows deleted since the page was read leave the refetched page short
+    assert window.item_at(0) == 0  # Evicts the last page
+    del source.rows[15:]
+    assert window.item_at(17) is None
+    assert window.item_at(14) == 14
+
+
+def test_empty_source_cannot_fetch_more():
+    window = KeysetWindow(RecordingSource(0), page_size=10)
+
+    window.append(window.fetch_next())
+
+    assert len(window) == 0
+    assert not window.can_fetch_more
+    assert window.item_at(0) is None
+
+
+def customer_source(names):
+    customers = [Customer(id=i, name=name) for i, name in enumerate(names, start=1)]
+
+    def fetch_page(after, limit):
+        remaining = [c for c in customers if after is None or (c.name, c.id) > tuple(after)]
+        page = remaining[:limit]
+        has_more = len(remaining) > limit
+        return Page(page, (page[-1].name, page[-1].id) if has_more else None)
+
+    return fetch_page
+
+
+def test_model_without_page_source_cannot_fetch_more(qtbot):
+    model = CustomerTableModel()
+
+    assert not model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 0
+
+
+def test_model_fetches_more_rows_as_pages(qtbot):
+    model = CustomerTableModel()
+    model.set_page_source(customer_source([f"Cliente {i:02d}" for i in range(5)]), page_size=2)
+
+    assert model.rowCount() == 2
+    assert model.canFetchMore()
+
+    with qtbot.waitSignal(model.rowsInserted) as blocker:
+        model.fetchMore()
+    assert blocker.args[1:] == [2, 3]
+    assert model.rowCount() == 4
+    assert model.data(model.index(3, 0), Qt.DisplayRole) == "Cliente 03"
+
+    model.fetchMore()
+    assert model.rowCount() == 5
+    assert not model.canFetchMore()
+
+    model.fetchMore()  # Nothing left to fetch
+    assert model.rowCount() == 5
+
+
+def test_model_stops_on_an_empty_trailing_page(qtbot):
+    names = ["Ana", "Beto"]
+    fetch_page = customer_source(names)
+
+    def always_more(after, limit):
+        page = fetch_page(after, limit)
+        # A source that claims more rows right up to an empty page
+        cursor = page.next_cursor or ((page.items[-1].name, page.items[-1].id) if page.items else None)
+        return Page(page.items, cursor)
+
+    model = CustomerTableModel()
+    model.set_page_source(always_more, page_size=2)
+    assert model.canFetchMore()
+
+    model.fetchMore()
+
+    assert model.rowCount() == 2
+    assert not model.canFetchMore()
+
+
+def test_set_page_source_resets_the_model(qtbot):
+    model = CustomerTableModel()
+    model.set_page_source(customer_source(["Ana", "Beto", "Carla"]), page_size=2)
+    model.fetchMore()
+    assert model.rowCount() == 3
+
+    with qtbot.waitSignal(model.modelReset):
+        model.set_page_source(customer_source(["Zoe"]), page_size=2)
+
+    assert model.rowCount() == 1
+    assert model.data(model.index(0, 0), Qt.DisplayRole) == "Zoe"
+    assert not model.canFetchMore()
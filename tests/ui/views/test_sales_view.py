@@ -1,12 +1,14 @@
 import pytest
 from unittest.mock import MagicMock, call, ANY, patch
 from decimal import Decimal
+import logging
+import threading
 
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QComboBox
 
 # Models and Services to be mocked or used
-from core.models.product import Product
+from core.models.product import Product, ProductRow
 from core.models.user import User
 from core.models.sale import SaleItem
 from ui.views.sales_view import SalesView
@@ -50,7 +52,7 @@ def test_search_suggests_products(sales_view_fixture, qtbot):
     product1 = Product(id=1, code="P001", description="Test Product 1", sell_price=Decimal("10.00"), quantity_in_stock=Decimal("5.00"))
     product2 = Product(id=2, code="P002", description="Another Test Product", sell_price=Decimal("20.50"), quantity_in_stock=Decimal("3.00"))
     mock_products_list = [product1, product2]
-    mock_product_service.find_product.return_value = mock_products_list
+    mock_product_service.search_product_rows.return_value = mock_products_list
 
     product_combo = sales_view.product_combo
 
@@ -58,11 +60,11 @@ def test_search_suggests_products(sales_view_fixture, qtbot):
     product_combo.lineEdit().setText(search_term)
     product_combo.lineEdit().textEdited.emit(search_term)
 
-    # Wait until the suggestion model has been populated or find_product has been called
+    # Wait until the suggestion model has been populated or search_product_rows has been called
     # Giving a timeout for waitUntil is good practice.
-    qtbot.waitUntil(lambda: sales_view._suggestion_model.rowCount() == len(mock_products_list) or mock_product_service.find_product.called, timeout=1000)
+    qtbot.waitUntil(lambda: sales_view._suggestion_model.rowCount() == len(mock_products_list), timeout=1000)
 
-    mock_product_service.find_product.assert_called_once_with(search_term)
+    mock_product_service.search_product_rows.assert_called_once_with(search_term, limit=SalesView.SUGGESTION_LIMIT)
 
     # Assert that the suggestion model (used by QCompleter) is populated correctly
     assert sales_view._suggestion_model.rowCount() == len(mock_products_list)
@@ -99,17 +101,17 @@ def test_search_clears_suggestions_on_short_text(sales_view_fixture, qtbot):
     short_search_term = "T" # Length 1, less than min 2 chars
     product_combo.lineEdit().textEdited.emit(short_search_term)
 
-    mock_product_service.find_product.assert_not_called()
+    mock_product_service.search_product_rows.assert_not_called()
     assert suggestion_model.rowCount() == 0, "Suggestion model should be empty after short search term"
     assert not sales_view._display_map, "Display map should be empty after short search term"
     assert product_combo.lineEdit().text() == initial_lineEdit_text
 
 
 def test_search_no_results_populates_empty(sales_view_fixture, qtbot):
-    """Test that completer suggestions and display_map are empty if find_product returns no results.""" # Clarified docstring
+    """Test that completer suggestions and display_map are empty if search_product_rows returns no results.""" # Clarified docstring
     sales_view, mock_product_service, _, _, _ = sales_view_fixture  # Fixed unpacking
     
-    mock_product_service.find_product.return_value = [] # No products found
+    mock_product_service.search_product_rows.return_value = [] # No products found
     
     product_combo = sales_view.product_combo
     suggestion_model = sales_view._suggestion_model
@@ -118,10 +120,10 @@ def test_search_no_results_populates_empty(sales_view_fixture, qtbot):
     product_combo.lineEdit().setText(search_term)
     product_combo.lineEdit().textEdited.emit(search_term)
 
-    # Wait until find_product is called. Timeout for safety.
-    qtbot.waitUntil(lambda: mock_product_service.find_product.called, timeout=1000)
+    # Wait until the search has run and its results were delivered. Timeout for safety.
+    qtbot.waitUntil(lambda: mock_product_service.search_product_rows.called and not sales_view._search_in_flight, timeout=1000)
 
-    mock_product_service.find_product.assert_called_once_with(search_term)
+    mock_product_service.search_product_rows.assert_called_once_with(search_term, limit=SalesView.SUGGESTION_LIMIT)
     assert suggestion_model.rowCount() == 0, "Suggestion model should be empty when no products found"
     assert not sales_view._display_map, "Display map should be empty when no products found"
     assert product_combo.lineEdit().text() == search_term # Line edit text should persist
@@ -136,7 +138,7 @@ def test_search_suggests_products_with_multiple_results(sales_view_fixture, qtbo
     product2 = Product(id=2, code="P002", description="Another Test Product", sell_price=Decimal("20.50"), quantity_in_stock=Decimal("3"))
     product3 = Product(id=3, code="P003", description="Yet Another Test Product", sell_price=Decimal("15.00"), quantity_in_stock=Decimal("2"))
     mock_products_list = [product1, product2, product3]
-    mock_product_service.find_product.return_value = mock_products_list
+    mock_product_service.search_product_rows.return_value = mock_products_list
 
     product_combo = sales_view.product_combo
     suggestion_model = sales_view._suggestion_model
@@ -148,12 +150,12 @@ def test_search_suggests_products_with_multiple_results(sales_view_fixture, qtbo
     product_combo.lineEdit().setText(search_term) # Sets text
     product_combo.lineEdit().textEdited.emit(search_term) # Manually emit if setText doesn't trigger it for tests
 
-    # Wait for find_product to be called or model to be populated
-    qtbot.waitUntil(lambda: suggestion_model.rowCount() == len(mock_products_list) or mock_product_service.find_product.called, timeout=1000)
+    # Wait for search_product_rows to be called or model to be populated
+    qtbot.waitUntil(lambda: suggestion_model.rowCount() == len(mock_products_list), timeout=1000)
 
     # 3. Assertions
-    # Verify product_service.find_product was called
-    mock_product_service.find_product.assert_called_once_with(search_term)
+    # Verify product_service.search_product_rows was called
+    mock_product_service.search_product_rows.assert_called_once_with(search_term, limit=SalesView.SUGGESTION_LIMIT)
 
     # Verify the suggestion model is populated correctly
     assert suggestion_model.rowCount() == len(mock_products_list)
@@ -169,7 +171,7 @@ def test_search_suggests_products_with_no_results(sales_view_fixture, qtbot):
     sales_view, mock_product_service, _, _, _ = sales_view_fixture  # Fixed unpacking
 
     # 1. Setup: Define mock products to be returned by the service
-    mock_product_service.find_product.return_value = [] # No products found
+    mock_product_service.search_product_rows.return_value = [] # No products found
 
     product_combo = sales_view.product_combo
     assert isinstance(product_combo, QComboBox)
@@ -178,25 +180,26 @@ def test_search_suggests_products_with_no_results(sales_view_fixture, qtbot):
     search_term = "Unknown"
     product_combo.lineEdit().setText(search_term)
     product_combo.lineEdit().textEdited.emit(search_term)
+    qtbot.waitUntil(lambda: not sales_view._search_in_flight and mock_product_service.search_product_rows.called, timeout=1000)
 
     # 3. Assertions
-    # Verify product_service.find_product was called
-    mock_product_service.find_product.assert_called_once_with(search_term)
+    # Verify product_service.search_product_rows was called
+    mock_product_service.search_product_rows.assert_called_once_with(search_term, limit=SalesView.SUGGESTION_LIMIT)
 
     # Verify the QComboBox is empty
     assert product_combo.count() == 0
 
 
 def test_search_suggests_products_with_empty_text(sales_view_fixture, qtbot):
-    """Test that find_product is not called and suggestions are empty when search text is empty."""
+    """Test that search_product_rows is not called and suggestions are empty when search text is empty."""
     sales_view, mock_product_service, _, _, _ = sales_view_fixture  # Fixed unpacking
     
-    # 1. Setup: Define mock products (though they shouldn't be used if find_product isn't called)
+    # 1. Setup: Define mock products (though they shouldn't be used if search_product_rows isn't called)
     product1 = Product(id=1, code="P001", description="Test Product 1", sell_price=Decimal("10.00"), quantity_in_stock=Decimal("5"))
     product2 = Product(id=2, code="P002", description="Another Test Product", sell_price=Decimal("20.50"), quantity_in_stock=Decimal("3"))
-    # mock_product_service.find_product shouldn't be called, so its return_value is less critical here,
+    # mock_product_service.search_product_rows shouldn't be called, so its return_value is less critical here,
     # but setting it up doesn't hurt if a different logic path was taken by mistake.
-    mock_product_service.find_product.return_value = [product1, product2] 
+    mock_product_service.search_product_rows.return_value = [product1, product2] 
  
     product_combo = sales_view.product_combo
     suggestion_model = sales_view._suggestion_model
@@ -208,8 +211,8 @@ def test_search_suggests_products_with_empty_text(sales_view_fixture, qtbot):
     product_combo.lineEdit().textEdited.emit(search_term)
  
     # 3. Assertions for empty search term
-    # Verify product_service.find_product was NOT called
-    mock_product_service.find_product.assert_not_called()
+    # Verify product_service.search_product_rows was NOT called
+    mock_product_service.search_product_rows.assert_not_called()
  
     # Verify the suggestion model and display map are empty
     assert suggestion_model.rowCount() == 0, "Suggestion model should be empty for empty search term"
@@ -226,7 +229,7 @@ def test_search_suggests_products_with_case_insensitive_search(sales_view_fixtur
     product2 = Product(id=2, code="P002", description="Test Product Two", sell_price=Decimal("20.50"), quantity_in_stock=Decimal("3"))
     mock_products = [product1, product2] # Keep original name for clarity in this test's context
     # The service is assumed to handle case-insensitivity if required, or SalesView might lowercase. Test the outcome.
-    mock_product_service.find_product.return_value = mock_products
+    mock_product_service.search_product_rows.return_value = mock_products
  
     product_combo = sales_view.product_combo
     suggestion_model = sales_view._suggestion_model
@@ -238,12 +241,12 @@ def test_search_suggests_products_with_case_insensitive_search(sales_view_fixtur
     product_combo.lineEdit().setText(search_term_simulated_typing)
     product_combo.lineEdit().textEdited.emit(search_term_simulated_typing)
  
-    # Wait for find_product to be called or model to be populated
-    qtbot.waitUntil(lambda: suggestion_model.rowCount() == len(mock_products) or mock_product_service.find_product.called, timeout=1000)
+    # Wait for search_product_rows to be called or model to be populated
+    qtbot.waitUntil(lambda: suggestion_model.rowCount() == len(mock_products), timeout=1000)
  
     # 3. Assertions
-    # Verify product_service.find_product was called with the text as typed
-    mock_product_service.find_product.assert_called_once_with(search_term_simulated_typing)
+    # Verify product_service.search_product_rows was called with the text as typed
+    mock_product_service.search_product_rows.assert_called_once_with(search_term_simulated_typing, limit=SalesView.SUGGESTION_LIMIT)
  
     # Verify the suggestion model is populated correctly
     assert suggestion_model.rowCount() == len(mock_products)
@@ -277,4 +280,92 @@ def test_product_selected_from_combo_adds_to_sale(sales_view_fixture, qtbot):
     assert sale_item.product_id == product.id
     assert sale_item.product_code == product.code
     assert sale_item.product_description == product.description
-    assert sale_item.unit_price == product.sell_price
\ No newline at end of file
+    assert sale_item.unit_price == product.sell_price
+
+def test_suggested_row_is_added_without_loading_the_product(sales_view_fixture):
+    """A suggestion is a slim ProductRow that carries everything a sale item needs."""
+    sales_view, mock_product_service, _, sale_item_model, _ = sales_view_fixture
+    row = ProductRow(1, "P001", "Test Product", Decimal("10.00"), Decimal("6.00"), Decimal("5"), Decimal("1"), True, "Kg")
+
+    sales_view._selected_suggested_product = row
+    sales_view.add_item_from_entry()
+
+    mock_product_service.get_product_by_id.assert_not_called()
+    sale_item = sale_item_model.add_item.call_args[0][0]
+    assert sale_item.product_id == 1
+    assert sale_item.unit_price == Decimal("10.00")
+    assert sale_item.product_unit == "Kg"
+
+
+def test_search_runs_off_the_gui_thread(sales_view_fixture, qtbot):
+    """The product search runs on a worker thread and results come back via signals."""
+    sales_view, mock_product_service, _, _, _ = sales_view_fixture
+
+    product = Product(id=1, code="P001", description="Test Product 1", sell_price=Decimal("10.00"), quantity_in_stock=Decimal("5"))
+    search_threads = []
+
+    def search_product_rows(term, limit=None):
+        search_threads.append(threading.get_ident())
+        return [product]
+
+    mock_product_service.search_product_rows.side_effect = search_product_rows
+
+    sales_view.product_combo.lineEdit().textEdited.emit("Test")
+    qtbot.waitUntil(lambda: sales_view._suggestion_model.rowCount() == 1, timeout=1000)
+
+    assert search_threads and search_threads[0] != threading.get_ident()
+
+
+def test_search_is_debounced(sales_view_fixture, qtbot):
+    """Quick successive edits trigger a single search for the latest text."""
+    sales_view, mock_product_service, _, _, _ = sales_view_fixture
+    mock_product_service.search_product_rows.return_value = []
+    line_edit = sales_view.product_combo.lineEdit()
+
+    for text in ("Te", "Tes", "Test"):
+        line_edit.textEdited.emit(text)
+        qtbot.wait(40)  # Faster than the debounce interval, slower than a scanner
+
+    qtbot.waitUntil(lambda: mock_product_service.search_product_rows.called and not sales_view._search_in_flight, timeout=1000)
+    mock_product_service.search_product_rows.assert_called_once_with("Test", limit=SalesView.SUGGESTION_LIMIT)
+
+
+def test_stale_search_results_are_discarded(sales_view_fixture):
+    """Results of a superseded request never reach the suggestion model."""
+    sales_view, _, _, _, _ = sales_view_fixture
+    product = Product(id=1, code="P001", description="Old Result", sell_price=Decimal("10.00"), quantity_in_stock=Decimal("5"))
+
+    stale_request_id = sales_view._suggestion_request_id
+    sales_view._cancel_product_suggestions()  # e.g. the text was cleared meanwhile
+    sales_view._on_product_suggestions_ready(stale_request_id, [product])
+
+    assert sales_view._suggestion_model.rowCount() == 0
+    assert not sales_view._display_map
+
+
+def test_failed_search_is_logged(sales_view_fixture, qtbot):
+    """A failing search is logged and leaves the view ready for the next one."""
+    sales_view, mock_product_service, _, _, _ = sales_view_fixture
+    error = RuntimeError("database is locked")
+    mock_product_service.search_product_rows.side_effect = error
+
+    # Patched, since logging.config.fileConfig in other tests may disable the module logger
+    with patch("ui.views.sales_view.logger") as mock_logger:
+        sales_view.product_combo.lineEdit().textEdited.emit("Test")
+        qtbot.waitUntil(lambda: mock_product_service.search_product_rows.called and not sales_view._search_in_flight, timeout=1000)
+
+    mock_logger.warning.assert_called_once_with("Product suggestion search failed: %s", str(error))
+    assert sales_view._suggestion_model.rowCount() == 0
+
+
+def test_scanner_input_skips_suggestions(sales_view_fixture, qtbot):
+    """Codes typed at barcode-scanner speed do not trigger suggestion searches."""
+    sales_view, mock_product_service, _, _, _ = sales_view_fixture
+    line_edit = sales_view.product_combo.lineEdit()
+
+    barcode = "7790001234567"
+    for length in range(1, len(barcode) + 1):
+        line_edit.textEdited.emit(barcode[:length])
+
+    qtbot.wait(SalesView.SUGGESTION_DEBOUNCE_MS * 2)
+    mock_product_service.search_product_rows.assert_not_called()
@@ -17,6 +17,7 @@ from PySide6.QtGui import QIcon
 from datetime import datetime
 
 from core.services.data_import_export_service import DataImportExportService
+from infrastructure.persistence.sqlite.backup import backup_file_name
 
 
 class ImportExportWorker(QThread):
@@ -36,22 +37,36 @@ class ImportExportWorker(QThread):
         try:
             if self.operation_type == "export_excel":
                 self.progress_updated.emit("Exportando productos a Excel...")
-                result = self.service.export_products_to_excel(self.file_path)
+                result = self.service.export_products_to_excel(
+                    self.file_path, progress_callback=self._report_rows
+                )
             elif self.operation_type == "export_csv":
                 self.progress_updated.emit("Exportando productos a CSV...")
-                result = self.service.export_products_to_csv(self.file_path)
+                result = self.service.export_products_to_csv(
+                    self.file_path, progress_callback=self._report_rows
+                )
             elif self.operation_type == "import_excel":
                 self.progress_updated.emit("Importando productos desde Excel...")
-                result = self.service.import_products_from_excel(self.file_path)
+                result = self.service.import_products_from_excel(
+                    self.file_path, progress_callback=self._report_rows
+                )
             elif self.operation_type == "import_csv":
                 self.progress_updated.emit("Importando productos desde CSV...")
-                result = self.service.import_products_from_csv(self.file_path)
+                result = self.service.import_products_from_csv(
+                    self.file_path, progress_callback=self._report_rows
+                )
             elif self.operation_type == "create_backup":
                 self.progress_updated.emit("Creando respaldo...")
-                result = self.service.create_backup(self.file_path)
+                result = self.service.create_database_backup(
+                    self.file_path, progress_callback=self._report_pages
+                )
             elif self.operation_type == "restore_backup":
                 self.progress_updated.emit("Restaurando desde respaldo...")
-                result = self.service.restore_from_backup(self.file_path)
+                if self.file_path.lower().endswith(".json"):
+                    # Respaldos JSON creados por versiones anteriores
+                    result = self.service.restore_from_backup(self.file_path)
+                else:
+                    result = self.service.restore_database_backup(self.file_path)
             else:
                 result = {"success": False, "error": "Operación no válida"}
 
@@ -66,6 +81,18 @@ class ImportExportWorker(QThread):
                 }
             )
 
+    def _report_rows(self, processed, total):
+        """Informa el avance de la importación o exportación por lotes."""
+        if total:
+            self.progress_updated.emit(f"Procesadas {processed} de {total} filas...")
+        else:
+            self.progress_updated.emit(f"Procesadas {processed} filas...")
+
+    def _report_pages(self, copied, total):
+        """Informa el avance de la copia de la base de datos."""
+        percent = copied * 100 // total if total else 100
+        self.progress_updated.emit(f"Copiando base de datos... {percent}%")
+
 
 class ImportExportDialog(QDialog):
     """Diálogo para importar y exportar datos del inventario."""
@@ -231,10 +258,11 @@ class ImportExportDialog(QDialog):
 
         # Información sobre respaldos
         backup_info = QLabel(
-            "<b>Respaldo:</b> Crea un archivo JSON con todos los datos del sistema "
-            "(productos, departamentos, clientes).<br><br>"
-            "<b>Restaurar:</b> Restaura los datos desde un archivo de respaldo. "
-            "Los datos existentes serán actualizados o creados según corresponda.<br><br>"
+            "<b>Respaldo:</b> Crea una copia comprimida y verificada de toda la base "
+            "de datos (productos, ventas, clientes, facturas y caja). Puede hacerse "
+            "mientras se sigue vendiendo.<br><br>"
+            "<b>Restaurar:</b> Reemplaza todos los datos por los del respaldo. "
+            "También acepta respaldos JSON de versiones anteriores.<br><br>"
             "<b>Recomendación:</b> Cree respaldos regulares para proteger sus datos."
         )
         backup_info.setWordWrap(True)
@@ -322,8 +350,8 @@ class ImportExportDialog(QDialog):
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Crear Respaldo",
-            f"respaldo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            "Archivos JSON (*.json)",
+            backup_file_name(compress=True),
+            "Respaldos de base de datos (*.db.gz *.db)",
         )
 
         if file_path:
@@ -332,7 +360,11 @@ class ImportExportDialog(QDialog):
     def _restore_backup(self):
         """Restaura desde un respaldo."""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Restaurar Respaldo", "", "Archivos JSON (*.json)"
+            self,
+            "Restaurar Respaldo",
+            "",
+            "Respaldos (*.db.gz *.db *.json);;Respaldos de base de datos (*.db.gz *.db);;"
+            "Respaldos JSON (*.json)",
         )
 
         if file_path:
@@ -340,7 +372,7 @@ class ImportExportDialog(QDialog):
                 self,
                 "Confirmar Restauración",
                 "¿Está seguro que desea restaurar desde este respaldo?\n\n"
-                "Los datos existentes serán actualizados o creados según corresponda.\n"
+                "Los datos actuales serán reemplazados por los del respaldo.\n"
                 "Esta operación no se puede deshacer.",
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                 QMessageBox.StandardButton.No,
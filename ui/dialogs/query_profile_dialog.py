@@ -0,0 +1,142 @@
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QTabWidget,
+    QPlainTextEdit,
+    QFileDialog,
+    QMessageBox,
+    QHeaderView,
+)
+from PySide6.QtCore import Qt, Slot
+
+from infrastructure.persistence.sqlite.query_profiler import QueryProfiler
+
+
+class QueryProfileDialog(QDialog):
+    """Debug view of the SQL run by each operation, as collected by a QueryProfiler."""
+
+    OPERATION_COLUMNS = [
+        ("Operación", "name"),
+        ("Llamadas", "calls"),
+        ("Consultas", "statements"),
+        ("Consultas/llamada", "statements_per_call"),
+        ("Máx. consultas", "max_statements"),
+        ("Filas", "rows"),
+        ("Tiempo (ms)", "elapsed_ms"),
+        ("Lentas", "slow_queries"),
+        ("N+1", "n_plus_one"),
+    ]
+
+    def __init__(self, profiler: QueryProfiler, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.setWindowTitle("Perfil de Consultas SQL")
+        self.setMinimumSize(900, 500)
+
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.tabs = QTabWidget()
+        self.operations_table = QTableWidget(0, len(self.OPERATION_COLUMNS))
+        self.operations_table.setHorizontalHeaderLabels(
+            [title for title, _ in self.OPERATION_COLUMNS]
+        )
+        self.operations_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.operations_table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.Stretch
+        )
+        self.tabs.addTab(self.operations_table, "Operaciones")
+
+        self.n_plus_one_table = QTableWidget(0, 3)
+        self.n_plus_one_table.setHorizontalHeaderLabels(
+            ["Operación", "Ejecuciones", "Consulta"]
+        )
+        self.n_plus_one_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.n_plus_one_table.horizontalHeader().setSectionResizeMode(
+            2, QHeaderView.Stretch
+        )
+        self.tabs.addTab(self.n_plus_one_table, "Posibles N+1")
+
+        self.slow_queries_text = QPlainTextEdit()
+        self.slow_queries_text.setReadOnly(True)
+        self.tabs.addTab(self.slow_queries_text, "Consultas lentas")
+        layout.addWidget(self.tabs)
+
+        buttons_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Actualizar")
+        self.reset_button = QPushButton("Reiniciar")
+        self.export_button = QPushButton("Exportar JSON...")
+        self.close_button = QPushButton("Cerrar")
+        self.refresh_button.clicked.connect(self.refresh)
+        self.reset_button.clicked.connect(self._reset)
+        self.export_button.clicked.connect(self._export)
+        self.close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(self.refresh_button)
+        buttons_layout.addWidget(self.reset_button)
+        buttons_layout.addWidget(self.export_button)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.close_button)
+        layout.addLayout(buttons_layout)
+
+        self.refresh()
+
+    @Slot()
+    def refresh(self):
+        """Reloads the tables from the profiler's current totals."""
+        snapshot = self.profiler.snapshot()
+        totals = snapshot["totals"]
+        self.summary_label.setText(
+            f"Desde {snapshot['started_at']}: {totals['statements']} consultas, "
+            f"{totals['rows']} filas escritas, {totals['elapsed_ms']:.1f} ms "
+            f"(lenta: ≥ {snapshot['slow_query_ms']:g} ms, "
+            f"N+1: ≥ {snapshot['n_plus_one_threshold']} repeticiones)"
+        )
+
+        operations = snapshot["operations"]
+        self.operations_table.setRowCount(len(operations))
+        for row, operation in enumerate(operations):
+            for column, (_, key) in enumerate(self.OPERATION_COLUMNS):
+                value = operation[key]
+                item = QTableWidgetItem(f"{value:.2f}" if isinstance(value, float) else str(value))
+                if column > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.operations_table.setItem(row, column, item)
+
+        findings = snapshot["n_plus_one"]
+        self.n_plus_one_table.setRowCount(len(findings))
+        for row, finding in enumerate(findings):
+            self.n_plus_one_table.setItem(row, 0, QTableWidgetItem(finding["operation"]))
+            self.n_plus_one_table.setItem(row, 1, QTableWidgetItem(str(finding["executions"])))
+            self.n_plus_one_table.setItem(row, 2, QTableWidgetItem(finding["statement"]))
+
+        lines = []
+        for query in snapshot["slow_queries"]:
+            lines.append(f"[{query['operation']}] {query['elapsed_ms']:.1f} ms")
+            lines.append(query["statement"])
+            lines.extend(f"    {step}" for step in query["plan"])
+            lines.append("")
+        self.slow_queries_text.setPlainText("\n".join(lines))
+
+    @Slot()
+    def _reset(self):
+        self.profiler.reset()
+        self.refresh()
+
+    @Slot()
+    def _export(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar perfil", "query_profile.json", "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            self.profiler.dump_json(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudo exportar el perfil:\n{e}")
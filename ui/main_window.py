@@ -250,7 +250,27 @@ class MainWindow(QMainWindow):
             self.status_bar.addPermanentWidget(self.user_label)
 
     def _create_menu_bar(self):
-        self.menuBar()
+        menu_bar = self.menuBar()
+
+        # Diagnostics are only offered while SQL profiling is on (config.sql_profiling)
+        from infrastructure.persistence.sqlite.query_profiler import active_query_profiler
+
+        if active_query_profiler() is not None:
+            debug_menu = menu_bar.addMenu("Diagnóstico")
+            profile_action = QAction("Perfil de Consultas SQL", self)
+            profile_action.setShortcut(QKeySequence("Ctrl+Shift+Q"))
+            profile_action.triggered.connect(self.show_query_profile)
+            debug_menu.addAction(profile_action)
+
+    @Slot()
+    def show_query_profile(self):
+        """Opens the per-operation SQL totals of the active query profiler."""
+        from infrastructure.persistence.sqlite.query_profiler import active_query_profiler
+        from ui.dialogs.query_profile_dialog import QueryProfileDialog
+
+        profiler = active_query_profiler()
+        if profiler is not None:
+            QueryProfileDialog(profiler, self).exec()
 
     @Slot(int)
     def switch_view(self, index: int):
@@ -303,6 +323,7 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    from core.interfaces.repository_interfaces import Page
 
     class MockProductService:
         def get_all_products(self, department_id=None):
@@ -314,10 +335,22 @@ if __name__ == "__main__":
         def find_product(self, search_term=None):
             return self.get_all_products()
 
+        def get_product_rows_page(self, after=None, limit=100):
+            return Page([])
+
+        def search_product_rows(self, search_term, limit=None):
+            return []
+
     class MockInventoryService:
         def get_low_stock_products(self):
             return []
 
+        def get_low_stock_rows(self):
+            return []
+
+        def get_inventory_rows(self, department_id=None):
+            return []
+
         def get_inventory_movements(self, product_id=None):
             return []
 
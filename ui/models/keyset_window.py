@@ -0,0 +1,111 @@
+"""
+Lazily fetched rows for table models over keyset-paginated listings.
+
+A KeysetWindow pulls pages from a ``fetch_page(after, limit)`` callable
+(such as ProductService.get_products_page) as the view scrolls, and keeps
+only the most recently used pages in memory. The cursor each page starts
+after is kept, so an evicted page is fetched again by keyset, never by
+OFFSET, when the view scrolls back to it.
+
+KeysetFetchMixin adds canFetchMore/fetchMore to a QAbstractTableModel that
+reads its rows through ``_row_count()`` and ``_item_at()``.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from PySide6.QtCore import QModelIndex
+
+from core.interfaces.repository_interfaces import Page
+
+FetchPage = Callable[[Optional[Tuple], int], Page]
+
+
+class KeysetWindow:
+    """Rows of a keyset-paginated listing, holding at most ``max_pages`` pages."""
+
+    def __init__(self, fetch_page: FetchPage, page_size: int = 200, max_pages: int = 5):
+        self._fetch_page = fetch_page
+        self.page_size = page_size
+        self.max_pages = max_pages
+        # Cursor each known page starts after; None for the first page
+        self._starts: List[Optional[Tuple]] = []
+        self._pages: "OrderedDict[int, List[Any]]" = OrderedDict()
+        self._row_count = 0
+        self._next_cursor: Optional[Tuple] = None
+        self._exhausted = False
+
+    def __len__(self) -> int:
+        return self._row_count
+
+    @property
+    def can_fetch_more(self) -> bool:
+        return not self._exhausted
+
+    @property
+    def loaded_pages(self) -> int:
+        return len(self._pages)
+
+    def fetch_next(self) -> Page:
+        """Fetches the page after the last known row, without adding it yet."""
+        page = self._fetch_page(self._next_cursor, self.page_size)
+        return Page(list(page.items), page.next_cursor)
+
+    def append(self, page: Page) -> None:
+        """Adds a page returned by fetch_next() after the last known row."""
+        if page.items:
+            self._starts.append(self._next_cursor)
+            self._keep(len(self._starts) - 1, list(page.items))
+            self._row_count += len(page.items)
+        self._next_cursor = page.next_cursor
+        self._exhausted = page.next_cursor is None or not page.items
+
+    def item_at(self, row: int) -> Optional[Any]:
+        """Returns the row's item, fetching its page again if it was evicted."""
+        if not 0 <= row < self._row_count:
+            return None
+        number, offset = divmod(row, self.page_size)
+        items = self._pages.get(number)
+        if items is None:
+            items = list(self._fetch_page(self._starts[number], self.page_size).items)
+            self._keep(number, items)
+        else:
+            self._pages.move_to_end(number)
+        # Rows deleted since the page was first read leave the tail empty
+        return items[offset] if offset < len(items) else None
+
+    def _keep(self, number: int, items: List[Any]) -> None:
+        self._pages[number] = items
+        self._pages.move_to_end(number)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+
+class KeysetFetchMixin:
+    """canFetchMore/fetchMore for table models that can list from a KeysetWindow."""
+
+    _window: Optional[KeysetWindow] = None
+
+    def set_page_source(self, fetch_page: FetchPage, page_size: int = 200) -> None:
+        """Lists rows lazily from ``fetch_page(after, limit)``, starting with its first page."""
+        self.beginResetModel()
+        self._window = KeysetWindow(fetch_page, page_size)
+        self._window.append(self._window.fetch_next())
+        self.endResetModel()
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.isValid() or self._window is None:
+            return False
+        return self._window.can_fetch_more
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        page = self._window.fetch_next()
+        first = len(self._window)
+        if page.items:
+            self.beginInsertRows(QModelIndex(), first, first + len(page.items) - 1)
+            self._window.append(page)
+            self.endInsertRows()
+        else:
+            self._window.append(page)
@@ -1,6 +1,6 @@
 from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
 from PySide6.QtGui import QColor, QBrush
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Union
 from decimal import Decimal
 import locale
 
@@ -13,7 +13,7 @@ except locale.Error:
     except locale.Error:
         locale.setlocale(locale.LC_ALL, "")  # Use default locale
 
-from core.models.product import Product
+from core.models.product import Product, ProductRow
 from core.models.sale import SaleItem
 from core.models.customer import Customer
 from core.models.invoice import Invoice
@@ -21,10 +21,16 @@ from core.models.invoice import Invoice
 # from core.models.supplier import Supplier # Removed
 # from core.models.purchase import PurchaseOrder, PurchaseOrderItem # Removed
 from core.models.cash_drawer import CashDrawerEntry, CashDrawerEntryType
+from ui.models.keyset_window import KeysetFetchMixin
 
 
-class ProductTableModel(QAbstractTableModel):
-    """Model for displaying products in a QTableView."""
+class ProductTableModel(KeysetFetchMixin, QAbstractTableModel):
+    """Model for displaying products in a QTableView.
+
+    Shows either a fixed list (update_data) or the whole catalog fetched
+    page by page as the view scrolls (set_page_source). Rows may be full
+    Products or ProductRow projections; list screens use the latter.
+    """
 
     HEADERS = [
         "Código",
@@ -42,8 +48,20 @@ class ProductTableModel(QAbstractTableModel):
 
     def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
         """Returns the number of rows (products)."""
+        return self._row_count()
+
+    def _row_count(self) -> int:
+        if self._window is not None:
+            return len(self._window)
         return len(self._products)
 
+    def _item_at(self, row: int) -> Optional[Product]:
+        if self._window is not None:
+            return self._window.item_at(row)
+        if 0 <= row < len(self._products):
+            return self._products[row]
+        return None
+
     def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
         """Returns the number of columns."""
         return len(self.HEADERS)
@@ -53,7 +71,9 @@ class ProductTableModel(QAbstractTableModel):
         if not index.isValid():
             return None
 
-        product = self._products[index.row()]
+        product = self._item_at(index.row())
+        if product is None:
+            return None
         column = index.column()
 
         if role == Qt.ItemDataRole.DisplayRole:
@@ -76,6 +96,10 @@ class ProductTableModel(QAbstractTableModel):
             elif column == 4:
                 return f"{product.min_stock:.2f}" if product.uses_inventory else "N/A"
             elif column == 5:
+                # ProductRow projections carry the department name directly
+                department_name = getattr(product, "department_name", None)
+                if department_name:
+                    return department_name
                 # Check for department object first
                 if hasattr(product, "department") and product.department is not None:
                     return product.department.name
@@ -140,17 +164,16 @@ class ProductTableModel(QAbstractTableModel):
     def update_data(self, products: List[Product]):
         """Updates the model's data and refreshes the view."""
         self.beginResetModel()
+        self._window = None
         self._products = sorted(
             products, key=lambda p: p.description
         )  # Sort by description
         self.endResetModel()
 
     # Renamed from get_product for clarity
-    def get_product_at_row(self, row: int) -> Optional[Product]:
-        """Gets the product object at a specific model row."""
-        if 0 <= row < len(self._products):
-            return self._products[row]
-        return None
+    def get_product_at_row(self, row: int) -> Optional[Union[Product, ProductRow]]:
+        """Gets the product object (or ProductRow) at a specific model row."""
+        return self._item_at(row)
 
 
 class SaleItemTableModel(QAbstractTableModel):
@@ -311,8 +334,12 @@ class SaleItemTableModel(QAbstractTableModel):
 # --- Add Customer Table Model ---
 
 
-class CustomerTableModel(QAbstractTableModel):
-    """Model for displaying customers in a QTableView."""
+class CustomerTableModel(KeysetFetchMixin, QAbstractTableModel):
+    """Model for displaying customers in a QTableView.
+
+    Shows either a fixed list (update_data) or every customer fetched
+    page by page as the view scrolls (set_page_source).
+    """
 
     HEADERS = ["Nombre", "Teléfono", "Email", "Dirección", "Saldo", "Límite Crédito"]
 
@@ -322,8 +349,20 @@ class CustomerTableModel(QAbstractTableModel):
 
     def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
         """Returns the number of rows (customers)."""
+        return self._row_count()
+
+    def _row_count(self) -> int:
+        if self._window is not None:
+            return len(self._window)
         return len(self._customers)
 
+    def _item_at(self, row: int) -> Optional[Customer]:
+        if self._window is not None:
+            return self._window.item_at(row)
+        if 0 <= row < len(self._customers):
+            return self._customers[row]
+        return None
+
     def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
         """Returns the number of columns."""
         return len(self.HEADERS)
@@ -333,7 +372,9 @@ class CustomerTableModel(QAbstractTableModel):
         if not index.isValid():
             return None
 
-        customer = self._customers[index.row()]
+        customer = self._item_at(index.row())
+        if customer is None:
+            return None
         column = index.column()
 
         if role == Qt.ItemDataRole.DisplayRole:
@@ -395,14 +436,13 @@ class CustomerTableModel(QAbstractTableModel):
     def update_data(self, customers: List[Customer]):
         """Updates the model's data and refreshes the view."""
         self.beginResetModel()
+        self._window = None
         self._customers = sorted(customers, key=lambda c: c.name)  # Sort by name
         self.endResetModel()
 
     def get_customer_at_row(self, row: int) -> Optional[Customer]:
         """Gets the customer object at a specific model row."""
-        if 0 <= row < len(self._customers):
-            return self._customers[row]
-        return None
+        return self._item_at(row)
 
 
 # class SupplierTableModel(QAbstractTableModel):
@@ -139,9 +139,10 @@ class CustomersView(QWidget):
             search_term = self.search_edit.text().strip()
             if search_term:
                 customers = self._customer_service.find_customer(search_term)
+                self.table_model.update_data(customers)
             else:
-                customers = self._customer_service.get_all_customers()
-            self.table_model.update_data(customers)
+                # Every customer is fetched page by page as the table scrolls
+                self.table_model.set_page_source(self._customer_service.get_customers_page)
             # Resize columns after data load
             self.table_view.resizeColumnsToContents()
             # self.table_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
@@ -341,6 +342,7 @@ if __name__ == "__main__":
     from PySide6.QtWidgets import QApplication
     from core.models.customer import Customer  # Need Customer for mock
     from decimal import Decimal  # Added Decimal for mock
+    from core.interfaces.repository_interfaces import Page
 
     # Mock CustomerService for standalone testing
     class MockCustomerService:
@@ -378,6 +380,15 @@ if __name__ == "__main__":
             print("Mock: get_all")
             return self._customers
 
+        def get_customers_page(self, after=None, limit=100):
+            print(f"Mock: page after {after}")
+            customers = sorted(self._customers, key=lambda c: (c.name, c.id))
+            if after is not None:
+                customers = [c for c in customers if (c.name, c.id) > tuple(after)]
+            page = customers[:limit]
+            has_more = len(customers) > limit
+            return Page(page, (page[-1].name, page[-1].id) if has_more else None)
+
         def find_customer(self, term):
             print(f"Mock: find '{term}'")
             return [
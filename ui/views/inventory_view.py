@@ -258,19 +258,17 @@ class InventoryView(QWidget):
             department_id = self.department_filter.get_selected_value()
             search_text = self.search_input.text().strip()
 
-            # Use product service to get products with optional filtering
+            # List rows are slim projections of just the displayed columns
             if search_text:
                 # Search by code or description
-                products = self.product_service.search_products(search_text)
+                products = self.product_service.search_product_rows(search_text)
+                inventory_products = [p for p in products if p.uses_inventory]
             else:
-                # Get all products or by department
-                products = self.product_service.get_all_products(
+                # Get all inventory tracked products or those of a department
+                inventory_products = self.inventory_service.get_inventory_rows(
                     department_id=department_id
                 )
 
-            # Filter for products that use inventory
-            inventory_products = [p for p in products if p.uses_inventory]
-
             self.inventory_report_model.update_data(inventory_products)
             self._update_report_totals(inventory_products)
             print(
@@ -312,7 +310,7 @@ class InventoryView(QWidget):
             self.search_input.text().strip()
 
             # Get low stock products without department_id parameter
-            low_stock_products = self.inventory_service.get_low_stock_products()
+            low_stock_products = self.inventory_service.get_low_stock_rows()
 
             self.low_stock_model.update_data(low_stock_products)
             print(
@@ -438,6 +436,12 @@ if __name__ == "__main__":
         def get_low_stock_products(self):
             return []
 
+        def get_low_stock_rows(self):
+            return []
+
+        def get_inventory_rows(self, department_id=None):
+            return []
+
     class MockProductService:
         def get_all_products(self, department_id=None):
             # Returns empty list or can simulate products if needed
@@ -446,6 +450,9 @@ if __name__ == "__main__":
         def find_product(self, search_term=None):
             return self.get_all_products()
 
+        def search_product_rows(self, search_term, limit=None):
+            return []
+
     # Add dummy resource file for icons (replace with actual resource handling)
     # Create a dummy resources_rc.py if needed, or remove QIcon usage for test
     # try:
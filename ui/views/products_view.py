@@ -23,6 +23,7 @@ from PySide6.QtGui import QIcon  # Add QIcon import
 from ui.models.table_models import (
     ProductTableModel,
     Product,
+    ProductRow,
 )  # Assuming Product mock is there too
 from ui.dialogs.department_dialog import (
     DepartmentDialog,
@@ -36,6 +37,8 @@ from ui.dialogs.unit_management_dialog import (
     UnitManagementDialog,
 )  # Import the Unit Management dialog
 
+from core.interfaces.repository_interfaces import Page
+
 # Placeholder for the actual service
 # from core.services.product_service import ProductService
 
@@ -114,6 +117,18 @@ class MockProductService(MockProductService_Departments):  # Inherit department
             if term in p.code.lower() or term in p.description.lower()
         ]
 
+    def search_product_rows(self, search_term: str, limit=None) -> list[Product]:
+        # The table model shows mock Products the same way as ProductRows
+        return self.find_product(search_term)[:limit]
+
+    def get_product_rows_page(self, after=None, limit: int = 100) -> Page:
+        products = sorted(self.find_product(), key=lambda p: (p.description, p.id))
+        if after is not None:
+            products = [p for p in products if (p.description, p.id) > tuple(after)]
+        page = products[:limit]
+        has_more = len(products) > limit
+        return Page(page, (page[-1].description, page[-1].id) if has_more else None)
+
     def get_product_by_id(self, product_id: int) -> Product | None:
         dept_map = {d.id: d.name for d in self.get_all_departments()}
         for p in self._products:
@@ -350,8 +365,8 @@ class ProductsView(QWidget):
             self.modify_selected_product
         )  # Double-click to modify
 
-    def _get_selected_product(self) -> Product | None:
-        """Gets the Product object from the currently selected row."""
+    def _get_selected_product(self) -> Product | ProductRow | None:
+        """Gets the product (usually a ProductRow) from the currently selected row."""
         selected_indexes = self.table_view.selectedIndexes()
         if not selected_indexes:
             return None
@@ -373,13 +388,17 @@ class ProductsView(QWidget):
         print("[ProductsView] Refreshing products...")
         search_term = self.search_input.text()
         try:
-            # Now calls the combined mock service's find method
-            products = self.product_service.find_product(search_term)
-            self._model.update_data(products)
-            print(f"[ProductsView] Found {len(products)} products.")
+            if not search_term:
+                # The whole catalog is fetched page by page as the table scrolls
+                self._model.set_page_source(self.product_service.get_product_rows_page)
+            else:
+                self._model.update_data(
+                    self.product_service.search_product_rows(search_term)
+                )
+            print(f"[ProductsView] Showing {self._model.rowCount()} products.")
 
             # Ensure the first row is selected if there are products
-            if products and len(products) > 0:
+            if self._model.rowCount() > 0:
                 self.table_view.selectRow(0)
 
         except Exception as e:
@@ -409,6 +428,14 @@ class ProductsView(QWidget):
             print(
                 f"[ProductsView] 'Modify Product' clicked for: {selected_product.code}"
             )
+            if isinstance(selected_product, ProductRow):
+                # List rows are slim projections; editing needs the full product
+                selected_product = self.product_service.get_product_by_id(
+                    selected_product.id
+                )
+                if selected_product is None:
+                    self.refresh_products()
+                    return
             # Instantiate and exec ProductDialog in 'edit' mode
             product_dialog = ProductDialog(
                 self.product_service, product_to_edit=selected_product, parent=self
@@ -18,12 +18,25 @@ from PySide6.QtWidgets import (
     QCompleter,
 )
 from PySide6.QtGui import QIcon, QKeySequence, QPixmap
-from PySide6.QtCore import Qt, Slot, QTimer, QPoint, QStringListModel, QStandardPaths
+from PySide6.QtCore import (
+    Qt,
+    Slot,
+    Signal,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    QTimer,
+    QPoint,
+    QStringListModel,
+    QStandardPaths,
+)
 from decimal import Decimal
 from typing import List, Optional
+import logging
 import os
 import subprocess
 import sys
+import time
 
 # Import models and services
 from ui.models.table_models import SaleItemTableModel
@@ -48,6 +61,8 @@ from ui.utils import (
 
 # Import resources
 
+logger = logging.getLogger(__name__)
+
 
 # --- Payment Dialog (Optional, alternative to radio buttons) ---
 class PaymentDialog(QDialog):
@@ -99,10 +114,47 @@ class PaymentDialog(QDialog):
         super().accept()
 
 
+# --- Product suggestion worker --- #
+class ProductSuggestionSignals(QObject):
+    """Signals emitted by ProductSuggestionTask (QRunnable cannot define signals)."""
+
+    results_ready = Signal(int, list)  # Request id, products found
+    search_failed = Signal(int, str)  # Request id, error message
+
+
+class ProductSuggestionTask(QRunnable):
+    """Runs one product search off the GUI thread."""
+
+    def __init__(self, request_id: int, term: str, limit: int, product_service):
+        super().__init__()
+        self.request_id = request_id
+        self.term = term
+        self.limit = limit
+        self.product_service = product_service
+        self.signals = ProductSuggestionSignals()
+
+    def run(self):
+        try:
+            # Suggestions only show a few columns; slim rows keep typing responsive
+            products = self.product_service.search_product_rows(
+                self.term, limit=self.limit
+            )
+        except Exception as e:
+            self.signals.search_failed.emit(self.request_id, str(e))
+            return
+        self.signals.results_ready.emit(self.request_id, list(products or []))
+
+
 # --- Sales View --- #
 class SalesView(QWidget):
     """View for processing sales."""
 
+    SUGGESTION_MIN_CHARS = 2  # Shortest text that triggers a product search
+    SUGGESTION_DEBOUNCE_MS = 150  # Quiet time after the last keystroke before searching
+    SUGGESTION_LIMIT = 50  # Maximum number of suggestions shown
+    SCANNER_KEY_INTERVAL = 0.03  # Seconds between keystrokes typed by a barcode scanner
+    SCANNER_MIN_KEYSTROKES = 4  # Consecutive fast keystrokes that identify a scanner
+
     def __init__(
         self,
         product_service: ProductService,
@@ -205,6 +257,20 @@ class SalesView(QWidget):
         self._selected_suggested_product = None
         self._completer.activated[str].connect(self._on_completer_activated)
 
+        # Searches run one at a time on a worker thread. Typing restarts the
+        # debounce timer; results of superseded requests are discarded.
+        self._suggestion_pool = QThreadPool(self)
+        self._suggestion_pool.setMaxThreadCount(1)
+        self._suggestion_timer = QTimer(self)
+        self._suggestion_timer.setSingleShot(True)
+        self._suggestion_timer.setInterval(self.SUGGESTION_DEBOUNCE_MS)
+        self._suggestion_timer.timeout.connect(self._start_product_search)
+        self._suggestion_request_id = 0
+        self._pending_search_term: Optional[str] = None
+        self._search_in_flight = False
+        self._last_keystroke_at: Optional[float] = None
+        self._fast_keystrokes = 0
+
         self.add_button = QPushButton("Agregar")
         self.add_button.setIcon(
             QIcon(":/icons/icons/new.png")
@@ -483,21 +549,85 @@ class SalesView(QWidget):
     # --- Existing Slots / Methods (add_item, update_total, remove_item, cancel_current_sale) --- #
     @Slot(str)
     def _search_and_suggest_products(self, text: str):
-        """Searches products based on input and updates the completer for product suggestions."""
-        line_edit = self.product_combo.lineEdit()
-        combo_box = self.product_combo
+        """Schedules a product search for the typed text; suggestions arrive asynchronously."""
+        # Barcode scanners type the whole code in a burst and press Enter,
+        # so suggestions would only get in the way
+        if self._is_scanner_input(text):
+            self._cancel_product_suggestions()
+            return
 
         # If text is empty or too short, clear suggestions and hide popup
-        if not text or len(text) < 2:  # Require at least 2 characters
-            self._suggestion_model.setStringList([])
-            self._display_map = {}
-            self._selected_suggested_product = None
-            if self._completer.popup() and self._completer.popup().isVisible():
-                self._completer.popup().hide()
+        if not text or len(text) < self.SUGGESTION_MIN_CHARS:
+            self._cancel_product_suggestions()
+            return
+
+        self._pending_search_term = text
+        self._suggestion_timer.start()  # Restarts the debounce interval
+
+    def _is_scanner_input(self, text: str) -> bool:
+        """Returns True while characters arrive at barcode-scanner speed."""
+        now = time.monotonic()
+        if (
+            len(text) > 1
+            and self._last_keystroke_at is not None
+            and now - self._last_keystroke_at <= self.SCANNER_KEY_INTERVAL
+        ):
+            self._fast_keystrokes += 1
+        else:
+            self._fast_keystrokes = 1
+        self._last_keystroke_at = now
+        return self._fast_keystrokes >= self.SCANNER_MIN_KEYSTROKES
+
+    def _abort_product_search(self):
+        """Drops the pending search and makes the results of a running one stale."""
+        self._suggestion_timer.stop()
+        self._pending_search_term = None
+        self._suggestion_request_id += 1
+
+    def _cancel_product_suggestions(self):
+        """Drops pending and running searches and clears the current suggestions."""
+        self._abort_product_search()
+        self._suggestion_model.setStringList([])
+        self._display_map = {}
+        self._selected_suggested_product = None
+        if self._completer.popup() and self._completer.popup().isVisible():
+            self._completer.popup().hide()
+
+    @Slot()
+    def _start_product_search(self):
+        """Hands the latest search term to the worker thread."""
+        if self._pending_search_term is None or self._search_in_flight:
+            # A running search picks up the pending term when it finishes
             return
 
-        # Text is valid, attempt to find products
-        products = self.product_service.find_product(text)  # Service call
+        term = self._pending_search_term
+        self._pending_search_term = None
+        self._suggestion_request_id += 1
+
+        task = ProductSuggestionTask(
+            self._suggestion_request_id,
+            term,
+            self.SUGGESTION_LIMIT,
+            self.product_service,
+        )
+        task.signals.results_ready.connect(self._on_product_suggestions_ready)
+        task.signals.search_failed.connect(self._on_product_search_failed)
+        self._search_in_flight = True
+        # Queued searches are superseded by this one; drop them unstarted
+        self._suggestion_pool.clear()
+        self._suggestion_pool.start(task)
+
+    @Slot(int, list)
+    def _on_product_suggestions_ready(self, request_id: int, products: list):
+        """Shows the results of the latest search, ignoring superseded ones."""
+        self._search_in_flight = False
+        if self._pending_search_term is not None:
+            # The user kept typing; search for the newer text instead
+            if not self._suggestion_timer.isActive():
+                self._start_product_search()
+            return
+        if request_id != self._suggestion_request_id:
+            return
 
         if products:
             displays = [
@@ -506,13 +636,28 @@ class SalesView(QWidget):
             ]
             self._display_map = dict(zip(displays, products))
             self._suggestion_model.setStringList(displays)
-            line_edit.setFocus()  # Keep focus on the line edit
+            self.product_combo.lineEdit().setFocus()  # Keep focus on the line edit
         else:
             # No products found for the search term
             self._suggestion_model.setStringList([])
             self._display_map = {}
             self._selected_suggested_product = None
 
+        self._show_suggestion_popup()
+
+    @Slot(int, str)
+    def _on_product_search_failed(self, request_id: int, error: str):
+        """Logs a failed suggestion search; the cashier can still add by code."""
+        self._search_in_flight = False
+        logger.warning("Product suggestion search failed: %s", error)
+        if self._pending_search_term is not None and not self._suggestion_timer.isActive():
+            self._start_product_search()
+
+    def _show_suggestion_popup(self):
+        """Shows the completer popup below the entry, or hides it if there is nothing to show."""
+        line_edit = self.product_combo.lineEdit()
+        combo_box = self.product_combo
+
         # Popup positioning logic: only show and position if there are suggestions
         if self._suggestion_model.stringList():  # Check if model has strings
             self._completer.complete()  # Trigger completer (it uses the model)
@@ -569,6 +714,9 @@ class SalesView(QWidget):
         # If no row is selected, proceed with normal product addition logic
         product_to_add: Optional[Product] = None
 
+        # The entry is being submitted; late suggestions must not pop up
+        self._abort_product_search()
+
         # Prefer product selected from completer
         if self._selected_suggested_product:
             product_to_add = self._selected_suggested_product
@@ -652,7 +800,7 @@ class SalesView(QWidget):
             self.product_combo.setFocus()
             return
 
-        # At this point, product_to_add should be a valid Product object
+        # At this point, product_to_add is a Product or a suggested ProductRow
         try:
             quantity = Decimal("1")  # Default quantity
             if product_to_add.sell_price is None: